@@ -15,15 +15,16 @@ from django.utils import timezone
 from rest_framework import status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Avg, Q, Min, Max, F
-from django.db.models.functions import TruncDate, TruncMonth, ExtractHour, ExtractWeekDay
+from django.db.models import Count, Avg, Q, Min, Max
+from django.db.models.functions import ExtractHour, ExtractWeekDay
 from django.contrib.contenttypes.models import ContentType
 
 from users.models import User
 from providers.models import Provider, Employee
-from billing.models import Payment, Invoice
 from booking.models import Booking
 from ratings.models import Rating
+
+from .rollups import AnalyticsRollupReader, group_by_month
 # from users.permissions import IsSystemAdmin  # Заменено на стандартные permissions
 
 logger = logging.getLogger(__name__)
@@ -42,48 +43,30 @@ class UserGrowthAnalyticsAPIView(APIView):
             days = int(request.GET.get('days', 30))
             start_date = timezone.now() - timedelta(days=days)
             
-            # Общая статистика
-            total_users = User.objects.count()
-            new_users = User.objects.filter(date_joined__gte=start_date).count()
+            rollups = AnalyticsRollupReader(days)
+
+            # Общая статистика (из дневных агрегатов)
+            all_time = rollups.user_totals(all_time=True)
+            period = rollups.user_totals()
+            total_users = all_time['new_users']
+            new_users = period['new_users']
             active_users = User.objects.filter(last_login__gte=start_date).count()
-            
-            # Рост по дням
-            daily_growth = User.objects.filter(
-                date_joined__gte=start_date
-            ).annotate(
-                date=TruncDate('date_joined')
-            ).values('date').annotate(
-                count=Count('id')
-            ).order_by('date')
-            
-            # Рост по месяцам
-            monthly_growth = User.objects.filter(
-                date_joined__gte=start_date
-            ).annotate(
-                month=TruncMonth('date_joined')
-            ).values('month').annotate(
-                count=Count('id')
-            ).order_by('month')
-            
+
+            # Рост по дням и месяцам
+            daily_growth = rollups.daily_new_users()
+            monthly_growth = group_by_month(daily_growth, ('count',))
+
             # Статистика по ролям
-            role_stats = User.user_types.through.objects.values(
-                role=F('usertype__name')
-            ).annotate(
-                count=Count('user_id')
-            ).order_by('-count')
-            
+            role_stats = rollups.users_by_type()
+
             # Статистика по статусу
-            status_stats = User.objects.values('is_active').annotate(
-                count=Count('id')
-            )
-            
+            status_stats = [
+                {'is_active': True, 'count': all_time['activated_users']},
+                {'is_active': False, 'count': total_users - all_time['activated_users']},
+            ]
+
             # Конверсия (регистрация -> активность)
-            registered_users = User.objects.filter(date_joined__gte=start_date).count()
-            activated_users = User.objects.filter(
-                date_joined__gte=start_date,
-                is_active=True
-            ).count()
-            conversion_rate = (activated_users / registered_users * 100) if registered_users > 0 else 0
+            conversion_rate = (period['activated_users'] / new_users * 100) if new_users > 0 else 0
             
             return Response({
                 'period': {
@@ -97,10 +80,10 @@ class UserGrowthAnalyticsAPIView(APIView):
                     'active_users': active_users,
                     'conversion_rate': round(conversion_rate, 2)
                 },
-                'daily_growth': list(daily_growth),
-                'monthly_growth': list(monthly_growth),
-                'role_stats': list(role_stats),
-                'status_stats': list(status_stats)
+                'daily_growth': daily_growth,
+                'monthly_growth': monthly_growth,
+                'role_stats': role_stats,
+                'status_stats': status_stats
             })
             
         except Exception as e:
@@ -129,23 +112,10 @@ class ProviderPerformanceAnalyticsAPIView(APIView):
             active_providers = Provider.objects.filter(is_active=True).count()
             new_providers = Provider.objects.filter(created_at__gte=start_date).count()
             
-            # Топ учреждений по выручке
-            top_providers_revenue = Provider.objects.annotate(
-                total_revenue=Sum('invoices__amount')
-            ).filter(
-                invoices__created_at__gte=start_date
-            ).values(
-                'id', 'name', 'total_revenue'
-            ).order_by('-total_revenue')[:10]
-            
-            # Топ учреждений по количеству бронирований
-            top_providers_bookings = Provider.objects.annotate(
-                total_bookings=Count('bookings')
-            ).filter(
-                bookings__created_at__gte=start_date
-            ).values(
-                'id', 'name', 'total_bookings'
-            ).order_by('-total_bookings')[:10]
+            # Топ учреждений по выручке и бронированиям (из дневных агрегатов)
+            rollups = AnalyticsRollupReader(days)
+            top_providers_revenue = rollups.top_providers_by_invoiced_amount()
+            top_providers_bookings = rollups.top_providers_by_bookings()
             
             # Статистика по рейтингам
             provider_content_type = ContentType.objects.get_for_model(Provider)
@@ -188,8 +158,8 @@ class ProviderPerformanceAnalyticsAPIView(APIView):
                     'new_providers': new_providers,
                     'activation_rate': round((active_providers / total_providers * 100), 2) if total_providers > 0 else 0
                 },
-                'top_providers_revenue': list(top_providers_revenue),
-                'top_providers_bookings': list(top_providers_bookings),
+                'top_providers_revenue': top_providers_revenue,
+                'top_providers_bookings': top_providers_bookings,
                 'rating_stats': rating_stats,
                 'employee_stats': employee_stats,
                 'service_stats': service_stats
@@ -216,67 +186,25 @@ class RevenueTrendsAnalyticsAPIView(APIView):
             days = int(request.GET.get('days', 30))
             start_date = timezone.now() - timedelta(days=days)
             
-            # Общая выручка
-            total_revenue = Payment.objects.filter(
-                created_at__gte=start_date,
-                status='completed'
-            ).aggregate(
-                total=Sum('amount')
-            )['total'] or 0
-            
-            # Выручка по дням
-            daily_revenue = Payment.objects.filter(
-                created_at__gte=start_date,
-                status='completed'
-            ).annotate(
-                date=TruncDate('created_at')
-            ).values('date').annotate(
-                revenue=Sum('amount')
-            ).order_by('date')
-            
-            # Выручка по месяцам
-            monthly_revenue = Payment.objects.filter(
-                created_at__gte=start_date,
-                status='completed'
-            ).annotate(
-                month=TruncMonth('created_at')
-            ).values('month').annotate(
-                revenue=Sum('amount')
-            ).order_by('month')
-            
+            rollups = AnalyticsRollupReader(days)
+
+            # Выручка по дням и месяцам (завершенные платежи, из дневных агрегатов)
+            daily_revenue = rollups.daily_payments('completed')
+            monthly_revenue = group_by_month(daily_revenue, ('revenue', 'count'))
+            total_revenue = sum(row['revenue'] for row in daily_revenue)
+            completed_payments = sum(row['count'] for row in daily_revenue)
+
             # Статистика по статусам платежей
-            payment_status_stats = Payment.objects.filter(
-                created_at__gte=start_date
-            ).values('status').annotate(
-                count=Count('id'),
-                total_amount=Sum('amount')
-            ).order_by('-total_amount')
-            
-            # Статистика по типам услуг
-            service_revenue_stats = Payment.objects.filter(
-                created_at__gte=start_date,
-                status='completed'
-            ).values(
-                'booking__service__name'
-            ).annotate(
-                count=Count('id'),
-                total_amount=Sum('amount')
-            ).order_by('-total_amount')[:10]
-            
+            payment_status_stats = rollups.payments_by_status()
+
+            # Выручка по услугам (завершенные бронирования)
+            service_revenue_stats = rollups.completed_bookings_by_service()
+
             # Средний чек
-            avg_check = Payment.objects.filter(
-                created_at__gte=start_date,
-                status='completed'
-            ).aggregate(
-                avg_amount=Avg('amount')
-            )['avg_amount'] or 0
-            
+            avg_check = (total_revenue / completed_payments) if completed_payments > 0 else 0
+
             # Конверсия платежей
-            total_payments = Payment.objects.filter(created_at__gte=start_date).count()
-            completed_payments = Payment.objects.filter(
-                created_at__gte=start_date,
-                status='completed'
-            ).count()
+            total_payments = sum(row['count'] for row in payment_status_stats)
             payment_conversion_rate = (completed_payments / total_payments * 100) if total_payments > 0 else 0
             
             return Response({
@@ -290,10 +218,10 @@ class RevenueTrendsAnalyticsAPIView(APIView):
                     'avg_check': float(avg_check),
                     'payment_conversion_rate': round(payment_conversion_rate, 2)
                 },
-                'daily_revenue': list(daily_revenue),
-                'monthly_revenue': list(monthly_revenue),
-                'payment_status_stats': list(payment_status_stats),
-                'service_revenue_stats': list(service_revenue_stats)
+                'daily_revenue': daily_revenue,
+                'monthly_revenue': monthly_revenue,
+                'payment_status_stats': payment_status_stats,
+                'service_revenue_stats': service_revenue_stats
             })
             
         except Exception as e:
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'analytics'
+    verbose_name = _('Analytics')
+
+    def ready(self):
+        """Подключает пометку дней для пересчета агрегатов."""
+        import analytics.signals  # noqa
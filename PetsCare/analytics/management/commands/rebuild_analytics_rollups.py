@@ -0,0 +1,52 @@
+"""
+Management команда для пересчета дневных агрегатов аналитики.
+
+Использование:
+    python manage.py rebuild_analytics_rollups               # помеченные дни
+    python manage.py rebuild_analytics_rollups --days 730    # последние 730 дней
+    python manage.py rebuild_analytics_rollups --from 2024-01-01
+
+Первичное заполнение делает миграция 0002_mark_history_dirty (помечает все
+дни с данными, их пересчитывает задача refresh_analytics_rollups); команда
+ускоряет его без ожидания Celery beat и нужна после массовых изменений
+через QuerySet.update(), которые не отправляют сигналов.
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.rollups import AnalyticsRollupService, mark_days_dirty
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily analytics rollups (dirty days, last N days or since a date)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Mark the last N days dirty before refreshing')
+        parser.add_argument('--from', dest='from_date', help='Mark every day since YYYY-MM-DD dirty before refreshing')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start = None
+        if options['from_date']:
+            try:
+                start = date.fromisoformat(options['from_date'])
+            except ValueError:
+                raise CommandError('--from must be a date in YYYY-MM-DD format')
+        elif options['days']:
+            start = today - timedelta(days=options['days'] - 1)
+
+        if start is not None:
+            mark_days_dirty(start + timedelta(days=offset) for offset in range((today - start).days + 1))
+
+        service = AnalyticsRollupService()
+        total = 0
+        while True:
+            days = service.refresh_dirty_days()
+            if not days:
+                break
+            total += len(days)
+            self.stdout.write(f'Rebuilt {days[0]}..{days[-1]}')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {total} days'))
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.11 on 2026-10-16 18:00
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('catalog', '0010_service_emergency_capability_mode_and_more'),
+        ('providers', '0057_unicode_requisite_validators'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Date')),
+                ('marked_at', models.DateTimeField(auto_now=True, verbose_name='Marked At')),
+            ],
+            options={
+                'verbose_name': 'Analytics Dirty Day',
+                'verbose_name_plural': 'Analytics Dirty Days',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('user_type', models.CharField(max_length=50, verbose_name='User Type')),
+                ('new_users', models.PositiveIntegerField(default=0, verbose_name='New Users')),
+                ('activated_users', models.PositiveIntegerField(default=0, verbose_name='Activated Users')),
+            ],
+            options={
+                'verbose_name': 'User Daily Stats',
+                'verbose_name_plural': 'User Daily Stats',
+                'indexes': [models.Index(fields=['user_type', 'date'], name='analytics_user_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProviderDailyBookingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('bookings_count', models.PositiveIntegerField(default=0, verbose_name='Bookings Count')),
+                ('completed_count', models.PositiveIntegerField(default=0, verbose_name='Completed Bookings')),
+                ('cancelled_count', models.PositiveIntegerField(default=0, verbose_name='Cancelled Bookings')),
+                ('bookings_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Bookings Amount')),
+                ('completed_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Completed Amount')),
+                ('provider', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_booking_stats', to='providers.provider', verbose_name='Provider')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_booking_stats', to='catalog.service', verbose_name='Service')),
+            ],
+            options={
+                'verbose_name': 'Provider Daily Booking Stats',
+                'verbose_name_plural': 'Provider Daily Booking Stats',
+                'indexes': [models.Index(fields=['date', 'provider'], name='analytics_booking_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProviderDailyPaymentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('status', models.CharField(max_length=20, verbose_name='Status')),
+                ('payments_count', models.PositiveIntegerField(default=0, verbose_name='Payments Count')),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Amount')),
+                ('provider', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_payment_stats', to='providers.provider', verbose_name='Provider')),
+            ],
+            options={
+                'verbose_name': 'Provider Daily Payment Stats',
+                'verbose_name_plural': 'Provider Daily Payment Stats',
+                'indexes': [models.Index(fields=['date', 'status'], name='analytics_payment_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProviderDailyInvoiceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('invoices_count', models.PositiveIntegerField(default=0, verbose_name='Invoices Count')),
+                ('invoiced_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Invoiced Amount')),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_invoice_stats', to='providers.provider', verbose_name='Provider')),
+            ],
+            options={
+                'verbose_name': 'Provider Daily Invoice Stats',
+                'verbose_name_plural': 'Provider Daily Invoice Stats',
+                'indexes': [models.Index(fields=['date', 'provider'], name='analytics_invoice_day_idx')],
+            },
+        ),
+    ]
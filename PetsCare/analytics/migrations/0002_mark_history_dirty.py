@@ -0,0 +1,49 @@
+# Первичное заполнение дневных агрегатов: помечаем все дни с историческими
+# данными, задача refresh_analytics_rollups пересчитывает их пачками.
+
+from django.db import migrations
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+SOURCES = (
+    ('booking', 'Booking', 'created_at'),
+    ('billing', 'Payment', 'created_at'),
+    ('billing', 'Invoice', 'created_at'),
+    ('users', 'User', 'date_joined'),
+)
+
+
+def mark_history_dirty(apps, schema_editor):
+    AnalyticsDirtyDay = apps.get_model('analytics', 'AnalyticsDirtyDay')
+    tzinfo = timezone.get_current_timezone()
+
+    days = set()
+    for app_label, model_name, field in SOURCES:
+        model = apps.get_model(app_label, model_name)
+        days.update(
+            model.objects.exclude(**{f'{field}__isnull': True})
+            .annotate(rollup_day=TruncDate(field, tzinfo=tzinfo))
+            .values_list('rollup_day', flat=True)
+            .distinct()
+            .order_by()
+        )
+    AnalyticsDirtyDay.objects.bulk_create(
+        [AnalyticsDirtyDay(date=day) for day in sorted(days)],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('billing', '0032_providerbillingstate'),
+        ('booking', '0015_traveltimeentry'),
+        ('users', '0037_unicode_requisite_validators'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_history_dirty, reverse_code=migrations.RunPython.noop),
+    ]
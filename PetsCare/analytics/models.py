@@ -0,0 +1,127 @@
+"""
+Дневные агрегаты (rollups) для административной аналитики.
+
+Каждая таблица хранит факты за один календарный день (TIME_ZONE проекта)
+в разрезе учреждения. Строки дня пересчитываются целиком задачей
+refresh_analytics_rollups только для дней, отмеченных в AnalyticsDirtyDay
+при изменении исходных записей (analytics.signals).
+"""
+
+from decimal import Decimal
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class AnalyticsDirtyDay(models.Model):
+    """День, агрегаты которого нужно пересчитать."""
+
+    date = models.DateField(_('Date'), unique=True)
+    marked_at = models.DateTimeField(_('Marked At'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Analytics Dirty Day')
+        verbose_name_plural = _('Analytics Dirty Days')
+        ordering = ['date']
+
+    def __str__(self):
+        return str(self.date)
+
+
+class ProviderDailyBookingStats(models.Model):
+    """Бронирования учреждения по услуге за день (по дате создания)."""
+
+    date = models.DateField(_('Date'))
+    provider = models.ForeignKey(
+        'providers.Provider',
+        on_delete=models.CASCADE,
+        related_name='daily_booking_stats',
+        verbose_name=_('Provider'),
+        null=True,
+        blank=True,
+    )
+    service = models.ForeignKey(
+        'catalog.Service',
+        on_delete=models.CASCADE,
+        related_name='daily_booking_stats',
+        verbose_name=_('Service'),
+    )
+    bookings_count = models.PositiveIntegerField(_('Bookings Count'), default=0)
+    completed_count = models.PositiveIntegerField(_('Completed Bookings'), default=0)
+    cancelled_count = models.PositiveIntegerField(_('Cancelled Bookings'), default=0)
+    bookings_amount = models.DecimalField(_('Bookings Amount'), max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    completed_amount = models.DecimalField(_('Completed Amount'), max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        verbose_name = _('Provider Daily Booking Stats')
+        verbose_name_plural = _('Provider Daily Booking Stats')
+        indexes = [
+            models.Index(fields=['date', 'provider'], name='analytics_booking_day_idx'),
+        ]
+
+
+class ProviderDailyPaymentStats(models.Model):
+    """Платежи учреждения по статусу за день (по дате создания)."""
+
+    date = models.DateField(_('Date'))
+    provider = models.ForeignKey(
+        'providers.Provider',
+        on_delete=models.CASCADE,
+        related_name='daily_payment_stats',
+        verbose_name=_('Provider'),
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(_('Status'), max_length=20)
+    payments_count = models.PositiveIntegerField(_('Payments Count'), default=0)
+    amount = models.DecimalField(_('Amount'), max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        verbose_name = _('Provider Daily Payment Stats')
+        verbose_name_plural = _('Provider Daily Payment Stats')
+        indexes = [
+            models.Index(fields=['date', 'status'], name='analytics_payment_day_idx'),
+        ]
+
+
+class ProviderDailyInvoiceStats(models.Model):
+    """Выставленные счета учреждения за день (по дате создания)."""
+
+    date = models.DateField(_('Date'))
+    provider = models.ForeignKey(
+        'providers.Provider',
+        on_delete=models.CASCADE,
+        related_name='daily_invoice_stats',
+        verbose_name=_('Provider'),
+    )
+    invoices_count = models.PositiveIntegerField(_('Invoices Count'), default=0)
+    invoiced_amount = models.DecimalField(_('Invoiced Amount'), max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        verbose_name = _('Provider Daily Invoice Stats')
+        verbose_name_plural = _('Provider Daily Invoice Stats')
+        indexes = [
+            models.Index(fields=['date', 'provider'], name='analytics_invoice_day_idx'),
+        ]
+
+
+class UserDailyStats(models.Model):
+    """
+    Новые пользователи за день по типу пользователя.
+    Строка с user_type=ALL_USER_TYPES — все новые пользователи (без дублей
+    пользователей с несколькими ролями).
+    """
+
+    ALL_USER_TYPES = '__all__'
+
+    date = models.DateField(_('Date'))
+    user_type = models.CharField(_('User Type'), max_length=50)
+    new_users = models.PositiveIntegerField(_('New Users'), default=0)
+    activated_users = models.PositiveIntegerField(_('Activated Users'), default=0)
+
+    class Meta:
+        verbose_name = _('User Daily Stats')
+        verbose_name_plural = _('User Daily Stats')
+        indexes = [
+            models.Index(fields=['user_type', 'date'], name='analytics_user_day_idx'),
+        ]
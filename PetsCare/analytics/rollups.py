@@ -0,0 +1,272 @@
+"""
+Пересчет и чтение дневных агрегатов аналитики.
+
+Изменение бронирования, платежа, счета или пользователя помечает день
+его создания как «грязный» (после коммита, см. analytics.signals).
+Задача refresh_analytics_rollups забирает помеченные дни и пересчитывает
+строки каждого дня целиком несколькими GROUP BY по диапазону created_at;
+эндпоинты читают только агрегаты — O(дней) вместо полного прохода по истории.
+
+Массовые изменения через QuerySet.update() сигналов не отправляют:
+после них дни нужно пометить вручную (команда rebuild_analytics_rollups).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from billing.models import Invoice, Payment
+from booking.constants import BOOKING_STATUS_CANCELLED, BOOKING_STATUS_COMPLETED
+from booking.models import Booking
+
+from .models import (
+    AnalyticsDirtyDay,
+    ProviderDailyBookingStats,
+    ProviderDailyInvoiceStats,
+    ProviderDailyPaymentStats,
+    UserDailyStats,
+)
+
+ROLLUP_MODELS = (
+    ProviderDailyBookingStats,
+    ProviderDailyPaymentStats,
+    ProviderDailyInvoiceStats,
+    UserDailyStats,
+)
+REFRESH_BATCH_DAYS = 31
+
+
+def _money_sum(field: str, **kwargs):
+    return Coalesce(
+        Sum(field, **kwargs),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    """Границы календарного дня в часовом поясе проекта."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def mark_days_dirty(days: Iterable[date]) -> None:
+    """Помечает дни для пересчета (повторная пометка ничего не делает)."""
+    days = {day for day in days if day is not None}
+    if days:
+        AnalyticsDirtyDay.objects.bulk_create(
+            [AnalyticsDirtyDay(date=day) for day in days],
+            ignore_conflicts=True,
+        )
+
+
+class AnalyticsRollupService:
+    """Пересчет дневных агрегатов."""
+
+    def refresh_dirty_days(self, limit: int = REFRESH_BATCH_DAYS) -> list[date]:
+        """
+        Пересчитывает помеченные дни (не больше limit за вызов).
+        Пометки снимаются до пересчета: изменения, закоммиченные во время
+        пересчета, снова пометят день, поэтому ничего не теряется.
+        """
+        with transaction.atomic():
+            dirty = list(
+                AnalyticsDirtyDay.objects.select_for_update(skip_locked=True)
+                .order_by('date')
+                .values_list('pk', 'date')[:limit]
+            )
+            AnalyticsDirtyDay.objects.filter(pk__in=[pk for pk, _ in dirty]).delete()
+
+        days = [day for _, day in dirty]
+        for index, day in enumerate(days):
+            try:
+                self.rebuild_day(day)
+            except Exception:
+                mark_days_dirty(days[index:])
+                raise
+        return days
+
+    def rebuild_day(self, day: date) -> None:
+        """Заменяет все агрегаты дня пересчитанными из исходных таблиц."""
+        start, end = day_bounds(day)
+        with transaction.atomic():
+            for model in ROLLUP_MODELS:
+                model.objects.filter(date=day).delete()
+            ProviderDailyBookingStats.objects.bulk_create(self._booking_rows(day, start, end))
+            ProviderDailyPaymentStats.objects.bulk_create(self._payment_rows(day, start, end))
+            ProviderDailyInvoiceStats.objects.bulk_create(self._invoice_rows(day, start, end))
+            UserDailyStats.objects.bulk_create(self._user_rows(day, start, end))
+
+    @staticmethod
+    def _booking_rows(day, start, end) -> list[ProviderDailyBookingStats]:
+        completed = Q(status__name=BOOKING_STATUS_COMPLETED)
+        rows = (
+            Booking.objects.filter(created_at__gte=start, created_at__lt=end)
+            # provider — устаревшее поле, учреждение берется и из локации.
+            .annotate(rollup_provider=Coalesce('provider_id', 'provider_location__provider_id'))
+            .values('rollup_provider', 'service_id')
+            .annotate(
+                bookings_count=Count('id'),
+                completed_count=Count('id', filter=completed),
+                cancelled_count=Count('id', filter=Q(status__name=BOOKING_STATUS_CANCELLED)),
+                bookings_amount=_money_sum('price'),
+                completed_amount=_money_sum('price', filter=completed),
+            )
+            .order_by()
+        )
+        return [
+            ProviderDailyBookingStats(
+                date=day,
+                provider_id=row.pop('rollup_provider'),
+                **row,
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def _payment_rows(day, start, end) -> list[ProviderDailyPaymentStats]:
+        rows = (
+            Payment.objects.filter(created_at__gte=start, created_at__lt=end)
+            .values('provider_id', 'status')
+            .annotate(payments_count=Count('id'), amount=_money_sum('amount'))
+            .order_by()
+        )
+        return [ProviderDailyPaymentStats(date=day, **row) for row in rows]
+
+    @staticmethod
+    def _invoice_rows(day, start, end) -> list[ProviderDailyInvoiceStats]:
+        rows = (
+            Invoice.objects.filter(created_at__gte=start, created_at__lt=end)
+            .values('provider_id')
+            .annotate(invoices_count=Count('id'), invoiced_amount=_money_sum('amount'))
+            .order_by()
+        )
+        return [ProviderDailyInvoiceStats(date=day, **row) for row in rows]
+
+    @staticmethod
+    def _user_rows(day, start, end) -> list[UserDailyStats]:
+        users = get_user_model().objects.filter(date_joined__gte=start, date_joined__lt=end)
+        counts = {
+            'new_users': Count('id', distinct=True),
+            'activated_users': Count('id', filter=Q(is_active=True), distinct=True),
+        }
+        total = users.aggregate(**counts)
+        rows = [UserDailyStats(date=day, user_type=UserDailyStats.ALL_USER_TYPES, **total)] if total['new_users'] else []
+        by_type = (
+            users.filter(user_types__isnull=False)
+            .values('user_types__name')
+            .annotate(**counts)
+            .order_by()
+        )
+        rows.extend(
+            UserDailyStats(date=day, user_type=row.pop('user_types__name'), **row)
+            for row in by_type
+        )
+        return rows
+
+
+class AnalyticsRollupReader:
+    """Чтение агрегатов за последние days дней (включая сегодняшний)."""
+
+    def __init__(self, days: int):
+        self.days = days
+        self.end_date = timezone.localdate()
+        self.start_date = self.end_date - timedelta(days=max(days, 1) - 1)
+
+    def _window(self, model):
+        return model.objects.filter(date__gte=self.start_date, date__lte=self.end_date)
+
+    def user_totals(self, all_time: bool = False) -> dict:
+        queryset = UserDailyStats.objects if all_time else self._window(UserDailyStats)
+        return queryset.filter(user_type=UserDailyStats.ALL_USER_TYPES).aggregate(
+            new_users=Coalesce(Sum('new_users'), 0),
+            activated_users=Coalesce(Sum('activated_users'), 0),
+        )
+
+    def daily_new_users(self) -> list[dict]:
+        return list(
+            self._window(UserDailyStats)
+            .filter(user_type=UserDailyStats.ALL_USER_TYPES)
+            .values('date')
+            .annotate(count=Sum('new_users'))
+            .order_by('date')
+        )
+
+    def users_by_type(self) -> list[dict]:
+        """Распределение всех пользователей по ролям (за всю историю агрегатов)."""
+        return list(
+            UserDailyStats.objects.exclude(user_type=UserDailyStats.ALL_USER_TYPES)
+            .values(role=F('user_type'))
+            .annotate(count=Sum('new_users'))
+            .order_by('-count')
+        )
+
+    def top_providers_by_invoiced_amount(self, limit: int = 10) -> list[dict]:
+        rows = (
+            self._window(ProviderDailyInvoiceStats)
+            .values('provider_id', 'provider__name')
+            .annotate(total_revenue=Sum('invoiced_amount'))
+            .order_by('-total_revenue')[:limit]
+        )
+        return [
+            {'id': row['provider_id'], 'name': row['provider__name'], 'total_revenue': row['total_revenue']}
+            for row in rows
+        ]
+
+    def top_providers_by_bookings(self, limit: int = 10) -> list[dict]:
+        rows = (
+            self._window(ProviderDailyBookingStats)
+            .filter(provider__isnull=False)
+            .values('provider_id', 'provider__name')
+            .annotate(total_bookings=Sum('bookings_count'))
+            .order_by('-total_bookings')[:limit]
+        )
+        return [
+            {'id': row['provider_id'], 'name': row['provider__name'], 'total_bookings': row['total_bookings']}
+            for row in rows
+        ]
+
+    def payments_by_status(self) -> list[dict]:
+        return list(
+            self._window(ProviderDailyPaymentStats)
+            .values('status')
+            .annotate(count=Sum('payments_count'), total_amount=Sum('amount'))
+            .order_by('-total_amount')
+        )
+
+    def daily_payments(self, status: str) -> list[dict]:
+        return list(
+            self._window(ProviderDailyPaymentStats)
+            .filter(status=status)
+            .values('date')
+            .annotate(revenue=Sum('amount'), count=Sum('payments_count'))
+            .order_by('date')
+        )
+
+    def completed_bookings_by_service(self, limit: int = 10) -> list[dict]:
+        return list(
+            self._window(ProviderDailyBookingStats)
+            .filter(completed_count__gt=0)
+            .values('service__name')
+            .annotate(count=Sum('completed_count'), total_amount=Sum('completed_amount'))
+            .order_by('-total_amount')[:limit]
+        )
+
+
+def group_by_month(rows: list[dict], value_fields: tuple[str, ...]) -> list[dict]:
+    """Сворачивает дневные строки ({'date': ..., поле: число}) в месячные."""
+    months: dict = {}
+    for row in rows:
+        month = row['date'].replace(day=1)
+        bucket = months.setdefault(month, {'month': month, **{name: 0 for name in value_fields}})
+        for name in value_fields:
+            bucket[name] += row[name] or 0
+    return list(months.values())
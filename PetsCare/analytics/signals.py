@@ -0,0 +1,60 @@
+"""
+Пометка дней для пересчета агрегатов аналитики.
+
+День берется по дате создания записи (как и в агрегатах) и помечается
+после коммита транзакции, чтобы пересчет видел уже сохраненные данные.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from billing.models import Invoice, Payment
+from booking.models import Booking
+
+from .rollups import mark_days_dirty
+
+User = get_user_model()
+
+
+def _mark_dirty_on_commit(moment) -> None:
+    if moment is None:
+        return
+    day = timezone.localdate(moment)
+    transaction.on_commit(lambda: mark_days_dirty([day]))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def mark_created_day_dirty(sender, instance, **kwargs):
+    """Бронирование, платеж или счет изменились — пересчитать день их создания."""
+    _mark_dirty_on_commit(instance.created_at)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def mark_user_joined_day_dirty(sender, instance, update_fields=None, **kwargs):
+    """Новые пользователи и активация учитываются в дне регистрации."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        # Вход пользователя агрегаты не меняет.
+        return
+    _mark_dirty_on_commit(instance.date_joined)
+
+
+@receiver(m2m_changed, sender=User.user_types.through)
+def mark_user_types_day_dirty(sender, instance, action, reverse, **kwargs):
+    """Смена ролей меняет разбивку новых пользователей по типам."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _mark_dirty_on_commit(instance.date_joined)
+    elif kwargs.get('pk_set'):
+        joined = User.objects.filter(pk__in=kwargs['pk_set']).values_list('date_joined', flat=True)
+        for moment in set(joined):
+            _mark_dirty_on_commit(moment)
@@ -0,0 +1,20 @@
+"""
+Задачи Celery для агрегатов аналитики.
+"""
+
+import logging
+
+from celery import shared_task
+
+from .rollups import AnalyticsRollupService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_analytics_rollups():
+    """Пересчитывает дневные агрегаты для помеченных дней."""
+    days = AnalyticsRollupService().refresh_dirty_days()
+    if days:
+        logger.info(f"Analytics rollups refreshed for {len(days)} days: {days[0]}..{days[-1]}")
+    return len(days)
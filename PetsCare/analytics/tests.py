@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from billing.models import Payment
+
+from .models import AnalyticsDirtyDay, ProviderDailyPaymentStats, UserDailyStats
+from .rollups import AnalyticsRollupReader, AnalyticsRollupService
+
+User = get_user_model()
+
+
+class AnalyticsRollupTestCase(TestCase):
+    def test_changes_mark_day_dirty_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(email='rollup@example.com', password='password')
+
+        self.assertTrue(AnalyticsDirtyDay.objects.filter(date=timezone.localdate()).exists())
+
+    def test_refresh_recomputes_only_dirty_days(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(email='first@example.com', password='password')
+            Payment.objects.create(amount=Decimal('100.00'), status='completed', payment_method='card')
+            Payment.objects.create(amount=Decimal('40.00'), status='completed', payment_method='card')
+            Payment.objects.create(amount=Decimal('10.00'), status='failed', payment_method='card')
+
+        self.assertEqual(AnalyticsRollupService().refresh_dirty_days(), [timezone.localdate()])
+        self.assertFalse(AnalyticsDirtyDay.objects.exists())
+        self.assertEqual(AnalyticsRollupService().refresh_dirty_days(), [])
+
+        stats = ProviderDailyPaymentStats.objects.get(status='completed')
+        self.assertEqual((stats.payments_count, stats.amount), (2, Decimal('140.00')))
+        self.assertEqual(
+            UserDailyStats.objects.get(user_type=UserDailyStats.ALL_USER_TYPES).new_users,
+            1,
+        )
+
+        reader = AnalyticsRollupReader(days=30)
+        daily = reader.daily_payments('completed')
+        self.assertEqual(daily, [{'date': timezone.localdate(), 'revenue': Decimal('140.00'), 'count': 2}])
+        self.assertEqual(reader.user_totals()['new_users'], 1)
@@ -2,6 +2,8 @@
 Конфигурация ASGI для проекта PetsCare.
 
 Этот модуль содержит ASGI приложение для запуска проекта на ASGI-совместимых серверах.
+SSE-поток событий (EVENT_STREAM_PATH) обслуживается напрямую, без Django-обработчика,
+остальные запросы передаются Django.
 """
 
 import os
@@ -9,4 +11,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PetsCare.settings')
 
-application = get_asgi_application() 
\ No newline at end of file
+django_application = get_asgi_application()
+
+from notifications.realtime import EVENT_STREAM_PATH, EventStreamApp  # noqa: E402
+
+event_stream_application = EventStreamApp()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].rstrip('/') == EVENT_STREAM_PATH.rstrip('/'):
+        await event_stream_application(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
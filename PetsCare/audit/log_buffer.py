@@ -0,0 +1,202 @@
+"""
+Буферизация записей UserAction.
+
+LoggingService после коммита транзакции (transaction.on_commit) кладет
+подготовленную запись в буфер.
+
+Буферы:
+- RedisAuditBuffer (AUDIT_LOG_BUFFER_URL задан) — список в Redis, общий для
+  воркеров gunicorn и Celery: запрос не пишет в audit_useraction, записи
+  сбрасываются пачками bulk_create Celery-задачей flush_audit_log_buffer;
+- LocalAuditBuffer — список в памяти процесса. Beat-задача другого процесса
+  его не видит, а память теряется при перезапуске воркера, поэтому записи
+  пишутся в БД сразу после коммита (вне atomic-блока), а остаток
+  (например, после ошибки БД) — при следующей записи и при выходе процесса (atexit).
+
+Время действия (timestamp) фиксируется при постановке в буфер, а не при сбросе.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DataError, IntegrityError, connection, transaction
+
+from .models import UserAction
+
+logger = logging.getLogger(__name__)
+
+REDIS_PENDING_KEY = 'audit:user_actions'
+FLUSH_BATCH_SIZE = 1000
+
+
+class LocalAuditBuffer:
+    """Буфер в памяти процесса: сбрасывается сразу после коммита."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: list[dict] = []
+
+    def push(self, record: dict) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def restore(self, records: list[dict]) -> None:
+        with self._lock:
+            self._records[:0] = records
+
+    def drain(self) -> list[dict]:
+        with self._lock:
+            records = self._records[:FLUSH_BATCH_SIZE]
+            del self._records[:FLUSH_BATCH_SIZE]
+        return records
+
+    def flush_due(self) -> bool:
+        return bool(self._records)
+
+
+class RedisAuditBuffer:
+    """Буфер в Redis, общий для воркеров gunicorn и Celery."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def push(self, record: dict) -> None:
+        self.client.rpush(REDIS_PENDING_KEY, json.dumps(record, cls=DjangoJSONEncoder))
+
+    def restore(self, records: list[dict]) -> None:
+        if records:
+            self.client.lpush(
+                REDIS_PENDING_KEY,
+                *(json.dumps(record, cls=DjangoJSONEncoder) for record in reversed(records)),
+            )
+
+    def drain(self) -> list[dict]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrange(REDIS_PENDING_KEY, 0, FLUSH_BATCH_SIZE - 1)
+        pipe.ltrim(REDIS_PENDING_KEY, FLUSH_BATCH_SIZE, -1)
+        values = pipe.execute()[0]
+        return [json.loads(value) for value in values]
+
+    def flush_due(self) -> bool:
+        # Сбрасывает Celery beat, запрос никогда не пишет в БД.
+        return False
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_audit_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                url = getattr(settings, 'AUDIT_LOG_BUFFER_URL', '')
+                if url:
+                    _buffer = RedisAuditBuffer(url)
+                else:
+                    _buffer = LocalAuditBuffer()
+                    atexit.register(_flush_at_exit)
+    return _buffer
+
+
+def set_audit_buffer(buffer) -> None:
+    """Подмена буфера (тесты)."""
+    global _buffer
+    _buffer = buffer
+
+
+def _flush_at_exit() -> None:
+    """Записи локального буфера не должны теряться при остановке воркера."""
+    if isinstance(_buffer, LocalAuditBuffer):
+        try:
+            flush_audit_buffer(_buffer)
+        except Exception as e:
+            logger.error(f"Audit log flush at exit failed: {e}")
+
+
+def record_user_action(record: dict) -> None:
+    """
+    Ставит запись UserAction (значения полей) в буфер; локальный буфер
+    сразу сбрасывается в БД. Внутри atomic-блока буфер не сбрасывается:
+    пачка не должна попасть в чужую транзакцию и откатиться вместе с ней.
+    """
+    buffer = get_audit_buffer()
+    buffer.push(record)
+    if not connection.in_atomic_block and buffer.flush_due():
+        try:
+            flush_audit_buffer(buffer)
+        except Exception as e:
+            logger.error(f"Audit log flush failed: {e}")
+
+
+def flush_audit_buffer(buffer=None) -> int:
+    """
+    Сбрасывает накопленные записи в UserAction.
+    Возвращает количество сохраненных записей. При ошибке БД записи
+    возвращаются в буфер.
+    """
+    buffer = buffer or get_audit_buffer()
+    total = 0
+    while True:
+        records = buffer.drain()
+        if not records:
+            return total
+        try:
+            total += _write_records(records)
+        except Exception:
+            buffer.restore(records)
+            raise
+        if len(records) < FLUSH_BATCH_SIZE:
+            return total
+
+
+def _write_records(records: list[dict]) -> int:
+    # Пользователь мог быть удален, пока запись лежала в буфере (on_delete=SET_NULL).
+    user_ids = {record['user_id'] for record in records if record.get('user_id')}
+    existing = set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+
+    actions = []
+    for record in records:
+        record = dict(record)
+        if record.get('user_id') not in existing:
+            record['user_id'] = None
+        if isinstance(record['timestamp'], str):
+            record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+        actions.append(UserAction(**record))
+
+    try:
+        with transaction.atomic():
+            UserAction.objects.bulk_create(actions, batch_size=500)
+        return len(actions)
+    except (DataError, IntegrityError) as e:
+        logger.warning(f"Audit log batch insert failed, writing rows one by one: {e}")
+
+    # Одна некорректная запись не должна терять всю пачку;
+    # недоступность БД (OperationalError) пробрасывается и пачка возвращается в буфер.
+    saved = 0
+    for action in actions:
+        try:
+            with transaction.atomic():
+                action.save(force_insert=True)
+            saved += 1
+        except (DataError, IntegrityError) as e:
+            logger.error(f"Dropped audit log record {action.action_type} {action.url}: {e}")
+    return saved
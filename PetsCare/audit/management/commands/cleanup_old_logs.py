@@ -5,6 +5,7 @@ from django.utils.translation import gettext as _
 from datetime import timedelta
 
 from audit.models import UserAction, SecurityAudit, AuditSettings
+from audit.partitions import drop_expired_partitions
 
 
 class Command(BaseCommand):
@@ -80,7 +81,17 @@ class Command(BaseCommand):
                 self.stdout.write(_('Operation cancelled'))
                 return
         
-        # Выполняем очистку в транзакции
+        # Сначала целиком удаляем устаревшие партиции (без построчного DELETE)
+        dropped = (
+            drop_expired_partitions(UserAction, log_retention_date)
+            + drop_expired_partitions(SecurityAudit, audit_retention_date)
+        )
+        if dropped:
+            self.stdout.write(
+                self.style.SUCCESS(_('Dropped partitions: {}').format(', '.join(dropped)))
+            )
+
+        # Остаток в пограничных партициях удаляем в транзакции
         with transaction.atomic():
             # Удаляем старые логи
             if old_logs_count > 0:
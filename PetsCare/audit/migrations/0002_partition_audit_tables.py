@@ -0,0 +1,107 @@
+"""
+Перевод audit_useraction и audit_securityaudit в секционированные по
+RANGE ("timestamp") таблицы PostgreSQL с помесячными партициями.
+
+Состояние моделей Django не меняется. Первичный ключ секционированной
+таблицы обязан включать ключ секционирования, поэтому в БД он (id, "timestamp");
+id по-прежнему выдается последовательностью и уникален.
+Имена индексов и внешних ключей сохраняются.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+
+TABLES = ('audit_useraction', 'audit_securityaudit')
+MONTHS_AHEAD = 3
+
+
+def _month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def _rebuild_table(schema_editor, table, partitioned):
+    qn = schema_editor.quote_name
+    old_table = f'{table}_old'
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes '
+            'WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s',
+            [table, f'{table}_pkey'],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min("timestamp"), max(id) FROM {qn(table)}')
+        first_timestamp, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}')
+        partition_clause = ' PARTITION BY RANGE ("timestamp")' if partitioned else ''
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            f'{partition_clause}'
+        )
+        # id старой таблицы — identity/serial; последовательность пересоздается ниже.
+        cursor.execute(f'ALTER TABLE {qn(table)} ALTER COLUMN id DROP DEFAULT')
+
+        if partitioned:
+            cursor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+            now_month = _month_start(datetime.now(dt_timezone.utc))
+            month = min(_month_start(first_timestamp), now_month) if first_timestamp else now_month
+            while month <= _add_months(now_month, MONTHS_AHEAD):
+                next_month = _add_months(month, 1)
+                cursor.execute(
+                    f'CREATE TABLE {qn(f"{table}_p{month:%Y%m}")} PARTITION OF {qn(table)} '
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+                )
+                month = next_month
+
+        cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}')
+        cursor.execute(f'DROP TABLE {qn(old_table)}')
+
+        sequence = f'{table}_id_seq'
+        cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id')
+        cursor.execute('SELECT setval(%s, %s, false)', [sequence, (max_id or 0) + 1])
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+        primary_key = '(id, "timestamp")' if partitioned else '(id)'
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + "_pkey")} PRIMARY KEY {primary_key}')
+        for _name, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+
+
+def partition_audit_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        _rebuild_table(schema_editor, table, partitioned=True)
+
+
+def unpartition_audit_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        _rebuild_table(schema_editor, table, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_audit_tables, unpartition_audit_tables),
+    ]
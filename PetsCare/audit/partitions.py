@@ -0,0 +1,157 @@
+"""
+Помесячные партиции таблиц аудита (PostgreSQL).
+
+audit_useraction и audit_securityaudit секционированы по RANGE ("timestamp")
+(миграция 0002_partition_audit_tables): партиция на календарный месяц UTC
+с именем <таблица>_pYYYYMM и партиция <таблица>_default для строк вне
+созданных месяцев.
+
+- ensure_partitions создает партиции текущего и AUDIT_PARTITION_MONTHS_AHEAD
+  следующих месяцев заранее, чтобы вставки не попадали в default;
+- drop_expired_partitions удаляет целиком партиции старше срока хранения:
+  DETACH + DROP вместо DELETE по миллионам строк и последующего VACUUM.
+
+На несекционированной таблице (другая СУБД) функции ничего не делают.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARTITION_SUFFIX = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    month_index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f'{table}_p{month:%Y%m}'
+
+
+def is_partitioned(table: str) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table pt
+                JOIN pg_class c ON c.oid = pt.partrelid
+                WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+            )
+            """,
+            [table],
+        )
+        return cursor.fetchone()[0]
+
+
+def list_partitions(table: str) -> dict[str, datetime]:
+    """Помесячные партиции таблицы: {имя: начало месяца}."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s AND parent.relnamespace = current_schema()::regnamespace
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_SUFFIX.search(name)
+        if match and name == partition_name(table, datetime(int(match[1]), int(match[2]), 1)):
+            partitions[name] = datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)
+    return partitions
+
+
+def ensure_partitions(model, months_ahead: int | None = None) -> list[str]:
+    """Создает недостающие партиции с текущего месяца; возвращает имена созданных."""
+    table = model._meta.db_table
+    if not is_partitioned(table):
+        return []
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'AUDIT_PARTITION_MONTHS_AHEAD', 3)
+
+    existing = list_partitions(table)
+    created = []
+    month = month_start(timezone.now())
+    for _ in range(months_ahead + 1):
+        name = partition_name(table, month)
+        if name not in existing:
+            _create_partition(table, name, month, add_months(month, 1))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def drop_expired_partitions(model, cutoff: datetime) -> list[str]:
+    """
+    Удаляет партиции, целиком лежащие раньше cutoff; возвращает имена удаленных.
+    Строки старше cutoff в пограничной партиции остаются — их удаляет вызывающий код.
+    """
+    table = model._meta.db_table
+    if not is_partitioned(table):
+        return []
+
+    dropped = []
+    qn = connection.ops.quote_name
+    for name, month in sorted(list_partitions(table).items(), key=lambda item: item[1]):
+        if add_months(month, 1) > cutoff:
+            break
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+                cursor.execute(f'DROP TABLE {qn(name)}')
+        dropped.append(name)
+        logger.info(f"Dropped audit partition {name}")
+    return dropped
+
+
+def _create_partition(table: str, name: str, start: datetime, end: datetime) -> None:
+    qn = connection.ops.quote_name
+    default_name = f'{table}_default'
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {qn(default_name)} WHERE "timestamp" >= %s AND "timestamp" < %s)',
+                [start, end],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES {bounds}')
+                return
+
+            # Строки месяца уже попали в default: переносим их в новую таблицу
+            # и только затем подключаем ее партицией.
+            cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {qn(default_name)}
+                    WHERE "timestamp" >= %s AND "timestamp" < %s
+                    RETURNING *
+                )
+                INSERT INTO {qn(name)} SELECT * FROM moved
+                """,
+                [start, end],
+            )
+            cursor.execute(f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES {bounds}')
+    logger.info(f"Created audit partition {name}")
@@ -7,8 +7,12 @@ from django.core.cache import cache
 from django.db import transaction
 from django.utils.translation import gettext as _
 
+from .log_buffer import record_user_action
 from .models import UserAction, SecurityAudit, AuditSettings
 
+URL_MAX_LENGTH = UserAction._meta.get_field('url').max_length
+HTTP_METHOD_MAX_LENGTH = UserAction._meta.get_field('http_method').max_length
+
 
 class LoggingService:
     """
@@ -79,30 +83,34 @@ class LoggingService:
             execution_time: Время выполнения в секундах
             
         Returns:
-            Созданная запись лога
+            Запись лога; в БД она попадает при сбросе буфера (audit.log_buffer),
+            поэтому pk у возвращенной записи нет
         """
         if not self.settings.logging_enabled:
             return None
         
         # Подготавливаем данные для логирования
         log_data = {
-            'user': user,
+            'user_id': user.pk if user is not None else None,
             'action_type': action_type,
             'details': details or {},
             'execution_time': execution_time,
+            'timestamp': timezone.now(),
         }
         
-        # Добавляем информацию об объекте
+        # Добавляем информацию об объекте (ContentType кешируется менеджером)
         if content_object:
-            log_data['content_type'] = ContentType.objects.get_for_model(content_object)
-            log_data['object_id'] = content_object.id
+            log_data['content_type_id'] = ContentType.objects.get_for_model(content_object).pk
+            log_data['object_id'] = content_object.pk
         
         # Добавляем информацию из запроса
         if request:
             log_data.update(self._extract_request_data(request))
         
-        # Создаем запись лога
-        return UserAction.objects.create(**log_data)
+        # Ставим запись в буфер после коммита; действие из откатившейся
+        # транзакции не логируется
+        transaction.on_commit(lambda: record_user_action(log_data))
+        return UserAction(**log_data)
     
     def log_http_request(self, request, response, execution_time: float) -> Optional[UserAction]:
         """
@@ -137,7 +145,7 @@ class LoggingService:
                 'method': request.method,
                 'url': request.get_full_path(),
                 'status_code': response.status_code,
-                'content_length': len(response.content) if hasattr(response, 'content') else 0,
+                'content_length': self._get_content_length(response),
             },
             request=request,
             execution_time=execution_time
@@ -210,11 +218,32 @@ class LoggingService:
         return {
             'ip_address': self._get_client_ip(request),
             'user_agent': request.META.get('HTTP_USER_AGENT', ''),
-            'http_method': request.method,
-            'url': request.get_full_path(),
-            'session_key': request.session.session_key if hasattr(request, 'session') else '',
+            # Значения обрезаются по длине полей: запись пишется пачкой bulk_create
+            'http_method': request.method[:HTTP_METHOD_MAX_LENGTH],
+            'url': request.get_full_path()[:URL_MAX_LENGTH],
+            'session_key': (request.session.session_key or '') if hasattr(request, 'session') else '',
         }
     
+    def _get_content_length(self, response) -> Optional[int]:
+        """
+        Размер тела ответа без чтения потоковых ответов.
+        
+        Args:
+            response: HTTP ответ
+            
+        Returns:
+            Размер в байтах или None, если он неизвестен до отправки
+        """
+        if response.has_header('Content-Length'):
+            try:
+                return int(response['Content-Length'])
+            except ValueError:
+                return None
+        if getattr(response, 'streaming', False):
+            # StreamingHttpResponse/FileResponse: content не материализуется
+            return None
+        return len(response.content)
+    
     def _get_client_ip(self, request) -> str:
         """
         Получает IP-адрес клиента.
@@ -545,6 +574,9 @@ class AuditMiddleware:
     
     Перехватывает все HTTP запросы и автоматически логирует их
     для обеспечения полного контроля над активностью пользователей.
+    Запись ставится в буфер audit.log_buffer после коммита: с общим (Redis)
+    буфером INSERT в пути запроса нет, локальный буфер пишет запись сразу;
+    тело потоковых ответов не читается.
     """
     
     def __init__(self, get_response):
@@ -0,0 +1,46 @@
+"""
+Задачи Celery для аудита.
+"""
+
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from .log_buffer import flush_audit_buffer
+from .models import AuditSettings, SecurityAudit, UserAction
+from .partitions import drop_expired_partitions, ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_audit_log_buffer():
+    """Сбрасывает буфер записей аудита в UserAction."""
+    flushed = flush_audit_buffer()
+    if flushed:
+        logger.info(f"Flushed {flushed} audit log records")
+    return flushed
+
+
+@shared_task
+def maintain_audit_partitions():
+    """
+    Создает партиции таблиц аудита на следующие месяцы и, если включена
+    автоочистка, удаляет партиции старше срока хранения.
+    """
+    created = ensure_partitions(UserAction) + ensure_partitions(SecurityAudit)
+
+    dropped = []
+    audit_settings = AuditSettings.get_settings()
+    if audit_settings.auto_cleanup_enabled:
+        now = timezone.now()
+        dropped += drop_expired_partitions(UserAction, now - timedelta(days=audit_settings.log_retention_days))
+        dropped += drop_expired_partitions(
+            SecurityAudit, now - timedelta(days=audit_settings.security_audit_retention_days),
+        )
+
+    if created or dropped:
+        logger.info(f"Audit partitions created: {created}, dropped: {dropped}")
+    return {'created': created, 'dropped': dropped}
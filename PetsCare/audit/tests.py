@@ -1,3 +1,116 @@
-from django.test import TestCase
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from .log_buffer import LocalAuditBuffer, flush_audit_buffer, set_audit_buffer
+from .models import UserAction
+from .partitions import _create_partition, add_months, drop_expired_partitions, month_start, partition_name
+from .services import LoggingService
+
+User = get_user_model()
+
+
+class AuditLogBufferTestCase(TestCase):
+    def setUp(self):
+        self.buffer = LocalAuditBuffer()
+        set_audit_buffer(self.buffer)
+        self.addCleanup(set_audit_buffer, None)
+        self.service = LoggingService()
+        self.service.settings  # настройки аудита загружаются один раз на сервис
+        self.user = User.objects.create_user(email='audit@example.com', password='password')
+        # Записи сигналов (создание пользователя) не относятся к тесту.
+        self.buffer.drain()
+
+    def get_request(self, path='/api/pets/?page=2'):
+        request = RequestFactory().get(path, HTTP_USER_AGENT='tests')
+        request.user = self.user
+        return request
+
+    def test_http_request_is_written_on_flush(self):
+        with self.assertNumQueries(0), self.captureOnCommitCallbacks(execute=True):
+            self.service.log_http_request(self.get_request(), HttpResponse(b'ok'), 0.25)
+
+        self.assertFalse(UserAction.objects.exists())
+
+        self.assertEqual(flush_audit_buffer(self.buffer), 1)
+        action = UserAction.objects.get()
+        self.assertEqual(action.user, self.user)
+        self.assertEqual((action.action_type, action.http_method, action.url), ('view', 'GET', '/api/pets/?page=2'))
+        self.assertEqual(action.details['content_length'], 2)
+
+    def test_streaming_response_is_not_consumed(self):
+        consumed = []
+
+        def chunks():
+            consumed.append(True)
+            yield b'chunk'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.log_http_request(self.get_request(), StreamingHttpResponse(chunks()), 0.1)
+        flush_audit_buffer(self.buffer)
+
+        self.assertEqual(consumed, [])
+        self.assertIsNone(UserAction.objects.get().details['content_length'])
+
+    def test_long_url_and_deleted_user_do_not_break_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.log_http_request(self.get_request('/api/pets/?q=' + 'x' * 500), HttpResponse(), 0.1)
+            self.service.log_http_request(self.get_request(), HttpResponse(), 0.1)
+        self.user.delete()
+
+        flush_audit_buffer(self.buffer)
+        actions = UserAction.objects.filter(http_method='GET')
+        self.assertEqual(actions.count(), 2)
+        self.assertFalse(actions.filter(user__isnull=False).exists())
+        self.assertTrue(all(len(url) <= 200 for url in actions.values_list('url', flat=True)))
+
+    def test_rolled_back_action_is_not_buffered(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.service.log_action(self.user, 'update')
+                    raise DatabaseError('rollback')
+            except DatabaseError:
+                pass
+
+        self.assertEqual(self.buffer.drain(), [])
+
+    def test_buffer_is_not_flushed_inside_atomic_block(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.log_action(self.user, 'update')
+
+        self.assertFalse(UserAction.objects.exists())
+        self.assertEqual(len(self.buffer.drain()), 1)
+
+    def test_local_buffer_writes_right_after_commit(self):
+        # После коммита on_commit-колбэк выполняется вне atomic-блока.
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.service.log_action(self.user, 'update')
+        with patch('audit.log_buffer.connection', SimpleNamespace(in_atomic_block=False)):
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(UserAction.objects.get().action_type, 'update')
+        self.assertEqual(self.buffer.drain(), [])
+
+
+class AuditPartitionTestCase(TestCase):
+    def test_expired_month_is_dropped_as_partition(self):
+        old_month = add_months(month_start(timezone.now()), -36)
+        old_action = UserAction.objects.create(action_type='system', timestamp=old_month + timedelta(days=3))
+        recent_action = UserAction.objects.create(action_type='system')
+
+        # Строка старого месяца лежит в default и переносится в новую партицию.
+        _create_partition('audit_useraction', partition_name('audit_useraction', old_month), old_month, add_months(old_month, 1))
+
+        dropped = drop_expired_partitions(UserAction, timezone.now() - timedelta(days=365))
+
+        self.assertEqual(dropped, [partition_name('audit_useraction', old_month)])
+        self.assertFalse(UserAction.objects.filter(pk=old_action.pk).exists())
+        self.assertTrue(UserAction.objects.filter(pk=recent_action.pk).exists())
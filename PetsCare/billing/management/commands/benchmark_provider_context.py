@@ -0,0 +1,85 @@
+"""
+Management команда для замера времени определения провайдера в ProviderBlockingMiddleware.
+
+Использование:
+    python manage.py benchmark_provider_context --iterations 1000 --body-mb 5
+
+Для каждого сценария (kwargs маршрута, query-параметр, JWT-пользователь,
+большой JSON POST) выводит среднее время на запрос и число SQL-запросов
+на «тёплом» кэше. Тело запроса при этом не читается.
+"""
+
+import json
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from billing.middleware import ProviderBlockingMiddleware
+from providers.models import EmployeeProvider
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время определения провайдера запроса в billing-middleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+        parser.add_argument('--body-mb', type=int, default=5, help='Размер JSON-тела для POST-сценария')
+
+    def handle(self, *args, **options):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        link = EmployeeProvider.objects.filter(provider__is_active=True).select_related('employee__user').first()
+        if link is None:
+            raise CommandError('Нужен хотя бы один активный провайдер с сотрудником.')
+
+        provider_id = link.provider_id
+        auth_header = f'Bearer {AccessToken.for_user(link.employee.user)}'
+        body = json.dumps({'items': ['x' * 1024] * (options['body_mb'] * 1024)})
+        factory = RequestFactory()
+        middleware = ProviderBlockingMiddleware(lambda request: None)
+
+        scenarios = {
+            'route kwargs': lambda: factory.get(f'/api/v1/providers/{provider_id}/admins/'),
+            'query param': lambda: factory.get('/api/v1/invoices/', {'provider_id': provider_id}),
+            'jwt subject': lambda: factory.get('/api/v1/provider-locations/', HTTP_AUTHORIZATION=auth_header),
+            'large json post': lambda: factory.post(
+                '/api/v1/provider-locations/',
+                data=body,
+                content_type='application/json',
+                HTTP_AUTHORIZATION=auth_header,
+            ),
+        }
+
+        self.stdout.write(f'Provider {provider_id}, {options["iterations"]} iterations\n')
+        for name, build_request in scenarios.items():
+            # Прогрев кэшей (снимок биллинга, провайдер пользователя).
+            middleware._get_provider_from_request(self._with_anonymous_user(build_request()))
+
+            elapsed = 0.0
+            query_count = 0
+            body_read = False
+            provider = None
+            for _ in range(options['iterations']):
+                request = self._with_anonymous_user(build_request())
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    provider = middleware._get_provider_from_request(request)
+                    elapsed += time.perf_counter() - started
+                query_count += len(queries)
+                body_read = body_read or hasattr(request, '_body')
+
+            self.stdout.write(
+                f'{name:>16}: {elapsed / options["iterations"] * 1_000_000:8.1f} µs/request, '
+                f'{query_count / options["iterations"]:.2f} queries/request, '
+                f'resolved={provider.id if provider else None}, body_read={body_read}'
+            )
+
+    @staticmethod
+    def _with_anonymous_user(request):
+        """Сессионный пользователь не аутентифицирован: провайдер берётся только из JWT."""
+        request.user = AnonymousUser()
+        return request
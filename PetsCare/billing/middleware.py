@@ -2,7 +2,6 @@
 
 import json
 import logging
-import re
 
 from django.http import JsonResponse
 from django.shortcuts import render
@@ -10,13 +9,11 @@ from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 from django.utils.translation import gettext as _
 
-from providers.models import EmployeeProvider, Provider
-
 from .models import BlockingSystemSettings
+from .provider_context import ProviderContextResolver
 from .services import MultiLevelBlockingService
 
 logger = logging.getLogger(__name__)
-PROVIDER_PATH_RE = re.compile(r'^/api/v1/providers/(?P<provider_id>\d+)(?:/|$)')
 BLOCKING_SKIP_PREFIXES = (
     '/admin',
     '/accounts',
@@ -76,70 +73,19 @@ class ProviderBlockingMiddleware(MiddlewareMixin):
 
     def _get_provider_from_request(self, request):
         """
-        Пытается извлечь провайдера из параметров запроса, URL или роли пользователя.
-        """
-        provider_id = (
-            request.GET.get('provider_id')
-            or request.GET.get('provider')
-            or getattr(request, 'resolver_match', None) and request.resolver_match.kwargs.get('provider_id')
-            or getattr(request, 'resolver_match', None) and request.resolver_match.kwargs.get('pk')
-            or self._extract_provider_id_from_path(request.path)
-        )
-
-        if provider_id is None and request.method in {'POST', 'PUT', 'PATCH'}:
-            provider_id = request.POST.get('provider_id') or request.POST.get('provider')
-
-        if provider_id is None and request.content_type == 'application/json' and request.body:
-            try:
-                payload = json.loads(request.body)
-            except (TypeError, ValueError, json.JSONDecodeError):
-                payload = {}
-            provider_id = payload.get('provider_id') or payload.get('provider')
-
-        if provider_id:
-            try:
-                return Provider.objects.get(id=provider_id, is_active=True)
-            except (Provider.DoesNotExist, ValueError, TypeError):
-                return None
-
-        if request.user.is_authenticated and self._uses_authenticated_provider_context(request):
-            managed_provider = request.user.get_managed_providers().order_by('id').first()
-            if managed_provider is not None:
-                return managed_provider
-
-            employee_provider = EmployeeProvider.get_active_ep_for_user_provider(
-                request.user,
-                Provider.objects.filter(is_active=True).order_by('id').first(),
-            )
-            if employee_provider is not None:
-                return employee_provider.provider
+        Определяет провайдера по маршруту, query-параметрам или кэшу провайдера
+        пользователя (см. billing.provider_context); тело запроса не читается.
 
-        return None
-
-    def _uses_authenticated_provider_context(self, request) -> bool:
-        """
-        Определяет запросы кабинета провайдера, где провайдера можно брать из роли
-        текущего пользователя. Публичный сайт и личные owner/sitter endpoint не должны
-        блокироваться только потому, что у пользователя есть provider-роль.
+        Провайдер подгружается вместе со снимком ProviderBillingState.
         """
-        normalized_path = (request.path or '').rstrip('/')
-        return (
-            normalized_path in {'/api/v1/profile', '/api/v1/user-roles'}
-            or normalized_path == '/api/v1/providers'
-            or normalized_path.startswith('/api/v1/provider-locations')
-            or normalized_path.startswith('/api/v1/invoices')
-            or normalized_path.endswith('/my-permissions')
-        )
+        provider_id = ProviderContextResolver.resolve_provider_id(request)
+        if provider_id is None:
+            return None
 
-    def _extract_provider_id_from_path(self, path):
-        """
-        Извлекает provider_id из URL-пути до URL resolving, чтобы middleware
-        работал и для JWT/API запросов в process_request.
-        """
-        match = PROVIDER_PATH_RE.match(path or '')
-        if match is None:
+        state = self.blocking_service.get_billing_state(provider_id)
+        if state is None or not state.provider.is_active:
             return None
-        return match.group('provider_id')
+        return state.provider
 
     def _should_skip_blocking_check(self, request) -> bool:
         """
@@ -150,28 +96,20 @@ class ProviderBlockingMiddleware(MiddlewareMixin):
 
     def _check_provider_blocking(self, provider):
         """
-        Возвращает нормализованный результат текущей blocking-оценки.
-        """
-        result = self.blocking_service.check_provider_blocking(provider)
-        if result['should_block']:
-            return {
-                'is_blocked': True,
-                'blocking_level': result['blocking_level'],
-                'reasons': result['reasons'],
-                'active_blocking': result.get('active_blocking'),
-                'debt_info': result.get('debt_info'),
-                'overdue_days': result.get('overdue_days'),
-                'thresholds': result.get('thresholds'),
-            }
+        Возвращает нормализованный результат blocking-оценки из снимка ProviderBillingState.
 
+        Снимок читается из кэша или одним запросом по первичному ключу; долг
+        заново не пересчитывается (см. MultiLevelBlockingService.get_billing_state).
+        """
+        state = self.blocking_service.get_billing_state(provider.id)
         return {
-            'is_blocked': False,
-            'blocking_level': 0,
-            'reasons': [],
-            'active_blocking': result.get('active_blocking'),
-            'debt_info': result.get('debt_info'),
-            'overdue_days': result.get('overdue_days'),
-            'thresholds': result.get('thresholds'),
+            'is_blocked': state.blocking_level > 0,
+            'blocking_level': state.blocking_level,
+            'reasons': list(state.reasons or []),
+            'active_blocking_id': state.active_blocking_id,
+            'debt_info': state.debt_info,
+            'overdue_days': state.max_overdue_days,
+            'thresholds': state.thresholds,
         }
 
     def _handle_blocked_provider(self, request, provider, blocking_result):
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.11 on 2026-10-16 12:00
+
+import django.core.serializers.json
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0031_payment_unapplied_amount'),
+        ('providers', '0057_unicode_requisite_validators'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderBillingState',
+            fields=[
+                ('provider', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='billing_state', serialize=False, to='providers.provider', verbose_name='Provider')),
+                ('blocking_level', models.PositiveSmallIntegerField(default=0, verbose_name='Blocking Level')),
+                ('total_debt', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Total Debt')),
+                ('overdue_debt', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Overdue Debt')),
+                ('max_overdue_days', models.PositiveIntegerField(default=0, verbose_name='Max Overdue Days')),
+                ('reasons', models.JSONField(blank=True, default=list, verbose_name='Reasons')),
+                ('thresholds', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Thresholds')),
+                ('computed_on', models.DateField(blank=True, null=True, verbose_name='Computed On')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('active_blocking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='billing.providerblocking', verbose_name='Active Blocking')),
+                ('currency', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='billing.currency', verbose_name='Currency')),
+            ],
+            options={
+                'verbose_name': 'Provider Billing State',
+                'verbose_name_plural': 'Provider Billing States',
+            },
+        ),
+    ]
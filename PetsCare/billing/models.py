@@ -11,6 +11,7 @@
 
 import re
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models, transaction
 from django.db.models import Sum
 from django.utils.translation import gettext_lazy as _
@@ -1895,6 +1896,98 @@ class ProviderBlocking(models.Model):
         return self.status == 'active'
 
 
+class ProviderBillingState(models.Model):
+    """
+    Денормализованный снимок биллингового состояния провайдера.
+
+    Читается ProviderBlockingMiddleware одним запросом по первичному ключу.
+    Пересчитывается MultiLevelBlockingService.refresh_billing_states() после
+    изменений PaymentHistory, Invoice, Payment, Refund и блокировок, а также
+    ночной проверкой. Просрочка растёт с датой, поэтому снимок действителен
+    только в день расчёта (computed_on).
+    """
+    provider = models.OneToOneField(
+        Provider,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='billing_state',
+        verbose_name=_('Provider')
+    )
+    blocking_level = models.PositiveSmallIntegerField(
+        _('Blocking Level'),
+        default=0
+    )
+    total_debt = models.DecimalField(
+        _('Total Debt'),
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    overdue_debt = models.DecimalField(
+        _('Overdue Debt'),
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    max_overdue_days = models.PositiveIntegerField(
+        _('Max Overdue Days'),
+        default=0
+    )
+    currency = models.ForeignKey(
+        Currency,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('Currency')
+    )
+    reasons = models.JSONField(
+        _('Reasons'),
+        default=list,
+        blank=True
+    )
+    thresholds = models.JSONField(
+        _('Thresholds'),
+        default=dict,
+        blank=True,
+        encoder=DjangoJSONEncoder
+    )
+    active_blocking = models.ForeignKey(
+        ProviderBlocking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('Active Blocking')
+    )
+    computed_on = models.DateField(
+        _('Computed On'),
+        null=True,
+        blank=True
+    )
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Provider Billing State')
+        verbose_name_plural = _('Provider Billing States')
+
+    def __str__(self):
+        return f"{self.provider_id} - L{self.blocking_level} ({self.computed_on})"
+
+    @property
+    def debt_info(self):
+        """Долг в формате Provider.calculate_debt()."""
+        return {
+            'total_debt': self.total_debt,
+            'overdue_debt': self.overdue_debt,
+            'currency': self.currency,
+        }
+
+    def is_current(self, today=None):
+        """Снимок рассчитан сегодня и не сброшен сменой политики."""
+        return self.computed_on is not None and self.computed_on == (today or timezone.now().date())
+
+
 class BlockingNotification(models.Model):
     """
     Модель для отслеживания уведомлений о блокировках.
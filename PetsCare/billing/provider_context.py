@@ -0,0 +1,161 @@
+"""
+Определение провайдера запроса для billing-middleware без чтения тела запроса.
+
+Источники провайдера (по порядку):
+1. kwargs маршрута: имя маршрута ищется в реестре PROVIDER_CONTEXT_ROUTES,
+   kwarg ``provider_id`` считается контекстом провайдера для любого маршрута;
+2. query-параметры ``provider_id`` / ``provider``;
+3. для путей кабинета провайдера — провайдер текущего пользователя из кэша
+   по subject JWT (user_id), без загрузки пользователя на cache hit.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from django.urls import Resolver404, resolve
+
+from utils.caching import get_namespace_cache
+
+PROVIDER_CONTEXT_CACHE_KEY = 'provider_context:user:{user_id}'
+# Маркер «у пользователя нет провайдера»: кэшируем и отрицательный результат.
+NO_PROVIDER = 0
+
+# view_name маршрута → kwarg с id провайдера. Маршруты с kwarg provider_id
+# учитываются и без записи здесь.
+PROVIDER_CONTEXT_ROUTES: dict[str, str] = {
+    'v1:providers:provider-detail': 'pk',
+}
+
+# Пути кабинета провайдера, где провайдера можно взять из роли пользователя.
+AUTHENTICATED_PROVIDER_CONTEXT_PATHS = frozenset({
+    '/api/v1/profile',
+    '/api/v1/user-roles',
+    '/api/v1/providers',
+})
+AUTHENTICATED_PROVIDER_CONTEXT_PREFIXES = (
+    '/api/v1/provider-locations',
+    '/api/v1/invoices',
+)
+
+cache = get_namespace_cache('provider_context')
+
+
+def register_provider_context_route(view_name: str, kwarg: str = 'provider_id') -> None:
+    """Регистрирует маршрут, kwarg которого содержит id провайдера."""
+    PROVIDER_CONTEXT_ROUTES[view_name] = kwarg
+
+
+def invalidate_user_provider_context(user_id: Optional[int]) -> None:
+    """Сбрасывает кэш провайдера пользователя (смена ролей в организациях)."""
+    if user_id:
+        cache.delete(PROVIDER_CONTEXT_CACHE_KEY.format(user_id=user_id))
+
+
+class ProviderContextResolver:
+    """
+    Возвращает id провайдера запроса; сам провайдер middleware читает
+    вместе со снимком ProviderBillingState.
+    """
+
+    @classmethod
+    def resolve_provider_id(cls, request) -> Optional[int]:
+        provider_id = cls.from_route(request) or cls.from_query(request)
+        if provider_id is not None:
+            return provider_id
+        if cls.uses_authenticated_provider_context(request.path):
+            return cls.from_user(request)
+        return None
+
+    @staticmethod
+    def from_route(request) -> Optional[int]:
+        """id провайдера из kwargs маршрута (resolver_match или resolve пути)."""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return None
+        kwarg = PROVIDER_CONTEXT_ROUTES.get(getattr(match, 'view_name', None), 'provider_id')
+        return _to_int(match.kwargs.get(kwarg))
+
+    @staticmethod
+    def from_query(request) -> Optional[int]:
+        return _to_int(request.GET.get('provider_id') or request.GET.get('provider'))
+
+    @staticmethod
+    def uses_authenticated_provider_context(path: str) -> bool:
+        """
+        Запросы кабинета провайдера, где провайдера можно брать из роли
+        текущего пользователя. Публичный сайт и личные owner/sitter endpoint
+        не должны блокироваться только из-за provider-роли пользователя.
+        """
+        normalized_path = (path or '').rstrip('/')
+        return (
+            normalized_path in AUTHENTICATED_PROVIDER_CONTEXT_PATHS
+            or normalized_path.startswith(AUTHENTICATED_PROVIDER_CONTEXT_PREFIXES)
+            or normalized_path.endswith('/my-permissions')
+        )
+
+    @classmethod
+    def from_user(cls, request) -> Optional[int]:
+        """Провайдер кабинета пользователя из кэша по subject JWT или сессии."""
+        user_id = cls.get_subject(request)
+        if user_id is None:
+            return None
+
+        cache_key = PROVIDER_CONTEXT_CACHE_KEY.format(user_id=user_id)
+        provider_id = cache.get(cache_key)
+        if provider_id is None:
+            provider_id = cls._load_user_provider_id(user_id) or NO_PROVIDER
+            cache.set(cache_key, provider_id)
+        return provider_id or None
+
+    @staticmethod
+    def get_subject(request) -> Optional[int]:
+        """
+        user_id из Bearer JWT (проверка подписи без запросов к БД);
+        для сессионных запросов — из уже аутентифицированного request.user.
+        """
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if header.startswith('Bearer '):
+            from rest_framework_simplejwt.exceptions import TokenError
+            from rest_framework_simplejwt.settings import api_settings
+            from rest_framework_simplejwt.tokens import AccessToken
+
+            try:
+                token = AccessToken(header[len('Bearer '):].strip())
+            except TokenError:
+                return None
+            return _to_int(token.get(api_settings.USER_ID_CLAIM))
+
+        user = getattr(request, 'user', None)
+        if user is not None and getattr(user, 'is_authenticated', False):
+            return user.pk
+        return None
+
+    @staticmethod
+    def _load_user_provider_id(user_id: int) -> Optional[int]:
+        from providers.models import EmployeeProvider, Provider
+        from users.models import User
+
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+
+        managed_provider_id = user.get_managed_providers().order_by('id').values_list('id', flat=True).first()
+        if managed_provider_id is not None:
+            return managed_provider_id
+
+        employee_provider = EmployeeProvider.get_active_ep_for_user_provider(
+            user,
+            Provider.objects.filter(is_active=True).order_by('id').first(),
+        )
+        return employee_provider.provider_id if employee_provider is not None else None
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
@@ -35,9 +35,26 @@ def resolve_blocking_region_code(provider) -> str:
     return country_code
 
 
-def get_active_policy_for_region(region_code: str) -> Optional[RegionalBlockingPolicy]:
-    """Активная строка политики для кода региона или DEFAULT."""
+def load_active_policies() -> Dict[str, RegionalBlockingPolicy]:
+    """Все активные политики по коду региона одним запросом (для массовой проверки)."""
+    return {
+        policy.region_code.upper(): policy
+        for policy in RegionalBlockingPolicy.objects.filter(is_active=True).select_related('currency')
+    }
+
+
+def get_active_policy_for_region(
+    region_code: str,
+    policies: Optional[Dict[str, RegionalBlockingPolicy]] = None,
+) -> Optional[RegionalBlockingPolicy]:
+    """
+    Активная строка политики для кода региона или DEFAULT.
+
+    policies — заранее загруженная карта load_active_policies(); без неё идём в БД.
+    """
     code = (region_code or 'DEFAULT').upper()
+    if policies is not None:
+        return policies.get(code) or policies.get('DEFAULT')
     policy = (
         RegionalBlockingPolicy.objects.filter(region_code=code, is_active=True)
         .select_related('currency')
@@ -71,7 +88,10 @@ def tolerance_in_provider_currency(
     return cur.convert_amount(amount, pc)
 
 
-def resolve_blocking_thresholds_for_provider(provider) -> Dict[str, Any]:
+def resolve_blocking_thresholds_for_provider(
+    provider,
+    policies: Optional[Dict[str, RegionalBlockingPolicy]] = None,
+) -> Dict[str, Any]:
     """
     Собирает словарь порогов для MultiLevelBlockingService и UI.
 
@@ -79,7 +99,7 @@ def resolve_blocking_thresholds_for_provider(provider) -> Dict[str, Any]:
     дни сравниваются с overdue_days_l2_from и overdue_days_l3_from.
     """
     region_code = resolve_blocking_region_code(provider)
-    policy = get_active_policy_for_region(region_code)
+    policy = get_active_policy_for_region(region_code, policies)
     if policy is None:
         return _fallback_thresholds(region_code)
 
@@ -3,21 +3,30 @@
 """
 
 import logging
+import threading
+from collections import defaultdict
+from datetime import date
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from django.core.cache import cache
 from django.db import transaction
+from django.db.models import DecimalField, Exists, F, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from providers.models import EmployeeProvider, Provider
+from utils.caching import get_namespace_cache
 
 from .models import (
     BlockingNotification,
     BlockingSystemSettings,
+    Currency,
+    PaymentHistory,
+    ProviderBillingState,
     ProviderBlocking,
 )
+from .regional_blocking import load_active_policies, resolve_blocking_thresholds_for_provider
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +37,60 @@ logger = logging.getLogger(__name__)
 # мало, чтобы пользователь не видел залежавшийся баннер после оплаты долга.
 BLOCKING_CHECK_CACHE_TTL = 10
 BLOCKING_CHECK_CACHE_KEY = "billing:blocking_check:provider:{provider_id}"
+BILLING_STATE_CACHE_KEY = "billing:state:provider:{provider_id}"
+# Маркер «провайдера не существует» в кэше снимков: несуществующий provider_id
+# из маршрута или query не пересобирает снимок на каждом запросе.
+MISSING_BILLING_STATE = 0
+MISSING_BILLING_STATE_CACHE_TTL = 300
+
+# Статусы PaymentHistory, которые формируют задолженность.
+OPEN_PAYMENT_STATUSES = ('pending', 'partially_paid', 'overdue')
+# Размер пачки провайдеров в check_all_providers: одна транзакция и
+# фиксированное число запросов на пачку.
+BLOCKING_CHECK_BATCH_SIZE = 1000
+
+cache = get_namespace_cache("billing_blocking")
+_pending_state_refresh = threading.local()
 
 
 def invalidate_provider_blocking_cache(provider_id: int) -> None:
     """Сбрасывает кэш проверки блокировки. Вызывать при оплате/изменении статуса."""
-    cache.delete(BLOCKING_CHECK_CACHE_KEY.format(provider_id=provider_id))
+    cache.delete_many([
+        BLOCKING_CHECK_CACHE_KEY.format(provider_id=provider_id),
+        BILLING_STATE_CACHE_KEY.format(provider_id=provider_id),
+    ])
+
+
+def schedule_billing_state_refresh(provider_id: Optional[int]) -> None:
+    """
+    Пересчитывает снимок ProviderBillingState после коммита транзакции.
+
+    Несколько изменений одного провайдера в транзакции дают один пересчёт:
+    id копятся в потоке, первый on_commit-колбэк забирает их все.
+    """
+    if not provider_id:
+        return
+    pending = getattr(_pending_state_refresh, 'provider_ids', None)
+    if pending is None:
+        pending = _pending_state_refresh.provider_ids = set()
+    pending.add(provider_id)
+    transaction.on_commit(_flush_billing_state_refresh)
+
+
+def _flush_billing_state_refresh() -> None:
+    pending = getattr(_pending_state_refresh, 'provider_ids', None)
+    if not pending:
+        return
+    provider_ids = list(pending)
+    pending.clear()
+    try:
+        MultiLevelBlockingService().refresh_billing_states(provider_ids)
+    except Exception:
+        # Снимок будет пересчитан при следующем чтении или ночной проверке.
+        logger.exception("Failed to refresh billing state for providers %s", provider_ids)
+        ProviderBillingState.objects.filter(provider_id__in=provider_ids).update(computed_on=None)
+        for provider_id in provider_ids:
+            invalidate_provider_blocking_cache(provider_id)
 
 
 class MultiLevelBlockingService:
@@ -49,6 +107,98 @@ class MultiLevelBlockingService:
     def __init__(self):
         self.settings = BlockingSystemSettings.get_settings()
 
+    def get_billing_state(self, provider_id: int) -> Optional[ProviderBillingState]:
+        """
+        Снимок биллингового состояния вместе с провайдером для горячего пути middleware.
+
+        Кэш → один запрос по первичному ключу (с провайдером и валютой);
+        отсутствующий или устаревший (не сегодняшний) снимок пересчитывается
+        на месте. None — провайдера не существует (отсутствие тоже кэшируется).
+        """
+        today = timezone.now().date()
+        cache_key = BILLING_STATE_CACHE_KEY.format(provider_id=provider_id)
+        state = cache.get(cache_key)
+        if state == MISSING_BILLING_STATE:
+            return None
+        if state is None or not state.is_current(today):
+            state = ProviderBillingState.objects.select_related('provider', 'currency').filter(pk=provider_id).first()
+            if state is None or not state.is_current(today):
+                state = self.refresh_billing_states([provider_id]).get(provider_id)
+                if state is None:
+                    cache.set(cache_key, MISSING_BILLING_STATE, timeout=MISSING_BILLING_STATE_CACHE_TTL)
+                    return None
+            cache.set(cache_key, state, timeout=BLOCKING_CHECK_CACHE_TTL)
+        return state
+
+    def refresh_billing_states(
+        self,
+        provider_ids: Iterable[int],
+        *,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[int, ProviderBillingState]:
+        """
+        Пересчитывает снимки ProviderBillingState набора провайдеров.
+
+        Один агрегирующий запрос annotate_debt, один запрос активных блокировок
+        и один upsert независимо от числа провайдеров.
+        """
+        provider_ids = list(set(provider_ids))
+        if not provider_ids:
+            return {}
+
+        today = context['today'] if context else timezone.now().date()
+        context = context or self._build_check_context(today)
+        active_blocking_ids: Dict[int, int] = {}
+        for provider_id, blocking_id in ProviderBlocking.objects.filter(
+            provider_id__in=provider_ids,
+            status='active',
+        ).order_by('provider_id', '-blocked_at').values_list('provider_id', 'id'):
+            active_blocking_ids.setdefault(provider_id, blocking_id)
+
+        states = []
+        for provider in self.annotate_debt(
+            Provider.objects.filter(pk__in=provider_ids).select_related('invoice_currency'),
+            today,
+        ):
+            result = self._evaluate_annotated_provider(provider, context)
+            states.append(
+                ProviderBillingState(
+                    provider=provider,
+                    blocking_level=result['blocking_level'],
+                    total_debt=result['debt_info']['total_debt'],
+                    overdue_debt=result['debt_info']['overdue_debt'],
+                    max_overdue_days=result['overdue_days'],
+                    currency=result['debt_info']['currency'],
+                    reasons=result['reasons'],
+                    thresholds=result['thresholds'],
+                    active_blocking_id=active_blocking_ids.get(provider.id),
+                    computed_on=today,
+                )
+            )
+
+        ProviderBillingState.objects.bulk_create(
+            states,
+            update_conflicts=True,
+            unique_fields=['provider'],
+            update_fields=[
+                'blocking_level',
+                'total_debt',
+                'overdue_debt',
+                'max_overdue_days',
+                'currency',
+                'reasons',
+                'thresholds',
+                'active_blocking',
+                'computed_on',
+                'updated_at',
+            ],
+        )
+        cache.delete_many(
+            [BLOCKING_CHECK_CACHE_KEY.format(provider_id=provider_id) for provider_id in provider_ids]
+            + [BILLING_STATE_CACHE_KEY.format(provider_id=provider_id) for provider_id in provider_ids]
+        )
+        return {state.provider_id: state for state in states}
+
     def check_provider_blocking(self, provider: Provider, *, use_cache: bool = True) -> Dict[str, Any]:
         """
         Возвращает нормализованный результат проверки блокировки провайдера.
@@ -85,10 +235,37 @@ class MultiLevelBlockingService:
                 'reason': 'Provider has no active offer acceptance',
             }
 
-        debt_info = provider.calculate_debt()
-        overdue_days = provider.get_max_overdue_days()
-        thresholds = provider.get_blocking_thresholds()
+        result = self._build_check_result(
+            provider,
+            debt_info=provider.calculate_debt(),
+            overdue_days=provider.get_max_overdue_days(),
+            thresholds=provider.get_blocking_thresholds(),
+        )
+        result['active_blocking'] = ProviderBlocking.objects.filter(
+            provider=provider,
+            status='active',
+        ).order_by('-blocked_at').first()
 
+        if use_cache:
+            cacheable = {k: v for k, v in result.items() if k not in ('provider', 'active_blocking')}
+            try:
+                cache.set(cache_key, cacheable, timeout=BLOCKING_CHECK_CACHE_TTL)
+            except Exception as exc:
+                logger.debug("Failed to cache blocking check for provider=%s: %s", provider.id, exc)
+
+        return result
+
+    def _build_check_result(
+        self,
+        provider: Provider,
+        *,
+        debt_info: Dict[str, Any],
+        overdue_days: int,
+        thresholds: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Рассчитывает уровень и причины из уже посчитанных долга, просрочки и порогов.
+        """
         blocking_level = self._resolve_blocking_level(
             overdue_debt=debt_info['overdue_debt'],
             overdue_days=overdue_days,
@@ -100,13 +277,7 @@ class MultiLevelBlockingService:
             thresholds=thresholds,
             blocking_level=blocking_level,
         )
-
-        active_blocking = ProviderBlocking.objects.filter(
-            provider=provider,
-            status='active',
-        ).order_by('-blocked_at').first()
-
-        result = {
+        return {
             'provider': provider,
             'should_block': blocking_level > 0,
             'blocking_level': blocking_level,
@@ -115,18 +286,8 @@ class MultiLevelBlockingService:
             'debt_info': debt_info,
             'overdue_days': overdue_days,
             'thresholds': thresholds,
-            'active_blocking': active_blocking,
         }
 
-        if use_cache:
-            cacheable = {k: v for k, v in result.items() if k not in ('provider', 'active_blocking')}
-            try:
-                cache.set(cache_key, cacheable, timeout=BLOCKING_CHECK_CACHE_TTL)
-            except Exception as exc:
-                logger.debug("Failed to cache blocking check for provider=%s: %s", provider.id, exc)
-
-        return result
-
     def _resolve_blocking_level(
         self,
         *,
@@ -306,10 +467,20 @@ class MultiLevelBlockingService:
     def check_all_providers(self) -> Dict[str, Any]:
         """
         Выполняет полную проверку всех активных провайдеров.
+
+        Долг, просрочка, валюта долга и акцепт оферты считаются одним
+        сгруппированным запросом по провайдерам, пороги берутся из заранее
+        загруженных RegionalBlockingPolicy. Блокировки применяются пачками по
+        BLOCKING_CHECK_BATCH_SIZE с фиксированным числом запросов на пачку.
         """
-        providers = Provider.objects.filter(is_active=True)
+        today = timezone.now().date()
+        context = self._build_check_context(today)
+        providers = self.annotate_debt(
+            Provider.objects.filter(is_active=True).select_related('invoice_currency'),
+            today,
+        ).order_by('pk')
         stats = {
-            'total_providers': providers.count(),
+            'total_providers': 0,
             'checked_providers': 0,
             'blocked_providers': 0,
             'resolved_blockings': 0,
@@ -317,51 +488,238 @@ class MultiLevelBlockingService:
             'errors': [],
         }
 
-        for provider in providers.iterator():
-            try:
-                result = self.check_provider_blocking(provider)
-                stats['checked_providers'] += 1
-
-                if result['should_block']:
-                    self.apply_blocking(
-                        provider,
-                        result['blocking_level'],
-                        result['reasons'],
-                        debt_info=result['debt_info'],
-                        overdue_days=result['overdue_days'],
-                        thresholds=result['thresholds'],
-                    )
-                    stats['blocked_providers'] += 1
-                    if result['blocking_level'] == 1:
-                        stats['warnings'] += 1
-                else:
-                    stats['resolved_blockings'] += self.resolve_provider_blocking(
-                        provider,
-                        notes='Billing blocking automatically removed after reevaluation',
-                    )
-            except Exception as exc:
-                logger.exception("Error while checking provider %s for billing blocking", provider.id)
-                stats['errors'].append(f"Provider {provider.id}: {exc}")
+        batch: List[Provider] = []
+        for provider in providers.iterator(chunk_size=BLOCKING_CHECK_BATCH_SIZE):
+            batch.append(provider)
+            if len(batch) >= BLOCKING_CHECK_BATCH_SIZE:
+                self._check_provider_batch(batch, context, stats)
+                batch = []
+        if batch:
+            self._check_provider_batch(batch, context, stats)
 
         return stats
 
+    @staticmethod
+    def _build_check_context(today: date) -> Dict[str, Any]:
+        """Справочники массовой проверки: политики, валюты, страны с обязательной офертой."""
+        from legal.models import CountryLegalConfig
+
+        return {
+            'today': today,
+            'policies': load_active_policies(),
+            'currencies': Currency.objects.in_bulk(),
+            'offer_countries': set(CountryLegalConfig.objects.values_list('country', flat=True)),
+        }
+
+    @staticmethod
+    def annotate_debt(queryset, today: date):
+        """
+        Добавляет к queryset провайдеров агрегаты PaymentHistory одним GROUP BY.
+
+        Аннотации: total_debt, overdue_debt, oldest_overdue_due_date,
+        debt_currency_id (валюта записи с самым поздним сроком, как в
+        Provider.calculate_debt) и has_offer_acceptance.
+        """
+        from legal.models import DocumentAcceptance
+
+        money = DecimalField(max_digits=12, decimal_places=2)
+        outstanding = Greatest(
+            F('payment_history__amount') - F('payment_history__paid_amount') + F('payment_history__refunded_amount'),
+            Value(Decimal('0.00')),
+            output_field=money,
+        )
+        open_q = Q(payment_history__status__in=OPEN_PAYMENT_STATUSES)
+        overdue_q = open_q & Q(payment_history__due_date__lt=today)
+        has_outstanding_q = Q(
+            payment_history__amount__gt=F('payment_history__paid_amount') - F('payment_history__refunded_amount')
+        )
+        return queryset.annotate(
+            total_debt=Coalesce(Sum(outstanding, filter=open_q), Value(Decimal('0.00')), output_field=money),
+            overdue_debt=Coalesce(Sum(outstanding, filter=overdue_q), Value(Decimal('0.00')), output_field=money),
+            oldest_overdue_due_date=Min('payment_history__due_date', filter=overdue_q & has_outstanding_q),
+            debt_currency_id=Subquery(
+                PaymentHistory.objects.filter(
+                    provider=OuterRef('pk'),
+                    status__in=OPEN_PAYMENT_STATUSES,
+                ).order_by('-due_date').values('currency_id')[:1]
+            ),
+            has_offer_acceptance=Exists(
+                DocumentAcceptance.objects.filter(
+                    provider=OuterRef('pk'),
+                    is_active=True,
+                    document__country_configs_global__country=OuterRef('country'),
+                )
+            ),
+        )
+
+    def _check_provider_batch(self, providers: List[Provider], context: Dict[str, Any], stats: Dict[str, Any]) -> None:
+        """Проверяет пачку провайдеров; ошибка откатывает только эту пачку."""
+        stats['total_providers'] += len(providers)
+        try:
+            batch_stats = self._apply_batch_blocking(providers, context)
+        except Exception as exc:
+            logger.exception(
+                "Error while checking providers %s-%s for billing blocking",
+                providers[0].id,
+                providers[-1].id,
+            )
+            stats['errors'].append(f"Providers {providers[0].id}-{providers[-1].id}: {exc}")
+            return
+        for key, value in batch_stats.items():
+            stats[key] += value
+
+    def _evaluate_annotated_provider(self, provider: Provider, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Результат проверки по аннотациям annotate_debt без обращений к БД.
+
+        Повторяет check_provider_blocking(use_cache=False) без active_blocking;
+        долг, просрочка и пороги возвращаются и для неблокируемых провайдеров.
+        """
+        oldest_due = provider.oldest_overdue_due_date
+        result = self._build_check_result(
+            provider,
+            debt_info={
+                'total_debt': provider.total_debt,
+                'overdue_debt': provider.overdue_debt,
+                'currency': context['currencies'].get(provider.debt_currency_id),
+            },
+            overdue_days=(context['today'] - oldest_due).days if oldest_due else 0,
+            thresholds=resolve_blocking_thresholds_for_provider(provider, context['policies']),
+        )
+
+        country_code = getattr(provider.country, 'code', None) or ''
+        offer_missing = country_code in context['offer_countries'] and not provider.has_offer_acceptance
+        if provider.exclude_from_blocking_checks or offer_missing:
+            result.update({'should_block': False, 'blocking_level': 0, 'reasons': [], 'reason': None})
+        return result
+
+    @transaction.atomic
+    def _apply_batch_blocking(self, providers: List[Provider], context: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Применяет результаты проверки пачки: bulk_create новых блокировок,
+        bulk_update текущих, массовое снятие лишних и пакетные уведомления.
+        """
+        active_by_provider: Dict[int, List[ProviderBlocking]] = defaultdict(list)
+        for blocking in ProviderBlocking.objects.select_for_update().filter(
+            provider_id__in=[provider.id for provider in providers],
+            status='active',
+        ):
+            active_by_provider[blocking.provider_id].append(blocking)
+
+        batch_stats = {'checked_providers': 0, 'blocked_providers': 0, 'resolved_blockings': 0, 'warnings': 0}
+        to_create: List[ProviderBlocking] = []
+        to_update: List[ProviderBlocking] = []
+        warning_candidates: List[ProviderBlocking] = []
+        superseded_ids: List[int] = []
+        resolved: List[ProviderBlocking] = []
+        touched_provider_ids = set()
+
+        for provider in providers:
+            result = self._evaluate_annotated_provider(provider, context)
+            batch_stats['checked_providers'] += 1
+            active_blockings = active_by_provider.get(provider.id, [])
+            for blocking in active_blockings:
+                blocking.provider = provider
+
+            if not result['should_block']:
+                if active_blockings:
+                    resolved.extend(active_blockings)
+                    touched_provider_ids.add(provider.id)
+                continue
+
+            blocking_level = result['blocking_level']
+            debt_info = result['debt_info']
+            values = {
+                'debt_amount': debt_info['total_debt'],
+                'overdue_days': result['overdue_days'],
+                'currency': debt_info['currency'],
+                'notes': '; '.join(result['reasons']),
+            }
+            current_blocking = next(
+                (blocking for blocking in active_blockings if blocking.blocking_level == blocking_level),
+                None,
+            )
+            superseded_ids.extend(
+                blocking.id for blocking in active_blockings if blocking is not current_blocking
+            )
+            if current_blocking:
+                for field_name, value in values.items():
+                    setattr(current_blocking, field_name, value)
+                to_update.append(current_blocking)
+                if blocking_level == 1:
+                    warning_candidates.append(current_blocking)
+            else:
+                to_create.append(
+                    ProviderBlocking(provider=provider, blocking_level=blocking_level, status='active', **values)
+                )
+
+            batch_stats['blocked_providers'] += 1
+            if blocking_level == 1:
+                batch_stats['warnings'] += 1
+            touched_provider_ids.add(provider.id)
+
+            if self.settings.log_all_checks:
+                logger.info(
+                    "Provider %s evaluated to blocking level %s (debt=%s, overdue_days=%s)",
+                    provider.id,
+                    blocking_level,
+                    debt_info['total_debt'],
+                    result['overdue_days'],
+                )
+
+        now = timezone.now()
+        if superseded_ids:
+            ProviderBlocking.objects.filter(pk__in=superseded_ids).update(
+                status='resolved',
+                resolved_at=now,
+                resolved_by=None,
+                notes='Superseded by a new billing blocking evaluation',
+            )
+        if resolved:
+            ProviderBlocking.objects.filter(pk__in=[blocking.id for blocking in resolved]).update(
+                status='resolved',
+                resolved_at=now,
+                resolved_by=None,
+                notes='Billing blocking automatically removed after reevaluation',
+            )
+            batch_stats['resolved_blockings'] += len(resolved)
+        if to_update:
+            ProviderBlocking.objects.bulk_update(to_update, ['debt_amount', 'overdue_days', 'currency', 'notes'])
+        created = ProviderBlocking.objects.bulk_create(to_create)
+
+        warned_ids = set()
+        if warning_candidates:
+            warned_ids = set(
+                BlockingNotification.objects.filter(
+                    provider_blocking__in=warning_candidates,
+                    notification_type='blocking_warning',
+                ).values_list('provider_blocking_id', flat=True)
+            )
+        self._bulk_create_notifications(
+            [
+                (blocking, 'blocking_warning' if blocking.blocking_level == 1 else 'blocking_activated')
+                for blocking in created
+            ]
+            + [(blocking, 'blocking_warning') for blocking in warning_candidates if blocking.id not in warned_ids]
+            + [(blocking, 'blocking_resolved') for blocking in resolved]
+        )
+
+        self.refresh_billing_states([provider.id for provider in providers], context=context)
+        if created or resolved or superseded_ids:
+            logger.info(
+                "Billing blocking batch: %s created, %s updated, %s resolved, %s superseded",
+                len(created),
+                len(to_update),
+                len(resolved),
+                len(superseded_ids),
+            )
+        return batch_stats
+
     def _create_notifications(self, blocking: ProviderBlocking) -> None:
         """
         Создает уведомления о включении блокировки.
         """
-        recipients = self._get_notification_recipients(blocking.provider)
-        for recipient in recipients:
-            BlockingNotification.objects.create(
-                provider_blocking=blocking,
-                notification_type='blocking_activated',
-                status='pending',
-                recipient_email=recipient.get('email', ''),
-                recipient_phone=recipient.get('phone', ''),
-                subject=_("Provider billing blocking level %(level)s") % {
-                    'level': blocking.blocking_level,
-                },
-                message=self._build_notification_message(blocking),
-            )
+        self._bulk_create_notifications([(blocking, 'blocking_activated')])
 
     def _ensure_warning_notification(self, blocking: ProviderBlocking) -> None:
         """
@@ -369,59 +727,90 @@ class MultiLevelBlockingService:
         """
         if blocking.notifications.filter(notification_type='blocking_warning').exists():
             return
-
-        recipients = self._get_notification_recipients(blocking.provider)
-        for recipient in recipients:
-            BlockingNotification.objects.create(
-                provider_blocking=blocking,
-                notification_type='blocking_warning',
-                status='pending',
-                recipient_email=recipient.get('email', ''),
-                recipient_phone=recipient.get('phone', ''),
-                subject=_("Provider payment warning"),
-                message=self._build_notification_message(blocking),
-            )
+        self._bulk_create_notifications([(blocking, 'blocking_warning')])
 
     def _create_resolution_notification(self, blocking: ProviderBlocking) -> None:
         """
         Создает уведомление о снятии блокировки.
         """
-        recipients = self._get_notification_recipients(blocking.provider)
-        for recipient in recipients:
-            BlockingNotification.objects.create(
-                provider_blocking=blocking,
-                notification_type='blocking_resolved',
-                status='pending',
-                recipient_email=recipient.get('email', ''),
-                recipient_phone=recipient.get('phone', ''),
-                subject=_("Provider billing blocking resolved"),
-                message=_("Provider %(provider)s is no longer blocked for billing reasons.") % {
-                    'provider': blocking.provider.name,
-                },
-            )
+        self._bulk_create_notifications([(blocking, 'blocking_resolved')])
+
+    def _bulk_create_notifications(self, items: Iterable[Tuple[ProviderBlocking, str]]) -> None:
+        """
+        Создает уведомления (blocking, notification_type) одним bulk_create.
+
+        Получатели всех затронутых провайдеров загружаются одним запросом.
+        """
+        items = list(items)
+        if not items:
+            return
+
+        recipients_map = self._get_notification_recipients_map([blocking.provider for blocking, _type in items])
+        BlockingNotification.objects.bulk_create(
+            [
+                BlockingNotification(
+                    provider_blocking=blocking,
+                    notification_type=notification_type,
+                    status='pending',
+                    recipient_email=recipient.get('email', ''),
+                    recipient_phone=recipient.get('phone', ''),
+                    subject=self._build_notification_subject(blocking, notification_type),
+                    message=(
+                        _("Provider %(provider)s is no longer blocked for billing reasons.") % {
+                            'provider': blocking.provider.name,
+                        }
+                        if notification_type == 'blocking_resolved'
+                        else self._build_notification_message(blocking)
+                    ),
+                )
+                for blocking, notification_type in items
+                for recipient in recipients_map.get(blocking.provider_id, [])
+            ]
+        )
 
     def _get_notification_recipients(self, provider: Provider) -> List[Dict[str, str]]:
         """
         Возвращает получателей уведомлений для организации.
         """
-        recipients: List[Dict[str, str]] = []
-        admin_links = EmployeeProvider.get_active_admin_links(provider)
+        return self._get_notification_recipients_map([provider]).get(provider.id, [])
+
+    def _get_notification_recipients_map(self, providers: Iterable[Provider]) -> Dict[int, List[Dict[str, str]]]:
+        """
+        Возвращает получателей уведомлений по id провайдера одним запросом.
+
+        Админы провайдера с email; если их нет — контакты самой организации.
+        """
+        providers_by_id = {provider.id: provider for provider in providers}
+        recipients: Dict[int, List[Dict[str, str]]] = defaultdict(list)
+        admin_links = EmployeeProvider.get_active_admin_links_for_providers(list(providers_by_id))
         for admin_link in admin_links:
             user = admin_link.employee.user
             if user.email:
-                recipients.append({
+                recipients[admin_link.provider_id].append({
                     'email': user.email,
                     'phone': getattr(user, 'phone_number', '') or '',
                 })
 
-        if not recipients and provider.email:
-            recipients.append({
-                'email': provider.email,
-                'phone': provider.phone_number or '',
-            })
+        for provider_id, provider in providers_by_id.items():
+            if not recipients.get(provider_id) and provider.email:
+                recipients[provider_id].append({
+                    'email': provider.email,
+                    'phone': provider.phone_number or '',
+                })
 
         return recipients
 
+    @staticmethod
+    def _build_notification_subject(blocking: ProviderBlocking, notification_type: str) -> str:
+        """Тема уведомления по типу."""
+        if notification_type == 'blocking_warning':
+            return _("Provider payment warning")
+        if notification_type == 'blocking_resolved':
+            return _("Provider billing blocking resolved")
+        return _("Provider billing blocking level %(level)s") % {
+            'level': blocking.blocking_level,
+        }
+
     def _build_notification_message(self, blocking: ProviderBlocking) -> str:
         """
         Формирует стандартное тело уведомления по блокировке.
@@ -3,9 +3,13 @@
 
 Содержит:
 - Логирование изменений блокировки организации
+- Пересчёт снимка ProviderBillingState при изменении долга, блокировок и
+  биллинговых полей провайдера
+- Сброс кэша провайдера кабинета при смене ролей сотрудника, руководителя филиала
+  и системных ролей пользователя
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
 from django.dispatch import receiver
 import logging
 
@@ -23,10 +27,13 @@ def handle_provider_blocking(sender, instance, created, **kwargs):
     в одинаковую полную блокировку.
     """
     from .models import ProviderBlocking
+    from .services import schedule_billing_state_refresh
 
     if not isinstance(instance, ProviderBlocking):
         return
 
+    schedule_billing_state_refresh(instance.provider_id)
+
     if instance.status == 'active':
         provider = instance.provider
         logger.info(
@@ -45,6 +52,172 @@ def handle_provider_blocking(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_save, sender='billing.PaymentHistory')
+@receiver(post_delete, sender='billing.PaymentHistory')
+@receiver(post_save, sender='billing.Invoice')
+@receiver(post_delete, sender='billing.Invoice')
+def refresh_billing_state_on_debt_change(sender, instance, **kwargs):
+    """Долг провайдера изменился — пересчитываем снимок после коммита."""
+    from .services import schedule_billing_state_refresh
+
+    schedule_billing_state_refresh(instance.provider_id)
+
+
+@receiver(post_save, sender='billing.Payment')
+@receiver(post_delete, sender='billing.Payment')
+def refresh_billing_state_on_payment(sender, instance, **kwargs):
+    """Платёж разнесён или удалён — пересчитываем снимок провайдера."""
+    from .services import schedule_billing_state_refresh
+
+    provider_id = instance.provider_id
+    if provider_id is None and instance.invoice_id:
+        provider_id = instance.invoice.provider_id
+    schedule_billing_state_refresh(provider_id)
+
+
+@receiver(post_save, sender='billing.Refund')
+@receiver(post_delete, sender='billing.Refund')
+def refresh_billing_state_on_refund(sender, instance, **kwargs):
+    """Возврат меняет остаток долга — пересчитываем снимок провайдера."""
+    from .services import schedule_billing_state_refresh
+
+    payment = instance.payment
+    provider_id = payment.provider_id
+    if provider_id is None and payment.invoice_id:
+        provider_id = payment.invoice.provider_id
+    schedule_billing_state_refresh(provider_id)
+
+
+@receiver(post_save, sender='legal.DocumentAcceptance')
+def refresh_billing_state_on_offer_acceptance(sender, instance, **kwargs):
+    """Акцепт оферты влияет на применимость блокировки."""
+    from .services import schedule_billing_state_refresh
+
+    schedule_billing_state_refresh(instance.provider_id)
+
+
+# Поля провайдера, от которых зависят пороги, применимость оферты и исключение
+# из проверок; is_active читает middleware из провайдера снимка.
+BILLING_STATE_PROVIDER_FIELDS = (
+    'country',
+    'blocking_region_code',
+    'invoice_currency_id',
+    'exclude_from_blocking_checks',
+    'is_active',
+)
+
+
+def _billing_state_provider_values(instance):
+    return {
+        field: instance.__dict__[field]
+        for field in BILLING_STATE_PROVIDER_FIELDS
+        if field in instance.__dict__
+    }
+
+
+@receiver(post_init, sender='providers.Provider')
+def remember_provider_billing_fields(sender, instance, **kwargs):
+    """Запоминает поля провайдера, влияющие на снимок биллингового состояния."""
+    instance._billing_state_values = _billing_state_provider_values(instance)
+
+
+@receiver(post_save, sender='providers.Provider')
+def refresh_billing_state_on_provider_change(sender, instance, created, **kwargs):
+    """
+    Новый провайдер мог получить id, отсутствие которого уже закэшировано;
+    смена региона, страны, валюты счетов или исключения из проверок меняет
+    снимок — пересчитываем его после коммита.
+    """
+    from .services import invalidate_provider_blocking_cache, schedule_billing_state_refresh
+
+    if created:
+        invalidate_provider_blocking_cache(instance.pk)
+        return
+
+    previous = getattr(instance, '_billing_state_values', {})
+    current = _billing_state_provider_values(instance)
+    instance._billing_state_values = current
+    if any(field not in previous or previous[field] != value for field, value in current.items()):
+        schedule_billing_state_refresh(instance.pk)
+
+
+@receiver(post_save, sender='providers.EmployeeProvider')
+@receiver(post_delete, sender='providers.EmployeeProvider')
+def invalidate_provider_context_on_role_change(sender, instance, **kwargs):
+    """Связь сотрудника с организацией изменилась — сбрасываем кэш провайдера кабинета."""
+    from .provider_context import invalidate_user_provider_context
+
+    invalidate_user_provider_context(instance.employee.user_id)
+
+
+@receiver(post_save, sender='providers.EmployeeLocationRole')
+@receiver(post_delete, sender='providers.EmployeeLocationRole')
+def invalidate_provider_context_on_location_role_change(sender, instance, **kwargs):
+    """Роль сотрудника в филиале изменилась — сбрасываем кэш провайдера кабинета."""
+    from .provider_context import invalidate_user_provider_context
+
+    invalidate_user_provider_context(instance.employee.user_id)
+
+
+@receiver(post_init, sender='providers.ProviderLocation')
+def remember_location_manager(sender, instance, **kwargs):
+    """Запоминает руководителя филиала, чтобы при переназначении сбросить кэш прежнего."""
+    if 'manager_id' in instance.__dict__:
+        instance._provider_context_manager_id = instance.manager_id
+
+
+@receiver(post_save, sender='providers.ProviderLocation')
+@receiver(post_delete, sender='providers.ProviderLocation')
+def invalidate_provider_context_on_manager_change(sender, instance, created=False, **kwargs):
+    """Руководитель филиала назначен, снят или филиал удалён — сбрасываем кэш обоих пользователей."""
+    from .provider_context import invalidate_user_provider_context
+
+    previous_manager_id = getattr(instance, '_provider_context_manager_id', None)
+    current_manager_id = instance.__dict__.get('manager_id')
+    is_update = kwargs.get('signal') is post_save and not created
+    if is_update and previous_manager_id == current_manager_id:
+        return
+    invalidate_user_provider_context(previous_manager_id)
+    invalidate_user_provider_context(current_manager_id)
+    instance._provider_context_manager_id = current_manager_id
+
+
+@receiver(m2m_changed, sender='users.User_user_types')
+def invalidate_provider_context_on_user_roles_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Роль billing_manager открывает доступ ко всем провайдерам — при смене
+    системных ролей сбрасываем кэш провайдера кабинета.
+    """
+    from .provider_context import invalidate_user_provider_context
+
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_user_provider_context(instance.pk)
+        return
+    # Изменение со стороны роли: pk_set содержит id пользователей, для clear
+    # пользователей роли читаем до очистки.
+    if action in ('post_add', 'post_remove'):
+        user_ids = pk_set
+    elif action == 'pre_clear':
+        user_ids = instance.user_set.values_list('pk', flat=True)
+    else:
+        return
+    for user_id in user_ids:
+        invalidate_user_provider_context(user_id)
+
+
+@receiver(post_save, sender='billing.RegionalBlockingPolicy')
+@receiver(post_delete, sender='billing.RegionalBlockingPolicy')
+def expire_billing_states_on_policy_change(sender, instance, **kwargs):
+    """
+    Пороги изменились для многих провайдеров сразу: помечаем снимки устаревшими,
+    они пересчитаются при следующем чтении или ночной проверке.
+    """
+    from .models import ProviderBillingState
+
+    ProviderBillingState.objects.exclude(computed_on=None).update(computed_on=None)
+
+
 # УДАЛЕНО: Сигнал для PublicOffer - модель удалена
 # Уведомления об изменениях оферты теперь обрабатываются в приложении legal
 # @receiver(post_save, sender='billing.PublicOffer')
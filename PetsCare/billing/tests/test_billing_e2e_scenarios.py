@@ -1,13 +1,20 @@
 import json
 from types import SimpleNamespace
 
+from django.core.cache import cache
 from django.core.management import call_command
 from django.http import JsonResponse
 from django.test import RequestFactory, TestCase
 from rest_framework.test import APIClient
 
 from billing.middleware import ProviderBlockingMiddleware
-from billing.models import BlockingNotification, BlockingSystemSettings, Invoice, ProviderBlocking
+from billing.models import (
+    BlockingNotification,
+    BlockingSystemSettings,
+    Invoice,
+    ProviderBillingState,
+    ProviderBlocking,
+)
 from billing.services import MultiLevelBlockingService
 from pets.models import Pet
 from providers.models import Provider
@@ -206,3 +213,92 @@ class BillingE2EScenariosTest(TestCase):
                 notification_type='blocking_activated',
             ).exists()
         )
+
+    def test_bulk_evaluation_matches_single_provider_check(self):
+        self.service.check_all_providers()
+
+        for provider in Provider.objects.filter(is_active=True):
+            expected = self.service.check_provider_blocking(provider, use_cache=False)
+            active = provider.blockings.filter(status='active').first()
+            if expected['should_block']:
+                self.assertEqual(active.blocking_level, expected['blocking_level'])
+                self.assertEqual(active.overdue_days, expected['overdue_days'])
+                self.assertEqual(active.debt_amount, expected['debt_info']['total_debt'])
+            else:
+                self.assertIsNone(active)
+
+    def test_repeated_check_is_idempotent(self):
+        self.service.check_all_providers()
+        blockings = ProviderBlocking.objects.count()
+        notifications = BlockingNotification.objects.count()
+
+        stats = self.service.check_all_providers()
+
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual(stats['resolved_blockings'], 0)
+        self.assertEqual(ProviderBlocking.objects.count(), blockings)
+        self.assertEqual(BlockingNotification.objects.count(), notifications)
+
+    def test_paid_debt_resolves_blocking_on_next_check(self):
+        self.service.check_all_providers()
+        provider = Provider.objects.get(name='Provider_Level2')
+        for payment in provider.payment_history.all():
+            payment.mark_as_paid()
+
+        stats = self.service.check_all_providers()
+
+        self.assertGreaterEqual(stats['resolved_blockings'], 1)
+        self.assertFalse(provider.blockings.filter(status='active').exists())
+        self.assertTrue(
+            BlockingNotification.objects.filter(
+                provider_blocking__provider=provider,
+                notification_type='blocking_resolved',
+            ).exists()
+        )
+
+    def test_middleware_reads_billing_state_snapshot(self):
+        self.service.check_all_providers()
+        provider = Provider.objects.get(name='Provider_Level2')
+        state = ProviderBillingState.objects.get(provider=provider)
+        self.assertEqual(state.blocking_level, 2)
+        self.assertEqual(state.active_blocking.blocking_level, 2)
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            result = self.middleware._check_provider_blocking(provider)
+        self.assertEqual(result['blocking_level'], 2)
+        self.assertEqual(result['overdue_days'], state.max_overdue_days)
+        with self.assertNumQueries(0):
+            self.middleware._check_provider_blocking(provider)
+
+    def test_missing_provider_billing_state_is_cached(self):
+        missing_provider_id = Provider.objects.order_by('-id').values_list('id', flat=True).first() + 1000
+
+        cache.clear()
+        self.assertIsNone(self.service.get_billing_state(missing_provider_id))
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.service.get_billing_state(missing_provider_id))
+
+    def test_payment_refreshes_billing_state_after_commit(self):
+        self.service.check_all_providers()
+        provider = Provider.objects.get(name='Provider_Level3')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for payment in provider.payment_history.all():
+                payment.mark_as_paid()
+
+        state = ProviderBillingState.objects.get(provider=provider)
+        self.assertEqual(state.blocking_level, 0)
+        self.assertEqual(state.overdue_debt, 0)
+        self.assertFalse(self.middleware._check_provider_blocking(provider)['is_blocked'])
+
+    def test_provider_exclusion_change_refreshes_billing_state(self):
+        self.service.check_all_providers()
+        provider = Provider.objects.get(name='Provider_Level3')
+        self.assertFalse(self.service.get_billing_state(provider.id).provider.exclude_from_blocking_checks)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            provider.exclude_from_blocking_checks = True
+            provider.save(update_fields=['exclude_from_blocking_checks'])
+
+        self.assertTrue(self.service.get_billing_state(provider.id).provider.exclude_from_blocking_checks)
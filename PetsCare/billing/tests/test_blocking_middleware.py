@@ -1,9 +1,12 @@
+import json
 from types import SimpleNamespace
 from unittest.mock import Mock, patch
 
 from django.test import RequestFactory, SimpleTestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
 from billing.middleware import ProviderBlockingMiddleware
+from billing.provider_context import NO_PROVIDER, PROVIDER_CONTEXT_CACHE_KEY, ProviderContextResolver, cache
 
 
 class ProviderBlockingMiddlewareTests(SimpleTestCase):
@@ -43,3 +46,53 @@ class ProviderBlockingMiddlewareTests(SimpleTestCase):
         self.assertIsNone(response)
         self.assertTrue(request.provider_blocking_check_performed)
         self.assertTrue(hasattr(request, 'blocking_start_time'))
+
+
+class ProviderContextResolverTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        cache.clear()
+
+    def test_provider_id_comes_from_route_kwargs(self):
+        request = self.factory.get('/api/v1/providers/73/admins/')
+
+        self.assertEqual(ProviderContextResolver.resolve_provider_id(request), 73)
+
+    def test_registered_route_uses_its_kwarg(self):
+        request = self.factory.get('/api/v1/providers/73/')
+
+        self.assertEqual(ProviderContextResolver.resolve_provider_id(request), 73)
+
+    def test_unregistered_pk_route_is_not_provider_context(self):
+        request = self.factory.get('/api/v1/employees/73/')
+        request.user = SimpleNamespace(is_authenticated=False)
+
+        self.assertIsNone(ProviderContextResolver.resolve_provider_id(request))
+
+    def test_json_body_is_never_read(self):
+        request = self.factory.post(
+            '/api/v1/provider-locations/',
+            data=json.dumps({'provider_id': 73}),
+            content_type='application/json',
+        )
+        request.user = SimpleNamespace(is_authenticated=False)
+
+        self.assertIsNone(ProviderContextResolver.resolve_provider_id(request))
+        self.assertFalse(hasattr(request, '_body'))
+
+    def test_jwt_subject_uses_cached_provider_context(self):
+        token = AccessToken()
+        token['user_id'] = 5
+        cache.set(PROVIDER_CONTEXT_CACHE_KEY.format(user_id=5), 42)
+        request = self.factory.get('/api/v1/provider-locations/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        with patch.object(ProviderContextResolver, '_load_user_provider_id', side_effect=AssertionError):
+            self.assertEqual(ProviderContextResolver.resolve_provider_id(request), 42)
+
+    def test_cached_absence_of_provider_returns_none(self):
+        token = AccessToken()
+        token['user_id'] = 5
+        cache.set(PROVIDER_CONTEXT_CACHE_KEY.format(user_id=5), NO_PROVIDER)
+        request = self.factory.get('/api/v1/invoices/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertIsNone(ProviderContextResolver.resolve_provider_id(request))
@@ -8,6 +8,7 @@ Configuration for the booking application.
 """
 
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -24,3 +25,38 @@ class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
     verbose_name = _('Booking')
+
+    def ready(self):
+        """
+        Подключение сигналов bitmap-индекса доступности и справочников.
+        """
+        from django.test.signals import setting_changed
+
+        from catalog.models import Service
+        from pets.models import PetType, SizeRule
+        from providers.models import LocationSchedule, Schedule
+        from scheduling.models import SickLeave, Vacation
+
+        from . import availability_index, reference_data
+        from .models import Booking, BookingStatus
+
+        # Busy masks сотрудников пересчитываются при любом изменении бронирования
+        pre_save.connect(availability_index.remember_previous_booking_interval, sender=Booking)
+        post_save.connect(availability_index.refresh_booking_availability, sender=Booking)
+        post_delete.connect(availability_index.refresh_booking_availability, sender=Booking)
+
+        # Work masks зависят от расписаний локации и сотрудников
+        for schedule_model in (Schedule, LocationSchedule):
+            post_save.connect(availability_index.invalidate_location_schedule_availability, sender=schedule_model)
+            post_delete.connect(availability_index.invalidate_location_schedule_availability, sender=schedule_model)
+
+        # Отпуска и больничные гасят рабочие дни сотрудника
+        for absence_model in (Vacation, SickLeave):
+            post_save.connect(availability_index.invalidate_employee_absence_availability, sender=absence_model)
+            post_delete.connect(availability_index.invalidate_employee_absence_availability, sender=absence_model)
+
+        # Справочники горячего пути бронирования кешируются в памяти процесса
+        for reference_model in (SizeRule, BookingStatus, PetType, Service):
+            post_save.connect(reference_data.invalidate_reference_data_on_change, sender=reference_model)
+            post_delete.connect(reference_data.invalidate_reference_data_on_change, sender=reference_model)
+        setting_changed.connect(reference_data.reset_reference_data_on_setting_change)
@@ -0,0 +1,606 @@
+"""
+Bitmap-индекс занятости сотрудников для генерации слотов.
+
+День сотрудника в локации представлен целым числом, где бит N соответствует
+минуте N от локальной полуночи. Индекс хранит две маски:
+
+1. work mask — рабочее окно: LocationSchedule ∩ Schedule минус перерыв
+   (зависит от локации, сотрудника и дня недели);
+2. busy mask — минуты, занятые активными бронированиями сотрудника
+   (зависит только от сотрудника и даты, т.к. конфликт по сотруднику глобальный).
+
+Свободные стартовые минуты слота находятся битовыми операциями:
+free = work & ~busy, затем AND сдвигов free на длительность услуги
+и пересечение с сеткой шага slot_step_minutes.
+
+Маски кешируются в Django cache. Busy mask пересчитывается при создании,
+изменении, отмене и удалении бронирования (сигналы модели). Массовая запись
+(QuerySet.update, bulk_create) сигналов не отправляет: такие места вызывают
+AvailabilityBitmapIndex.refresh_bookings, а короткий TTL busy masks
+ограничивает срок жизни пропущенной инвалидации. Work mask инвалидируется
+через версию расписания локации при изменении Schedule/LocationSchedule,
+Vacation и SickLeave. Без общего кеша (LocMem в процессе) инвалидация не
+доходит до других воркеров, поэтому TTL обеих масок ограничен
+BOOKING_AVAILABILITY_LOCAL_TIMEOUT_SECONDS.
+
+Промахи кеша для диапазона дат достраиваются фиксированным числом
+запросов независимо от длины диапазона и числа сотрудников.
+"""
+
+from __future__ import annotations
+
+import math
+import time as time_module
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from providers.models import Employee, LocationSchedule, ProviderLocation, Schedule
+from scheduling.models import SickLeave, Vacation
+from utils.caching import get_namespace_cache
+
+from .constants import ACTIVE_BOOKING_STATUS_NAMES, BOOKING_STATUS_ACTIVE
+from .manual_v2_models import ManualBooking
+from .models import Booking
+
+
+MINUTES_PER_DAY = 24 * 60
+CACHE_KEY_PREFIX = 'booking_availability'
+NO_WORK_ENTRY = (-1, 0)
+
+cache = get_namespace_cache('booking_availability')
+
+
+def interval_mask(start_minute: int, end_minute: int) -> int:
+    """Возвращает маску минут [start_minute, end_minute) в пределах суток."""
+    start_minute = max(start_minute, 0)
+    end_minute = min(end_minute, MINUTES_PER_DAY)
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+def window_mask(free_mask: int, length: int) -> int:
+    """Оставляет биты s, для которых свободны все минуты s..s+length-1.
+
+    Использует удвоение окна, поэтому требует O(log length) битовых операций.
+    """
+    if length <= 0:
+        return free_mask
+    result = free_mask
+    span = 1
+    while span < length and result:
+        shift = min(span, length - span)
+        result &= result >> shift
+        span += shift
+    return result
+
+
+@lru_cache(maxsize=1024)
+def grid_mask(anchor_minute: int, step_minutes: int) -> int:
+    """Возвращает маску допустимых стартов слотов: anchor + k * step."""
+    mask = 0
+    for minute in range(max(anchor_minute, 0), MINUTES_PER_DAY, max(step_minutes, 1)):
+        mask |= 1 << minute
+    return mask
+
+
+def iter_set_bits(mask: int) -> Iterator[int]:
+    """Перебирает номера установленных битов по возрастанию."""
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+
+def _time_to_minute(value: time, *, round_up: bool = False) -> int:
+    """Переводит время суток в минуту от полуночи."""
+    minute = value.hour * 60 + value.minute
+    if round_up and (value.second or value.microsecond):
+        minute += 1
+    return minute
+
+
+@dataclass(frozen=True)
+class EmployeeDayBitmap:
+    """Маски рабочего окна и занятости сотрудника на одну дату в локации."""
+
+    employee_id: int
+    work_start_minute: int
+    work_mask: int
+    busy_mask: int
+
+    @property
+    def free_mask(self) -> int:
+        """Минуты, в которые сотрудник работает и не занят бронированиями."""
+        return self.work_mask & ~self.busy_mask
+
+    def slot_start_minutes(
+        self,
+        *,
+        duration_minutes: int,
+        step_minutes: int,
+        not_before_minute: int = 0,
+    ) -> Iterator[int]:
+        """Возвращает стартовые минуты свободных слотов заданной длительности."""
+        if self.work_start_minute < 0 or not self.work_mask:
+            return iter(())
+        candidates = window_mask(self.free_mask, duration_minutes)
+        candidates &= grid_mask(self.work_start_minute, step_minutes)
+        if not_before_minute > 0:
+            candidates &= ~((1 << not_before_minute) - 1)
+        return iter_set_bits(candidates)
+
+
+class AvailabilityBitmapIndex:
+    """Кешируемый bitmap-индекс доступности сотрудников по дням."""
+
+    @classmethod
+    def get_cache_timeout(cls) -> int:
+        """Возвращает TTL масок в кеше."""
+        timeout = max(int(getattr(settings, 'BOOKING_AVAILABILITY_INDEX_TIMEOUT_SECONDS', 6 * 3600)), 60)
+        return cls._limit_local_timeout(timeout)
+
+    @classmethod
+    def get_busy_cache_timeout(cls) -> int:
+        """Возвращает TTL busy masks; он короче TTL work masks, которые версионируются."""
+        timeout = max(int(getattr(settings, 'BOOKING_AVAILABILITY_BUSY_TIMEOUT_SECONDS', 5 * 60)), 60)
+        return cls._limit_local_timeout(timeout)
+
+    @staticmethod
+    def _limit_local_timeout(timeout: int) -> int:
+        """
+        Без общего кеша (LocMem) версия расписания и сброс busy mask видны только
+        своему процессу: TTL ограничивается, чтобы другие воркеры не предлагали
+        исчезнувшие слоты часами.
+        """
+        if cache.is_shared:
+            return timeout
+        local_timeout = int(getattr(settings, 'BOOKING_AVAILABILITY_LOCAL_TIMEOUT_SECONDS', 60))
+        return min(timeout, max(local_timeout, 1))
+
+    @staticmethod
+    def day_start(target_date: date) -> datetime:
+        """Возвращает aware-начало локальных суток."""
+        return timezone.make_aware(
+            datetime.combine(target_date, datetime.min.time()),
+            timezone.get_current_timezone(),
+        )
+
+    @classmethod
+    def first_minute_after(cls, target_date: date, moment: datetime) -> int | None:
+        """Возвращает первую минуту суток строго после moment.
+
+        None означает, что все минуты суток уже в прошлом.
+        """
+        day_start = cls.day_start(target_date)
+        elapsed_seconds = (moment - day_start).total_seconds()
+        if elapsed_seconds < 0:
+            return 0
+        first_minute = math.floor(elapsed_seconds / 60) + 1
+        if first_minute >= MINUTES_PER_DAY:
+            return None
+        return first_minute
+
+    @staticmethod
+    def date_range(date_start: date, date_end: date) -> list[date]:
+        """Возвращает список дат [date_start, date_end] включительно."""
+        dates = []
+        current_date = date_start
+        while current_date <= date_end:
+            dates.append(current_date)
+            current_date += timedelta(days=1)
+        return dates
+
+    @classmethod
+    def get_day_bitmaps(
+        cls,
+        *,
+        provider_location: ProviderLocation,
+        employees: Iterable[Employee],
+        target_date: date,
+    ) -> dict[int, EmployeeDayBitmap]:
+        """Возвращает bitmap-маски сотрудников локации на дату."""
+        return cls.get_range_bitmaps(
+            provider_location=provider_location,
+            employees=employees,
+            date_start=target_date,
+            date_end=target_date,
+        )[target_date]
+
+    @classmethod
+    def get_range_bitmaps(
+        cls,
+        *,
+        provider_location: ProviderLocation,
+        employees: Iterable[Employee],
+        date_start: date,
+        date_end: date,
+    ) -> dict[date, dict[int, EmployeeDayBitmap]]:
+        """Возвращает bitmap-маски сотрудников локации на каждую дату диапазона.
+
+        Число запросов к БД не зависит ни от длины диапазона, ни от числа сотрудников.
+        """
+        dates = cls.date_range(date_start, date_end)
+        employee_ids = [employee.id for employee in employees]
+        if not employee_ids or not dates:
+            return {target_date: {} for target_date in dates}
+
+        work_entries = cls._get_work_entries(provider_location.id, employee_ids, dates)
+        busy_masks = cls._get_busy_masks(employee_ids, dates)
+        return {
+            target_date: {
+                employee_id: EmployeeDayBitmap(
+                    employee_id=employee_id,
+                    work_start_minute=work_entries[(employee_id, target_date)][0],
+                    work_mask=work_entries[(employee_id, target_date)][1],
+                    busy_mask=busy_masks[(employee_id, target_date)],
+                )
+                for employee_id in employee_ids
+            }
+            for target_date in dates
+        }
+
+    @staticmethod
+    def build_work_entry(
+        location_schedule: LocationSchedule | None,
+        employee_schedule: Schedule | None,
+    ) -> tuple[int, int]:
+        """Строит (минуту начала работы, work mask) из расписаний."""
+        if location_schedule is None or employee_schedule is None:
+            return NO_WORK_ENTRY
+        if location_schedule.is_closed or not employee_schedule.is_working:
+            return NO_WORK_ENTRY
+        if (
+            location_schedule.open_time is None
+            or location_schedule.close_time is None
+            or employee_schedule.start_time is None
+            or employee_schedule.end_time is None
+        ):
+            return NO_WORK_ENTRY
+
+        work_start = _time_to_minute(
+            max(location_schedule.open_time, employee_schedule.start_time),
+            round_up=True,
+        )
+        work_end = _time_to_minute(min(location_schedule.close_time, employee_schedule.end_time))
+        mask = interval_mask(work_start, work_end)
+        if not mask:
+            return NO_WORK_ENTRY
+
+        if employee_schedule.break_start and employee_schedule.break_end:
+            mask &= ~interval_mask(
+                _time_to_minute(employee_schedule.break_start),
+                _time_to_minute(employee_schedule.break_end, round_up=True),
+            )
+        return work_start, mask
+
+    @classmethod
+    def build_busy_masks(
+        cls,
+        employee_ids: Iterable[int],
+        dates: Iterable[date],
+    ) -> dict[tuple[int, date], int]:
+        """Строит busy masks для всех пар (сотрудник, дата) одним запросом к бронированиям."""
+        return cls._build_interval_masks(
+            Booking.objects.filter(status__name__in=ACTIVE_BOOKING_STATUS_NAMES),
+            employee_ids,
+            dates,
+        )
+
+    @classmethod
+    def build_manual_busy_masks(
+        cls,
+        employee_ids: Iterable[int],
+        dates: Iterable[date],
+    ) -> dict[tuple[int, date], int]:
+        """Строит маски занятости по активным ручным записям (Manual Booking V2).
+
+        Ручные записи не кешируются в индексе: они нужны только manual flow.
+        """
+        return cls._build_interval_masks(
+            ManualBooking.objects.filter(status=BOOKING_STATUS_ACTIVE),
+            employee_ids,
+            dates,
+        )
+
+    @classmethod
+    def _build_interval_masks(
+        cls,
+        queryset,
+        employee_ids: Iterable[int],
+        dates: Iterable[date],
+    ) -> dict[tuple[int, date], int]:
+        """Накладывает интервалы employee/start_time/end_time из queryset на маски дней."""
+        employee_ids = list(employee_ids)
+        day_starts = {target_date: cls.day_start(target_date) for target_date in dates}
+        masks = {
+            (employee_id, target_date): 0
+            for employee_id in employee_ids
+            for target_date in day_starts
+        }
+        if not masks:
+            return masks
+
+        window_start = day_starts[min(day_starts)]
+        window_end = day_starts[max(day_starts)] + timedelta(days=1)
+        rows = queryset.filter(
+            employee_id__in=employee_ids,
+            start_time__lt=window_end,
+            end_time__gt=window_start,
+        ).values_list('employee_id', 'start_time', 'end_time')
+        for employee_id, start_time, end_time in rows:
+            for target_date in cls.local_dates_between(start_time, end_time):
+                day_start = day_starts.get(target_date)
+                if day_start is None:
+                    continue
+                masks[(employee_id, target_date)] |= cls.booking_interval_mask(day_start, start_time, end_time)
+        return masks
+
+    @staticmethod
+    def booking_interval_mask(day_start: datetime, start_time: datetime, end_time: datetime) -> int:
+        """Возвращает маску минут суток, которые задевает интервал бронирования."""
+        start_minute = math.floor((start_time - day_start).total_seconds() / 60)
+        end_minute = math.ceil((end_time - day_start).total_seconds() / 60)
+        return interval_mask(start_minute, end_minute)
+
+    @classmethod
+    def invalidate_location_schedule(cls, provider_location_id: int) -> None:
+        """Сбрасывает work masks локации сменой версии расписания."""
+        cache.set(
+            cls._schedule_version_key(provider_location_id),
+            time_module.time_ns(),
+            None,
+        )
+
+    @classmethod
+    def refresh_employee_days(cls, employee_days: Iterable[tuple[int, date]]) -> None:
+        """Сбрасывает busy masks сразу и пересобирает их после commit транзакции."""
+        pairs = {(employee_id, target_date) for employee_id, target_date in employee_days if employee_id}
+        if not pairs:
+            return
+        cache.delete_many([cls._busy_key(employee_id, target_date) for employee_id, target_date in pairs])
+        transaction.on_commit(lambda: cls.rebuild_busy_masks(pairs))
+
+    @classmethod
+    def refresh_bookings(cls, bookings) -> None:
+        """
+        Сбрасывает busy masks по бронированиям (QuerySet или список объектов).
+
+        Для записи в обход сигналов: после bulk_create, а для QuerySet.update —
+        до и после обновления, чтобы учесть старые и новые интервалы.
+        """
+        if isinstance(bookings, QuerySet):
+            intervals = list(bookings.values_list('employee_id', 'start_time', 'end_time'))
+        else:
+            intervals = [(booking.employee_id, booking.start_time, booking.end_time) for booking in bookings]
+        cls.refresh_employee_days(cls.employee_days_for_intervals(intervals))
+
+    @classmethod
+    def employee_days_for_intervals(cls, intervals) -> list[tuple[int, date]]:
+        """Возвращает пары (сотрудник, дата), которые задевают интервалы (employee_id, start, end)."""
+        employee_days = []
+        for employee_id, start_time, end_time in intervals:
+            if employee_id is None or start_time is None or end_time is None:
+                continue
+            for target_date in cls.local_dates_between(start_time, end_time):
+                employee_days.append((employee_id, target_date))
+        return employee_days
+
+    @classmethod
+    def rebuild_busy_masks(cls, employee_days: Iterable[tuple[int, date]]) -> None:
+        """Пересчитывает и сохраняет busy masks для пар (сотрудник, дата)."""
+        pairs = set(employee_days)
+        if not pairs:
+            return
+        busy_masks = cls.build_busy_masks(
+            {employee_id for employee_id, _ in pairs},
+            {target_date for _, target_date in pairs},
+        )
+        cache.set_many(
+            {
+                cls._busy_key(employee_id, target_date): busy_masks[(employee_id, target_date)]
+                for employee_id, target_date in pairs
+            },
+            cls.get_busy_cache_timeout(),
+        )
+
+    @classmethod
+    def local_dates_between(cls, start_time: datetime, end_time: datetime) -> list[date]:
+        """Возвращает локальные даты, которые задевает интервал [start_time, end_time)."""
+        first_date = timezone.localtime(start_time).date()
+        last_moment = end_time - timedelta(microseconds=1) if end_time > start_time else start_time
+        last_date = timezone.localtime(last_moment).date()
+        return cls.date_range(first_date, last_date)
+
+    @classmethod
+    def _get_work_entries(
+        cls,
+        provider_location_id: int,
+        employee_ids: list[int],
+        dates: list[date],
+    ) -> dict[tuple[int, date], tuple[int, int]]:
+        """Возвращает work entries из кеша, достраивая недостающие из БД."""
+        version = cls._get_schedule_version(provider_location_id)
+        keys = {
+            (employee_id, target_date): cls._work_key(provider_location_id, employee_id, target_date, version)
+            for employee_id in employee_ids
+            for target_date in dates
+        }
+        cached = cache.get_many(list(keys.values()))
+        entries: dict[tuple[int, date], tuple[int, int]] = {}
+        missing_pairs: list[tuple[int, date]] = []
+        for pair, key in keys.items():
+            if key in cached:
+                entries[pair] = tuple(cached[key])
+            else:
+                missing_pairs.append(pair)
+
+        if missing_pairs:
+            built = cls._build_work_entries(provider_location_id, missing_pairs)
+            cache.set_many(
+                {keys[pair]: entry for pair, entry in built.items()},
+                cls.get_cache_timeout(),
+            )
+            entries.update(built)
+        return entries
+
+    @classmethod
+    def _build_work_entries(
+        cls,
+        provider_location_id: int,
+        pairs: list[tuple[int, date]],
+    ) -> dict[tuple[int, date], tuple[int, int]]:
+        """Строит work entries для пар (сотрудник, дата) четырьмя запросами.
+
+        Загружает расписание локации, расписания сотрудников, отпуска и больничные
+        сразу на весь диапазон дат; дни отсутствия получают пустую маску.
+        """
+        employee_ids = {employee_id for employee_id, _ in pairs}
+        first_date = min(target_date for _, target_date in pairs)
+        last_date = max(target_date for _, target_date in pairs)
+
+        location_schedules = {
+            schedule.weekday: schedule
+            for schedule in LocationSchedule.objects.filter(provider_location_id=provider_location_id)
+        }
+        employee_schedules = {
+            (schedule.employee_id, schedule.day_of_week): schedule
+            for schedule in Schedule.objects.filter(
+                employee_id__in=employee_ids,
+                provider_location_id=provider_location_id,
+            )
+        }
+
+        location_scope = Q(provider_location_id=provider_location_id) | Q(provider_location__isnull=True)
+        absences: dict[int, list[tuple[date, date | None]]] = {}
+        vacation_rows = Vacation.objects.filter(
+            location_scope,
+            employee_id__in=employee_ids,
+            start_date__lte=last_date,
+            end_date__gte=first_date,
+        ).values_list('employee_id', 'start_date', 'end_date')
+        sick_leave_rows = SickLeave.objects.filter(
+            location_scope,
+            Q(end_date__isnull=True) | Q(end_date__gte=first_date),
+            employee_id__in=employee_ids,
+            start_date__lte=last_date,
+        ).values_list('employee_id', 'start_date', 'end_date')
+        for employee_id, start_date, end_date in [*vacation_rows, *sick_leave_rows]:
+            absences.setdefault(employee_id, []).append((start_date, end_date))
+
+        entries: dict[tuple[int, date], tuple[int, int]] = {}
+        for employee_id, target_date in pairs:
+            is_absent = any(
+                start_date <= target_date and (end_date is None or target_date <= end_date)
+                for start_date, end_date in absences.get(employee_id, [])
+            )
+            if is_absent:
+                entries[(employee_id, target_date)] = NO_WORK_ENTRY
+                continue
+            weekday = target_date.weekday()
+            entries[(employee_id, target_date)] = cls.build_work_entry(
+                location_schedules.get(weekday),
+                employee_schedules.get((employee_id, weekday)),
+            )
+        return entries
+
+    @classmethod
+    def _get_busy_masks(cls, employee_ids: list[int], dates: list[date]) -> dict[tuple[int, date], int]:
+        """Возвращает busy masks из кеша, достраивая недостающие одним запросом."""
+        keys = {
+            (employee_id, target_date): cls._busy_key(employee_id, target_date)
+            for employee_id in employee_ids
+            for target_date in dates
+        }
+        cached = cache.get_many(list(keys.values()))
+        masks: dict[tuple[int, date], int] = {}
+        missing_pairs: list[tuple[int, date]] = []
+        for pair, key in keys.items():
+            if key in cached:
+                masks[pair] = cached[key]
+            else:
+                missing_pairs.append(pair)
+
+        if missing_pairs:
+            built = cls.build_busy_masks(
+                {employee_id for employee_id, _ in missing_pairs},
+                {target_date for _, target_date in missing_pairs},
+            )
+            cache.set_many(
+                {keys[pair]: built[pair] for pair in missing_pairs},
+                cls.get_busy_cache_timeout(),
+            )
+            masks.update({pair: built[pair] for pair in missing_pairs})
+        return masks
+
+    @classmethod
+    def _get_schedule_version(cls, provider_location_id: int) -> int:
+        """Возвращает версию расписания локации, создавая её при отсутствии."""
+        key = cls._schedule_version_key(provider_location_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time_module.time_ns(), None)
+            version = cache.get(key, 0)
+        return version
+
+    @staticmethod
+    def _schedule_version_key(provider_location_id: int) -> str:
+        return f'{CACHE_KEY_PREFIX}:schedule_version:{provider_location_id}'
+
+    @staticmethod
+    def _work_key(provider_location_id: int, employee_id: int, target_date: date, version: int) -> str:
+        return f'{CACHE_KEY_PREFIX}:work:{provider_location_id}:{employee_id}:{target_date.isoformat()}:{version}'
+
+    @staticmethod
+    def _busy_key(employee_id: int, target_date: date) -> str:
+        return f'{CACHE_KEY_PREFIX}:busy:{employee_id}:{target_date.isoformat()}'
+
+
+def remember_previous_booking_interval(sender, instance, raw=False, **kwargs):
+    """Запоминает прежние сотрудника и интервал бронирования перед сохранением."""
+    if raw or not instance.pk:
+        instance._availability_previous_interval = None
+        return
+    instance._availability_previous_interval = sender.objects.filter(pk=instance.pk).values_list(
+        'employee_id',
+        'start_time',
+        'end_time',
+    ).first()
+
+
+def refresh_booking_availability(sender, instance, **kwargs):
+    """Обновляет busy masks для старого и нового интервала бронирования."""
+    intervals = [(instance.employee_id, instance.start_time, instance.end_time)]
+    previous_interval = getattr(instance, '_availability_previous_interval', None)
+    if previous_interval is not None:
+        intervals.append(previous_interval)
+
+    AvailabilityBitmapIndex.refresh_employee_days(AvailabilityBitmapIndex.employee_days_for_intervals(intervals))
+
+
+def invalidate_location_schedule_availability(sender, instance, **kwargs):
+    """Сбрасывает work masks локации при изменении расписаний."""
+    if instance.provider_location_id:
+        AvailabilityBitmapIndex.invalidate_location_schedule(instance.provider_location_id)
+
+
+def invalidate_employee_absence_availability(sender, instance, **kwargs):
+    """Сбрасывает work masks локаций сотрудника при изменении отпуска или больничного.
+
+    Отсутствие может быть без локации или перенесено между локациями,
+    поэтому сбрасываются все локации, где у сотрудника есть расписание.
+    """
+    location_ids = set(
+        Schedule.objects.filter(employee_id=instance.employee_id).values_list('provider_location_id', flat=True)
+    )
+    if instance.provider_location_id:
+        location_ids.add(instance.provider_location_id)
+    for provider_location_id in location_ids:
+        AvailabilityBitmapIndex.invalidate_location_schedule(provider_location_id)
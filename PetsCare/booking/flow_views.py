@@ -1,5 +1,6 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from django.conf import settings
 from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.geos import Point
 from django.db.models import Exists, OuterRef, Q
@@ -20,6 +21,7 @@ from users.email_verification_permissions import IsVerifiedForOwnerWriteActions
 from .location_search import LocationSearchPayload, filter_locations_by_payload
 from .routing import RoutingUnavailableError
 from .services import BookingAvailabilityService, BookingDomainError, BookingTransactionService
+from .unified_services import SlotCursor
 
 
 def _get_request_language_code(request):
@@ -259,17 +261,21 @@ class ProviderSearchAPIView(APIView):
 
 
 class LocationSlotsAPIView(APIView):
+    """Слоты локации по датам либо первые limit слотов с курсором продолжения."""
+
     permission_classes = [IsAuthenticated]
+    MAX_SLOT_LIMIT = 100
 
     def get(self, request, location_id):
         service_id = request.query_params.get('service_id')
         pet_id = request.query_params.get('pet_id')
         date_start_str = request.query_params.get('date_start')
         date_end_str = request.query_params.get('date_end')
+        limit_str = request.query_params.get('limit')
 
-        if not all([service_id, pet_id, date_start_str, date_end_str]):
+        if not all([service_id, pet_id, date_start_str]) or (not date_end_str and not limit_str):
             return Response(
-                {'error': _('service_id, pet_id, date_start and date_end are required')},
+                {'error': _('service_id, pet_id, date_start and either date_end or limit are required')},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
@@ -282,10 +288,23 @@ class LocationSlotsAPIView(APIView):
 
         try:
             date_start = datetime.strptime(date_start_str, '%Y-%m-%d').date()
-            date_end = datetime.strptime(date_end_str, '%Y-%m-%d').date()
+            if date_end_str:
+                date_end = datetime.strptime(date_end_str, '%Y-%m-%d').date()
+            else:
+                horizon_days = int(getattr(settings, 'BOOKING_SLOT_SEARCH_HORIZON_DAYS', 30))
+                date_end = date_start + timedelta(days=horizon_days - 1)
         except ValueError:
             return Response({'error': _('Invalid date format')}, status=status.HTTP_400_BAD_REQUEST)
 
+        if limit_str:
+            try:
+                limit = int(limit_str)
+            except ValueError:
+                limit = 0
+            if not 1 <= limit <= self.MAX_SLOT_LIMIT:
+                return Response({'error': _('Invalid limit')}, status=status.HTTP_400_BAD_REQUEST)
+            return self._get_next_slots(request, location, service, pet, date_start, date_end, limit)
+
         try:
             grouped_slots = BookingAvailabilityService.get_available_slots(
                 provider_location=location,
@@ -300,6 +319,30 @@ class LocationSlotsAPIView(APIView):
 
         return Response({'slots_by_date': grouped_slots})
 
+    def _get_next_slots(self, request, location, service, pet, date_start, date_end, limit):
+        """Отдаёт страницу ближайших слотов в хронологическом порядке."""
+        cursor_str = request.query_params.get('cursor')
+        try:
+            cursor = SlotCursor.decode(cursor_str) if cursor_str else None
+            slots, next_cursor = BookingAvailabilityService.find_next_slots(
+                provider_location=location,
+                service=service,
+                pet=pet,
+                date_start=date_start,
+                date_end=date_end,
+                limit=limit,
+                cursor=cursor,
+            )
+        except BookingDomainError as exc:
+            return Response(exc.to_dict(), status=exc.status_code)
+        except RoutingUnavailableError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return Response({
+            'slots': slots,
+            'next_cursor': next_cursor.encode() if next_cursor else None,
+        })
+
 
 class BookingDraftValidationAPIView(APIView):
     permission_classes = [IsAuthenticated, IsVerifiedForOwnerWriteActions]
@@ -0,0 +1,119 @@
+"""
+Management команда для замера параллельного создания бронирований у одного сотрудника.
+
+Использование:
+    python manage.py benchmark_booking_concurrency --employee 12 --location 3 --service 7 \
+        --pets 41 42 43 --start 2026-11-02T09:00 --bookings 16 --workers 8
+    python manage.py benchmark_booking_concurrency ... --overlap
+
+Каждый поток создает бронирование через BookingTransactionService.create_booking
+в собственном соединении с БД. Без --overlap слоты идут подряд с шагом --step
+минут и не пересекаются — они должны создаваться параллельно. С --overlap все
+потоки бьют в один слот: ровно одно бронирование должно пройти, остальные
+получают BookingDomainError.
+
+Созданные бронирования удаляются после замера, если не указан --keep.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from booking.models import Booking
+from booking.unified_services import BookingDomainError, BookingTransactionService
+from catalog.models import Service
+from pets.models import Pet
+from providers.models import Employee, ProviderLocation
+
+
+class Command(BaseCommand):
+    help = 'Fire parallel bookings at one employee and report throughput and conflicts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employee', type=int, required=True)
+        parser.add_argument('--location', type=int, required=True)
+        parser.add_argument('--service', type=int, required=True)
+        parser.add_argument('--pets', type=int, nargs='+', required=True)
+        parser.add_argument('--start', required=True, help='Start of the first slot (ISO datetime)')
+        parser.add_argument('--bookings', type=int, default=16)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--step', type=int, default=60, help='Minutes between consecutive slots')
+        parser.add_argument('--overlap', action='store_true', help='All workers target the same slot')
+        parser.add_argument('--keep', action='store_true', help='Do not delete created bookings')
+
+    def handle(self, *args, **options):
+        start = parse_datetime(options['start'])
+        if start is None:
+            raise CommandError('--start must be an ISO datetime')
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+
+        employee = Employee.objects.get(pk=options['employee'])
+        provider_location = ProviderLocation.objects.select_related('provider').get(pk=options['location'])
+        service = Service.objects.get(pk=options['service'])
+        pets = list(Pet.objects.filter(pk__in=options['pets']).prefetch_related('owners'))
+        if not pets:
+            raise CommandError('No pets found')
+
+        jobs = []
+        for index in range(options['bookings']):
+            pet = pets[index % len(pets)]
+            owner = pet.owners.first()
+            if owner is None:
+                raise CommandError(f'Pet {pet.pk} has no owners')
+            slot = start if options['overlap'] else start + timedelta(minutes=options['step'] * index)
+            jobs.append((owner, pet, slot))
+
+        created_ids = []
+        errors = {}
+        lock = threading.Lock()
+
+        def run(job):
+            owner, pet, slot = job
+            started = time.perf_counter()
+            try:
+                booking = BookingTransactionService.create_booking(
+                    user=owner,
+                    pet=pet,
+                    provider=provider_location.provider,
+                    employee=employee,
+                    service=service,
+                    start_time=slot,
+                    provider_location=provider_location,
+                    escort_owner=owner,
+                )
+                with lock:
+                    created_ids.append(booking.pk)
+            except BookingDomainError as e:
+                with lock:
+                    errors[e.code] = errors.get(e.code, 0) + 1
+            finally:
+                connection.close()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            latencies = sorted(executor.map(run, jobs))
+        elapsed = time.perf_counter() - started
+
+        mode = 'same slot' if options['overlap'] else f'disjoint slots every {options["step"]} min'
+        self.stdout.write(f'{len(jobs)} bookings, {options["workers"]} workers, {mode}')
+        self.stdout.write(f'created:     {len(created_ids)}')
+        for code, count in sorted(errors.items()):
+            self.stdout.write(f'rejected:    {count} ({code})')
+        self.stdout.write(f'throughput:  {len(jobs) / elapsed:8.1f} bookings/s')
+        self.stdout.write(
+            f'latency:     p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, '
+            f'max {latencies[-1] * 1000:.0f} ms'
+        )
+        if options['overlap'] and len(created_ids) > 1:
+            self.stdout.write(self.style.ERROR('Double booking detected for the same slot'))
+
+        if not options['keep'] and created_ids:
+            Booking.objects.filter(pk__in=created_ids).delete()
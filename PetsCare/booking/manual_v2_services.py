@@ -7,6 +7,7 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from decimal import Decimal
 from io import BytesIO
+from itertools import islice
 from typing import Any, cast
 
 import phonenumbers
@@ -25,11 +26,13 @@ from booking.constants import (
     CANCELLED_BY_PROVIDER,
     CANCELLATION_REASON_PROVIDER_EMERGENCY_PREEMPTION,
 )
+from booking.locking import BookingIntervalLock
 from booking.manual_v2_models import ManualBooking, ManualVisitProtocol, ProviderClientLead
 from booking.models import Booking, BookingAutoCompleteSettings, BookingCancellationReason
-from booking.unified_services import BookingAvailabilityService, BookingDomainError, BookingPolicy
+from booking.reference_data import reference_data
+from booking.unified_services import BookingAvailabilityService, BookingDomainError
 from catalog.models import Service
-from pets.models import Breed, PetType, SizeRule
+from pets.models import Breed, PetType
 from providers.models import Employee, EmployeeLocationRole, Provider, ProviderLocation, ProviderLocationService
 from users.models import User
 
@@ -306,7 +309,7 @@ class ManualBookingOptionsService:
                 'min_weight_kg': str(rule.min_weight_kg),
                 'max_weight_kg': str(rule.max_weight_kg),
             }
-            for rule in SizeRule.objects.filter(pet_type=selected_pet_type).order_by('min_weight_kg')
+            for rule in reference_data.size_rules(selected_pet_type.pk)
         ]
 
     @staticmethod
@@ -331,7 +334,7 @@ class ManualBookingOptionsService:
         seen: set[int] = set()
         for location_service in queryset:
             service = location_service.service
-            if service.id in seen or service.children.exists():
+            if service.id in seen or reference_data.service_has_children(service.id):
                 continue
             seen.add(service.id)
             results.append(
@@ -340,8 +343,8 @@ class ManualBookingOptionsService:
                     'name': service.get_localized_name(),
                     'code': service.code,
                     'is_client_facing': service.is_client_facing,
-                    'emergency_capable': service.resolve_emergency_capable(),
-                    'protocol_family': service.resolve_protocol_family(),
+                    'emergency_capable': reference_data.resolve_emergency_capable(service.id),
+                    'protocol_family': reference_data.resolve_protocol_family(service.id),
                     'price': str(location_service.price),
                     'duration_minutes': int(location_service.duration_minutes),
                 }
@@ -556,65 +559,41 @@ class ManualBookingSchedulingService:
         occupied_duration_minutes: int,
         requested_start_time: datetime,
     ) -> list[dict[str, Any]]:
-        """Генерирует ближайшие альтернативные слоты для manual booking."""
-        alternatives: list[dict[str, Any]] = []
-        policy = BookingPolicy.load()
-        eligible_employees = BookingAvailabilityService.get_eligible_employees(provider_location, service)
-        if not eligible_employees:
-            return alternatives
-
-        current_date = requested_start_time.date()
-        end_date = current_date + timedelta(days=MANUAL_ALTERNATIVE_DAY_SPAN)
-        current_timezone = timezone.get_current_timezone()
+        """Генерирует ближайшие альтернативные слоты для manual booking.
 
-        while current_date <= end_date and len(alternatives) < MANUAL_ALTERNATIVE_SLOT_LIMIT:
-            location_schedule = BookingAvailabilityService.get_location_schedule(provider_location, current_date)
-            if location_schedule is None:
-                current_date += timedelta(days=1)
-                continue
-
-            for employee in eligible_employees:
-                employee_schedule = BookingAvailabilityService.get_employee_schedule(employee, provider_location, current_date)
-                if employee_schedule is None:
-                    continue
-                if (
-                    location_schedule.open_time is None
-                    or location_schedule.close_time is None
-                    or employee_schedule.start_time is None
-                    or employee_schedule.end_time is None
-                ):
-                    continue
-
-                work_start = timezone.make_aware(
-                    datetime.combine(current_date, max(location_schedule.open_time, employee_schedule.start_time)),
-                    current_timezone,
-                )
-                work_end = timezone.make_aware(
-                    datetime.combine(current_date, min(location_schedule.close_time, employee_schedule.end_time)),
-                    current_timezone,
-                )
-                current_time = max(work_start, requested_start_time)
-                while current_time + timedelta(minutes=occupied_duration_minutes) <= work_end:
-                    slot_end = current_time + timedelta(minutes=occupied_duration_minutes)
-                    if current_time > timezone.now() and cls.employee_can_take_slot(
-                        employee=employee,
-                        provider_location=provider_location,
-                        start_time=current_time,
-                        end_time=slot_end,
-                    ):
-                        alternatives.append(
-                            {
-                                'start_time': current_time.isoformat(),
-                                'end_time': slot_end.isoformat(),
-                                'employee_id': employee.id,
-                                'employee_name': employee.user.get_full_name() or employee.user.email,
-                            }
-                        )
-                        if len(alternatives) >= MANUAL_ALTERNATIVE_SLOT_LIMIT:
-                            return alternatives
-                    current_time += timedelta(minutes=policy.slot_step_minutes)
-            current_date += timedelta(days=1)
+        Использует общий поток слотов BookingAvailabilityService.iter_slots
+        с учётом ручных записей и останавливается на первых
+        MANUAL_ALTERNATIVE_SLOT_LIMIT слотах в хронологическом порядке.
+        """
+        eligible_employees = {
+            employee.id: employee
+            for employee in BookingAvailabilityService.get_eligible_employees(provider_location, service)
+        }
+        if not eligible_employees:
+            return []
 
+        slot_iterator = BookingAvailabilityService.iter_slots(
+            provider_location=provider_location,
+            service=service,
+            date_start=requested_start_time.date(),
+            date_end=requested_start_time.date() + timedelta(days=MANUAL_ALTERNATIVE_DAY_SPAN),
+            occupied_duration_minutes=occupied_duration_minutes,
+            price=Decimal('0.00'),
+            employee_ids=eligible_employees.keys(),
+            not_before=requested_start_time,
+            include_manual_bookings=True,
+        )
+        alternatives: list[dict[str, Any]] = []
+        for slot in islice(slot_iterator, MANUAL_ALTERNATIVE_SLOT_LIMIT):
+            employee = eligible_employees[slot['employee_id']]
+            alternatives.append(
+                {
+                    'start_time': slot['start_time'],
+                    'end_time': slot['end_time'],
+                    'employee_id': employee.id,
+                    'employee_name': employee.user.get_full_name() or employee.user.email,
+                }
+            )
         return alternatives
 
 
@@ -671,6 +650,7 @@ class ManualBookingServiceV2:
             payload=mutable_payload,
             existing_manual_booking=locked_booking,
         )
+        cls._lock_slot(context=context, exclude_manual_booking_id=locked_booking.id)
 
         locked_booking.provider_location = context.provider_location
         locked_booking.employee = context.employee
@@ -978,24 +958,21 @@ class ManualBookingServiceV2:
         )
 
     @classmethod
-    def _create_from_context(cls, *, actor: User, context: ManualResolvedContext) -> ManualBooking:
-        """Переиспользуемая ветка финального создания manual booking."""
-        locked_employees = list(
-            Employee.objects.select_for_update().filter(
-                id__in=[employee.id for employee in BookingAvailabilityService.get_eligible_employees(context.provider_location, context.service)],
-            )
-        )
-        if context.employee.id not in {employee.id for employee in locked_employees}:
-            raise BookingDomainError(
-                'manual_booking_specialist_invalid',
-                _('Selected specialist is no longer available for this service.'),
-                status_code=409,
-            )
+    def _lock_slot(cls, *, context: ManualResolvedContext, exclude_manual_booking_id: int | None = None) -> None:
+        """
+        Блокирует окно специалиста и повторно проверяет конфликты под блокировкой.
+
+        Тот же advisory lock берёт клиентское бронирование (BookingIntervalLock),
+        поэтому клиентское и ручное бронирование одного специалиста в одном окне
+        не могут закоммититься одновременно.
+        """
+        BookingIntervalLock(context.start_time, context.end_time).employee(context.employee.id).acquire()
 
         conflicts = ManualBookingSchedulingService.get_conflicting_items(
             employee=context.employee,
             start_time=context.start_time,
             end_time=context.end_time,
+            exclude_manual_booking_id=exclude_manual_booking_id,
             lock=True,
         )
         if conflicts:
@@ -1016,6 +993,23 @@ class ManualBookingServiceV2:
                 },
             )
 
+    @classmethod
+    def _create_from_context(cls, *, actor: User, context: ManualResolvedContext) -> ManualBooking:
+        """Переиспользуемая ветка финального создания manual booking."""
+        locked_employees = list(
+            Employee.objects.select_for_update().filter(
+                id__in=[employee.id for employee in BookingAvailabilityService.get_eligible_employees(context.provider_location, context.service)],
+            )
+        )
+        if context.employee.id not in {employee.id for employee in locked_employees}:
+            raise BookingDomainError(
+                'manual_booking_specialist_invalid',
+                _('Selected specialist is no longer available for this service.'),
+                status_code=409,
+            )
+
+        cls._lock_slot(context=context)
+
         return ManualBooking.objects.create(
             provider=context.provider,
             provider_location=context.provider_location,
@@ -1234,6 +1228,7 @@ class ManualBookingServiceV2:
             'start_time': new_start_time,
         }
         context = cls._resolve_context(actor=actor, payload=payload, existing_manual_booking=manual_booking)
+        cls._lock_slot(context=context, exclude_manual_booking_id=manual_booking.id)
         manual_booking.provider_location = context.provider_location
         manual_booking.employee = context.employee
         manual_booking.service = context.service
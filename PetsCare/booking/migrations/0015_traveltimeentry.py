@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0014_bookingautocompletesettings_manual_booking_emergency_window_hours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravelTimeEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin_latitude', models.DecimalField(decimal_places=4, max_digits=8, verbose_name='Origin Latitude')),
+                ('origin_longitude', models.DecimalField(decimal_places=4, max_digits=8, verbose_name='Origin Longitude')),
+                ('destination_latitude', models.DecimalField(decimal_places=4, max_digits=8, verbose_name='Destination Latitude')),
+                ('destination_longitude', models.DecimalField(decimal_places=4, max_digits=8, verbose_name='Destination Longitude')),
+                ('mode', models.CharField(max_length=20, verbose_name='Mode')),
+                ('duration_seconds', models.PositiveIntegerField(verbose_name='Duration (seconds)')),
+                ('backend', models.CharField(blank=True, max_length=100, verbose_name='Backend')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Travel Time Entry',
+                'verbose_name_plural': 'Travel Time Entries',
+                'constraints': [models.UniqueConstraint(fields=('origin_latitude', 'origin_longitude', 'destination_latitude', 'destination_longitude', 'mode'), name='booking_traveltime_route_mode_uniq')],
+            },
+        ),
+    ]
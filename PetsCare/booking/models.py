@@ -574,8 +574,9 @@ class Booking(models.Model):
 
     @classmethod
     def get_status(cls, status_name):
-        status_obj, _ = BookingStatus.objects.get_or_create(name=status_name)
-        return status_obj
+        from .reference_data import reference_data
+
+        return reference_data.status(status_name)
 
     def complete_booking(
         self,
@@ -1110,4 +1111,42 @@ class BookingServiceIssue(models.Model):
         return f"Issue {self.id} for Booking {self.booking.code}"
 
 
+class TravelTimeEntry(models.Model):
+    """
+    Сохранённое время в пути между двумя точками для routing.
+
+    Координаты округляются (booking.routing.ROUTING_COORDINATE_PRECISION),
+    поэтому близкие точки разделяют одну запись между воркерами и рестартами.
+    """
+    origin_latitude = models.DecimalField(_('Origin Latitude'), max_digits=8, decimal_places=4)
+    origin_longitude = models.DecimalField(_('Origin Longitude'), max_digits=8, decimal_places=4)
+    destination_latitude = models.DecimalField(_('Destination Latitude'), max_digits=8, decimal_places=4)
+    destination_longitude = models.DecimalField(_('Destination Longitude'), max_digits=8, decimal_places=4)
+    mode = models.CharField(_('Mode'), max_length=20)
+    duration_seconds = models.PositiveIntegerField(_('Duration (seconds)'))
+    backend = models.CharField(_('Backend'), max_length=100, blank=True)
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Travel Time Entry')
+        verbose_name_plural = _('Travel Time Entries')
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'origin_latitude',
+                    'origin_longitude',
+                    'destination_latitude',
+                    'destination_longitude',
+                    'mode',
+                ],
+                name='booking_traveltime_route_mode_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.origin_latitude},{self.origin_longitude} -> "
+            f"{self.destination_latitude},{self.destination_longitude} ({self.mode}): {self.duration_seconds}s"
+        )
+
 from .manual_v2_models import ManualBooking, ManualVisitProtocol, ProviderClientLead  # noqa: E402,F401
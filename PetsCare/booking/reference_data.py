@@ -0,0 +1,244 @@
+"""
+Справочные данные горячего пути бронирования в памяти процесса.
+
+Поиск слотов и валидация бронирования постоянно обращаются к маленьким,
+редко меняющимся таблицам: SizeRule (size code по весу), BookingStatus,
+PetType, иерархия Service, а также к BookingPolicy из settings.
+Реестр загружает их одним снимком на процесс и отдаёт без запросов к БД.
+
+Сохранение/удаление справочной записи сразу сбрасывает снимок процесса
+и после коммита меняет версию в кеше 'booking_reference'. Остальные процессы
+сверяют версию не чаще раза в BOOKING_REFERENCE_DATA_CHECK_SECONDS.
+Без общего кеша (LocMem) версия видна только своему процессу, поэтому снимок
+перечитывается из БД не реже раза в BOOKING_REFERENCE_DATA_LOCAL_MAX_AGE_SECONDS.
+Изменение settings в тестах (override_settings) тоже сбрасывает снимок.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time as time_module
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+
+from utils.caching import get_namespace_cache
+
+cache = get_namespace_cache('booking_reference')
+
+VERSION_KEY = 'version'
+SIZE_ORDER = {'S': 0, 'M': 1, 'L': 2, 'XL': 3}
+
+
+@dataclass(frozen=True)
+class ServiceNode:
+    """Узел иерархии услуг с полями, наследуемыми от предков."""
+
+    id: int
+    parent_id: int | None
+    emergency_capability_mode: str
+    protocol_family_mode: str
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    version: Any
+    loaded_at: float
+    size_rules: dict[int, tuple]
+    statuses: dict[str, Any]
+    pet_types: dict[int, Any]
+    services: dict[int, ServiceNode]
+    parent_service_ids: frozenset
+    policy: Any
+
+
+class ReferenceDataRegistry:
+    """Версионированный снимок справочников бронирования на процесс."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: ReferenceSnapshot | None = None
+        self._checked_at = 0.0
+
+    # --- Размеры питомцев ---
+
+    def size_rules(self, pet_type_id: int) -> tuple:
+        """SizeRule типа питомца, упорядоченные по min_weight_kg."""
+        return self._get().size_rules.get(pet_type_id, ())
+
+    def resolve_size_code(self, pet_type_id: int, weight) -> str | None:
+        """Size code по весу: наибольший из подходящих диапазонов, иначе наибольший вообще."""
+        if weight is None:
+            return None
+        rules = self.size_rules(pet_type_id)
+        if not rules:
+            return None
+
+        weight_value = float(weight)
+        matching_rules = [
+            rule
+            for rule in rules
+            if float(rule.min_weight_kg) <= weight_value <= float(rule.max_weight_kg)
+        ]
+        ordered_rules = sorted(matching_rules or rules, key=lambda item: SIZE_ORDER.get(item.size_code, -1))
+        return ordered_rules[-1].size_code
+
+    # --- Статусы и типы питомцев ---
+
+    def status(self, name: str):
+        """BookingStatus по имени; отсутствующий статус создаётся, как раньше get_or_create."""
+        from .models import BookingStatus
+
+        status_obj = self._get().statuses.get(name)
+        if status_obj is None:
+            status_obj, _ = BookingStatus.objects.get_or_create(name=name)
+            return status_obj
+        # Копия: вызывающий код может менять экземпляр, снимок общий для потоков.
+        return copy.copy(status_obj)
+
+    def pet_type(self, pet_type_id: int | None):
+        if pet_type_id is None:
+            return None
+        return self._get().pet_types.get(pet_type_id)
+
+    # --- Иерархия услуг ---
+
+    def service_ancestor_ids(self, service_id: int) -> list[int]:
+        """Id предков услуги от родителя к корню."""
+        services = self._get().services
+        ancestor_ids = []
+        node = services.get(service_id)
+        while node is not None and node.parent_id is not None and node.parent_id not in ancestor_ids:
+            ancestor_ids.append(node.parent_id)
+            node = services.get(node.parent_id)
+        return ancestor_ids
+
+    def service_has_children(self, service_id: int) -> bool:
+        return service_id in self._get().parent_service_ids
+
+    def resolve_emergency_capable(self, service_id: int) -> bool:
+        """То же, что Service.resolve_emergency_capable, без обхода parent запросами."""
+        from catalog.models import Service
+
+        for node in self._service_chain(service_id):
+            if node.emergency_capability_mode == Service.EmergencyCapabilityMode.ENABLED:
+                return True
+            if node.emergency_capability_mode == Service.EmergencyCapabilityMode.DISABLED:
+                return False
+        return False
+
+    def resolve_protocol_family(self, service_id: int) -> str:
+        """То же, что Service.resolve_protocol_family, без обхода parent запросами."""
+        from catalog.models import Service
+
+        for node in self._service_chain(service_id):
+            if node.protocol_family_mode != Service.ProtocolFamilyMode.INHERIT:
+                return node.protocol_family_mode
+        return Service.ProtocolFamilyMode.NONE
+
+    # --- Политика ---
+
+    def policy(self):
+        """BookingPolicy, прочитанная из settings один раз на снимок."""
+        return self._get().policy
+
+    # --- Загрузка и инвалидация ---
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+    def _service_chain(self, service_id: int):
+        services = self._get().services
+        node = services.get(service_id)
+        seen = set()
+        while node is not None and node.id not in seen:
+            seen.add(node.id)
+            yield node
+            node = services.get(node.parent_id) if node.parent_id is not None else None
+
+    def _get(self) -> ReferenceSnapshot:
+        snapshot = self._snapshot
+        now = time_module.monotonic()
+        check_interval = getattr(settings, 'BOOKING_REFERENCE_DATA_CHECK_SECONDS', 5)
+        if snapshot is not None and now - self._checked_at < check_interval:
+            return snapshot
+
+        version = _get_version()
+        if snapshot is None or snapshot.version != version or self._expired_locally(snapshot, now):
+            snapshot = _load(version)
+        with self._lock:
+            self._snapshot = snapshot
+            self._checked_at = now
+        return snapshot
+
+
+    @staticmethod
+    def _expired_locally(snapshot: ReferenceSnapshot, now: float) -> bool:
+        """Версия в LocMem не видна другим процессам: ограничиваем возраст снимка."""
+        if cache.is_shared:
+            return False
+        max_age = getattr(settings, 'BOOKING_REFERENCE_DATA_LOCAL_MAX_AGE_SECONDS', 60)
+        return now - snapshot.loaded_at >= max_age
+
+
+def _load(version) -> ReferenceSnapshot:
+    from catalog.models import Service
+    from pets.models import PetType, SizeRule
+
+    from .models import BookingStatus
+    from .unified_services import BookingPolicy
+
+    size_rules: dict[int, list] = {}
+    for rule in SizeRule.objects.order_by('pet_type_id', 'min_weight_kg', 'pk'):
+        size_rules.setdefault(rule.pet_type_id, []).append(rule)
+
+    services = {
+        row['id']: ServiceNode(**row)
+        for row in Service.objects.values(
+            'id', 'parent_id', 'emergency_capability_mode', 'protocol_family_mode',
+        )
+    }
+    return ReferenceSnapshot(
+        version=version,
+        loaded_at=time_module.monotonic(),
+        size_rules={pet_type_id: tuple(rules) for pet_type_id, rules in size_rules.items()},
+        statuses={status_obj.name: status_obj for status_obj in BookingStatus.objects.all()},
+        pet_types={pet_type.pk: pet_type for pet_type in PetType.objects.all()},
+        services=services,
+        parent_service_ids=frozenset(node.parent_id for node in services.values() if node.parent_id is not None),
+        policy=BookingPolicy.load(),
+    )
+
+
+def _get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time_module.time_ns(), None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+reference_data = ReferenceDataRegistry()
+
+
+def invalidate_reference_data() -> None:
+    """Сбрасывает справочники во всех процессах."""
+    cache.set(VERSION_KEY, time_module.time_ns(), None)
+    reference_data.clear()
+
+
+def invalidate_reference_data_on_change(sender, **kwargs) -> None:
+    """post_save/post_delete справочных моделей."""
+    reference_data.clear()
+    transaction.on_commit(invalidate_reference_data)
+
+
+def reset_reference_data_on_setting_change(sender, setting, **kwargs) -> None:
+    """setting_changed: BookingPolicy и интервал проверки читаются из settings."""
+    if setting.startswith('BOOKING_'):
+        reference_data.clear()
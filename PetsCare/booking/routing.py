@@ -1,34 +1,86 @@
 from __future__ import annotations
 
 import hashlib
+import math
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable
 
 import requests
 from django.conf import settings
-from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 
+from utils.caching import get_namespace_cache
+
+ROUTING_COORDINATE_PRECISION = 4
+EARTH_RADIUS_KM = 6371.0088
+
+cache = get_namespace_cache('routing')
+
 
 class RoutingUnavailableError(Exception):
     """Ошибка недоступности routing API."""
 
 
-class RoutingService:
-    """Сервис для получения travel time только через routing API."""
+@dataclass(frozen=True)
+class RoutePoint:
+    """Точка маршрута с округлёнными координатами — ключ хранилища travel time."""
+
+    latitude: Decimal
+    longitude: Decimal
 
     @classmethod
-    def get_travel_duration_seconds(cls, source, destination, mode: str | None = None) -> int:
-        """Возвращает длительность поездки в секундах между двумя точками."""
-        source_point = cls._extract_point(source)
-        destination_point = cls._extract_point(destination)
+    def from_point(cls, point) -> 'RoutePoint':
+        """Создаёт точку из GEOS Point, округляя координаты."""
+        quantum = Decimal(1).scaleb(-ROUTING_COORDINATE_PRECISION)
+        return cls(
+            latitude=Decimal(str(point.y)).quantize(quantum, rounding=ROUND_HALF_UP),
+            longitude=Decimal(str(point.x)).quantize(quantum, rounding=ROUND_HALF_UP),
+        )
+
+    def as_param(self) -> str:
+        """Координаты в формате параметра Distance Matrix API."""
+        return f'{self.latitude},{self.longitude}'
+
+
+RoutePair = tuple[RoutePoint, RoutePoint]
+
+
+class RoutingBackend(ABC):
+    """
+    Базовый backend матрицы travel time.
+
+    Backend получает списки origins и destinations и возвращает длительности
+    для всех пар, которые удалось рассчитать.
+    """
 
-        if source_point.x == destination_point.x and source_point.y == destination_point.y:
-            return 0
+    max_origins = 25
+    max_destinations = 25
+    max_elements = 100
 
-        cache_key = cls._build_cache_key(source_point, destination_point, mode)
-        cached_duration = cache.get(cache_key)
-        if cached_duration is not None:
-            return int(cached_duration)
+    @abstractmethod
+    def get_duration_matrix(
+        self,
+        origins: list[RoutePoint],
+        destinations: list[RoutePoint],
+        mode: str,
+    ) -> dict[RoutePair, int]:
+        """Длительности в секундах для рассчитанных пар (origin, destination)."""
 
+    @property
+    def name(self) -> str:
+        return f'{type(self).__module__}.{type(self).__name__}'
+
+
+class DistanceMatrixRoutingBackend(RoutingBackend):
+    """Google Distance Matrix API: много origins/destinations за один запрос."""
+
+    def get_duration_matrix(self, origins, destinations, mode):
         api_key = getattr(settings, 'GOOGLE_MAPS_API_KEY', '')
         if not api_key:
             raise RoutingUnavailableError(_('Routing API is not configured.'))
@@ -40,9 +92,9 @@ class RoutingService:
                 'https://maps.googleapis.com/maps/api/distancematrix/json',
             ),
             params={
-                'origins': f'{source_point.y},{source_point.x}',
-                'destinations': f'{destination_point.y},{destination_point.x}',
-                'mode': mode or getattr(settings, 'BOOKING_ROUTING_MODE', 'driving'),
+                'origins': '|'.join(origin.as_param() for origin in origins),
+                'destinations': '|'.join(destination.as_param() for destination in destinations),
+                'mode': mode,
                 'key': api_key,
             },
             timeout=getattr(settings, 'BOOKING_ROUTING_TIMEOUT_SECONDS', 10),
@@ -59,21 +111,217 @@ class RoutingService:
         if payload.get('status') != 'OK':
             raise RoutingUnavailableError(_('Routing data is unavailable.'))
 
-        rows = payload.get('rows') or []
-        if not rows or not rows[0].get('elements'):
-            raise RoutingUnavailableError(_('Routing data is unavailable.'))
+        durations: dict[RoutePair, int] = {}
+        for origin, row in zip(origins, payload.get('rows') or []):
+            for destination, element in zip(destinations, row.get('elements') or []):
+                if element.get('status') == 'OK' and 'duration' in element:
+                    durations[(origin, destination)] = int(element['duration']['value'])
+        return durations
 
-        element = rows[0]['elements'][0]
-        if element.get('status') != 'OK' or 'duration' not in element:
-            raise RoutingUnavailableError(_('Routing data is unavailable.'))
 
-        duration_seconds = int(element['duration']['value'])
-        cache.set(
-            cache_key,
-            duration_seconds,
-            getattr(settings, 'BOOKING_ROUTING_CACHE_TIMEOUT_SECONDS', 3600),
+class HaversineRoutingBackend(RoutingBackend):
+    """
+    Локальная замена routing API для тестов и офлайн-запуска.
+
+    Время = расстояние по большому кругу × коэффициент извилистости / скорость.
+    """
+
+    max_origins = 1000
+    max_destinations = 1000
+    max_elements = 1_000_000
+
+    def get_duration_matrix(self, origins, destinations, mode):
+        speed_kmh = float(getattr(settings, 'BOOKING_ROUTING_HAVERSINE_SPEED_KMH', 30))
+        detour_factor = float(getattr(settings, 'BOOKING_ROUTING_HAVERSINE_DETOUR_FACTOR', 1.3))
+        return {
+            (origin, destination): math.ceil(
+                self.haversine_km(origin, destination) * detour_factor / speed_kmh * 3600
+            )
+            for origin in origins
+            for destination in destinations
+        }
+
+    @staticmethod
+    def haversine_km(origin: RoutePoint, destination: RoutePoint) -> float:
+        """Расстояние по большому кругу в километрах."""
+        lat1, lon1 = math.radians(origin.latitude), math.radians(origin.longitude)
+        lat2, lon2 = math.radians(destination.latitude), math.radians(destination.longitude)
+        value = (
+            math.sin((lat2 - lat1) / 2) ** 2
+            + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
         )
-        return duration_seconds
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(value))
+
+
+class RoutingService:
+    """
+    Сервис travel time: кеш процесса → таблица TravelTimeEntry → backend.
+
+    Недостающие пары добираются матричными запросами к backend только по
+    нужным парам: origins с одинаковым набором destinations объединяются
+    в одну матрицу (с разбиением по лимитам backend), последовательные
+    отрезки маршрута запрашиваются каждый отдельно, без лишних элементов.
+    Результат сохраняется в БД для всех воркеров.
+    """
+
+    @classmethod
+    def get_travel_duration_seconds(cls, source, destination, mode: str | None = None) -> int:
+        """Возвращает длительность поездки в секундах между двумя точками."""
+        return cls.get_travel_durations([(source, destination)], mode)[0]
+
+    @classmethod
+    def get_travel_durations(cls, pairs: Iterable[tuple[object, object]], mode: str | None = None) -> list[int]:
+        """Возвращает длительности поездок для списка пар (source, destination) в том же порядке."""
+        mode = mode or getattr(settings, 'BOOKING_ROUTING_MODE', 'driving')
+        route_pairs = [
+            (
+                RoutePoint.from_point(cls._extract_point(source)),
+                RoutePoint.from_point(cls._extract_point(destination)),
+            )
+            for source, destination in pairs
+        ]
+
+        durations: dict[RoutePair, int] = {pair: 0 for pair in route_pairs if pair[0] == pair[1]}
+        missing = [pair for pair in dict.fromkeys(route_pairs) if pair not in durations]
+        if missing:
+            durations.update(cls._get_cached_durations(missing, mode))
+            missing = [pair for pair in missing if pair not in durations]
+        if missing:
+            stored = cls._get_stored_durations(missing, mode)
+            durations.update(stored)
+            cls._cache_durations(stored, mode)
+            missing = [pair for pair in missing if pair not in durations]
+        if missing:
+            fetched = cls._fetch_durations(missing, mode)
+            durations.update(fetched)
+            if any(pair not in durations for pair in missing):
+                raise RoutingUnavailableError(_('Routing data is unavailable.'))
+
+        return [durations[pair] for pair in route_pairs]
+
+    @staticmethod
+    def get_backend() -> RoutingBackend:
+        """Возвращает backend из настройки BOOKING_ROUTING_BACKEND."""
+        backend_path = getattr(settings, 'BOOKING_ROUTING_BACKEND', 'booking.routing.DistanceMatrixRoutingBackend')
+        return import_string(backend_path)()
+
+    @classmethod
+    def _get_cached_durations(cls, pairs: list[RoutePair], mode: str) -> dict[RoutePair, int]:
+        """Пары из кеша процесса."""
+        keys = {cls._build_cache_key(origin, destination, mode): (origin, destination) for origin, destination in pairs}
+        cached = cache.get_many(list(keys))
+        return {keys[key]: int(value) for key, value in cached.items()}
+
+    @classmethod
+    def _cache_durations(cls, durations: dict[RoutePair, int], mode: str) -> None:
+        if durations:
+            cache.set_many(
+                {
+                    cls._build_cache_key(origin, destination, mode): seconds
+                    for (origin, destination), seconds in durations.items()
+                },
+                getattr(settings, 'BOOKING_ROUTING_CACHE_TIMEOUT_SECONDS', 3600),
+            )
+
+    @staticmethod
+    def _get_stored_durations(pairs: list[RoutePair], mode: str) -> dict[RoutePair, int]:
+        """Свежие записи TravelTimeEntry одним запросом."""
+        from .models import TravelTimeEntry
+
+        max_age_days = int(getattr(settings, 'BOOKING_ROUTING_STORE_MAX_AGE_DAYS', 30))
+        wanted = set(pairs)
+        entries = TravelTimeEntry.objects.filter(
+            mode=mode,
+            origin_latitude__in={origin.latitude for origin, _destination in pairs},
+            origin_longitude__in={origin.longitude for origin, _destination in pairs},
+            destination_latitude__in={destination.latitude for _origin, destination in pairs},
+            destination_longitude__in={destination.longitude for _origin, destination in pairs},
+            updated_at__gte=timezone.now() - timedelta(days=max_age_days),
+        ).values_list(
+            'origin_latitude',
+            'origin_longitude',
+            'destination_latitude',
+            'destination_longitude',
+            'duration_seconds',
+        )
+        stored: dict[RoutePair, int] = {}
+        for origin_lat, origin_lon, destination_lat, destination_lon, seconds in entries:
+            pair = (RoutePoint(origin_lat, origin_lon), RoutePoint(destination_lat, destination_lon))
+            if pair in wanted:
+                stored[pair] = seconds
+        return stored
+
+    @classmethod
+    def _fetch_durations(cls, pairs: list[RoutePair], mode: str) -> dict[RoutePair, int]:
+        """
+        Запрашивает у backend только нужные пары и сохраняет результат.
+
+        Origins группируются по набору своих destinations: каждая группа —
+        полная матрица без лишних элементов, блоками по лимитам backend.
+        """
+        from .models import TravelTimeEntry
+
+        backend = cls.get_backend()
+        destinations_by_origin: dict[RoutePoint, list[RoutePoint]] = defaultdict(list)
+        for origin, destination in dict.fromkeys(pairs):
+            destinations_by_origin[origin].append(destination)
+        origins_by_destinations: dict[tuple[RoutePoint, ...], list[RoutePoint]] = defaultdict(list)
+        for origin, destinations in destinations_by_origin.items():
+            origins_by_destinations[tuple(destinations)].append(origin)
+
+        fetched: dict[RoutePair, int] = {}
+        for destinations, origins in origins_by_destinations.items():
+            fetched.update(cls._fetch_matrix(backend, origins, list(destinations), mode))
+
+        if fetched:
+            TravelTimeEntry.objects.bulk_create(
+                [
+                    TravelTimeEntry(
+                        origin_latitude=origin.latitude,
+                        origin_longitude=origin.longitude,
+                        destination_latitude=destination.latitude,
+                        destination_longitude=destination.longitude,
+                        mode=mode,
+                        duration_seconds=seconds,
+                        backend=backend.name,
+                    )
+                    for (origin, destination), seconds in fetched.items()
+                ],
+                update_conflicts=True,
+                unique_fields=[
+                    'origin_latitude',
+                    'origin_longitude',
+                    'destination_latitude',
+                    'destination_longitude',
+                    'mode',
+                ],
+                update_fields=['duration_seconds', 'backend', 'updated_at'],
+            )
+            cls._cache_durations(fetched, mode)
+        return fetched
+
+    @staticmethod
+    def _fetch_matrix(
+        backend: RoutingBackend,
+        origins: list[RoutePoint],
+        destinations: list[RoutePoint],
+        mode: str,
+    ) -> dict[RoutePair, int]:
+        """Полная матрица origins × destinations блоками по лимитам backend."""
+        destinations_per_call = min(len(destinations), backend.max_destinations, backend.max_elements)
+        origins_per_call = max(min(backend.max_origins, backend.max_elements // destinations_per_call), 1)
+
+        durations: dict[RoutePair, int] = {}
+        for origin_offset in range(0, len(origins), origins_per_call):
+            for destination_offset in range(0, len(destinations), destinations_per_call):
+                durations.update(
+                    backend.get_duration_matrix(
+                        origins[origin_offset:origin_offset + origins_per_call],
+                        destinations[destination_offset:destination_offset + destinations_per_call],
+                        mode,
+                    )
+                )
+        return durations
 
     @staticmethod
     def _extract_point(entity):
@@ -90,10 +338,10 @@ class RoutingService:
         return point
 
     @staticmethod
-    def _build_cache_key(source_point, destination_point, mode: str | None) -> str:
+    def _build_cache_key(origin: RoutePoint, destination: RoutePoint, mode: str) -> str:
         """Формирует ключ кеша для routing API."""
         raw_key = (
-            f'{source_point.y:.7f}:{source_point.x:.7f}:'
-            f'{destination_point.y:.7f}:{destination_point.x:.7f}:{mode or "default"}'
+            f'{origin.latitude}:{origin.longitude}:'
+            f'{destination.latitude}:{destination.longitude}:{mode}'
         )
         return f'booking_routing:{hashlib.sha256(raw_key.encode("utf-8")).hexdigest()}'
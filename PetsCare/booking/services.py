@@ -14,6 +14,7 @@ import logging
 from datetime import timedelta, time, date, datetime
 
 from .models import Booking, TimeSlot, BookingStatus, BookingAutoCompleteSettings
+from .reference_data import reference_data
 from .utils import get_effective_price_for_pet
 from pets.models import Pet
 from providers.models import Employee, Provider, Schedule, LocationSchedule, ProviderLocationService, ProviderLocation
@@ -1263,9 +1264,7 @@ class EmployeeAutoBookingService:
         # Проверяем, что провайдер может оказывать эту услугу (через available_category_levels)
         # Услуга должна быть в категориях уровня 0 провайдера или их потомках
         if not provider.available_category_levels.filter(
-            id=service.id
-        ).exists() and not provider.available_category_levels.filter(
-            id__in=service.get_ancestors().values_list('id', flat=True)
+            id__in=[service.id, *reference_data.service_ancestor_ids(service.id)]
         ).exists():
             # Проверяем через локации (fallback)
             if not ProviderLocationService.objects.filter(
@@ -1,9 +1,10 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_init, post_save, pre_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from .models import Booking, BookingPayment, BookingReview
 from django.core.mail import send_mail
 from django.conf import settings
+from notifications.realtime import publish_to_users
 
 @receiver(pre_save, sender=Booking)
 def validate_booking_time(sender, instance, **kwargs):
@@ -48,6 +49,40 @@ def send_booking_confirmation(sender, instance, created, **kwargs):
             fail_silently=False,
         )
 
+@receiver(post_init, sender=Booking)
+def remember_loaded_booking_status(sender, instance, **kwargs):
+    """
+    Запоминает статус, с которым бронирование загружено, чтобы определить
+    переход статуса в post_save без дополнительного запроса. При отложенной
+    загрузке поля (only/defer) статус не читаем, чтобы не вызвать запрос.
+    """
+    instance._loaded_status_id = instance.__dict__.get('status_id')
+
+
+@receiver(post_save, sender=Booking)
+def publish_booking_status_change(sender, instance, created, **kwargs):
+    """
+    Отправляет участникам бронирования событие смены статуса (SSE) вместо
+    polling эндпоинтов статуса.
+    """
+    previous_status_id = getattr(instance, '_loaded_status_id', None)
+    instance._loaded_status_id = instance.status_id
+    if created or previous_status_id is None or previous_status_id == instance.status_id:
+        return
+
+    recipients = [instance.user_id, instance.escort_owner_id]
+    if instance.employee_id:
+        recipients.append(instance.employee.user_id)
+    publish_to_users(
+        recipients,
+        'booking.status_changed',
+        {
+            'booking_id': instance.id,
+            'status': instance.status.name,
+            'updated_at': instance.updated_at,
+        },
+    )
+
 @receiver(post_save, sender=BookingPayment)
 def send_payment_confirmation(sender, instance, created, **kwargs):
     """
@@ -0,0 +1,331 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from booking.availability_index import (
+    AvailabilityBitmapIndex,
+    EmployeeDayBitmap,
+    interval_mask,
+    iter_set_bits,
+    cache as availability_cache,
+    window_mask,
+)
+from booking.constants import BOOKING_STATUS_CANCELLED
+from booking.models import Booking
+from booking.test_booking_flow_logic import BookingFlowBaseMixin
+from booking.unified_services import BookingAvailabilityService, BookingDomainError, SlotCursor
+from providers.models import Employee, EmployeeLocationService, Schedule
+from scheduling.models import SickLeave, Vacation
+
+User = get_user_model()
+
+
+class AvailabilityBitmapHelpersTests(SimpleTestCase):
+    def test_window_mask_keeps_only_starts_with_full_free_run(self):
+        free_mask = interval_mask(10, 20) | interval_mask(30, 33)
+
+        self.assertEqual(list(iter_set_bits(window_mask(free_mask, 4))), [10, 11, 12, 13, 14, 15, 16])
+        self.assertEqual(list(iter_set_bits(window_mask(free_mask, 11))), [])
+
+    def test_slot_starts_follow_grid_and_skip_break_and_bookings(self):
+        work_mask = interval_mask(9 * 60, 13 * 60) & ~interval_mask(11 * 60, 11 * 60 + 30)
+        bitmap = EmployeeDayBitmap(
+            employee_id=1,
+            work_start_minute=9 * 60,
+            work_mask=work_mask,
+            busy_mask=interval_mask(9 * 60 + 30, 10 * 60),
+        )
+
+        starts = list(bitmap.slot_start_minutes(duration_minutes=60, step_minutes=30))
+
+        self.assertEqual(starts, [10 * 60, 11 * 60 + 30, 12 * 60])
+
+    def test_slot_starts_respect_not_before_minute(self):
+        bitmap = EmployeeDayBitmap(
+            employee_id=1,
+            work_start_minute=0,
+            work_mask=interval_mask(0, 120),
+            busy_mask=0,
+        )
+
+        starts = list(bitmap.slot_start_minutes(duration_minutes=30, step_minutes=30, not_before_minute=31))
+
+        self.assertEqual(starts, [60, 90])
+
+    @override_settings(
+        BOOKING_AVAILABILITY_INDEX_TIMEOUT_SECONDS=6 * 3600,
+        BOOKING_AVAILABILITY_BUSY_TIMEOUT_SECONDS=300,
+        BOOKING_AVAILABILITY_LOCAL_TIMEOUT_SECONDS=60,
+    )
+    def test_process_local_cache_limits_mask_ttl(self):
+        if availability_cache.is_shared:
+            self.assertEqual(AvailabilityBitmapIndex.get_cache_timeout(), 6 * 3600)
+            self.assertEqual(AvailabilityBitmapIndex.get_busy_cache_timeout(), 300)
+        else:
+            self.assertEqual(AvailabilityBitmapIndex.get_cache_timeout(), 60)
+            self.assertEqual(AvailabilityBitmapIndex.get_busy_cache_timeout(), 60)
+
+
+class AvailabilityBitmapIndexTests(BookingFlowBaseMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.target_date = timezone.localdate() + timedelta(days=1)
+
+    def _at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.target_date, time(hour=hour, minute=minute)))
+
+    def _slot_starts(self):
+        slots = BookingAvailabilityService.get_day_slots(
+            provider_location=self.location_a,
+            service=self.service,
+            target_date=self.target_date,
+            occupied_duration_minutes=60,
+            price=Decimal('100.00'),
+        )
+        return {datetime.fromisoformat(slot['start_time']) for slot in slots}
+
+    def test_day_slots_exclude_booked_interval(self):
+        self._create_booking(
+            pet=self.pet_one,
+            location=self.location_a,
+            employee=self.employee_a,
+            start_time=self._at(10),
+        )
+
+        starts = self._slot_starts()
+
+        self.assertIn(self._at(9), starts)
+        self.assertNotIn(self._at(9, 30), starts)
+        self.assertNotIn(self._at(10), starts)
+        self.assertNotIn(self._at(10, 30), starts)
+        self.assertIn(self._at(11), starts)
+
+    def test_booking_changes_update_cached_bitmap(self):
+        self.assertIn(self._at(10), self._slot_starts())
+
+        booking = self._create_booking(
+            pet=self.pet_one,
+            location=self.location_a,
+            employee=self.employee_a,
+            start_time=self._at(10),
+        )
+        self.assertNotIn(self._at(10), self._slot_starts())
+
+        booking.start_time = self._at(14)
+        booking.end_time = self._at(15)
+        booking.save()
+        starts = self._slot_starts()
+        self.assertIn(self._at(10), starts)
+        self.assertNotIn(self._at(14), starts)
+
+        booking.status = Booking.get_status(BOOKING_STATUS_CANCELLED)
+        booking.save()
+        self.assertIn(self._at(14), self._slot_starts())
+
+    def test_refresh_bookings_covers_queryset_update(self):
+        booking = self._create_booking(
+            pet=self.pet_one,
+            location=self.location_a,
+            employee=self.employee_a,
+            start_time=self._at(10),
+        )
+        self.assertNotIn(self._at(10), self._slot_starts())
+
+        bookings = Booking.objects.filter(pk=booking.pk)
+        AvailabilityBitmapIndex.refresh_bookings(bookings)
+        bookings.update(start_time=self._at(14), end_time=self._at(15))
+        AvailabilityBitmapIndex.refresh_bookings(bookings)
+
+        starts = self._slot_starts()
+        self.assertIn(self._at(10), starts)
+        self.assertNotIn(self._at(14), starts)
+
+    def test_schedule_change_invalidates_work_mask(self):
+        self.assertIn(self._at(12), self._slot_starts())
+
+        schedule = Schedule.objects.get(
+            employee=self.employee_a,
+            provider_location=self.location_a,
+            day_of_week=self.target_date.weekday(),
+        )
+        schedule.break_start = time(hour=12)
+        schedule.break_end = time(hour=13)
+        schedule.save()
+
+        starts = self._slot_starts()
+        self.assertNotIn(self._at(11, 30), starts)
+        self.assertNotIn(self._at(12), starts)
+        self.assertIn(self._at(13), starts)
+
+    def test_bitmaps_are_served_from_cache_without_queries(self):
+        AvailabilityBitmapIndex.get_day_bitmaps(
+            provider_location=self.location_a,
+            employees=[self.employee_a],
+            target_date=self.target_date,
+        )
+
+        with self.assertNumQueries(0):
+            bitmaps = AvailabilityBitmapIndex.get_day_bitmaps(
+                provider_location=self.location_a,
+                employees=[self.employee_a],
+                target_date=self.target_date,
+            )
+        self.assertTrue(bitmaps[self.employee_a.id].free_mask)
+
+
+class RangeAvailabilityQueryBudgetTests(BookingFlowBaseMixin, TestCase):
+    """Число запросов get_available_slots не зависит от диапазона и числа сотрудников."""
+
+    COLD_QUERY_BUDGET = 10
+    WARM_QUERY_BUDGET = 5
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.date_start = timezone.localdate() + timedelta(days=1)
+        self.date_end = self.date_start + timedelta(days=13)
+        for index in range(3):
+            self._add_employee(index)
+
+    def _add_employee(self, index):
+        employee = Employee.objects.create(
+            user=User.objects.create_user(
+                email=f'extra{index}@example.com',
+                password='password123',
+                username=f'extra_employee_{index}',
+                phone_number=f'+3826710000{index}',
+            ),
+            is_active=True,
+        )
+        EmployeeLocationService.objects.create(
+            employee=employee,
+            provider_location=self.location_a,
+            service=self.service,
+        )
+        for weekday in range(7):
+            Schedule.objects.create(
+                employee=employee,
+                provider_location=self.location_a,
+                day_of_week=weekday,
+                start_time=time(hour=9),
+                end_time=time(hour=18),
+                break_start=time(hour=13),
+                break_end=time(hour=14),
+                is_working=True,
+            )
+        return employee
+
+    def _get_slots(self):
+        return BookingAvailabilityService.get_available_slots(
+            provider_location=self.location_a,
+            service=self.service,
+            pet=self.pet_one,
+            requester=self.owner,
+            date_start=self.date_start,
+            date_end=self.date_end,
+        )
+
+    def test_cold_and_warm_query_budget_for_two_week_range(self):
+        self._create_booking(
+            pet=self.pet_one,
+            location=self.location_a,
+            employee=self.employee_a,
+            start_time=timezone.make_aware(datetime.combine(self.date_start, time(hour=10))),
+        )
+
+        with self.assertNumQueries(self.COLD_QUERY_BUDGET):
+            grouped_slots = self._get_slots()
+        self.assertEqual(len(grouped_slots), 14)
+        self.assertTrue(all(grouped_slots.values()))
+
+        with self.assertNumQueries(self.WARM_QUERY_BUDGET):
+            self.assertEqual(self._get_slots(), grouped_slots)
+
+    def test_query_budget_does_not_grow_with_employees(self):
+        for index in range(3, 8):
+            self._add_employee(index)
+
+        with self.assertNumQueries(self.COLD_QUERY_BUDGET):
+            self._get_slots()
+
+    def test_vacation_and_open_sick_leave_remove_employee_days(self):
+        Vacation.objects.create(
+            employee=self.employee_a,
+            start_date=self.date_start,
+            end_date=self.date_start + timedelta(days=1),
+        )
+        SickLeave.objects.create(
+            employee=self.employee_a,
+            provider_location=self.location_a,
+            start_date=self.date_start + timedelta(days=10),
+        )
+
+        grouped_slots = self._get_slots()
+
+        for offset in range(14):
+            target_date = self.date_start + timedelta(days=offset)
+            employee_ids = {slot['employee_id'] for slot in grouped_slots[target_date.isoformat()]}
+            if offset < 2 or offset >= 10:
+                self.assertNotIn(self.employee_a.id, employee_ids)
+            else:
+                self.assertIn(self.employee_a.id, employee_ids)
+
+
+class SlotStreamTests(BookingFlowBaseMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.date_start = timezone.localdate() + timedelta(days=1)
+        self.date_end = self.date_start + timedelta(days=6)
+
+    def _find(self, limit, cursor=None):
+        return BookingAvailabilityService.find_next_slots(
+            provider_location=self.location_a,
+            service=self.service,
+            pet=self.pet_one,
+            date_start=self.date_start,
+            date_end=self.date_end,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    def _slot_key(self, slot):
+        return datetime.fromisoformat(slot['start_time']), slot['employee_id']
+
+    def test_stream_matches_range_slots_in_chronological_order(self):
+        grouped_slots = BookingAvailabilityService.get_available_slots(
+            provider_location=self.location_a,
+            service=self.service,
+            pet=self.pet_one,
+            requester=self.owner,
+            date_start=self.date_start,
+            date_end=self.date_end,
+        )
+        expected = [slot for slots in grouped_slots.values() for slot in slots]
+
+        streamed, next_cursor = self._find(limit=len(expected))
+
+        self.assertEqual(streamed, expected)
+        self.assertIsNone(next_cursor)
+        keys = [self._slot_key(slot) for slot in streamed]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_cursor_resumes_without_duplicates_or_gaps(self):
+        all_slots, _ = self._find(limit=500)
+
+        first_page, cursor = self._find(limit=5)
+        self.assertIsNotNone(cursor)
+        second_page, _ = self._find(limit=5, cursor=SlotCursor.decode(cursor.encode()))
+
+        self.assertEqual(first_page + second_page, all_slots[:10])
+
+    def test_invalid_cursor_raises_domain_error(self):
+        with self.assertRaises(BookingDomainError) as context:
+            SlotCursor.decode('not-a-cursor')
+
+        self.assertEqual(context.exception.code, 'invalid_slot_cursor')
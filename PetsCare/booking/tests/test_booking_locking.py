@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from booking.locking import RESOURCE_EMPLOYEE, RESOURCE_PET, interval_lock_keys
+from booking.test_booking_flow_logic import BookingFlowBaseMixin
+from booking.unified_services import BookingDomainError, BookingTransactionService
+
+
+@override_settings(BOOKING_LOCK_BUCKET_MINUTES=60)
+class IntervalLockKeysTest(SimpleTestCase):
+    start = datetime(2026, 11, 2, 10, 0, tzinfo=dt_timezone.utc)
+
+    def keys(self, start_offset, end_offset, resource=RESOURCE_EMPLOYEE, resource_id=1):
+        return set(interval_lock_keys(
+            resource,
+            resource_id,
+            self.start + timedelta(minutes=start_offset),
+            self.start + timedelta(minutes=end_offset),
+        ))
+
+    def test_overlapping_intervals_share_a_key(self):
+        self.assertTrue(self.keys(0, 90) & self.keys(75, 120))
+
+    def test_adjacent_and_distant_intervals_do_not_share_keys(self):
+        self.assertFalse(self.keys(0, 60) & self.keys(60, 120))
+        self.assertFalse(self.keys(0, 60) & self.keys(24 * 60, 25 * 60))
+
+    def test_keys_are_scoped_by_resource(self):
+        self.assertFalse(self.keys(0, 60) & self.keys(0, 60, resource_id=2))
+        self.assertFalse(self.keys(0, 60) & self.keys(0, 60, resource=RESOURCE_PET))
+
+
+class BookingTransactionLockingTest(BookingFlowBaseMixin, TestCase):
+    def test_only_bookings_in_window_are_row_locked(self):
+        start_time = self._dt(10, 0) + timedelta(days=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            BookingTransactionService._lock_relevant_bookings(
+                pet=self.pet_one,
+                employee=self.employee_a,
+                escort_owner=self.owner,
+                start_time=start_time,
+                end_time=start_time + timedelta(hours=1),
+            )
+
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertTrue(any('pg_advisory_xact_lock' in statement for statement in sql))
+        row_locks = [statement for statement in sql if 'FOR UPDATE' in statement]
+        self.assertEqual(len(row_locks), 3)
+        for statement in row_locks:
+            self.assertIn('"start_time" <', statement)
+
+    def test_overlapping_booking_is_still_rejected(self):
+        start_time = self._dt(10, 0) + timedelta(days=1)
+        self._create_booking(pet=self.pet_one, location=self.location_a, employee=self.employee_a, start_time=start_time)
+
+        with self.assertRaises(BookingDomainError):
+            BookingTransactionService.create_booking(
+                user=self.owner,
+                pet=self.pet_one,
+                provider=self.provider,
+                employee=self.employee_a,
+                service=self.service,
+                start_time=start_time + timedelta(minutes=30),
+                provider_location=self.location_a,
+            )
@@ -2,9 +2,12 @@ from datetime import timedelta
 
 from rest_framework import status
 from rest_framework.test import APITestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from booking.constants import CANCELLED_BY_PROVIDER
+from booking.locking import RESOURCE_EMPLOYEE, interval_lock_keys
 from booking.models import ManualBooking
 from booking.test_booking_flow_logic import BookingFlowBaseMixin
 from catalog.models import Service
@@ -96,3 +99,37 @@ class ManualBookingV2Tests(BookingFlowBaseMixin, APITestCase):
         self.assertEqual(booking.status, 'cancelled')
         self.assertEqual(booking.cancelled_by, CANCELLED_BY_PROVIDER)
         self.assertEqual(booking.cancellation_reason.scope, CANCELLED_BY_PROVIDER)
+
+    def test_manual_booking_takes_client_booking_interval_lock(self):
+        self.client.force_authenticate(self.employee_a.user)
+        future_start = timezone.localtime(timezone.now()) + timedelta(hours=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.manual_bookings_url,
+                {
+                    'provider_id': self.provider.id,
+                    'provider_location_id': self.location_a.id,
+                    'employee_id': self.employee_a.id,
+                    'service_id': self.service.id,
+                    'pet_type_id': self.pet_type.id,
+                    'breed_id': self.breed.id,
+                    'size_code': 'S',
+                    'owner_first_name': 'Desk',
+                    'owner_last_name': 'Client',
+                    'owner_phone_number': '+38267000992',
+                    'owner_email': 'lock@example.com',
+                    'pet_name': 'Shadow',
+                    'start_time': future_start.isoformat(),
+                },
+                format='json',
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        # Тот же ключ берёт клиентское бронирование этого специалиста в этом окне.
+        booking = ManualBooking.objects.get(id=response.data['id'])  # type: ignore[index]
+        employee_key = str(interval_lock_keys(RESOURCE_EMPLOYEE, self.employee_a.id, booking.start_time, booking.end_time)[0])
+        self.assertTrue(any(
+            'pg_advisory_xact_lock' in query['sql'] and employee_key in query['sql']
+            for query in queries.captured_queries
+        ))
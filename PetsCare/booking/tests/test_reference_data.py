@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from booking.reference_data import cache as reference_cache, reference_data
+from catalog.models import Service
+from pets.models import PetType, SizeRule
+
+
+class ReferenceDataRegistryTest(TestCase):
+    def setUp(self):
+        self.pet_type = PetType.objects.create(name='Dog')
+        SizeRule.objects.create(
+            pet_type=self.pet_type, size_code='S', min_weight_kg=Decimal('0'), max_weight_kg=Decimal('10'),
+        )
+        SizeRule.objects.create(
+            pet_type=self.pet_type, size_code='M', min_weight_kg=Decimal('10'), max_weight_kg=Decimal('25'),
+        )
+
+    def test_lookups_are_served_without_queries_once_loaded(self):
+        reference_data.resolve_size_code(self.pet_type.pk, Decimal('5'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(reference_data.resolve_size_code(self.pet_type.pk, Decimal('5')), 'S')
+            self.assertEqual(reference_data.resolve_size_code(self.pet_type.pk, Decimal('10')), 'M')
+            self.assertEqual(reference_data.resolve_size_code(self.pet_type.pk, Decimal('40')), 'M')
+            self.assertEqual(reference_data.pet_type(self.pet_type.pk), self.pet_type)
+            self.assertEqual(reference_data.status('active').name, 'active')
+
+    def test_saving_reference_rows_reloads_snapshot(self):
+        self.assertEqual(reference_data.resolve_size_code(self.pet_type.pk, Decimal('40')), 'M')
+
+        SizeRule.objects.create(
+            pet_type=self.pet_type, size_code='L', min_weight_kg=Decimal('25'), max_weight_kg=Decimal('50'),
+        )
+
+        self.assertEqual(reference_data.resolve_size_code(self.pet_type.pk, Decimal('40')), 'L')
+
+    @override_settings(BOOKING_REFERENCE_DATA_CHECK_SECONDS=0, BOOKING_REFERENCE_DATA_LOCAL_MAX_AGE_SECONDS=0)
+    def test_snapshot_expires_without_shared_cache(self):
+        if reference_cache.is_shared:
+            self.skipTest('Проверяется только in-process fallback')
+        self.assertEqual(reference_data.resolve_size_code(self.pet_type.pk, Decimal('40')), 'M')
+
+        # Изменение в другом процессе: сигналов и смены версии здесь нет.
+        SizeRule.objects.filter(pet_type=self.pet_type, size_code='M').update(size_code='L')
+
+        self.assertEqual(reference_data.resolve_size_code(self.pet_type.pk, Decimal('40')), 'L')
+
+    def test_service_hierarchy_is_resolved_from_snapshot(self):
+        root = Service.objects.create(
+            code='ref_root',
+            name='Root',
+            level=0,
+            emergency_capability_mode=Service.EmergencyCapabilityMode.ENABLED,
+        )
+        leaf = Service.objects.create(code='ref_leaf', name='Leaf', parent=root, level=1)
+
+        self.assertEqual(reference_data.service_ancestor_ids(leaf.pk), [root.pk])
+        self.assertTrue(reference_data.service_has_children(root.pk))
+        self.assertFalse(reference_data.service_has_children(leaf.pk))
+        self.assertEqual(reference_data.resolve_emergency_capable(leaf.pk), leaf.resolve_emergency_capable())
+
+    def test_policy_follows_settings_overrides(self):
+        with override_settings(BOOKING_SLOT_STEP_MINUTES=15):
+            self.assertEqual(reference_data.policy().slot_step_minutes, 15)
+        with override_settings(BOOKING_SLOT_STEP_MINUTES=45):
+            self.assertEqual(reference_data.policy().slot_step_minutes, 45)
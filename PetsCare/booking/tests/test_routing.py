@@ -0,0 +1,92 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from booking.models import TravelTimeEntry
+from booking.routing import HaversineRoutingBackend, RoutePoint, RoutingService
+
+
+def _place(lat, lon):
+    return SimpleNamespace(point=Point(lon, lat, srid=4326))
+
+
+class CountingRoutingBackend(HaversineRoutingBackend):
+    """Haversine backend с маленькими лимитами, запоминающий размеры матриц."""
+
+    max_origins = 2
+    max_destinations = 2
+    max_elements = 4
+    calls = []
+
+    def get_duration_matrix(self, origins, destinations, mode):
+        type(self).calls.append((len(origins), len(destinations)))
+        return super().get_duration_matrix(origins, destinations, mode)
+
+
+class RoutePointTests(SimpleTestCase):
+    def test_nearby_points_share_rounded_key(self):
+        first = RoutePoint.from_point(Point(19.260012, 42.440041))
+        second = RoutePoint.from_point(Point(19.260049, 42.439963))
+
+        self.assertEqual(first, second)
+        self.assertEqual(first.latitude, Decimal('42.4400'))
+
+    def test_haversine_backend_scales_distance_by_speed(self):
+        origin = RoutePoint(Decimal('42.4400'), Decimal('19.2600'))
+        destination = RoutePoint(Decimal('42.5300'), Decimal('19.2600'))
+
+        with self.settings(BOOKING_ROUTING_HAVERSINE_SPEED_KMH=60, BOOKING_ROUTING_HAVERSINE_DETOUR_FACTOR=1):
+            durations = HaversineRoutingBackend().get_duration_matrix([origin], [destination], 'driving')
+
+        self.assertAlmostEqual(durations[(origin, destination)], 600, delta=5)
+
+
+@override_settings(BOOKING_ROUTING_BACKEND='booking.tests.test_routing.CountingRoutingBackend')
+class RoutingServiceStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        CountingRoutingBackend.calls = []
+
+    def test_durations_are_persisted_and_served_from_store(self):
+        pairs = [(_place(42.44, 19.26), _place(42.45, 19.27))]
+        first = RoutingService.get_travel_durations(pairs)
+        self.assertEqual(TravelTimeEntry.objects.count(), 1)
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            second = RoutingService.get_travel_durations(pairs)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(CountingRoutingBackend.calls), 1)
+
+    def test_missing_pairs_are_fetched_in_matrix_batches(self):
+        origins = [_place(42.40 + index / 100, 19.26) for index in range(3)]
+        destinations = [_place(42.50, 19.20 + index / 100) for index in range(2)]
+        pairs = [(origin, destination) for origin in origins for destination in destinations]
+
+        durations = RoutingService.get_travel_durations(pairs)
+
+        self.assertEqual(len(durations), 6)
+        self.assertEqual(CountingRoutingBackend.calls, [(2, 2), (1, 2)])
+        with self.assertNumQueries(0):
+            self.assertEqual(RoutingService.get_travel_durations(pairs), durations)
+
+    def test_consecutive_legs_request_only_their_pairs(self):
+        stops = [_place(42.40 + index / 100, 19.26 + index / 100) for index in range(4)]
+        pairs = list(zip(stops, stops[1:]))
+
+        durations = RoutingService.get_travel_durations(pairs)
+
+        self.assertEqual(len(durations), 3)
+        self.assertEqual(CountingRoutingBackend.calls, [(1, 1), (1, 1), (1, 1)])
+        self.assertEqual(TravelTimeEntry.objects.count(), 3)
+
+    def test_same_point_needs_no_backend(self):
+        place = _place(42.44, 19.26)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(RoutingService.get_travel_duration_seconds(place, place), 0)
+        self.assertEqual(CountingRoutingBackend.calls, [])
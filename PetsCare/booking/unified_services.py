@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import base64
+import binascii
+from dataclasses import dataclass, field, replace
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+import heapq
+from itertools import islice
 import math
 import random
 import string
-from typing import Any, cast
+from typing import Any, Collection, Iterator, cast
 
 from django.conf import settings
 from django.db import transaction
@@ -14,7 +18,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from catalog.models import Service
-from pets.models import Pet, PetType, SizeRule
+from pets.models import Pet, PetType
 from providers.models import (
     Employee,
     EmployeeLocationRole,
@@ -27,9 +31,12 @@ from providers.models import (
 )
 from users.models import User
 
+from .availability_index import AvailabilityBitmapIndex, EmployeeDayBitmap
+from .locking import BookingIntervalLock
+from .reference_data import reference_data
 from .models import Booking, BookingStatus
 from .routing import RoutingService
-from .constants import ACTIVE_BOOKING_STATUS_NAMES
+from .constants import ACTIVE_BOOKING_STATUS_NAMES, BOOKING_STATUS_ACTIVE
 
 
 
@@ -93,6 +100,33 @@ class BookingPolicy:
         )
 
 
+@dataclass(frozen=True)
+class SlotCursor:
+    """Позиция в хронологическом потоке слотов для продолжения выдачи ("show more")."""
+
+    start_time: datetime
+    employee_id: int
+
+    def encode(self) -> str:
+        """Кодирует курсор в непрозрачную строку для API."""
+        raw_value = f'{self.start_time.isoformat()}|{self.employee_id}'
+        return base64.urlsafe_b64encode(raw_value.encode('utf-8')).decode('ascii')
+
+    @classmethod
+    def decode(cls, token: str) -> 'SlotCursor':
+        """Восстанавливает курсор из строки API."""
+        try:
+            raw_value = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8')
+            start_value, employee_value = raw_value.rsplit('|', 1)
+            start_time = datetime.fromisoformat(start_value)
+            employee_id = int(employee_value)
+        except (binascii.Error, UnicodeError, ValueError) as exc:
+            raise BookingDomainError('invalid_slot_cursor', _('Invalid slot cursor.')) from exc
+        if timezone.is_naive(start_time):
+            raise BookingDomainError('invalid_slot_cursor', _('Invalid slot cursor.'))
+        return cls(start_time=start_time, employee_id=employee_id)
+
+
 @dataclass
 class BookingDraftValidationResult:
     """Результат единой валидации слота."""
@@ -330,22 +364,14 @@ class BookingAvailabilityService:
         if location_service is None:
             return grouped_slots
 
-        occupied_duration_minutes = int(location_service.duration_minutes)
-        price = Decimal(location_service.price)
-
-        current_date = date_start
-        while current_date <= date_end:
-            slots = cls.get_day_slots(
-                provider_location=provider_location,
-                service=service,
-                target_date=current_date,
-                occupied_duration_minutes=occupied_duration_minutes,
-                price=price,
-            )
-            grouped_slots[current_date.isoformat()] = slots
-            current_date += timedelta(days=1)
-
-        return grouped_slots
+        return cls.get_range_slots(
+            provider_location=provider_location,
+            service=service,
+            date_start=date_start,
+            date_end=date_end,
+            occupied_duration_minutes=int(location_service.duration_minutes),
+            price=Decimal(location_service.price),
+        )
 
     @classmethod
     def get_day_slots(
@@ -364,95 +390,230 @@ class BookingAvailabilityService:
         Проверки питомца/эскорта/логистики здесь НЕ выполняются —
         они делаются при конкретном бронировании.
         """
-        policy = BookingPolicy.load()
-        slots: list[dict[str, Any]] = []
+        return cls.get_range_slots(
+            provider_location=provider_location,
+            service=service,
+            date_start=target_date,
+            date_end=target_date,
+            occupied_duration_minutes=occupied_duration_minutes,
+            price=price,
+        )[target_date.isoformat()]
 
-        location_schedule = cls.get_location_schedule(provider_location, target_date)
-        if location_schedule is None:
-            return slots
+    @classmethod
+    def get_range_slots(
+        cls,
+        *,
+        provider_location: ProviderLocation,
+        service: Service,
+        date_start: date,
+        date_end: date,
+        occupied_duration_minutes: int,
+        price: Decimal,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Генерирует слоты на каждую дату диапазона [date_start, date_end].
 
-        eligible_employees = cls.get_eligible_employees(provider_location, service)
-        if not eligible_employees:
-            return slots
+        Сотрудники, расписания, отпуска, больничные и бронирования загружаются
+        на весь диапазон сразу, поэтому число запросов не зависит от длины
+        диапазона и числа сотрудников. Свободные слоты вычисляются битовыми
+        операциями над масками AvailabilityBitmapIndex в памяти.
+        """
+        grouped_slots: dict[str, list[dict[str, Any]]] = {
+            target_date.isoformat(): []
+            for target_date in AvailabilityBitmapIndex.date_range(date_start, date_end)
+        }
+        for target_date, slot in cls._iter_slot_entries(
+            provider_location=provider_location,
+            service=service,
+            date_start=date_start,
+            date_end=date_end,
+            occupied_duration_minutes=occupied_duration_minutes,
+            price=price,
+        ):
+            grouped_slots[target_date.isoformat()].append(slot)
+        return grouped_slots
 
-        current_timezone = timezone.get_current_timezone()
-        now = timezone.now()
+    @classmethod
+    def iter_slots(
+        cls,
+        *,
+        provider_location: ProviderLocation,
+        service: Service,
+        date_start: date,
+        date_end: date,
+        occupied_duration_minutes: int,
+        price: Decimal,
+        employee_ids: Collection[int] | None = None,
+        after: SlotCursor | None = None,
+        not_before: datetime | None = None,
+        include_manual_bookings: bool = False,
+        chunk_days: int | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Лениво перебирает свободные слоты в хронологическом порядке по всем сотрудникам.
+
+        Слоты разных сотрудников сливаются через heap-merge в порядке
+        (start_time, employee_id). Курсор after позволяет продолжить выдачу
+        без пересчёта предыдущих дней; chunk_days ограничивает, сколько дней
+        индекса загружается за раз, чтобы поиск "первых N" не читал весь диапазон.
+        """
+        for _target_date, slot in cls._iter_slot_entries(
+            provider_location=provider_location,
+            service=service,
+            date_start=date_start,
+            date_end=date_end,
+            occupied_duration_minutes=occupied_duration_minutes,
+            price=price,
+            employee_ids=employee_ids,
+            after=after,
+            not_before=not_before,
+            include_manual_bookings=include_manual_bookings,
+            chunk_days=chunk_days,
+        ):
+            yield slot
 
-        # Предзагружаем бронирования сотрудников на этот день одним запросом
-        employee_ids = [e.id for e in eligible_employees]
-        day_start = timezone.make_aware(
-            datetime.combine(target_date, datetime.min.time()), current_timezone,
-        )
-        day_end = day_start + timedelta(days=1)
+    @classmethod
+    def find_next_slots(
+        cls,
+        *,
+        provider_location: ProviderLocation,
+        service: Service,
+        pet: Pet,
+        date_start: date,
+        date_end: date,
+        limit: int,
+        cursor: SlotCursor | None = None,
+    ) -> tuple[list[dict[str, Any]], SlotCursor | None]:
+        """Возвращает первые limit свободных слотов и курсор для следующей страницы."""
+        location_service = cls.get_location_service(provider_location, service, pet)
+        if location_service is None:
+            return [], None
 
-        employee_bookings = list(
-            Booking.objects.filter(
-                status__name__in=ACTIVE_BOOKING_STATUS_NAMES,
-                employee_id__in=employee_ids,
-                start_time__lt=day_end,
-                end_time__gt=day_start,
-            ).only('employee_id', 'start_time', 'end_time')
+        slot_iterator = cls.iter_slots(
+            provider_location=provider_location,
+            service=service,
+            date_start=date_start,
+            date_end=date_end,
+            occupied_duration_minutes=int(location_service.duration_minutes),
+            price=Decimal(location_service.price),
+            after=cursor,
+            chunk_days=cls.get_slot_search_chunk_days(),
+        )
+        slots = list(islice(slot_iterator, limit + 1))
+        if len(slots) <= limit:
+            return slots, None
+
+        slots = slots[:limit]
+        last_slot = slots[-1]
+        return slots, SlotCursor(
+            start_time=datetime.fromisoformat(last_slot['start_time']),
+            employee_id=last_slot['employee_id'],
         )
-        bookings_by_employee: dict[int, list] = {eid: [] for eid in employee_ids}
-        for booking in employee_bookings:
-            bookings_by_employee[booking.employee_id].append(booking)
-
-        for employee in eligible_employees:
-            employee_schedule = cls.get_employee_schedule(employee, provider_location, target_date)
-            if employee_schedule is None:
-                continue
-            if (
-                location_schedule.open_time is None
-                or location_schedule.close_time is None
-                or employee_schedule.start_time is None
-                or employee_schedule.end_time is None
-            ):
-                continue
-
-            work_start = timezone.make_aware(
-                datetime.combine(target_date, max(location_schedule.open_time, employee_schedule.start_time)),
-                current_timezone,
-            )
-            work_end = timezone.make_aware(
-                datetime.combine(target_date, min(location_schedule.close_time, employee_schedule.end_time)),
-                current_timezone,
-            )
-
-            emp_bookings = bookings_by_employee.get(employee.id, [])
-            current_time = work_start
-
-            while current_time + timedelta(minutes=occupied_duration_minutes) <= work_end:
-                slot_end = current_time + timedelta(minutes=occupied_duration_minutes)
 
-                if current_time <= now:
-                    current_time += timedelta(minutes=policy.slot_step_minutes)
-                    continue
+    @staticmethod
+    def get_slot_search_chunk_days() -> int:
+        """Сколько дней индекса загружать за раз при поиске ближайших слотов."""
+        return max(int(getattr(settings, 'BOOKING_SLOT_SEARCH_CHUNK_DAYS', 7)), 1)
 
-                if cls._slot_overlaps_break(current_time, slot_end, employee_schedule):
-                    current_time += timedelta(minutes=policy.slot_step_minutes)
-                    continue
+    @classmethod
+    def _iter_slot_entries(
+        cls,
+        *,
+        provider_location: ProviderLocation,
+        service: Service,
+        date_start: date,
+        date_end: date,
+        occupied_duration_minutes: int,
+        price: Decimal,
+        employee_ids: Collection[int] | None = None,
+        after: SlotCursor | None = None,
+        not_before: datetime | None = None,
+        include_manual_bookings: bool = False,
+        chunk_days: int | None = None,
+    ) -> Iterator[tuple[date, dict[str, Any]]]:
+        """Генерирует пары (дата, слот) для iter_slots и get_range_slots."""
+        if after is not None:
+            date_start = max(date_start, timezone.localtime(after.start_time).date())
+        if not_before is not None:
+            date_start = max(date_start, timezone.localtime(not_before).date())
+        if date_start > date_end:
+            return
 
-                # Проверяем конфликт с существующими бронированиями сотрудника (in-memory)
-                has_conflict = any(
-                    b.start_time < slot_end and b.end_time > current_time
-                    for b in emp_bookings
+        eligible_employees = cls.get_eligible_employees(provider_location, service)
+        if employee_ids is not None:
+            eligible_employees = [employee for employee in eligible_employees if employee.id in employee_ids]
+        if not eligible_employees:
+            return
+
+        policy = reference_data.policy()
+        duration = timedelta(minutes=occupied_duration_minutes)
+        chunk_length = timedelta(days=(chunk_days or (date_end - date_start).days + 1) - 1)
+        chunk_start = date_start
+        while chunk_start <= date_end:
+            chunk_end = min(chunk_start + chunk_length, date_end)
+            bitmaps_by_date = AvailabilityBitmapIndex.get_range_bitmaps(
+                provider_location=provider_location,
+                employees=eligible_employees,
+                date_start=chunk_start,
+                date_end=chunk_end,
+            )
+            manual_busy_masks: dict[tuple[int, date], int] = {}
+            if include_manual_bookings:
+                manual_busy_masks = AvailabilityBitmapIndex.build_manual_busy_masks(
+                    [employee.id for employee in eligible_employees],
+                    bitmaps_by_date.keys(),
                 )
-                if has_conflict:
-                    current_time += timedelta(minutes=policy.slot_step_minutes)
-                    continue
 
-                slots.append({
-                    'start_time': current_time.isoformat(),
-                    'end_time': slot_end.isoformat(),
-                    'employee_id': employee.id,
-                    'price': str(price),
-                    'occupied_duration_minutes': occupied_duration_minutes,
-                })
+            now = timezone.now()
+            for target_date, bitmaps in bitmaps_by_date.items():
+                not_before_minute = AvailabilityBitmapIndex.first_minute_after(target_date, now)
+                if not_before_minute is None:
+                    continue
 
-                current_time += timedelta(minutes=policy.slot_step_minutes)
+                streams = []
+                for employee in eligible_employees:
+                    bitmap = bitmaps[employee.id]
+                    manual_mask = manual_busy_masks.get((employee.id, target_date), 0)
+                    if manual_mask:
+                        bitmap = replace(bitmap, busy_mask=bitmap.busy_mask | manual_mask)
+                    streams.append(
+                        cls._employee_slot_stream(
+                            bitmap,
+                            duration_minutes=occupied_duration_minutes,
+                            step_minutes=policy.slot_step_minutes,
+                            not_before_minute=not_before_minute,
+                        )
+                    )
+
+                day_start = AvailabilityBitmapIndex.day_start(target_date)
+                for start_minute, employee_id in heapq.merge(*streams):
+                    slot_start = day_start + timedelta(minutes=start_minute)
+                    if after is not None and (slot_start, employee_id) <= (after.start_time, after.employee_id):
+                        continue
+                    if not_before is not None and slot_start < not_before:
+                        continue
+                    yield target_date, {
+                        'start_time': slot_start.isoformat(),
+                        'end_time': (slot_start + duration).isoformat(),
+                        'employee_id': employee_id,
+                        'price': str(price),
+                        'occupied_duration_minutes': occupied_duration_minutes,
+                    }
+            chunk_start = chunk_end + timedelta(days=1)
 
-        slots.sort(key=lambda item: (item['start_time'], item['employee_id']))
-        return slots
+    @staticmethod
+    def _employee_slot_stream(
+        bitmap: EmployeeDayBitmap,
+        *,
+        duration_minutes: int,
+        step_minutes: int,
+        not_before_minute: int,
+    ) -> Iterator[tuple[int, int]]:
+        """Поток (стартовая минута, employee_id) одного сотрудника, упорядоченный по времени."""
+        for start_minute in bitmap.slot_start_minutes(
+            duration_minutes=duration_minutes,
+            step_minutes=step_minutes,
+            not_before_minute=not_before_minute,
+        ):
+            yield start_minute, bitmap.employee_id
 
     @classmethod
     def location_has_real_availability(
@@ -526,12 +687,12 @@ class BookingAvailabilityService:
         weight: Decimal | None = None,
     ) -> ProviderLocationService | None:
         """Находит услугу локации для pet context или явных pet_type/weight."""
-        resolved_pet_type = pet_type or getattr(pet, 'pet_type', None)
+        resolved_pet_type = pet_type or reference_data.pet_type(getattr(pet, 'pet_type_id', None))
         if resolved_pet_type is None:
             return None
 
         resolved_weight = weight if weight is not None else getattr(pet, 'weight', None)
-        size_code = cls._resolve_size_code(resolved_pet_type, resolved_weight)
+        size_code = reference_data.resolve_size_code(resolved_pet_type.pk, resolved_weight)
         queryset = ProviderLocationService.objects.filter(
             location=provider_location,
             service=service,
@@ -542,34 +703,6 @@ class BookingAvailabilityService:
             queryset = queryset.filter(size_code=size_code)
         return queryset.select_related('service').first()
 
-    @staticmethod
-    def _resolve_size_code(pet_type: PetType, weight: Decimal | None) -> str | None:
-        """Определяет size code по типу питомца и весу."""
-        if weight is None:
-            return None
-
-        weight_value = float(weight)
-        rules = list(SizeRule.objects.filter(pet_type=pet_type).order_by('min_weight_kg'))
-        if not rules:
-            return None
-
-        matching_rules = [
-            rule
-            for rule in rules
-            if float(rule.min_weight_kg) <= weight_value <= float(rule.max_weight_kg)
-        ]
-        if matching_rules:
-            ordered_rules = sorted(
-                matching_rules,
-                key=lambda item: {'S': 0, 'M': 1, 'L': 2, 'XL': 3}.get(item.size_code, -1),
-            )
-            return ordered_rules[-1].size_code
-        ordered_rules = sorted(
-            rules,
-            key=lambda item: {'S': 0, 'M': 1, 'L': 2, 'XL': 3}.get(item.size_code, -1),
-        )
-        return ordered_rules[-1].size_code
-
     @classmethod
     def get_eligible_employees(
         cls,
@@ -589,10 +722,24 @@ class BookingAvailabilityService:
         employees = list(
             Employee.objects.filter(id__in=employee_ids, is_active=True).select_related('user')
         )
+        if not employees:
+            return []
+
+        # Soft-activation по ролям локации считаем одним запросом на всех сотрудников
+        employees_with_roles: set[int] = set()
+        active_role_employee_ids: set[int] = set()
+        for employee_id, is_active in EmployeeLocationRole.objects.filter(
+            employee_id__in=[employee.id for employee in employees],
+            provider_location=provider_location,
+        ).values_list('employee_id', 'is_active'):
+            employees_with_roles.add(employee_id)
+            if is_active:
+                active_role_employee_ids.add(employee_id)
+
         return [
             employee
             for employee in employees
-            if cls._is_employee_active_in_location(employee, provider_location)
+            if employee.id not in employees_with_roles or employee.id in active_role_employee_ids
         ]
 
     @classmethod
@@ -629,7 +776,7 @@ class BookingAvailabilityService:
         exclude_booking_id: int | None,
     ) -> bool:
         """Проверяет, может ли конкретный владелец сопровождать питомца."""
-        policy = BookingPolicy.load()
+        policy = reference_data.policy()
         overlapping_bookings = cls.active_bookings().filter(
             escort_owner=owner,
             start_time__lt=end_time,
@@ -778,21 +925,26 @@ class BookingAvailabilityService:
         previous_booking = cls._get_previous_pet_booking(pet, start_time, exclude_booking_id)
         next_booking = cls._get_next_pet_booking(pet, end_time, exclude_booking_id)
 
+        # Оба перехода запрашиваются одной матрицей routing
+        route_pairs = []
         if previous_booking is not None:
-            required_seconds = cls.get_adjusted_travel_seconds(
-                previous_booking.provider_location,
-                provider_location,
-            )
-            latest_arrival = previous_booking.end_time + timedelta(seconds=required_seconds)
+            route_pairs.append((previous_booking.provider_location, provider_location))
+        if next_booking is not None:
+            route_pairs.append((provider_location, next_booking.provider_location))
+        if not route_pairs:
+            return True
+        required_seconds = iter(
+            cls.apply_travel_buffer(base_seconds)
+            for base_seconds in RoutingService.get_travel_durations(route_pairs)
+        )
+
+        if previous_booking is not None:
+            latest_arrival = previous_booking.end_time + timedelta(seconds=next(required_seconds))
             if latest_arrival > start_time:
                 return False
 
         if next_booking is not None:
-            required_seconds = cls.get_adjusted_travel_seconds(
-                provider_location,
-                next_booking.provider_location,
-            )
-            earliest_departure = end_time + timedelta(seconds=required_seconds)
+            earliest_departure = end_time + timedelta(seconds=next(required_seconds))
             if earliest_departure > next_booking.start_time:
                 return False
 
@@ -801,8 +953,12 @@ class BookingAvailabilityService:
     @classmethod
     def get_adjusted_travel_seconds(cls, source, destination) -> int:
         """Возвращает travel time с бизнес-буфером."""
-        base_seconds = RoutingService.get_travel_duration_seconds(source, destination)
-        policy = BookingPolicy.load()
+        return cls.apply_travel_buffer(RoutingService.get_travel_duration_seconds(source, destination))
+
+    @staticmethod
+    def apply_travel_buffer(base_seconds: int) -> int:
+        """Добавляет к travel time процентный и фиксированный буфер политики."""
+        policy = reference_data.policy()
         buffered_seconds = math.ceil(base_seconds * (1 + policy.travel_buffer_percent / 100))
         return buffered_seconds + (policy.travel_extra_buffer_minutes * 60)
 
@@ -943,19 +1099,6 @@ class BookingAvailabilityService:
         end_time_only = end_time.timetz().replace(tzinfo=None)
         return start_time_only < schedule.break_end and end_time_only > schedule.break_start
 
-    @classmethod
-    def _is_employee_active_in_location(
-        cls,
-        employee: Employee,
-        provider_location: ProviderLocation,
-    ) -> bool:
-        """Проверяет soft-activation сотрудника в локации без ломки старых данных."""
-        roles = EmployeeLocationRole.objects.filter(
-            employee=employee,
-            provider_location=provider_location,
-        )
-        return not roles.exists() or roles.filter(is_active=True).exists()
-
     @classmethod
     def _infer_provider_location(
         cls,
@@ -1013,15 +1156,26 @@ class BookingTransactionService:
 
         provider = provider or provider_location.provider
 
-        pet_queryset = Pet.objects.select_for_update() if not ignore_pet_constraints else Pet.objects.all()
-        pet = pet_queryset.get(pk=pet.pk)
-        employee = Employee.objects.select_for_update().get(pk=employee.pk)
-        provider_location = ProviderLocation.objects.select_for_update().get(pk=provider_location.pk)
+        # Строки Pet/Employee/ProviderLocation не блокируются: конфликты
+        # сериализуются блокировками временного окна (booking.locking).
+        pet = Pet.objects.get(pk=pet.pk)
+        employee = Employee.objects.get(pk=employee.pk)
+        provider_location = ProviderLocation.objects.get(pk=provider_location.pk)
 
         BookingTransactionService._lock_relevant_bookings(
             pet=pet if not ignore_pet_constraints else None,
             employee=employee,
             escort_owner=(escort_owner or user) if not skip_escort_constraints else None,
+            start_time=start_time,
+            end_time=BookingTransactionService._lock_window_end(
+                provider_location=provider_location,
+                service=service,
+                pet=pet,
+                start_time=start_time,
+                end_time=end_time,
+                service_pet_type=service_pet_type,
+                service_pet_weight=service_pet_weight,
+            ),
             include_pet=not ignore_pet_constraints,
             include_escort=not skip_escort_constraints,
         )
@@ -1108,30 +1262,51 @@ class BookingTransactionService:
         pet: Pet | None,
         employee: Employee,
         escort_owner: User | None,
+        start_time: datetime,
+        end_time: datetime,
         include_pet: bool = True,
         include_escort: bool = True,
     ) -> None:
-        """Берёт row locks на потенциально конфликтующие бронирования."""
+        """Блокирует сотрудника, питомца и сопровождающих только в окне нового слота."""
+        lock = BookingIntervalLock(start_time, end_time).employee(employee.pk)
         if include_pet and pet is not None:
-            list(Booking.objects.select_for_update().filter(
-                pet=pet,
-                status__name__in=ACTIVE_BOOKING_STATUS_NAMES,
-            ))
-        list(Booking.objects.select_for_update().filter(
-            employee=employee,
-            status__name__in=ACTIVE_BOOKING_STATUS_NAMES,
-        ))
+            lock.pet(pet.pk)
         if include_escort and escort_owner is not None:
-            list(Booking.objects.select_for_update().filter(
-                escort_owner=escort_owner,
-                status__name__in=ACTIVE_BOOKING_STATUS_NAMES,
-            ))
+            # Доступность сопровождения проверяется по всем владельцам питомца.
+            owner_ids = {escort_owner.pk}
+            if pet is not None:
+                owner_ids.update(pet.owners.values_list('id', flat=True))
+            lock.escort_owners(sorted(owner_ids))
+        lock.acquire()
+
+    @staticmethod
+    def _lock_window_end(
+        *,
+        provider_location: ProviderLocation,
+        service: Service,
+        pet: Pet,
+        start_time: datetime,
+        end_time: datetime | None,
+        service_pet_type: PetType | None = None,
+        service_pet_weight: Decimal | None = None,
+    ) -> datetime:
+        """Оценивает конец слота до валидации — по длительности услуги локации."""
+        location_service = BookingAvailabilityService.get_location_service_for_context(
+            provider_location,
+            service,
+            pet=pet,
+            pet_type=service_pet_type,
+            weight=service_pet_weight,
+        )
+        if location_service is not None:
+            return start_time + timedelta(minutes=int(location_service.duration_minutes))
+        # Валидация всё равно отклонит запрос; блокируем хотя бы указанный интервал.
+        return max(end_time or start_time, start_time)
 
     @staticmethod
     def _get_active_status() -> BookingStatus:
         """Возвращает активный статус бронирования."""
-        status_obj, _ = BookingStatus.objects.get_or_create(name='active')
-        return status_obj
+        return reference_data.status(BOOKING_STATUS_ACTIVE)
 
     @staticmethod
     def _generate_booking_code() -> str:
@@ -1180,6 +1355,14 @@ class BookingTransactionService:
             pet=booking.pet,
             employee=employee,
             escort_owner=cast(User | None, escort_owner),
+            start_time=start_time,
+            end_time=BookingTransactionService._lock_window_end(
+                provider_location=booking.provider_location,
+                service=service,
+                pet=booking.pet,
+                start_time=start_time,
+                end_time=new_end_time,
+            ),
         )
 
         validation_result = BookingAvailabilityService.validate_booking_request(
@@ -38,11 +38,23 @@ class ServiceSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'level']
 
     def get_root_category_code(self, obj):
-        """Код корневой категории (veterinary, grooming и т.д.) для определения семейства услуги."""
-        current = obj
-        while current.parent_id:
-            current = current.parent
-        return current.code if current else None
+        """
+        Код корневой категории (veterinary, grooming и т.д.) для определения семейства услуги.
+        Иерархия загружается одним запросом и кешируется в контексте сериализации.
+        """
+        if not obj.parent_id:
+            return obj.code
+        hierarchy = self.context.get('service_hierarchy')
+        if hierarchy is None:
+            hierarchy = {
+                service_id: (parent_id, code)
+                for service_id, parent_id, code in Service.objects.values_list('id', 'parent_id', 'code')
+            }
+            self.context['service_hierarchy'] = hierarchy
+        parent_id, code = obj.parent_id, obj.code
+        while parent_id in hierarchy:
+            parent_id, code = hierarchy[parent_id]
+        return code
 
     def validate(self, data):
         if data.get('is_periodic') and not data.get('period_days'):
@@ -54,6 +54,22 @@ app.conf.beat_schedule = {
         'task': 'notifications.tasks.process_reminders_task',
         'schedule': crontab(hour='8', minute='0'),
     },
+    'refresh-analytics-rollups': {
+        'task': 'analytics.tasks.refresh_analytics_rollups',
+        'schedule': crontab(minute='*/10'),  # Пересчет дневных агрегатов только для помеченных дней
+    },
+    'flush-user-activity-buffer': {
+        'task': 'user_analytics.tasks.flush_user_activity_buffer',
+        'schedule': crontab(),  # Каждую минуту: приращения активности из буфера в UserActivity
+    },
+    'flush-audit-log-buffer': {
+        'task': 'audit.tasks.flush_audit_log_buffer',
+        'schedule': 10.0,  # Записи UserAction из буфера в БД пачками
+    },
+    'maintain-audit-partitions': {
+        'task': 'audit.tasks.maintain_audit_partitions',
+        'schedule': crontab(hour='3', minute='30'),  # Партиции следующих месяцев и удаление устаревших
+    },
 }
 
 @app.task(bind=True)
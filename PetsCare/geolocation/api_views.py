@@ -473,8 +473,8 @@ def clear_user_location(request):
         # Удаляем из базы данных
         UserLocation.objects.filter(user=request.user).delete()
         
-        # Очищаем кэш
-        from django.core.cache import cache
+        # Очищаем кэш (пространство имён geolocation, как в DeviceLocationService)
+        from .services import cache
         cache_key = f"user_location_{request.user.id}"
         cache.delete(cache_key)
         
@@ -0,0 +1,149 @@
+"""
+Кеш кандидатов геопоиска по тайлам.
+
+Точка поиска привязывается к тайлу сетки, а радиус — к ближайшему
+сверху значению из SEARCH_RADIUS_BUCKETS_KM. В кеш кладётся список
+(id, широта, долгота) объектов в радиусе, покрывающем любую точку тайла,
+поэтому соседние пользователи с немного разными координатами разделяют
+одну запись. При чтении расстояния пересчитываются точно от реальной
+точки и лишние кандидаты отбрасываются.
+
+Записи сбрасываются сменой версии пространства имён (invalidate).
+"""
+
+from __future__ import annotations
+
+import math
+import time as time_module
+from typing import Any
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+
+from utils.caching import get_namespace_cache
+
+from .utils import calculate_distance, generate_search_cache_key
+
+CACHE_KEY_PREFIX = 'geo_search'
+SEARCH_RADIUS_BUCKETS_KM = (1, 2, 5, 10, 20, 50, 100)
+TILES_PER_RADIUS = 4
+KM_PER_DEGREE = 111.32
+TILE_COVER_MARGIN = 1.05
+
+cache = get_namespace_cache('geo_search')
+
+
+class GeoSearchCache:
+    """
+    Кеш кандидатов поиска по расстоянию с ключами по тайлам.
+    """
+
+    @staticmethod
+    def get_cache_timeout() -> int:
+        """Возвращает TTL записей кеша геопоиска."""
+        return max(int(getattr(settings, 'GEO_SEARCH_CACHE_TIMEOUT_SECONDS', 600)), 1)
+
+    @staticmethod
+    def radius_bucket(radius_km: float) -> float | None:
+        """Возвращает корзину радиуса или None, если радиус больше максимальной."""
+        for bucket in SEARCH_RADIUS_BUCKETS_KM:
+            if radius_km <= bucket:
+                return bucket
+        return None
+
+    @staticmethod
+    def snap_to_tile(lat: float, lon: float, bucket_km: float) -> tuple[int, int, float, float, float]:
+        """
+        Привязывает точку к тайлу сетки для корзины радиуса.
+
+        Returns:
+            (row, col, center_lat, center_lon, tile_size_km)
+        """
+        tile_size_km = bucket_km / TILES_PER_RADIUS
+        lat_step = tile_size_km / KM_PER_DEGREE
+        row = math.floor(lat / lat_step)
+        center_lat = (row + 0.5) * lat_step
+        lon_step = tile_size_km / (KM_PER_DEGREE * max(math.cos(math.radians(center_lat)), 0.01))
+        col = math.floor(lon / lon_step)
+        center_lon = (col + 0.5) * lon_step
+        return row, col, center_lat, center_lon, tile_size_km
+
+    @classmethod
+    def get_candidates(
+        cls,
+        *,
+        namespace: str,
+        queryset,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        filters: dict[str, Any] | None = None,
+        point_field: str = 'point',
+    ) -> list[tuple[int, float]]:
+        """
+        Возвращает [(id, расстояние_км)] объектов в радиусе, по возрастанию расстояния.
+
+        filters должен однозначно описывать фильтры queryset: он входит в ключ кеша.
+        """
+        bucket_km = cls.radius_bucket(radius_km)
+        if bucket_km is None:
+            return cls._refine(cls._load_points(queryset, point_field, lat, lon, radius_km), lat, lon, radius_km)
+
+        row, col, center_lat, center_lon, tile_size_km = cls.snap_to_tile(lat, lon, bucket_km)
+        cache_key = cls._entry_key(namespace, bucket_km, row, col, filters or {})
+        points = cache.get(cache_key)
+        if points is None:
+            cover_radius_km = (bucket_km + tile_size_km * math.sqrt(2) / 2) * TILE_COVER_MARGIN
+            points = cls._load_points(queryset, point_field, center_lat, center_lon, cover_radius_km)
+            cache.set(cache_key, points, cls.get_cache_timeout())
+        return cls._refine(points, lat, lon, radius_km)
+
+    @classmethod
+    def invalidate(cls, namespace: str) -> None:
+        """Сбрасывает все записи пространства имён."""
+        cache.set(cls._version_key(namespace), time_module.time_ns(), None)
+
+    @staticmethod
+    def _load_points(queryset, point_field: str, lat: float, lon: float, radius_km: float) -> list[tuple[int, float, float]]:
+        """Один PostGIS-запрос координат объектов в радиусе от точки."""
+        center_point = Point(lon, lat, srid=4326)
+        rows = queryset.filter(
+            **{f'{point_field}__distance_lte': (center_point, radius_km * 1000)}
+        ).values_list('pk', point_field)
+        return [(pk, point.y, point.x) for pk, point in rows if point is not None]
+
+    @staticmethod
+    def _refine(
+        points: list[tuple[int, float, float]],
+        lat: float,
+        lon: float,
+        radius_km: float,
+    ) -> list[tuple[int, float]]:
+        """Точно пересчитывает расстояния от точки поиска и отсекает лишнее."""
+        results = []
+        for pk, point_lat, point_lon in points:
+            distance = calculate_distance(lat, lon, point_lat, point_lon)
+            if distance is not None and distance <= radius_km:
+                results.append((pk, distance))
+        results.sort(key=lambda item: (item[1], item[0]))
+        return results
+
+    @classmethod
+    def _get_version(cls, namespace: str) -> int:
+        """Возвращает версию пространства имён, создавая её при отсутствии."""
+        key = cls._version_key(namespace)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time_module.time_ns(), None)
+            version = cache.get(key, 0)
+        return version
+
+    @classmethod
+    def _entry_key(cls, namespace: str, bucket_km: float, row: int, col: int, filters: dict[str, Any]) -> str:
+        version = cls._get_version(namespace)
+        filters_hash = generate_search_cache_key(namespace, **filters)
+        return f'{CACHE_KEY_PREFIX}:{namespace}:{version}:{bucket_km}:{row}:{col}:{filters_hash}'
+
+    @staticmethod
+    def _version_key(namespace: str) -> str:
+        return f'{CACHE_KEY_PREFIX}:version:{namespace}'
@@ -9,7 +9,7 @@ from decimal import Decimal
 import requests
 from django.conf import settings
 from django.utils import timezone
-from django.core.cache import cache
+from utils.caching import get_namespace_cache
 from django.db import transaction
 from django.utils.translation import gettext as _
 
@@ -21,6 +21,8 @@ from booking.location_search import normalize_location_text, transliterate_cyril
 
 logger = logging.getLogger(__name__)
 
+cache = get_namespace_cache('geolocation')
+
 
 def _make_json_serializable(obj: Any) -> Any:
     """
@@ -17,6 +17,7 @@ from geolocation.forms import AddressForm
 from geolocation.models import Address, AddressCache, AddressValidation, UserLocation
 from geolocation.serializers import AddressSerializer
 from geolocation.services import AddressValidationService, DeviceLocationService, GoogleMapsService
+from geolocation.services import cache as location_cache
 from geolocation.utils import (
     batch_distance_calculation,
     filter_by_distance,
@@ -326,7 +327,7 @@ class DeviceLocationServiceTestCase(TestCase):
             accuracy=100,
             source='map',
         )
-        cache.delete(f'user_location_{user.id}')
+        location_cache.delete(f'user_location_{user.id}')
 
         service = DeviceLocationService()
         location = service.get_user_location(user)
@@ -335,4 +336,4 @@ class DeviceLocationServiceTestCase(TestCase):
         self.assertEqual(location['source'], 'map')
         self.assertEqual(float(location['latitude']), 52.5200066)
         self.assertEqual(float(location['longitude']), 13.404954)
-        self.assertIsNotNone(cache.get(f'user_location_{user.id}'))
+        self.assertIsNotNone(location_cache.get(f'user_location_{user.id}'))
@@ -215,7 +215,6 @@ class ProviderSearchByDistanceAPITest(APITestCase):
         self.assertEqual(len(data), 0)
 
 
-@skip("Deprecated sitter distance search endpoint removed")
 class SitterAdvancedSearchByDistanceAPITest(APITestCase):
     """
     Тесты для расширенного API поиска ситтеров по расстоянию.
@@ -223,134 +222,80 @@ class SitterAdvancedSearchByDistanceAPITest(APITestCase):
     
     def setUp(self):
         """
-        Подготавливает тестовые данные.
+        Подготавливает ситтеров с точками зоны обслуживания вокруг центра Москвы.
         """
-        # Создаем тестового пользователя
+        from django.contrib.gis.geos import Point
+        from geolocation.models import UserLocation
+        from sitters.models import SitterProfile
+
         self.user = User.objects.create_user(
             email='test@example.com',
             password='testpass123',
             first_name='Test',
             last_name='User'
         )
-        
-        # Создаем ситтеров
-        from users.models import UserType
-        sitter_type = UserType.objects.create(name='sitter')
-        
-        self.sitter1 = User.objects.create_user(
-            email='sitter1@example.com',
-            password='testpass123',
-            first_name='Sitter',
-            last_name='One',
-            rating=Decimal('4.8')
-        )
-        self.sitter1.user_types.add(sitter_type)
-        
-        self.sitter2 = User.objects.create_user(
-            email='sitter2@example.com',
-            password='testpass123',
-            first_name='Sitter',
-            last_name='Two',
-            rating=Decimal('4.2')
-        )
-        self.sitter2.user_types.add(sitter_type)
-        
-        # Создаем адреса
-        self.center_address = Address.objects.create(
-            country='Russia',
-            city='Moscow',
-            street='Tverskaya',
-            house_number='1',
-            latitude=Decimal('55.7558'),
-            longitude=Decimal('37.6176'),
-            validation_status='valid',
-            is_valid=True,
-            is_geocoded=True
-        )
-        
-        self.nearby_address = Address.objects.create(
-            country='Russia',
-            city='Moscow',
-            street='Arbat',
-            house_number='10',
-            latitude=Decimal('55.7494'),
-            longitude=Decimal('37.5914'),
-            validation_status='valid',
-            is_valid=True,
-            is_geocoded=True
-        )
-        
-        # Привязываем адреса к ситтерам
-        self.sitter1.address = self.nearby_address
-        self.sitter1.save()
-        
-        self.sitter2.address = self.center_address
-        self.sitter2.save()
-    
-    def test_advanced_search_sitters_by_distance(self):
-        """
-        Тестирует расширенный поиск ситтеров по расстоянию.
-        """
-        self.client.force_authenticate(user=self.user)
-        
-        url = reverse('providers:sitter-advanced-search')
-        params = {
-            'latitude': '55.7558',
-            'longitude': '37.6176',
-            'radius': '5'
-        }
-        
-        response = self.client.get(url, params)
-        
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data: list = list(response.data) if response.data is not None else []  # type: ignore[arg-type]
-        self.assertEqual(len(data), 2)
-        
-        # Проверяем, что результаты отсортированы по расстоянию
-        distances = [item['distance'] for item in data if item.get('distance')]
-        self.assertEqual(distances, sorted(distances))
-    
-    def test_advanced_search_sitters_with_rating_filter(self):
-        """
-        Тестирует поиск ситтеров с фильтром по рейтингу.
-        """
+        self.url = reverse('providers:sitter-advanced-search')
+        self.center = {'latitude': '55.7558', 'longitude': '37.6176'}
+
+        def create_sitter(index, longitude, latitude, **profile_fields):
+            sitter_user = User.objects.create_user(
+                email=f'sitter{index}@example.com',
+                password='testpass123',
+                first_name='Sitter',
+                last_name=str(index),
+            )
+            UserLocation.objects.create(user=sitter_user, point=Point(longitude, latitude, srid=4326), source='map')
+            return SitterProfile.objects.create(user=sitter_user, **profile_fields)
+
+        # ~1.8 км от центра
+        self.nearby = create_sitter(1, 37.5914, 55.7494, hourly_rate=Decimal('10.00'), max_distance_km=5)
+        # ~0.5 км от центра, но дороже
+        self.expensive = create_sitter(2, 37.6100, 55.7560, hourly_rate=Decimal('50.00'), max_distance_km=5)
+        # ~25 км от центра
+        self.far = create_sitter(3, 37.9000, 55.9000, hourly_rate=Decimal('10.00'), max_distance_km=50)
+        # ~1.8 км от центра, но зона обслуживания только 1 км
+        self.small_area = create_sitter(4, 37.5914, 55.7500, hourly_rate=Decimal('10.00'), max_distance_km=1)
+
+    def search(self, **params):
         self.client.force_authenticate(user=self.user)
-        
-        url = reverse('providers:sitter-advanced-search')
-        params = {
-            'latitude': '55.7558',
-            'longitude': '37.6176',
-            'radius': '5',
-            'min_rating': '4.5'
-        }
-        
-        response = self.client.get(url, params)
-        
+        response = self.client.get(self.url, {**self.center, **params})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data: list = list(response.data) if response.data is not None else []  # type: ignore[arg-type]
-        self.assertEqual(len(data), 1)
-        self.assertEqual(data[0]['email'], 'sitter1@example.com')
-    
-    def test_advanced_search_sitters_with_availability_filter(self):
-        """
-        Тестирует поиск ситтеров с фильтром по доступности.
-        """
+        return response.data
+
+    def test_search_uses_service_point_radius_and_orders_by_distance(self):
+        data = self.search(radius='5')
+
+        self.assertEqual([item['id'] for item in data['results']], [self.expensive.id, self.nearby.id])
+        self.assertLess(data['results'][0]['distance_km'], data['results'][1]['distance_km'])
+        self.assertEqual(data['count'], 2)
+
+    def test_search_prefilters_by_price(self):
+        data = self.search(radius='5', max_price='20')
+
+        self.assertEqual([item['id'] for item in data['results']], [self.nearby.id])
+
+    def test_search_is_paginated(self):
+        data = self.search(radius='5', limit='1')
+
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNotNone(data['next'])
+
+    def test_service_point_follows_user_location(self):
+        from django.contrib.gis.geos import Point
+
+        location = self.far.user.user_location
+        location.point = Point(37.6170, 55.7550, srid=4326)
+        location.save()
+
+        data = self.search(radius='5')
+        self.assertIn(self.far.id, [item['id'] for item in data['results']])
+
+    def test_invalid_coordinates_return_empty_result(self):
         self.client.force_authenticate(user=self.user)
-        
-        url = reverse('providers:sitter-advanced-search')
-        params = {
-            'latitude': '55.7558',
-            'longitude': '37.6176',
-            'radius': '5',
-            'available': 'true'
-        }
-        
-        response = self.client.get(url, params)
-        
+        response = self.client.get(self.url, {'latitude': 'invalid', 'longitude': 'invalid'})
+
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        # Все ситтеры должны быть доступны (нет активных заявок)
-        data: list = list(response.data) if response.data is not None else []  # type: ignore[arg-type]
-        self.assertEqual(len(data), 2)
+        self.assertEqual(response.data['results'], [])
 
 
 class DistanceCalculationTest(TestCase):
@@ -0,0 +1,38 @@
+"""
+Тесты тайлового кеша кандидатов геопоиска.
+"""
+
+import math
+
+from django.test import SimpleTestCase
+
+from geolocation.search_cache import SEARCH_RADIUS_BUCKETS_KM, GeoSearchCache
+from geolocation.utils import calculate_distance
+
+
+class GeoSearchCacheHelpersTests(SimpleTestCase):
+    def test_radius_bucket_rounds_up(self):
+        self.assertEqual(GeoSearchCache.radius_bucket(0.5), 1)
+        self.assertEqual(GeoSearchCache.radius_bucket(7), 10)
+        self.assertEqual(GeoSearchCache.radius_bucket(10), 10)
+        self.assertIsNone(GeoSearchCache.radius_bucket(SEARCH_RADIUS_BUCKETS_KM[-1] + 1))
+
+    def test_nearby_points_share_tile(self):
+        first = GeoSearchCache.snap_to_tile(42.4401, 19.2601, 10)
+        second = GeoSearchCache.snap_to_tile(42.4402, 19.2602, 10)
+
+        self.assertEqual(first[:2], second[:2])
+
+    def test_tile_center_is_within_half_diagonal(self):
+        for lat, lon in ((42.44, 19.26), (-33.87, 151.21), (64.14, -21.94)):
+            _row, _col, center_lat, center_lon, tile_size_km = GeoSearchCache.snap_to_tile(lat, lon, 5)
+            distance = calculate_distance(lat, lon, center_lat, center_lon)
+
+            self.assertLessEqual(distance, tile_size_km * math.sqrt(2) / 2 * 1.05)
+
+    def test_refine_filters_and_sorts_by_exact_distance(self):
+        points = [(1, 42.46, 19.26), (2, 42.445, 19.26), (3, 43.0, 19.26)]
+
+        results = GeoSearchCache._refine(points, 42.44, 19.26, 5)
+
+        self.assertEqual([pk for pk, _distance in results], [2, 1])
@@ -275,8 +275,10 @@ def cache_search_results(cache_key: str, results: List[Tuple[Any, float]],
         results: Список результатов поиска с расстояниями
         timeout: Время жизни кэша в секундах (по умолчанию 1 час)
     """
-    from django.core.cache import cache
-    
+    from utils.caching import get_namespace_cache
+
+    cache = get_namespace_cache('geolocation')
+
     # Сохраняем результаты в кэше
     cache.set(cache_key, results, timeout)
 
@@ -291,9 +293,9 @@ def get_cached_search_results(cache_key: str) -> Optional[List[Tuple[Any, float]
     Returns:
         Список результатов поиска или None, если кэш не найден
     """
-    from django.core.cache import cache
-    
-    return cache.get(cache_key)
+    from utils.caching import get_namespace_cache
+
+    return get_namespace_cache('geolocation').get(cache_key)
 
 
 def generate_search_cache_key(search_type: str, **params) -> str:
@@ -29,13 +29,12 @@ from .serializers import (
     NotificationRuleSerializer
 )
 from .services import NotificationService, PreferenceService, NotificationRuleService
+from .counters import NotificationCounterService, notification_statistics
 from .upcoming_booking_reminders import (
     get_or_create_upcoming_booking_reminder_settings,
     get_upcoming_booking_reminder_defaults,
 )
-from django.utils import timezone
 from django.core.paginator import Paginator
-from django.db.models import Count
 
 logger = logging.getLogger(__name__)
 
@@ -97,7 +96,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         Returns:
             Response: Количество непрочитанных уведомлений
         """
-        count = self.get_queryset().filter(is_read=False).count()
+        count = NotificationCounterService.unread_count(request.user.id)
         return Response({'unread_count': count})
 
     @action(detail=True, methods=['post'])
@@ -114,9 +113,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         """
         try:
             notification = self.get_object()
-            notification.is_read = True
-            notification.read_at = timezone.now()
-            notification.save()
+            NotificationCounterService.mark_as_read(notification)
             
             return Response({
                 'message': _('Notification marked as read'),
@@ -142,14 +139,13 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
             Response: Результат операции
         """
         try:
-            with transaction.atomic():
-                updated_count = self.get_queryset().filter(is_read=False).update(is_read=True, read_at=timezone.now())
-                
-                return Response({
-                    'message': _('All notifications marked as read'),
-                    'updated_count': updated_count
-                })
-                
+            updated_count = NotificationCounterService.mark_all_as_read(self.get_queryset())
+
+            return Response({
+                'message': _('All notifications marked as read'),
+                'updated_count': updated_count
+            })
+
         except Exception as e:
             logger.error(f"Failed to mark all notifications as read for user {request.user.id}: {e}")
             return Response(
@@ -169,35 +165,8 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
             Response: Статистика уведомлений
         """
         try:
-            queryset = self.get_queryset()
-            
-            # Общая статистика
-            total_count = queryset.count()
-            unread_count = queryset.filter(is_read=False).count()
-            read_count = total_count - unread_count
-            
-            # Статистика по типам
-            type_stats = {}
-            for notification_type, _ in Notification.NOTIFICATION_TYPES:
-                count = queryset.filter(notification_type=notification_type).count()
-                if count > 0:
-                    type_stats[notification_type] = count
-            
-            # Статистика по приоритетам
-            priority_stats = {}
-            for priority, _ in Notification.PRIORITY_CHOICES:
-                count = queryset.filter(priority=priority).count()
-                if count > 0:
-                    priority_stats[priority] = count
-            
-            return Response({
-                'total_count': total_count,
-                'unread_count': unread_count,
-                'read_count': read_count,
-                'type_stats': type_stats,
-                'priority_stats': priority_stats
-            })
-            
+            return Response(notification_statistics(self.get_queryset()))
+
         except Exception as e:
             logger.error(f"Failed to get notification statistics for user {request.user.id}: {e}")
             return Response(
@@ -448,9 +417,7 @@ def mark_notification_as_read(request, notification_id):
             user=request.user
         )
         
-        notification.is_read = True
-        notification.read_at = timezone.now()
-        notification.save()
+        NotificationCounterService.mark_as_read(notification)
         
         return Response({
             'success': True,
@@ -483,12 +450,8 @@ def mark_all_notifications_as_read(request):
         JSON ответ с результатом операции
     """
     try:
-        updated_count = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).update(
-            is_read=True,
-            read_at=timezone.now()
+        updated_count = NotificationCounterService.mark_all_as_read(
+            Notification.objects.filter(user=request.user)
         )
         
         return Response({
@@ -587,35 +550,19 @@ def get_notification_stats(request):
         JSON ответ со статистикой
     """
     try:
-        total_notifications = Notification.objects.filter(user=request.user).count()
-        unread_notifications = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).count()
-        
-        # Статистика по типам уведомлений
-        notification_types = Notification.objects.filter(
-            user=request.user
-        ).values('notification_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # Статистика по каналам
-        channel_stats = {}
-        for channel in ['email', 'push', 'in_app']:
-            channel_stats[channel] = Notification.objects.filter(
-                user=request.user,
-                channels__contains=channel
-            ).count()
-        
+        stats = notification_statistics(
+            Notification.objects.filter(user=request.user),
+            with_channels=True,
+        )
+
         return Response({
             'success': True,
             'stats': {
-                'total': total_notifications,
-                'unread': unread_notifications,
-                'read': total_notifications - unread_notifications,
-                'types': list(notification_types),
-                'channels': channel_stats
+                'total': stats['total_count'],
+                'unread': stats['unread_count'],
+                'read': stats['read_count'],
+                'types': stats['type_counts'],
+                'channels': stats['channel_stats']
             }
         })
         
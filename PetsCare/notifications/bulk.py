@@ -0,0 +1,323 @@
+"""
+Массовая рассылка уведомлений (send_bulk_notifications, системные рассылки).
+
+Получатели обрабатываются пачками по NOTIFICATION_BULK_CHUNK_SIZE:
+- настройки каналов (NotificationType, NotificationPreference), HTML-шаблон
+  и устройства push загружаются одним запросом на пачку, а не на пользователя;
+- строки Notification создаются через bulk_create, счётчики непрочитанных
+  обновляются одним UPDATE на пачку;
+- письма уходят через одно соединение почтового backend (SMTP или Gmail API)
+  партиями по NOTIFICATION_EMAIL_BATCH_SIZE; соединение открывается только
+  при первой отправке, а ошибка открытия считается неудачей партии —
+  уведомления уже созданы, email уходит в повторную доставку;
+- push отправляется одним вызовом на тип устройств для всей пачки;
+- неудачные доставки не ждут в воркере (time.sleep), а ставятся в очередь
+  повторно задачей retry_bulk_notification_delivery_task с экспоненциальной задержкой.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from push_notifications.models import APNSDevice, GCMDevice, WebPushDevice
+
+from .counters import NotificationCounterService
+from .models import Notification, NotificationPreference, NotificationTemplate, NotificationType
+from .realtime import publish_to_users
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNELS = ['email', 'push', 'in_app']
+
+# Цели доставки, которые повторяются независимо друг от друга.
+TARGET_EMAIL = 'email'
+PUSH_TARGETS = {
+    'gcm': GCMDevice,
+    'apns': APNSDevice,
+    'webpush': WebPushDevice,
+}
+
+
+def _chunks(items: Iterable[Any], size: int):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _LazyEmailConnection:
+    """
+    Соединение почтового backend, открываемое при первой отправке.
+    Ошибка открытия запоминается: следующие партии не ждут тот же таймаут.
+    """
+
+    def __init__(self):
+        self._connection = None
+        self._open_error: Optional[Exception] = None
+
+    def send_messages(self, messages) -> int:
+        if self._open_error is not None:
+            raise self._open_error
+        if self._connection is None:
+            connection = get_connection()
+            try:
+                connection.open()
+            except Exception as e:
+                self._open_error = e
+                raise
+            self._connection = connection
+        return self._connection.send_messages(messages)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception as e:
+                logger.warning(f"Failed to close bulk email connection: {e}")
+            self._connection = None
+
+
+class BulkNotificationDispatcher:
+    """Создание и доставка одного уведомления множеству пользователей."""
+
+    def __init__(self, max_retries: int = 3, retry_delay: int = 60):
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.chunk_size = getattr(settings, 'NOTIFICATION_BULK_CHUNK_SIZE', 500)
+        self.email_batch_size = getattr(settings, 'NOTIFICATION_EMAIL_BATCH_SIZE', 100)
+
+    def dispatch(
+        self,
+        users: Iterable[Any],
+        notification_type: str,
+        title: str,
+        message: str,
+        channels: Optional[List[str]] = None,
+        priority: str = 'medium',
+        data: Optional[Dict[str, Any]] = None,
+    ) -> List[Notification]:
+        """Создает и отправляет уведомления; возвращает созданные уведомления."""
+        created: List[Notification] = []
+        for notifications in self.dispatch_chunks(users, notification_type, title, message, channels, priority, data):
+            created.extend(notifications)
+        return created
+
+    def dispatch_chunks(
+        self,
+        users: Iterable[Any],
+        notification_type: str,
+        title: str,
+        message: str,
+        channels: Optional[List[str]] = None,
+        priority: str = 'medium',
+        data: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[List[Notification]]:
+        """
+        То же, что dispatch, но отдает уведомления по пачкам, не накапливая их
+        (рассылки на всех пользователей).
+        """
+        html_message = self._email_html(notification_type)
+        connection = _LazyEmailConnection()
+        try:
+            for chunk in _chunks(users, self.chunk_size):
+                channels_by_user = self._resolve_channels(chunk, notification_type, channels)
+                notifications = self._create(chunk, channels_by_user, notification_type, title, message, priority, data)
+                self._deliver(notifications, channels_by_user, html_message, connection, attempt=0)
+                yield notifications
+        finally:
+            connection.close()
+
+    def retry(self, notification_ids: List[int], target: str, attempt: int) -> None:
+        """Повторная доставка в одну цель (email или тип push-устройств)."""
+        notifications = list(Notification.objects.filter(pk__in=notification_ids).select_related('user'))
+        if not notifications:
+            return
+        if target == TARGET_EMAIL:
+            connection = _LazyEmailConnection()
+            try:
+                failed = self._send_emails(
+                    notifications, self._email_html(notifications[0].notification_type), connection
+                )
+            finally:
+                connection.close()
+        else:
+            failed = self._send_push(notifications, PUSH_TARGETS[target])
+        self._mark_sent([n.pk for n in notifications if n.pk not in failed])
+        self._schedule_retry(failed, target, attempt + 1)
+
+    def _resolve_channels(self, users, notification_type: str, channels: Optional[List[str]]) -> Dict[int, List[str]]:
+        """Каналы каждого получателя: та же логика, что NotificationService._get_user_channels."""
+        if channels is not None:
+            return {user.pk: list(channels) for user in users}
+
+        type_obj = NotificationType.objects.filter(code=notification_type).only('is_required').first()
+        if type_obj is not None and type_obj.is_required:
+            return {user.pk: list(DEFAULT_CHANNELS) for user in users}
+
+        preferred: Dict[int, List[str]] = defaultdict(list)
+        preferences = NotificationPreference.objects.filter(
+            user_id__in=[user.pk for user in users],
+            notification_type__code=notification_type,
+        ).values_list('user_id', 'email_enabled', 'push_enabled', 'in_app_enabled')
+        for user_id, email_enabled, push_enabled, in_app_enabled in preferences:
+            for channel, enabled in (('email', email_enabled), ('push', push_enabled), ('in_app', in_app_enabled)):
+                if enabled:
+                    preferred[user_id].append(channel)
+        return {user.pk: preferred.get(user.pk) or list(DEFAULT_CHANNELS) for user in users}
+
+    @classmethod
+    def _create(cls, users, channels_by_user, notification_type, title, message, priority, data) -> List[Notification]:
+        notifications = [
+            Notification(
+                user=user,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                priority=priority,
+                channel=cls._stored_channel(channels_by_user[user.pk]),
+                data=cls._stored_data(data, channels_by_user[user.pk]),
+            )
+            for user in users
+        ]
+        with transaction.atomic():
+            created = Notification.objects.bulk_create(notifications)
+            # bulk_create не вызывает post_save — счётчики непрочитанных обновляются здесь
+            NotificationCounterService.notifications_created(created)
+        return created
+
+    @staticmethod
+    def _stored_channel(user_channels: List[str]) -> str:
+        """
+        Значение Notification.channel (max_length=10): один канал хранится как есть,
+        несколько — как 'all'; доставка идет по channels_by_user.
+        """
+        if len(user_channels) == 1:
+            return user_channels[0]
+        return 'all'
+
+    @staticmethod
+    def _stored_data(data: Optional[Dict[str, Any]], user_channels: List[str]) -> Dict[str, Any]:
+        """Выбранные каналы сохраняются в data, если channel='all' их не отражает."""
+        stored = dict(data) if data is not None else {}
+        if len(user_channels) > 1 and 'all' not in user_channels:
+            stored['channels'] = list(user_channels)
+        return stored
+
+    def _deliver(self, notifications, channels_by_user, html_message, connection, attempt: int) -> None:
+        def wants(notification, channel):
+            user_channels = channels_by_user[notification.user_id]
+            return channel in user_channels or 'all' in user_channels
+
+        failed_everywhere = set()
+        email_recipients = [n for n in notifications if wants(n, 'email')]
+        if email_recipients:
+            failed = self._send_emails(email_recipients, html_message, connection)
+            failed_everywhere |= failed
+            self._schedule_retry(failed, TARGET_EMAIL, attempt + 1)
+
+        push_recipients = [n for n in notifications if wants(n, 'push')]
+        if push_recipients:
+            for target, device_model in PUSH_TARGETS.items():
+                failed = self._send_push(push_recipients, device_model)
+                failed_everywhere |= failed
+                self._schedule_retry(failed, target, attempt + 1)
+
+        for notification in notifications:
+            if wants(notification, 'in_app'):
+                self._publish_in_app(notification)
+
+        self._mark_sent([n.pk for n in notifications if n.pk not in failed_everywhere])
+
+    def _send_emails(self, notifications, html_message: Optional[str], connection) -> set:
+        """Отправляет письма партиями через общее соединение; возвращает id неудачных."""
+        failed = set()
+        with_email = [n for n in notifications if n.user.email]
+        for batch in _chunks(with_email, self.email_batch_size):
+            messages = []
+            for notification in batch:
+                email = EmailMultiAlternatives(
+                    subject=notification.title,
+                    body=notification.message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[notification.user.email],
+                )
+                if html_message:
+                    email.attach_alternative(html_message, 'text/html')
+                messages.append(email)
+            try:
+                connection.send_messages(messages)
+            except Exception as e:
+                logger.error(f"Failed to send bulk email batch of {len(batch)} messages: {e}")
+                failed.update(n.pk for n in batch)
+        return failed
+
+    @staticmethod
+    def _send_push(notifications, device_model) -> set:
+        """Один вызов send_message на все активные устройства получателей."""
+        sample = notifications[0]
+        devices = device_model.objects.filter(user_id__in={n.user_id for n in notifications}, active=True)
+        try:
+            if devices.exists():
+                devices.send_message(sample.message, title=sample.title, extra=sample.data)
+                logger.info(f"Bulk push sent via {device_model.__name__} to {len(notifications)} users")
+        except Exception as e:
+            logger.error(f"Failed to send bulk push via {device_model.__name__}: {e}")
+            return {n.pk for n in notifications}
+        return set()
+
+    @staticmethod
+    def _publish_in_app(notification: Notification) -> None:
+        publish_to_users(
+            [notification.user_id],
+            'notification.created',
+            {
+                'id': notification.id,
+                'notification_type': notification.notification_type,
+                'title': notification.title,
+                'message': notification.message,
+                'data': notification.data,
+                'created_at': notification.created_at,
+            },
+        )
+
+    @staticmethod
+    def _email_html(notification_type: str) -> Optional[str]:
+        template = NotificationTemplate.objects.filter(
+            code=f"{notification_type}_email",
+            channel='email',
+            is_active=True,
+        ).only('html_body').first()
+        return template.html_body if template else None
+
+    @staticmethod
+    def _mark_sent(notification_ids: List[int]) -> None:
+        if notification_ids:
+            Notification.objects.filter(pk__in=notification_ids, sent_at__isnull=True).update(sent_at=timezone.now())
+
+    def _schedule_retry(self, notification_ids, target: str, attempt: int) -> None:
+        if not notification_ids:
+            return
+        if attempt >= self.max_retries:
+            logger.error(
+                f"Giving up bulk delivery to {target} for {len(notification_ids)} notifications "
+                f"after {self.max_retries} attempts"
+            )
+            return
+        from .tasks import retry_bulk_notification_delivery_task
+
+        ids = sorted(notification_ids)
+        transaction.on_commit(
+            lambda: retry_bulk_notification_delivery_task.apply_async(
+                args=[ids, target, attempt],
+                countdown=self.retry_delay * (2 ** (attempt - 1)),
+            )
+        )
@@ -0,0 +1,219 @@
+"""
+Счётчики непрочитанных уведомлений и статистика уведомлений пользователя.
+
+Бейдж клиента опрашивает unread_count постоянно. Вместо COUNT(*) по
+уведомлениям читается одна строка NotificationUnreadCounter по уникальному
+индексу (user, notification_type). Счётчики меняются атомарными
+UPDATE ... SET unread_count = unread_count + delta в той же транзакции, что и
+само уведомление:
+- post_save/post_delete Notification (создание, прочтение, удаление);
+- bulk_create массовой рассылки — NotificationCounterService.notifications_created;
+- «прочитать» / «прочитать все» — NotificationCounterService.mark_as_read
+  (условный UPDATE) / mark_all_as_read (UPDATE заблокированных строк), без post_save.
+
+Расхождения (например, после ручных UPDATE в БД) исправляет
+recalculate() / команда rebuild_notification_counters.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from .models import Notification, NotificationUnreadCounter
+
+ALL_TYPES = NotificationUnreadCounter.ALL_TYPES
+
+
+class NotificationCounterService:
+    """Атомарное ведение счётчиков непрочитанных уведомлений."""
+
+    @staticmethod
+    def unread_count(user_id: int) -> int:
+        return NotificationUnreadCounter.objects.filter(
+            user_id=user_id,
+            notification_type=ALL_TYPES,
+        ).values_list('unread_count', flat=True).first() or 0
+
+    @staticmethod
+    def unread_by_type(user_id: int) -> dict[str, int]:
+        return dict(
+            NotificationUnreadCounter.objects.filter(user_id=user_id, unread_count__gt=0).exclude(
+                notification_type=ALL_TYPES,
+            ).values_list('notification_type', 'unread_count')
+        )
+
+    @classmethod
+    def notifications_created(cls, notifications: Iterable[Notification]) -> None:
+        """Учитывает уведомления, созданные в обход post_save (bulk_create)."""
+        cls.apply(Counter(
+            (notification.user_id, notification.notification_type)
+            for notification in notifications
+            if not notification.is_read
+        ))
+
+    @classmethod
+    def apply(cls, deltas: dict[tuple[int, str], int]) -> None:
+        """
+        Применяет изменения {(user_id, notification_type): delta}.
+
+        Изменения группируются по (тип, delta): один UPDATE на группу,
+        а не на пользователя — массовая рассылка даёт два запроса на пачку.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        totals: dict[int, int] = defaultdict(int)
+        for (user_id, _notification_type), delta in deltas.items():
+            totals[user_id] += delta
+        all_deltas = dict(deltas)
+        for user_id, delta in totals.items():
+            if delta:
+                all_deltas[(user_id, ALL_TYPES)] = delta
+
+        positive_keys = sorted(key for key, delta in all_deltas.items() if delta > 0)
+        if positive_keys:
+            NotificationUnreadCounter.objects.bulk_create(
+                [
+                    NotificationUnreadCounter(user_id=user_id, notification_type=notification_type)
+                    for user_id, notification_type in positive_keys
+                ],
+                ignore_conflicts=True,
+            )
+
+        groups: dict[tuple[str, int], list[int]] = defaultdict(list)
+        for (user_id, notification_type), delta in all_deltas.items():
+            groups[(notification_type, delta)].append(user_id)
+        for (notification_type, delta), user_ids in sorted(groups.items()):
+            NotificationUnreadCounter.objects.filter(
+                user_id__in=sorted(user_ids),
+                notification_type=notification_type,
+            ).update(unread_count=Greatest(F('unread_count') + delta, Value(0)))
+
+    @classmethod
+    def mark_as_read(cls, notification: Notification) -> bool:
+        """
+        Отмечает уведомление прочитанным условным UPDATE ... WHERE is_read = false.
+
+        Счётчик уменьшает только запрос, который действительно обновил строку,
+        поэтому параллельные «прочитать» не уменьшают его дважды.
+        """
+        with transaction.atomic():
+            updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+            if updated:
+                cls.apply({(notification.user_id, notification.notification_type): -1})
+        notification.is_read = True
+        notification._counted_unread = None
+        return bool(updated)
+
+    @classmethod
+    def mark_all_as_read(cls, queryset) -> int:
+        """
+        Отмечает непрочитанные уведомления queryset прочитанными; возвращает число обновлённых.
+
+        Строки блокируются SELECT ... FOR UPDATE до UPDATE: параллельный
+        mark_as_read ждёт коммита и затем не находит is_read = false, а
+        созданные после блокировки уведомления не обновляются и не вычитаются.
+        """
+        with transaction.atomic():
+            rows = list(
+                queryset.filter(is_read=False)
+                .select_for_update(of=('self',))
+                .order_by('pk')
+                .values_list('pk', 'user_id', 'notification_type')
+            )
+            if not rows:
+                return 0
+            Notification.objects.filter(pk__in=[pk for pk, _user_id, _notification_type in rows]).update(is_read=True)
+            cls.apply({
+                key: -count
+                for key, count in Counter(
+                    (user_id, notification_type) for _pk, user_id, notification_type in rows
+                ).items()
+            })
+        return len(rows)
+
+    @staticmethod
+    def recalculate(user_ids: Iterable[int] | None = None) -> int:
+        """Пересчитывает счётчики по уведомлениям (одним GROUP BY); возвращает число строк."""
+        unread = Notification.objects.filter(is_read=False)
+        counters = NotificationUnreadCounter.objects.all()
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            unread = unread.filter(user_id__in=user_ids)
+            counters = counters.filter(user_id__in=user_ids)
+
+        values: dict[tuple[int, str], int] = defaultdict(int)
+        for row in unread.values('user_id', 'notification_type').annotate(count=Count('id')).order_by():
+            values[(row['user_id'], row['notification_type'])] = row['count']
+            values[(row['user_id'], ALL_TYPES)] += row['count']
+
+        with transaction.atomic():
+            counters.delete()
+            NotificationUnreadCounter.objects.bulk_create(
+                [
+                    NotificationUnreadCounter(user_id=user_id, notification_type=notification_type, unread_count=count)
+                    for (user_id, notification_type), count in sorted(values.items())
+                ],
+                batch_size=1000,
+            )
+        return len(values)
+
+
+def notification_statistics(queryset, *, with_channels: bool = False) -> dict:
+    """
+    Статистика уведомлений одним запросом GROUP BY notification_type, priority, is_read.
+
+    Returns:
+        dict: total_count, unread_count, read_count, type_stats, priority_stats
+        (и channel_stats при with_channels)
+    """
+    group_fields = ['notification_type', 'priority', 'is_read']
+    if with_channels:
+        group_fields.append('channel')
+
+    total_count = unread_count = 0
+    type_stats: dict[str, int] = defaultdict(int)
+    priority_stats: dict[str, int] = defaultdict(int)
+    channel_stats: dict[str, int] = {'email': 0, 'push': 0, 'in_app': 0}
+    for row in queryset.values(*group_fields).annotate(count=Count('id')).order_by():
+        count = row['count']
+        total_count += count
+        if not row['is_read']:
+            unread_count += count
+        type_stats[row['notification_type']] += count
+        priority_stats[row['priority']] += count
+        if with_channels:
+            channels = row['channel'].split(',')
+            for channel in channel_stats:
+                if row['channel'] == 'all' or channel in channels:
+                    channel_stats[channel] += count
+
+    # Порядок ключей — как в choices модели
+    statistics = {
+        'total_count': total_count,
+        'unread_count': unread_count,
+        'read_count': total_count - unread_count,
+        'type_stats': {
+            notification_type: type_stats[notification_type]
+            for notification_type, _label in Notification.NOTIFICATION_TYPES
+            if type_stats.get(notification_type)
+        },
+        'priority_stats': {
+            priority: priority_stats[priority]
+            for priority, _label in Notification.PRIORITY_CHOICES
+            if priority_stats.get(priority)
+        },
+    }
+    if with_channels:
+        statistics['channel_stats'] = channel_stats
+        statistics['type_counts'] = sorted(
+            ({'notification_type': key, 'count': value} for key, value in type_stats.items()),
+            key=lambda item: -item['count'],
+        )
+    return statistics
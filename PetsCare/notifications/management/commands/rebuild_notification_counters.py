@@ -0,0 +1,30 @@
+"""
+Команда для пересчёта счётчиков непрочитанных уведомлений.
+
+Счётчики поддерживаются атомарно (notifications.counters); команда нужна
+после ручных изменений уведомлений в БД в обход ORM.
+"""
+
+from django.core.management.base import BaseCommand
+
+from notifications.counters import NotificationCounterService
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает NotificationUnreadCounter по таблице уведомлений.
+    """
+    help = 'Rebuild unread notification counters from notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Rebuild counters only for the given user id (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        rows = NotificationCounterService.recalculate(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} unread notification counters'))
@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+ALL_TYPES = '__all__'
+
+
+def backfill_unread_counters(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationUnreadCounter = apps.get_model('notifications', 'NotificationUnreadCounter')
+
+    values = defaultdict(int)
+    rows = (
+        Notification.objects.filter(is_read=False)
+        .values('user_id', 'notification_type')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        values[(row['user_id'], row['notification_type'])] = row['count']
+        values[(row['user_id'], ALL_TYPES)] += row['count']
+
+    NotificationUnreadCounter.objects.bulk_create(
+        [
+            NotificationUnreadCounter(user_id=user_id, notification_type=notification_type, unread_count=count)
+            for (user_id, notification_type), count in values.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notificationtemplate_body_de_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationUnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(max_length=20, verbose_name='Notification Type')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='Unread Count')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_unread_counters', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Notification Unread Counter',
+                'verbose_name_plural': 'Notification Unread Counters',
+                'constraints': [models.UniqueConstraint(fields=('user', 'notification_type'), name='notifications_unread_counter_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
@@ -708,6 +708,39 @@ class Notification(models.Model):
         pass
 
 
+class NotificationUnreadCounter(models.Model):
+    """
+    Счётчик непрочитанных уведомлений пользователя.
+
+    Строка на (пользователь, тип уведомления) и строка с типом ALL_TYPES для
+    общего числа. Поддерживается атомарными UPDATE при создании, прочтении
+    и удалении уведомлений (notifications.counters).
+    """
+    ALL_TYPES = '__all__'
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notification_unread_counters',
+        verbose_name=_('User')
+    )
+    notification_type = models.CharField(_('Notification Type'), max_length=20)
+    unread_count = models.PositiveIntegerField(_('Unread Count'), default=0)
+
+    class Meta:
+        verbose_name = _('Notification Unread Counter')
+        verbose_name_plural = _('Notification Unread Counters')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'notification_type'],
+                name='notifications_unread_counter_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.notification_type}: {self.unread_count}"
+
+
 class Reminder(models.Model):
     """
     Модель для напоминаний о процедурах для питомцев.
@@ -981,27 +1014,11 @@ class NotificationRule(models.Model):
         Raises:
             Exception: При ошибке в оценке условия
         """
+        from .rule_engine import compile_condition
+
         try:
-            # Безопасная оценка Python-выражения
-            # Ограничиваем доступ только к безопасным переменным
-            safe_vars = {
-                'user': context.get('user'),
-                'booking': context.get('booking'),
-                'service': context.get('service'),
-                'provider': context.get('provider'),
-                'pet': context.get('pet'),
-                'amount': context.get('amount'),
-                'hours_before_start': context.get('hours_before_start'),
-                'price_increase_percent': context.get('price_increase_percent'),
-                'True': True,
-                'False': False,
-                'None': None,
-            }
-            
-            # Выполняем условие в безопасном контексте
-            result = eval(self.condition, {"__builtins__": {}}, safe_vars)
-            return bool(result)
-            
+            # Условие компилируется в проверенный AST один раз на выражение
+            return compile_condition(self.condition)(context)
         except Exception as e:
             # Логируем ошибку и возвращаем False
             import logging
@@ -0,0 +1,342 @@
+"""
+Доставка событий клиентам в реальном времени (Server-Sent Events) вместо polling.
+
+Поток:
+1. Код приложения вызывает publish_to_users() — событие уходит в брокер
+   после коммита транзакции, в канал ``user:<id>`` каждого получателя.
+2. ASGI-endpoint EventStreamApp держит открытые SSE-соединения и пересылает
+   события канала пользователя; в простое шлёт только heartbeat-комментарии.
+
+Брокеры:
+- RedisBroker — pub/sub Redis (REALTIME_BROKER_URL), общий для ASGI/WSGI
+  воркеров и Celery; один psubscribe-слушатель на ASGI-процесс, который
+  после обрыва соединения переподключается с экспоненциальной задержкой,
+  пока в процессе есть подписчики;
+- InMemoryBroker — в пределах процесса (тесты, локальная разработка).
+
+Очередь подписчика ограничена REALTIME_SUBSCRIBER_QUEUE_SIZE: медленный клиент
+отключается, а не накапливает события в памяти.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Iterable, Optional
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_PATH = '/api/v1/events/stream/'
+USER_CHANNEL = 'user:{user_id}'
+REDIS_CHANNEL_PREFIX = 'realtime:'
+REDIS_RECONNECT_MIN_DELAY = 0.5
+REDIS_RECONNECT_MAX_DELAY = 30
+
+
+def user_channel(user_id: int) -> str:
+    return USER_CHANNEL.format(user_id=user_id)
+
+
+class Subscription:
+    """
+    Ограниченная очередь событий одного подписчика.
+
+    Если клиент не успевает читать и очередь переполнена, подписка закрывается:
+    get() возвращает None, поток завершается, клиент переподключается и
+    перечитывает актуальное состояние через API.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: Optional[int] = None):
+        self.loop = loop
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue(
+            maxsize=maxsize or getattr(settings, 'REALTIME_SUBSCRIBER_QUEUE_SIZE', 100),
+        )
+        self.overflowed = False
+
+    async def get(self) -> Optional[str]:
+        return await self.queue.get()
+
+    def deliver(self, message: str) -> None:
+        """Потокобезопасная доставка: publish может вызываться из sync-кода другого потока."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Цикл событий подписчика уже закрыт.
+            pass
+
+    def _put(self, message: str) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            logger.warning('Realtime subscriber queue is full, closing the stream')
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class InMemoryBroker:
+    """Pub/sub в памяти процесса."""
+
+    def __init__(self):
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscriptions)
+
+    def publish(self, channel: str, message: str) -> int:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+        return len(subscriptions)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[channel].discard(subscription)
+                if not self._subscriptions[channel]:
+                    del self._subscriptions[channel]
+
+
+class RedisBroker:
+    """
+    Pub/sub через Redis. Публикация — синхронным клиентом из любого процесса;
+    в ASGI-процессе один слушатель psubscribe раздаёт события локальным подписчикам.
+    """
+
+    def __init__(self, url: str, reconnect_delay: float = REDIS_RECONNECT_MIN_DELAY):
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self._client = None
+        self._local = InMemoryBroker()
+        self._listener: Optional[asyncio.Task] = None
+
+    def publish(self, channel: str, message: str) -> int:
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url)
+        return self._client.publish(REDIS_CHANNEL_PREFIX + channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        async with self._local.subscribe(channel) as subscription:
+            yield subscription
+
+    async def _listen(self) -> None:
+        """
+        Слушает Redis, пока есть локальные подписчики. При обрыве соединения
+        переподключается с экспоненциальной задержкой: открытые SSE-потоки
+        продолжают получать события без переподключения клиентов.
+        """
+        delay = self.reconnect_delay
+        while self._local.has_subscribers():
+            try:
+                async with self._pubsub() as pubsub:
+                    delay = self.reconnect_delay
+                    await self._relay(pubsub)
+                logger.warning("Realtime Redis listener stream ended, reconnecting")
+            except Exception as e:
+                logger.error(f"Realtime Redis listener disconnected, reconnecting in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, REDIS_RECONNECT_MAX_DELAY)
+
+    @asynccontextmanager
+    async def _pubsub(self):
+        from redis import asyncio as aioredis
+
+        client = aioredis.from_url(self.url)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.psubscribe(REDIS_CHANNEL_PREFIX + '*')
+            yield pubsub
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+    async def _relay(self, pubsub) -> None:
+        async for message in pubsub.listen():
+            if message['type'] != 'pmessage':
+                continue
+            channel = message['channel'].decode()[len(REDIS_CHANNEL_PREFIX):]
+            self._local.publish(channel, message['data'].decode())
+
+
+_broker = None
+
+
+def get_broker():
+    """Брокер процесса: Redis при заданном REALTIME_BROKER_URL, иначе в памяти."""
+    global _broker
+    if _broker is None:
+        url = getattr(settings, 'REALTIME_BROKER_URL', '')
+        _broker = RedisBroker(url) if url else InMemoryBroker()
+    return _broker
+
+
+def set_broker(broker) -> None:
+    """Подменяет брокер процесса (тесты)."""
+    global _broker
+    _broker = broker
+
+
+def publish_to_users(user_ids: Iterable[Optional[int]], event_type: str, data: dict) -> None:
+    """
+    Публикует событие в каналы пользователей после коммита текущей транзакции.
+    Ошибки брокера только логируются: push не должен ломать основной запрос.
+    """
+    recipients = sorted({user_id for user_id in user_ids if user_id})
+    if not recipients:
+        return
+    message = json.dumps({'type': event_type, 'data': data}, cls=DjangoJSONEncoder)
+
+    def _publish():
+        broker = get_broker()
+        for user_id in recipients:
+            try:
+                broker.publish(user_channel(user_id), message)
+            except Exception as e:
+                logger.error(f"Failed to publish realtime event {event_type} to user {user_id}: {e}")
+
+    transaction.on_commit(_publish)
+
+
+def authenticate_scope(scope) -> Optional[int]:
+    """
+    user_id из access JWT: заголовок Authorization или параметр ``token``
+    (EventSource в браузере не умеет передавать заголовки). Без запросов к БД.
+    """
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    raw_token = None
+    for name, value in scope.get('headers', []):
+        if name == b'authorization' and value.startswith(b'Bearer '):
+            raw_token = value[len(b'Bearer '):].decode().strip()
+            break
+    if raw_token is None:
+        raw_token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+    if not raw_token:
+        return None
+
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return None
+    try:
+        return int(token.get(api_settings.USER_ID_CLAIM))
+    except (TypeError, ValueError):
+        return None
+
+
+def format_sse(message: str) -> bytes:
+    """Событие SSE: ``event`` — тип события, ``data`` — JSON целиком."""
+    try:
+        event_type = json.loads(message).get('type') or 'message'
+    except (ValueError, AttributeError):
+        event_type = 'message'
+    return f'event: {event_type}\ndata: {message}\n\n'.encode()
+
+
+class EventStreamApp:
+    """
+    ASGI-приложение SSE-потока пользователя.
+
+    Соединение живёт до отключения клиента или переполнения его очереди; каждые heartbeat секунд без
+    событий отправляется комментарий ``: ping``, чтобы прокси не закрывали его.
+    """
+
+    def __init__(self, broker=None, heartbeat: Optional[float] = None):
+        self._broker = broker
+        self.heartbeat = heartbeat or getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 20)
+
+    @property
+    def broker(self):
+        return self._broker or get_broker()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope.get('method') != 'GET':
+            await self._respond(send, 405, b'Method not allowed')
+            return
+
+        user_id = authenticate_scope(scope)
+        if user_id is None:
+            await self._respond(send, 401, b'Authentication credentials were not provided or are invalid')
+            return
+
+        async with self.broker.subscribe(user_channel(user_id)) as subscription:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': b': connected\n\n', 'more_body': True})
+            await self._stream(subscription, receive, send)
+
+    async def _stream(self, subscription, receive, send):
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            while True:
+                next_message = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait(
+                    {next_message, disconnected},
+                    timeout=self.heartbeat,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    next_message.cancel()
+                    return
+                if next_message in done:
+                    message = next_message.result()
+                    if message is None:
+                        return
+                    chunk = format_sse(message)
+                else:
+                    next_message.cancel()
+                    chunk = b': ping\n\n'
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            disconnected.cancel()
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    @staticmethod
+    async def _respond(send, status: int, body: bytes):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,246 @@
+"""
+Компиляция и кеширование правил уведомлений (NotificationRule).
+
+Условие правила разбирается в AST один раз, проверяется по белому списку
+узлов (сравнения, логика, арифметика, доступ к атрибутам и элементам,
+вызовы только безопасных функций) и компилируется в code object.
+Шаблоны {{переменная}} разбиваются на фрагменты заранее.
+
+Скомпилированные правила хранятся в памяти процесса по event_type.
+Сохранение/удаление правила или шаблона меняет версию в кеше
+'notification_rules' — все процессы перечитывают правила при следующем событии.
+Без общего кеша (LocMem) версия видна только сохранившему процессу, поэтому
+остальные перечитывают правила не реже раза в NOTIFICATION_RULES_LOCAL_MAX_AGE_SECONDS.
+"""
+
+from __future__ import annotations
+
+import ast
+import logging
+import re
+import threading
+import time as time_module
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+
+from utils.caching import get_namespace_cache
+
+logger = logging.getLogger(__name__)
+
+cache = get_namespace_cache('notification_rules')
+
+VERSION_KEY = 'version'
+
+# Переменные контекста, доступные в условиях правил.
+CONDITION_VARIABLES = frozenset({
+    'user', 'booking', 'service', 'provider', 'pet', 'amount',
+    'hours_before_start', 'price_increase_percent',
+})
+CONDITION_FUNCTIONS = {
+    'len': len, 'abs': abs, 'min': min, 'max': max, 'round': round,
+    'int': int, 'float': float, 'str': str, 'bool': bool,
+}
+ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot, ast.IfExp,
+    ast.Name, ast.Load, ast.Constant, ast.Attribute, ast.Subscript, ast.Slice,
+    ast.List, ast.Tuple, ast.Set, ast.Call,
+)
+PRIORITY_ORDER = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+PLACEHOLDER_RE = re.compile(r'\{\{([^{}]*)\}\}')
+
+
+class ConditionError(ValueError):
+    """Условие правила не прошло разбор или проверку безопасности."""
+
+
+def _validate_condition(tree: ast.AST) -> frozenset:
+    """Проверяет AST условия; возвращает используемые переменные контекста."""
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ConditionError(f'Unsupported syntax in condition: {type(node).__name__}')
+        if isinstance(node, ast.Attribute) and node.attr.startswith('_'):
+            raise ConditionError(f'Access to private attribute is not allowed: {node.attr}')
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in CONDITION_FUNCTIONS:
+                raise ConditionError('Only calls of len, abs, min, max, round, int, float, str, bool are allowed')
+            if node.keywords:
+                raise ConditionError('Keyword arguments are not allowed in conditions')
+        if isinstance(node, ast.Name) and node.id not in CONDITION_FUNCTIONS:
+            if node.id not in CONDITION_VARIABLES:
+                raise ConditionError(f'Unknown variable in condition: {node.id}')
+            names.add(node.id)
+    return frozenset(names)
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(expression: str) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Компилирует условие в функцию context -> bool.
+
+    Raises:
+        ConditionError: синтаксическая ошибка или недопустимая конструкция
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ConditionError(f'Invalid condition syntax: {e.msg}') from e
+    names = _validate_condition(tree)
+    code = compile(tree, '<notification-rule>', 'eval')
+    condition_globals = {'__builtins__': {}, **CONDITION_FUNCTIONS}
+
+    def evaluate(context: Dict[str, Any]) -> bool:
+        return bool(eval(code, condition_globals, {name: context.get(name) for name in names}))
+
+    return evaluate
+
+
+@lru_cache(maxsize=1024)
+def compile_template(text: str) -> Callable[[Dict[str, Any]], str]:
+    """
+    Компилирует шаблон с подстановками {{key}} в функцию context -> str.
+    Ключи, отсутствующие в контексте, остаются в тексте как есть.
+    """
+    parts = PLACEHOLDER_RE.split(text or '')
+    literals, keys = parts[0::2], parts[1::2]
+    if not keys:
+        return lambda context: literals[0]
+
+    def render(context: Dict[str, Any]) -> str:
+        chunks = [literals[0]]
+        for key, literal in zip(keys, literals[1:]):
+            chunks.append(str(context[key]) if key in context else f'{{{{{key}}}}}')
+            chunks.append(literal)
+        return ''.join(chunks)
+
+    return render
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Правило с заранее скомпилированными условием и шаблонами."""
+
+    rule: Any
+    condition: Callable[[Dict[str, Any]], bool]
+    render_subject: Callable[[Dict[str, Any]], str]
+    render_body: Callable[[Dict[str, Any]], str]
+    priority_rank: int
+
+    @classmethod
+    def from_rule(cls, rule) -> Optional['CompiledRule']:
+        try:
+            condition = compile_condition(rule.condition)
+        except ConditionError as e:
+            logger.error(f"Notification rule {rule.pk} has invalid condition and is skipped: {e}")
+            return None
+        return cls(
+            rule=rule,
+            condition=condition,
+            render_subject=compile_template(rule.template.subject),
+            render_body=compile_template(rule.template.body),
+            priority_rank=PRIORITY_ORDER.get(rule.priority, 2),
+        )
+
+    def matches(self, context: Dict[str, Any]) -> bool:
+        try:
+            return self.condition(context)
+        except Exception as e:
+            logger.error(f"Error evaluating notification rule {self.rule.pk} condition: {e}")
+            return False
+
+
+@dataclass
+class _EventRules:
+    version: Any
+    global_rules: List[CompiledRule]
+    user_rules: Dict[int, List[CompiledRule]]
+    loaded_at: float = 0.0
+
+    def is_current(self, version) -> bool:
+        if self.version != version:
+            return False
+        if cache.is_shared:
+            return True
+        # Версия в LocMem не видна другим процессам: ограничиваем возраст правил.
+        max_age = getattr(settings, 'NOTIFICATION_RULES_LOCAL_MAX_AGE_SECONDS', 30)
+        return time_module.monotonic() - self.loaded_at < max_age
+
+
+class CompiledRuleRegistry:
+    """Кеш скомпилированных активных правил по event_type в памяти процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: Dict[str, _EventRules] = {}
+
+    def get_rules(self, event_type: str, user=None) -> List[CompiledRule]:
+        """Глобальные и пользовательские правила события, отсортированные по приоритету."""
+        version = self._get_version()
+        entry = self._events.get(event_type)
+        if entry is None or not entry.is_current(version):
+            entry = self._load(event_type, version)
+            with self._lock:
+                self._events[event_type] = entry
+
+        user_rules = entry.user_rules.get(user.pk, []) if user is not None else []
+        if not user_rules:
+            return entry.global_rules
+        return sorted(entry.global_rules + user_rules, key=lambda compiled: compiled.priority_rank)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+
+    @staticmethod
+    def _load(event_type: str, version) -> _EventRules:
+        from .models import NotificationRule
+
+        rules = NotificationRule.objects.filter(
+            event_type=event_type,
+            is_active=True,
+        ).select_related('template').order_by('created_at', 'pk')
+
+        global_rules, user_rules = [], {}
+        for rule in rules:
+            if rule.inheritance == 'global':
+                target = global_rules
+            elif rule.inheritance == 'user_specific' and rule.user_id:
+                target = user_rules.setdefault(rule.user_id, [])
+            else:
+                continue
+            compiled = CompiledRule.from_rule(rule)
+            if compiled is not None:
+                target.append(compiled)
+
+        # sorted стабилен: внутри приоритета сохраняется порядок создания.
+        global_rules.sort(key=lambda compiled: compiled.priority_rank)
+        return _EventRules(
+            version=version,
+            global_rules=global_rules,
+            user_rules=user_rules,
+            loaded_at=time_module.monotonic(),
+        )
+
+    @staticmethod
+    def _get_version():
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, time_module.time_ns(), None)
+            version = cache.get(VERSION_KEY, 0)
+        return version
+
+
+rule_registry = CompiledRuleRegistry()
+
+
+def invalidate_compiled_rules() -> None:
+    """Сбрасывает скомпилированные правила во всех процессах."""
+    cache.set(VERSION_KEY, time_module.time_ns(), None)
+    rule_registry.clear()
@@ -26,6 +26,14 @@ class SafeEmailBackend(BaseEmailBackend):
         backend_cls = import_string(backend_path)
         self.delegate = backend_cls(fail_silently=fail_silently, **kwargs)
 
+    def open(self):
+        # Соединение реального backend переиспользуется всеми send_messages
+        # до close() (массовые рассылки).
+        return self.delegate.open()
+
+    def close(self):
+        return self.delegate.close()
+
     def send_messages(self, email_messages: list[EmailMessage]) -> int:
         prepared_messages: list[EmailMessage] = []
 
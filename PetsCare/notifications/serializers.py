@@ -13,6 +13,7 @@ from .models import Notification, Reminder
 from pets.serializers import PetSerializer
 # ProviderServiceSerializer удален - используйте ProviderLocationServiceSerializer
 from django.utils.translation import gettext as _
+from .rule_engine import ConditionError, compile_condition
 from .models import (
     NotificationType, NotificationTemplate, NotificationPreference,
     UserNotificationSettings, NotificationRule
@@ -470,8 +471,12 @@ class NotificationRuleSerializer(serializers.ModelSerializer):
                 _('Condition cannot be empty')
             )
         
-        # Здесь можно добавить дополнительную валидацию синтаксиса Python
-        # Например, проверку на безопасность выражения
+        # Синтаксис и допустимые конструкции проверяются той же компиляцией,
+        # что используется при обработке событий
+        try:
+            compile_condition(value)
+        except ConditionError as e:
+            raise serializers.ValidationError(str(e))
         
         return value
 
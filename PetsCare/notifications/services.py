@@ -22,6 +22,9 @@ from .models import (
     UserNotificationSettings, NotificationTemplate, NotificationRule
 )
 from push_notifications.models import GCMDevice, APNSDevice, WebPushDevice
+from .realtime import publish_to_users
+from .rule_engine import CompiledRule, rule_registry
+from .bulk import BulkNotificationDispatcher
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -126,25 +129,17 @@ class NotificationService:
         Returns:
             List[Notification]: Список созданных уведомлений
         """
-        notifications = []
-        
-        for user in users:
-            try:
-                notification = self.send_notification(
-                    user=user,
-                    notification_type=notification_type,
-                    title=title,
-                    message=message,
-                    channels=channels,
-                    priority=priority,
-                    data=data
-                )
-                notifications.append(notification)
-            except Exception as e:
-                logger.error(_("Failed to send bulk notification to user {}: {}").format(user.id, e))
-                continue
-        
-        return notifications
+        # Настройки, шаблон и устройства загружаются на пачку получателей,
+        # уведомления создаются bulk_create, письма — через одно соединение.
+        return BulkNotificationDispatcher(self.max_retries, self.retry_delay).dispatch(
+            users=users,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            channels=channels,
+            priority=priority,
+            data=data
+        )
     
     def _get_user_channels(self, user, notification_type: str) -> List[str]:
         """
@@ -311,8 +306,20 @@ class NotificationService:
         Args:
             notification: Уведомление для отправки
         """
-        # In-app уведомления уже сохранены в базе данных
-        # Клиент получает их через API
+        # In-app уведомления уже сохранены в базе данных;
+        # открытым SSE-соединениям пользователя отправляем событие сразу
+        publish_to_users(
+            [notification.user_id],
+            'notification.created',
+            {
+                'id': notification.id,
+                'notification_type': notification.notification_type,
+                'title': notification.title,
+                'message': notification.message,
+                'data': notification.data,
+                'created_at': notification.created_at,
+            },
+        )
         logger.info(_("In-app notification {} ready for delivery").format(notification.id))
 
 
@@ -582,6 +589,9 @@ class NotificationRuleService:
         """
         Обрабатывает событие и применяет соответствующие правила уведомлений.
         
+        Правила берутся уже скомпилированными из rule_registry
+        (без запроса к БД и разбора условий на каждое событие).
+        
         Args:
             event_type: Тип события
             context: Контекст события (объекты, данные)
@@ -589,78 +599,26 @@ class NotificationRuleService:
         """
         try:
             with transaction.atomic():
-                # Получаем все активные правила для данного типа события
-                rules = self._get_active_rules(event_type, user)
-                
-                # Сортируем правила по приоритету
-                rules = self._sort_rules_by_priority(rules)
-                
-                # Применяем каждое правило
-                for rule in rules:
-                    self._apply_rule(rule, context, user)
+                # Активные правила события, отсортированные по приоритету
+                for compiled in rule_registry.get_rules(event_type, user):
+                    self._apply_rule(compiled, context, user)
                     
         except Exception as e:
             logger.error(f"Error processing notification rules for event {event_type}: {e}")
     
-    def _get_active_rules(self, event_type: str, user=None) -> List["NotificationRule"]:
-        """
-        Получает активные правила для типа события.
-        
-        Args:
-            event_type: Тип события
-            user: Пользователь (для пользовательских правил)
-            
-        Returns:
-            List[NotificationRule]: Список активных правил
-        """
-        # Получаем глобальные правила
-        global_rules = NotificationRule.objects.filter(
-            event_type=event_type,
-            is_active=True,
-            inheritance='global'
-        )
-        
-        # Получаем пользовательские правила (если указан пользователь)
-        user_rules = []
-        if user:
-            user_rules = NotificationRule.objects.filter(
-                event_type=event_type,
-                is_active=True,
-                inheritance='user_specific',
-                user=user
-            )
-        
-        # Объединяем правила (пользовательские имеют приоритет)
-        all_rules = list(global_rules) + list(user_rules)
-        
-        return all_rules
-    
-    def _sort_rules_by_priority(self, rules: List["NotificationRule"]) -> List["NotificationRule"]:
-        """
-        Сортирует правила по приоритету.
-        
-        Args:
-            rules: Список правил
-            
-        Returns:
-            List[NotificationRule]: Отсортированный список правил
-        """
-        priority_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
-        
-        return sorted(rules, key=lambda rule: priority_order.get(rule.priority, 2))
-    
-    def _apply_rule(self, rule: "NotificationRule", context: Dict[str, Any], user=None):
+    def _apply_rule(self, compiled: CompiledRule, context: Dict[str, Any], user=None):
         """
         Применяет правило уведомления.
         
         Args:
-            rule: Правило уведомления
+            compiled: Скомпилированное правило уведомления
             context: Контекст события
             user: Пользователь
         """
+        rule = compiled.rule
         try:
             # Оцениваем условие правила
-            if not rule.evaluate_condition(context):
+            if not compiled.matches(context):
                 return
             
             # Определяем получателя уведомления
@@ -676,7 +634,7 @@ class NotificationRuleService:
             
             # Создаем уведомление через шаблон
             notification = self._create_notification_from_template(
-                rule, target_user, context, channels
+                compiled, target_user, context, channels
             )
             
             # Логируем срабатывание правила
@@ -687,7 +645,7 @@ class NotificationRuleService:
     
     def _create_notification_from_template(
         self, 
-        rule: "NotificationRule", 
+        compiled: CompiledRule, 
         user, 
         context: Dict[str, Any], 
         channels: List[str]
@@ -696,7 +654,7 @@ class NotificationRuleService:
         Создает уведомление на основе шаблона правила.
         
         Args:
-            rule: Правило уведомления
+            compiled: Скомпилированное правило уведомления
             user: Пользователь-получатель
             context: Контекст события
             channels: Каналы доставки
@@ -704,11 +662,11 @@ class NotificationRuleService:
         Returns:
             Notification: Созданное уведомление
         """
-        template = rule.template
+        rule = compiled.rule
         
         # Заполняем шаблон данными из контекста
-        title = self._render_template(template.subject, context)
-        message = self._render_template(template.body, context)
+        title = self._render_template(compiled.render_subject, context, rule.template.subject)
+        message = self._render_template(compiled.render_body, context, rule.template.body)
         
         # Создаем уведомление
         notification = self.notification_service.send_notification(
@@ -723,28 +681,20 @@ class NotificationRuleService:
         
         return notification
     
-    def _render_template(self, template_text: str, context: Dict[str, Any]) -> str:
+    def _render_template(self, render, context: Dict[str, Any], template_text: str) -> str:
         """
-        Рендерит шаблон с данными из контекста.
+        Рендерит скомпилированный шаблон с данными из контекста.
         
         Args:
-            template_text: Текст шаблона
-            context: Контекст для подстановки
+            render: Шаблон, скомпилированный compile_template
+            context: Контекст для подстановки {{variable}}
+            template_text: Исходный текст шаблона (возвращается при ошибке рендеринга)
             
         Returns:
             str: Обработанный текст
         """
         try:
-            # Простая подстановка переменных в формате {{variable}}
-            result = template_text
-            
-            for key, value in context.items():
-                placeholder = f"{{{{{key}}}}}"
-                if placeholder in result:
-                    result = result.replace(placeholder, str(value))
-            
-            return result
-            
+            return render(context)
         except Exception as e:
             logger.error(f"Error rendering template: {e}")
             return template_text
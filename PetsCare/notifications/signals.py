@@ -9,7 +9,8 @@
 """
 
 import logging
-from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils.translation import gettext as _
 from django.contrib.auth import get_user_model
@@ -28,6 +29,8 @@ from .tasks import (
     send_invite_expired_task,
 )
 from .services import NotificationService, NotificationRuleService, PreferenceService
+from .rule_engine import invalidate_compiled_rules
+from .counters import NotificationCounterService
 from django.utils import timezone
 
 User = get_user_model()
@@ -302,6 +305,75 @@ def handle_pet_sitting_notifications(sender, instance, **kwargs):
         logger.error(f"Failed to handle pet sitting notification for sitting {instance.id}: {e}")
 
 
+@receiver(post_save, sender='notifications.NotificationRule')
+@receiver(post_delete, sender='notifications.NotificationRule')
+@receiver(post_save, sender='notifications.NotificationTemplate')
+@receiver(post_delete, sender='notifications.NotificationTemplate')
+def invalidate_notification_rules(sender, instance, **kwargs):
+    """
+    Сбрасывает скомпилированные правила уведомлений после изменения правила или шаблона.
+    """
+    transaction.on_commit(invalidate_compiled_rules)
+
+
+UNREAD_STATE_FIELDS = ('is_read', 'user_id', 'notification_type')
+
+
+@receiver(post_init, sender='notifications.Notification')
+def remember_notification_unread_state(sender, instance, **kwargs):
+    """
+    Запоминает, учтено ли уведомление в счётчике непрочитанных.
+
+    Для .only()/.defer() без этих полей их не читаем, чтобы не делать запрос
+    на строку; состояние остаётся неизвестным (см. update_unread_counters_on_save).
+    """
+    if not all(field in instance.__dict__ for field in UNREAD_STATE_FIELDS):
+        return
+    instance._counted_unread = (
+        (instance.user_id, instance.notification_type)
+        if instance.pk and not instance.is_read else None
+    )
+
+
+@receiver(post_save, sender='notifications.Notification')
+def update_unread_counters_on_save(sender, instance, created, **kwargs):
+    """
+    Обновляет счётчики непрочитанных при создании и прочтении уведомления.
+    """
+    if not created and not hasattr(instance, '_counted_unread'):
+        # Экземпляр загружен без is_read: прежнее состояние неизвестно, пересчитываем пользователя.
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'is_read' in update_fields:
+            NotificationCounterService.recalculate([instance.user_id])
+        return
+    previous = None if created else instance._counted_unread
+    current = (instance.user_id, instance.notification_type) if not instance.is_read else None
+    if previous == current:
+        return
+    deltas = {}
+    if previous is not None:
+        deltas[previous] = deltas.get(previous, 0) - 1
+    if current is not None:
+        deltas[current] = deltas.get(current, 0) + 1
+    NotificationCounterService.apply(deltas)
+    instance._counted_unread = current
+
+
+@receiver(post_delete, sender='notifications.Notification')
+def update_unread_counters_on_delete(sender, instance, **kwargs):
+    """
+    Удалённое непрочитанное уведомление уменьшает счётчики.
+    """
+    if not hasattr(instance, '_counted_unread'):
+        if 'user_id' in instance.__dict__:
+            NotificationCounterService.recalculate([instance.user_id])
+        return
+    counted = instance._counted_unread
+    if counted is not None:
+        NotificationCounterService.apply({counted: -1})
+        instance._counted_unread = None
+
+
 # Сигналы для платежей (если будут добавлены в будущем)
 @receiver(post_save, sender='billing.Payment')
 def handle_payment_notifications(sender, instance, created, **kwargs):
@@ -17,6 +17,7 @@ from django.utils import timezone
 from django.utils.translation import gettext as _
 from celery import shared_task
 from .services import NotificationService, SchedulerService
+from .bulk import BulkNotificationDispatcher
 from .models import Notification
 from .periodic_procedure_reminders import PeriodicProcedureReminderService
 from .upcoming_booking_reminders import UpcomingBookingReminderService
@@ -183,6 +184,19 @@ def send_bulk_notifications_task(
         logger.error(f"Failed to send bulk notifications: {e}")
 
 
+@shared_task
+def retry_bulk_notification_delivery_task(notification_ids: List[int], target: str, attempt: int):
+    """
+    Повторная доставка массовой рассылки в одну цель (email, gcm, apns, webpush).
+    
+    Args:
+        notification_ids: ID уведомлений, доставка которых не удалась
+        target: Цель доставки
+        attempt: Номер попытки
+    """
+    BulkNotificationDispatcher().retry(notification_ids, target, attempt)
+
+
 @shared_task
 def process_scheduled_notifications_task():
     """
@@ -707,25 +721,20 @@ def send_system_maintenance_notification_task(message: str, user_ids: List[int]
         else:
             users = User.objects.filter(is_active=True)
         
-        notification_service = NotificationService()
+        dispatcher = BulkNotificationDispatcher()
+        sent = 0
+        for notifications in dispatcher.dispatch_chunks(
+            users.order_by('pk').iterator(chunk_size=dispatcher.chunk_size),
+            notification_type='system',
+            title=_('System Maintenance'),
+            message=message,
+            channels=['email', 'push', 'in_app'],
+            priority='high',
+            data={'maintenance': True}
+        ):
+            sent += len(notifications)
         
-        for user in users:
-            try:
-                notification_service.send_notification(
-                    user=user,
-                    notification_type='system',
-                    title=_('System Maintenance'),
-                    message=message,
-                    channels=['email', 'push', 'in_app'],
-                    priority='high',
-                    data={'maintenance': True}
-                )
-                
-                logger.info(f"System maintenance notification sent to user {user.id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to send system maintenance notification to user {user.id}: {e}")
-                continue
+        logger.info(f"System maintenance notification sent to {sent} users")
         
     except Exception as e:
         logger.error(f"Failed to send system maintenance notifications: {e}")
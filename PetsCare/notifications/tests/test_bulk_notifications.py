@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from notifications.bulk import BulkNotificationDispatcher
+from notifications.models import Notification
+
+User = get_user_model()
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP unavailable')
+
+
+class UnreachableEmailBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionError('SMTP unreachable')
+
+    def send_messages(self, email_messages):
+        raise AssertionError('send_messages must not be called without an open connection')
+
+
+@override_settings(
+    EMAIL_BACKEND='notifications.safe_email_backend.SafeEmailBackend',
+    ACTUAL_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    NOTIFICATION_EMAIL_BATCH_SIZE=2,
+)
+class BulkNotificationDispatcherTest(TestCase):
+    def create_users(self, count, offset=0):
+        return [
+            User.objects.create_user(email=f'bulk{offset + index}@petcare.me', password='password')
+            for index in range(count)
+        ]
+
+    def dispatch(self, users, **kwargs):
+        return BulkNotificationDispatcher().dispatch(
+            users,
+            notification_type='system',
+            title='Maintenance',
+            message='Tonight',
+            channels=['email', 'in_app'],
+            **kwargs,
+        )
+
+    def test_creates_notifications_and_sends_emails_in_batches(self):
+        users = self.create_users(3)
+
+        notifications = self.dispatch(users)
+
+        self.assertEqual(len(notifications), 3)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(user.email for user in users),
+        )
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+
+    def test_stored_channel_fits_the_channel_field(self):
+        multi_user, single_user, default_user = self.create_users(3)
+
+        self.dispatch([multi_user])
+        BulkNotificationDispatcher().dispatch([single_user], 'system', 'Title', 'Body', channels=['in_app'])
+        BulkNotificationDispatcher().dispatch([default_user], 'system', 'Title', 'Body')
+
+        multi = Notification.objects.get(user=multi_user)
+        self.assertEqual(multi.channel, 'all')
+        self.assertEqual(multi.data['channels'], ['email', 'in_app'])
+        self.assertEqual(Notification.objects.get(user=single_user).channel, 'in_app')
+        self.assertEqual(Notification.objects.get(user=default_user).channel, 'all')
+        max_length = Notification._meta.get_field('channel').max_length
+        self.assertTrue(all(len(channel) <= max_length for channel in Notification.objects.values_list('channel', flat=True)))
+
+    def test_query_count_does_not_grow_with_recipients(self):
+        few, many = self.create_users(2), self.create_users(8, offset=2)
+
+        with CaptureQueriesContext(connection) as few_queries:
+            BulkNotificationDispatcher().dispatch(few, 'system', 'Title', 'Body')
+        with CaptureQueriesContext(connection) as many_queries:
+            BulkNotificationDispatcher().dispatch(many, 'system', 'Title', 'Body')
+
+        self.assertEqual(len(few_queries), len(many_queries))
+
+    @override_settings(ACTUAL_EMAIL_BACKEND='notifications.tests.test_bulk_notifications.FailingEmailBackend')
+    def test_failed_email_batch_is_requeued_instead_of_sleeping(self):
+        users = self.create_users(2)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            notifications = self.dispatch(users)
+
+        # Одна повторная доставка email + публикации in-app.
+        self.assertEqual(len(callbacks), 1 + len(users))
+        self.assertEqual(Notification.objects.filter(pk__in=[n.pk for n in notifications], sent_at__isnull=True).count(), 2)
+
+    @override_settings(ACTUAL_EMAIL_BACKEND='notifications.tests.test_bulk_notifications.UnreachableEmailBackend')
+    def test_connection_failure_keeps_notifications_and_requeues_email(self):
+        users = self.create_users(3)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            notifications = self.dispatch(users)
+
+        self.assertEqual(Notification.objects.filter(pk__in=[n.pk for n in notifications]).count(), 3)
+        # Одна повторная доставка email на пачку + публикации in-app.
+        self.assertEqual(len(callbacks), 1 + len(users))
+
+    @override_settings(ACTUAL_EMAIL_BACKEND='notifications.tests.test_bulk_notifications.UnreachableEmailBackend')
+    def test_in_app_only_dispatch_does_not_open_email_connection(self):
+        users = self.create_users(2)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            BulkNotificationDispatcher().dispatch(users, 'system', 'Title', 'Body', channels=['in_app'])
+
+        self.assertEqual(len(callbacks), len(users))
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+
+    @override_settings(ACTUAL_EMAIL_BACKEND='notifications.tests.test_bulk_notifications.UnreachableEmailBackend')
+    def test_retry_schedules_next_attempt_when_connection_fails(self):
+        users = self.create_users(2)
+        with self.captureOnCommitCallbacks(execute=False):
+            notifications = self.dispatch(users)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            BulkNotificationDispatcher().retry([n.pk for n in notifications], 'email', attempt=1)
+
+        self.assertEqual(len(callbacks), 1)
@@ -241,24 +241,21 @@ class SystemMaintenanceNotificationTaskTest(TestCase):
             password='testpass123'
         )
 
-    @patch('notifications.tasks.User')
-    @patch('notifications.tasks.NotificationService')
-    def test_send_system_maintenance_notification_task(self, mock_service, mock_user):
-        """Тест отправки системного уведомления"""
-        # Мокаем пользователей
-        mock_user.objects.filter.return_value = [self.user]
-        
-        mock_notification = MagicMock()
-        mock_service.return_value.send_notification.return_value = mock_notification
+    @patch('notifications.tasks.BulkNotificationDispatcher')
+    def test_send_system_maintenance_notification_task(self, mock_dispatcher):
+        """Тест отправки системного уведомления через массовую рассылку"""
+        mock_dispatcher.return_value.chunk_size = 500
+        mock_dispatcher.return_value.dispatch_chunks.return_value = [[MagicMock()]]
         
         send_system_maintenance_notification_task('System maintenance scheduled', [self.user.id])
         
-        mock_service.return_value.send_notification.assert_called_once_with(
-            user=self.user,
-            notification_type='system',
-            title='System Maintenance',
-            message='System maintenance scheduled',
-            channels=['email', 'push', 'in_app'],
-            priority='high',
-            data={'maintenance': True}
-        ) 
+        args, kwargs = mock_dispatcher.return_value.dispatch_chunks.call_args
+        self.assertEqual(list(args[0]), [self.user])
+        self.assertEqual(kwargs, {
+            'notification_type': 'system',
+            'title': 'System Maintenance',
+            'message': 'System maintenance scheduled',
+            'channels': ['email', 'push', 'in_app'],
+            'priority': 'high',
+            'data': {'maintenance': True},
+        }) 
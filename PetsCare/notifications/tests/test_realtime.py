@@ -0,0 +1,181 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.realtime import (
+    EVENT_STREAM_PATH,
+    EventStreamApp,
+    InMemoryBroker,
+    RedisBroker,
+    get_broker,
+    publish_to_users,
+    set_broker,
+    user_channel,
+)
+
+
+def build_scope(token=None, method='GET'):
+    headers = []
+    if token is not None:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    return {'type': 'http', 'method': method, 'path': EVENT_STREAM_PATH, 'headers': headers, 'query_string': b''}
+
+
+def build_token(user_id):
+    token = AccessToken()
+    token['user_id'] = user_id
+    return str(token)
+
+
+class InMemoryBrokerTests(SimpleTestCase):
+    def test_publish_reaches_only_channel_subscribers(self):
+        broker = InMemoryBroker()
+
+        async def scenario():
+            async with broker.subscribe('user:1') as first, broker.subscribe('user:2') as second:
+                self.assertEqual(broker.publish('user:1', 'hello'), 1)
+                received = await asyncio.wait_for(first.get(), timeout=1)
+                self.assertTrue(second.queue.empty())
+                return received
+
+        self.assertEqual(asyncio.run(scenario()), 'hello')
+        self.assertEqual(broker.publish('user:1', 'after unsubscribe'), 0)
+
+    @override_settings(REALTIME_SUBSCRIBER_QUEUE_SIZE=2)
+    def test_overflowed_subscription_is_closed(self):
+        broker = InMemoryBroker()
+
+        async def scenario():
+            async with broker.subscribe('user:1') as subscription:
+                for index in range(3):
+                    broker.publish('user:1', f'event {index}')
+                return await asyncio.wait_for(subscription.get(), timeout=1), subscription.queue.empty()
+
+        self.assertEqual(asyncio.run(scenario()), (None, True))
+
+
+class FlakyRedisBroker(RedisBroker):
+    """RedisBroker, чьи соединения читают сообщения (или ошибки) из общей очереди."""
+
+    def __init__(self):
+        super().__init__('redis://unused', reconnect_delay=0.01)
+        self.connections = 0
+        self.feed = None
+
+    @asynccontextmanager
+    async def _pubsub(self):
+        self.connections += 1
+        yield self
+
+    async def listen(self):
+        while True:
+            item = await self.feed.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class RedisBrokerReconnectTests(SimpleTestCase):
+    def test_existing_subscriber_receives_events_after_listener_failure(self):
+        broker = FlakyRedisBroker()
+
+        async def scenario():
+            broker.feed = asyncio.Queue()
+            async with broker.subscribe('user:1') as subscription:
+                await broker.feed.put(ConnectionError('connection lost'))
+                await broker.feed.put({'type': 'pmessage', 'channel': b'realtime:user:1', 'data': b'hello'})
+                return await asyncio.wait_for(subscription.get(), timeout=1)
+
+        self.assertEqual(asyncio.run(scenario()), 'hello')
+        self.assertEqual(broker.connections, 2)
+
+
+class EventStreamAppTests(SimpleTestCase):
+    def run_stream(self, scope, publish=None, heartbeat=20):
+        broker = InMemoryBroker()
+        app = EventStreamApp(broker=broker, heartbeat=heartbeat)
+        sent = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if message['type'] == 'http.response.body' and message['body'].startswith(b': connected') and publish:
+                publish(broker)
+            if message['type'] == 'http.response.body' and message['body'].startswith((b'event:', b': ping')):
+                disconnect.set()
+
+        asyncio.run(asyncio.wait_for(app(scope, receive, send), timeout=2))
+        return sent
+
+    def test_rejects_request_without_valid_token(self):
+        sent = self.run_stream(build_scope())
+        self.assertEqual(sent[0]['status'], 401)
+
+        sent = self.run_stream(build_scope(token='broken'))
+        self.assertEqual(sent[0]['status'], 401)
+
+    def test_streams_events_of_authenticated_user(self):
+        event = json.dumps({'type': 'message.created', 'data': {'conversation_id': 3}})
+        sent = self.run_stream(
+            build_scope(build_token(7)),
+            publish=lambda broker: broker.publish(user_channel(7), event),
+        )
+
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), sent[0]['headers'])
+        self.assertEqual(sent[-1]['body'], f'event: message.created\ndata: {event}\n\n'.encode())
+
+    @override_settings(REALTIME_SUBSCRIBER_QUEUE_SIZE=1)
+    def test_slow_client_is_disconnected_when_queue_overflows(self):
+        def publish(broker):
+            for index in range(3):
+                broker.publish(user_channel(7), json.dumps({'type': 'ping', 'index': index}))
+
+        sent = self.run_stream(build_scope(build_token(7)), publish=publish)
+
+        self.assertEqual(sent[-1]['body'], b': connected\n\n')
+
+    def test_idle_connection_only_sends_heartbeat(self):
+        sent = self.run_stream(build_scope(build_token(7)), heartbeat=0.01)
+        self.assertEqual(sent[-1]['body'], b': ping\n\n')
+
+
+class PublishToUsersTests(TestCase):
+    class RecordingBroker:
+        def __init__(self):
+            self.published = []
+
+        def publish(self, channel, message):
+            self.published.append((channel, json.loads(message)))
+            return 1
+
+    def setUp(self):
+        self.previous_broker = get_broker()
+        self.broker = self.RecordingBroker()
+        set_broker(self.broker)
+
+    def tearDown(self):
+        set_broker(self.previous_broker)
+
+    def test_publishes_after_commit_once_per_recipient(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            publish_to_users([5, 5, None, 6], 'notification.created', {'id': 1})
+            self.assertEqual(self.broker.published, [])
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(
+            self.broker.published,
+            [
+                ('user:5', {'type': 'notification.created', 'data': {'id': 1}}),
+                ('user:6', {'type': 'notification.created', 'data': {'id': 1}}),
+            ],
+        )
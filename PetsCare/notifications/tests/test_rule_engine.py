@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from notifications.models import NotificationRule, NotificationTemplate
+from notifications.rule_engine import (
+    ConditionError,
+    cache as rule_cache,
+    compile_condition,
+    compile_template,
+    rule_registry,
+)
+from notifications.services import NotificationRuleService
+
+
+class CompileConditionTest(SimpleTestCase):
+    def test_evaluates_context_variables(self):
+        condition = compile_condition("booking.price > 50 and hours_before_start >= 24")
+
+        self.assertTrue(condition({'booking': SimpleNamespace(price=60), 'hours_before_start': 30}))
+        self.assertFalse(condition({'booking': SimpleNamespace(price=60), 'hours_before_start': 2}))
+
+    def test_is_compiled_once_per_expression(self):
+        self.assertIs(compile_condition('amount > 10'), compile_condition('amount > 10'))
+
+    def test_rejects_unsafe_constructs(self):
+        for expression in (
+            "booking.delete()",
+            "user.__class__",
+            "__import__('os')",
+            "[x for x in amount]",
+            "lambda: 1",
+            "settings.SECRET_KEY",
+            "amount >",
+        ):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ConditionError):
+                    compile_condition(expression)
+
+    def test_allows_whitelisted_functions(self):
+        self.assertTrue(compile_condition("len(pet.name) > 2")({'pet': SimpleNamespace(name='Murka')}))
+
+
+class CompileTemplateTest(SimpleTestCase):
+    def test_substitutes_known_keys_and_keeps_unknown(self):
+        render = compile_template('Hi {{name}}, {{missing}} at {{time}}')
+
+        self.assertEqual(render({'name': 'Anna', 'time': 10}), 'Hi Anna, {{missing}} at 10')
+
+    def test_text_without_placeholders(self):
+        self.assertEqual(compile_template('Plain text')({'name': 'Anna'}), 'Plain text')
+
+
+class CompiledRuleRegistryTest(TestCase):
+    def setUp(self):
+        rule_registry.clear()
+        self.template = NotificationTemplate.objects.create(
+            name='Booking', code='rule_engine_booking', subject='{{code}}', body='Body {{code}}',
+        )
+
+    def test_rules_are_cached_and_invalidated_on_save(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = NotificationRule.objects.create(
+                event_type='booking_created', condition='amount > 10', template=self.template, channels=['in_app'],
+            )
+
+        compiled = rule_registry.get_rules('booking_created')
+        self.assertEqual([item.rule.pk for item in compiled], [rule.pk])
+        with self.assertNumQueries(0):
+            rule_registry.get_rules('booking_created')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.condition = 'amount > 100'
+            rule.save()
+
+        compiled = rule_registry.get_rules('booking_created')
+        self.assertFalse(compiled[0].matches({'amount': 50}))
+
+    @override_settings(NOTIFICATION_RULES_LOCAL_MAX_AGE_SECONDS=0)
+    def test_rules_expire_without_shared_cache(self):
+        if rule_cache.is_shared:
+            self.skipTest('Проверяется только in-process fallback')
+        rule = NotificationRule.objects.create(
+            event_type='booking_updated', condition='amount > 10', template=self.template, channels=['in_app'],
+        )
+        rule_registry.get_rules('booking_updated')
+
+        # Изменение в другом процессе: сигналов и смены версии здесь нет.
+        NotificationRule.objects.filter(pk=rule.pk).update(condition='amount > 100')
+
+        self.assertFalse(rule_registry.get_rules('booking_updated')[0].matches({'amount': 50}))
+
+    def test_invalid_condition_is_skipped(self):
+        NotificationRule.objects.create(
+            event_type='booking_cancelled', condition='booking.delete()', template=self.template, channels=['in_app'],
+        )
+
+        self.assertEqual(rule_registry.get_rules('booking_cancelled'), [])
+
+
+class RenderTemplateFallbackTest(SimpleTestCase):
+    def test_render_error_returns_raw_template_text(self):
+        class Broken:
+            def __str__(self):
+                raise ValueError('broken')
+
+        text = 'Hi {{name}}'
+        rendered = NotificationRuleService()._render_template(compile_template(text), {'name': Broken()}, text)
+
+        self.assertEqual(rendered, text)
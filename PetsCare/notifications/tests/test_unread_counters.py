@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from notifications.bulk import BulkNotificationDispatcher
+from notifications.counters import NotificationCounterService, notification_statistics
+from notifications.models import Notification, NotificationUnreadCounter
+
+User = get_user_model()
+
+
+class NotificationUnreadCounterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='counter@petcare.me', password='password')
+
+    def notify(self, notification_type='system', **kwargs):
+        return Notification.objects.create(
+            user=self.user,
+            notification_type=notification_type,
+            title='Title',
+            message='Body',
+            **kwargs,
+        )
+
+    def test_counters_follow_create_read_and_delete(self):
+        first = self.notify()
+        self.notify(notification_type='booking')
+        self.notify(is_read=True)
+
+        self.assertEqual(NotificationCounterService.unread_count(self.user.id), 2)
+        self.assertEqual(NotificationCounterService.unread_by_type(self.user.id), {'system': 1, 'booking': 1})
+
+        first.is_read = True
+        first.save()
+        first.save()
+        self.assertEqual(NotificationCounterService.unread_count(self.user.id), 1)
+
+        Notification.objects.filter(notification_type='booking').delete()
+        self.assertEqual(NotificationCounterService.unread_count(self.user.id), 0)
+        self.assertEqual(NotificationCounterService.unread_by_type(self.user.id), {})
+
+    def test_concurrent_mark_as_read_decrements_once(self):
+        notification = self.notify()
+        self.notify()
+        stale_copy = Notification.objects.get(pk=notification.pk)
+
+        self.assertTrue(NotificationCounterService.mark_as_read(notification))
+        self.assertFalse(NotificationCounterService.mark_as_read(stale_copy))
+
+        self.assertTrue(Notification.objects.get(pk=notification.pk).is_read)
+        self.assertEqual(NotificationCounterService.unread_count(self.user.id), 1)
+
+    def test_deferred_is_read_is_not_loaded_per_row(self):
+        self.notify()
+        self.notify()
+
+        with self.assertNumQueries(1):
+            titles = [notification.title for notification in Notification.objects.only('id', 'title')]
+        self.assertEqual(len(titles), 2)
+
+    def test_saving_deferred_notification_keeps_counters_consistent(self):
+        notification = self.notify()
+        self.notify()
+        deferred = Notification.objects.only('id').get(pk=notification.pk)
+
+        deferred.is_read = True
+        deferred.save(update_fields=['is_read'])
+
+        self.assertEqual(NotificationCounterService.unread_count(self.user.id), 1)
+
+    def test_unread_count_is_a_single_query(self):
+        self.notify()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(NotificationCounterService.unread_count(self.user.id), 1)
+
+    def test_mark_all_as_read_resets_counters(self):
+        self.notify()
+        self.notify(notification_type='booking')
+
+        updated_count = NotificationCounterService.mark_all_as_read(Notification.objects.filter(user=self.user))
+
+        self.assertEqual(updated_count, 2)
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+        self.assertEqual(NotificationCounterService.unread_count(self.user.id), 0)
+
+    def test_bulk_dispatch_updates_counters(self):
+        users = [User.objects.create_user(email=f'counter{index}@petcare.me', password='password') for index in range(3)]
+
+        BulkNotificationDispatcher().dispatch(users, 'system', 'Title', 'Body', channels=['in_app'])
+
+        for user in users:
+            self.assertEqual(NotificationCounterService.unread_count(user.id), 1)
+
+    def test_rebuild_command_repairs_drift(self):
+        self.notify()
+        NotificationUnreadCounter.objects.filter(user=self.user).update(unread_count=7)
+
+        call_command('rebuild_notification_counters', user_ids=[self.user.id], stdout=StringIO())
+
+        self.assertEqual(NotificationCounterService.unread_count(self.user.id), 1)
+
+    def test_statistics_are_computed_in_one_query(self):
+        self.notify(priority='high')
+        self.notify(notification_type='booking', is_read=True)
+
+        with self.assertNumQueries(1):
+            statistics = notification_statistics(Notification.objects.filter(user=self.user))
+
+        self.assertEqual(statistics['total_count'], 2)
+        self.assertEqual(statistics['unread_count'], 1)
+        self.assertEqual(statistics['read_count'], 1)
+        self.assertEqual(statistics['type_stats'], {'system': 1, 'booking': 1})
+        self.assertEqual(statistics['priority_stats'], {'medium': 1, 'high': 1})
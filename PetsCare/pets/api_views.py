@@ -12,6 +12,7 @@ from users.models import User
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.db import transaction
 from users.email_verification_permissions import IsVerifiedForOwnerWriteActions
+from .document_delivery import DocumentDelivery
 from .models import Pet, PetHealthNote, VisitRecord, VisitRecordAddendum, PetAccess, PetDocument, DocumentType, ChronicCondition, PhysicalFeature, BehavioralTrait, PetOwner
 from .serializers import (
     PetSerializer,
@@ -989,28 +990,7 @@ class PetDocumentDownloadAPIView(APIView):
             )
         
         try:
-            # Открываем файл для чтения
-            file_handle = document.file.open('rb')
-            
-            # Определяем MIME-тип
-            import mimetypes
-            content_type, encoding = mimetypes.guess_type(document.file.name)
-            if not content_type:
-                content_type = 'application/octet-stream'
-            
-            # Создаем ответ с файлом
-            from django.http import FileResponse
-            response = FileResponse(
-                file_handle,
-                content_type=content_type
-            )
-            
-            # Устанавливаем заголовки для скачивания
-            response['Content-Disposition'] = f'attachment; filename="{document.name}"'
-            response['Content-Length'] = document.file.size
-            
-            return response
-            
+            return DocumentDelivery(document, disposition='attachment').respond(request)
         except Exception as e:
             return Response(
                 {'error': _('Error downloading file')},
@@ -1071,29 +1051,13 @@ class PetDocumentPreviewAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        import mimetypes
+        content_type = mimetypes.guess_type(document.file.name)[0]
+        if not content_type:
+            content_type = 'application/pdf' if file_extension.endswith('.pdf') else 'image/jpeg'
+
         try:
-            # Открываем файл для чтения
-            file_handle = document.file.open('rb')
-            
-            # Определяем MIME-тип
-            import mimetypes
-            content_type, encoding = mimetypes.guess_type(document.file.name)
-            if not content_type:
-                content_type = 'application/pdf' if file_extension.endswith('.pdf') else 'image/jpeg'
-            
-            # Создаем inline-ответ для поддерживаемого файла
-            from django.http import FileResponse
-            response = FileResponse(
-                file_handle,
-                content_type=content_type
-            )
-            
-            # Устанавливаем заголовки для предпросмотра
-            response['Content-Disposition'] = f'inline; filename="{document.name}"'
-            response['Content-Length'] = document.file.size
-            
-            return response
-            
+            return DocumentDelivery(document, disposition='inline', content_type=content_type).respond(request)
         except Exception as e:
             return Response(
                 {'error': _('Error loading preview file')},
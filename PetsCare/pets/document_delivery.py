@@ -0,0 +1,151 @@
+"""
+Отдача файлов документов питомцев после проверки прав.
+
+Возможности:
+- сильный ETag из хеша содержимого (PetDocument.content_sha256) и
+  Last-Modified, ответ 304 на условные запросы (If-None-Match / If-Modified-Since);
+- HTTP Range (один диапазон байт, If-Range), 206 / 416;
+- режим offload: после проверки прав файл отдаёт nginx (X-Accel-Redirect)
+  или Apache/lighttpd (X-Sendfile), воркер не проксирует байты.
+
+Настройки:
+- PET_DOCUMENT_DELIVERY_OFFLOAD: '' | 'x-accel-redirect' | 'x-sendfile'
+- PET_DOCUMENT_ACCEL_REDIRECT_PREFIX: internal location nginx для MEDIA_ROOT
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import re
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+OFFLOAD_X_ACCEL_REDIRECT = 'x-accel-redirect'
+OFFLOAD_X_SENDFILE = 'x-sendfile'
+STREAM_CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class DocumentDelivery:
+    """Формирует ответ с содержимым документа для download и preview."""
+
+    def __init__(self, document, disposition: str = 'attachment', content_type: Optional[str] = None):
+        self.document = document
+        self.disposition = disposition
+        self.content_type = content_type or mimetypes.guess_type(document.file.name)[0] or 'application/octet-stream'
+
+    def respond(self, request) -> HttpResponse:
+        document = self.document
+        document.ensure_content_metadata()
+        size = document.file_size if document.file_size is not None else document.file.size
+        etag = quote_etag(document.content_sha256)
+        last_modified = document.updated_at or document.uploaded_at
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+        if not_modified is not None:
+            self._set_validators(not_modified, etag, last_modified_ts)
+            return not_modified
+
+        offload = getattr(settings, 'PET_DOCUMENT_DELIVERY_OFFLOAD', '')
+        if offload:
+            response = self._offload_response(offload)
+        else:
+            byte_range = self._requested_range(request, etag, size)
+            if byte_range == 'unsatisfiable':
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            if byte_range is None:
+                response = FileResponse(document.file.open('rb'), content_type=self.content_type)
+                response['Content-Length'] = size
+            else:
+                response = self._partial_response(*byte_range, size)
+
+        response['Content-Disposition'] = self._content_disposition()
+        response['Accept-Ranges'] = 'bytes'
+        self._set_validators(response, etag, last_modified_ts)
+        return response
+
+    def _requested_range(self, request, etag: str, size: int):
+        """(start, end) запрошенного диапазона, None — весь файл, 'unsatisfiable' — 416."""
+        header = request.META.get('HTTP_RANGE', '').strip()
+        if not header:
+            return None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range and if_range.strip() != etag:
+            # Файл изменился с момента первого ответа — отдаём целиком.
+            return None
+
+        match = RANGE_RE.match(header)
+        if match is None:
+            # Несколько диапазонов или неизвестная единица — допустимо отдать весь файл.
+            return None
+        start, end = match.groups()
+        if not start and not end:
+            return None
+        if not start:
+            suffix = int(end)
+            if suffix == 0:
+                return 'unsatisfiable'
+            return max(size - suffix, 0), size - 1
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+        if start >= size or start > end:
+            return 'unsatisfiable'
+        return start, end
+
+    def _partial_response(self, start: int, end: int, size: int) -> StreamingHttpResponse:
+        length = end - start + 1
+        file_handle = self.document.file.open('rb')
+        file_handle.seek(start)
+
+        def stream():
+            remaining = length
+            try:
+                while remaining > 0:
+                    chunk = file_handle.read(min(STREAM_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+            finally:
+                file_handle.close()
+
+        response = StreamingHttpResponse(stream(), status=206, content_type=self.content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = length
+        return response
+
+    def _offload_response(self, offload: str) -> HttpResponse:
+        """Пустой ответ с заголовком для веб-сервера; Range и 206 обрабатывает он."""
+        response = HttpResponse(content_type=self.content_type)
+        if offload == OFFLOAD_X_ACCEL_REDIRECT:
+            prefix = getattr(settings, 'PET_DOCUMENT_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(self.document.file.name.lstrip('/'))
+        elif offload == OFFLOAD_X_SENDFILE:
+            response['X-Sendfile'] = self.document.file.path
+        else:
+            raise ValueError(f'Unknown PET_DOCUMENT_DELIVERY_OFFLOAD mode: {offload}')
+        return response
+
+    def _content_disposition(self) -> str:
+        filename = self.document.name or self.document.file.name.rsplit('/', 1)[-1]
+        ascii_name = filename.encode('ascii', 'ignore').decode() or 'document'
+        ascii_name = ascii_name.replace('"', '').replace('\\', '')
+        return f"{self.disposition}; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+    @staticmethod
+    def _set_validators(response, etag: str, last_modified_ts: Optional[int]) -> None:
+        response['ETag'] = etag
+        if last_modified_ts is not None:
+            response['Last-Modified'] = http_date(last_modified_ts)
+        # Содержимое доступно только после проверки прав: браузер может
+        # хранить копию, но обязан ревалидировать её по ETag.
+        response['Cache-Control'] = 'private, no-cache'
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-16 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0025_petdocument_addendum_and_type_contract'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petdocument',
+            name='content_sha256',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the stored file content, used as a strong ETag', max_length=64, verbose_name='Content SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='petdocument',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Stored file size in bytes', null=True, verbose_name='File size'),
+        ),
+    ]
@@ -28,6 +28,7 @@ from datetime import date, timedelta
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.utils import timezone
+import hashlib
 import os
 import logging
 
@@ -1408,6 +1409,22 @@ class PetDocument(models.Model):
         help_text=_('User who withdrew the provider-managed document.')
     )
 
+    # Метаданные содержимого для отдачи файла (ETag, Content-Length)
+    content_sha256 = models.CharField(
+        _('Content SHA-256'),
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text=_('Hash of the stored file content, used as a strong ETag')
+    )
+    file_size = models.PositiveBigIntegerField(
+        _('File size'),
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('Stored file size in bytes')
+    )
+
     # Системные поля
     created_at = models.DateTimeField(
         _('Created At'),
@@ -1435,6 +1452,34 @@ class PetDocument(models.Model):
     def __str__(self):
         return f"{self.name} - {self.pet.name}"
 
+    def ensure_content_metadata(self):
+        """
+        Ленивое заполнение хеша и размера для документов, загруженных до
+        появления этих полей.
+        """
+        if self.content_sha256 or not self.file:
+            return
+        self.content_sha256, self.file_size = self._hash_file()
+        PetDocument.objects.filter(pk=self.pk).update(
+            content_sha256=self.content_sha256,
+            file_size=self.file_size,
+        )
+
+    def _hash_file(self):
+        digest = hashlib.sha256()
+        size = 0
+        self.file.open('rb')
+        try:
+            for chunk in self.file.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+        finally:
+            if self.file._committed:
+                self.file.close()
+            else:
+                self.file.seek(0)
+        return digest.hexdigest(), size
+
     def clean(self):
         """Валидация модели"""
         super().clean()
@@ -1590,12 +1635,19 @@ class PetDocument(models.Model):
         return None
 
     def save(self, *args, **kwargs):
-        """Сохраняет документ с валидацией и инкрементом версии."""
+        """
+        Сохраняет документ с валидацией и инкрементом версии.
+        При загрузке нового файла считает хеш и размер содержимого.
+        """
         update_fields = kwargs.get('update_fields')
+        changed_fields = {'version'} if self.pk else set()
         if self.pk:
             self.version = (self.version or 0) + 1
-            if update_fields is not None:
-                kwargs['update_fields'] = list(set(update_fields) | {'version'})
+        if self.file and not self.file._committed:
+            self.content_sha256, self.file_size = self._hash_file()
+            changed_fields |= {'content_sha256', 'file_size'}
+        if update_fields is not None:
+            kwargs['update_fields'] = list(set(update_fields) | changed_fields)
         self.full_clean()
         super().save(*args, **kwargs)
 
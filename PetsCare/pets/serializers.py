@@ -30,6 +30,7 @@ from .models import (
     VisitRecordAddendum,
 )
 from users.models import User
+from utils.image_derivatives import ImageDerivativesField
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.db import transaction
@@ -947,6 +948,7 @@ class PetSerializer(serializers.ModelSerializer):
     last_visit_date = serializers.SerializerMethodField()
     has_medical_conditions = serializers.SerializerMethodField()
     has_special_needs = serializers.SerializerMethodField()
+    photo_srcset = ImageDerivativesField(source='photo', profile='pet_photo')
 
     class Meta:
         model = Pet
@@ -975,6 +977,7 @@ class PetSerializer(serializers.ModelSerializer):
             'medical_conditions',
             'chronic_conditions',
             'photo',
+            'photo_srcset',
             'access_list',
             'main_owner_name',
             'main_owner_email',
@@ -4,7 +4,9 @@
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import PetOwner
+from utils.image_derivatives import register_image_derivatives
+
+from .models import Pet, PetOwner
 
 
 @receiver(post_save, sender=PetOwner)
@@ -37,3 +39,7 @@ def assign_pet_owner_role_on_petowner_creation(sender, instance, created, **kwar
             )
             if not user.user_types.filter(name='pet_owner').exists():
                 user.user_types.add(pet_owner_role)
+
+
+# Производные (thumbnails) фото питомца генерируются при загрузке.
+register_image_derivatives(Pet, {'photo': 'pet_photo'})
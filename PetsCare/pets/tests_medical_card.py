@@ -614,6 +614,44 @@ class PetDocumentAPITests(BookingFlowBaseMixin, APITestCase):
         self.assertEqual(response['Content-Type'], 'application/pdf')
         self.assertTrue(response['Content-Disposition'].startswith('inline;'))
 
+    def test_document_download_supports_etag_and_conditional_get(self):
+        self.client.force_authenticate(self.employee_a.user)
+
+        response = self.client.get(self._download_url(self.visit_document.id))
+        etag = response['ETag']
+        self.visit_document.refresh_from_db()
+
+        self.assertEqual(etag, f'"{self.visit_document.content_sha256}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(self._download_url(self.visit_document.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_document_download_serves_byte_ranges(self):
+        self.client.force_authenticate(self.employee_a.user)
+        content = b'%PDF-1.4 visit'
+
+        response = self.client.get(self._download_url(self.visit_document.id), HTTP_RANGE='bytes=2-4')
+
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), content[2:5])
+        self.assertEqual(response['Content-Range'], f'bytes 2-4/{len(content)}')
+
+        response = self.client.get(self._download_url(self.visit_document.id), HTTP_RANGE='bytes=100-')
+
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_document_preview_can_offload_to_web_server(self):
+        self.client.force_authenticate(self.employee_a.user)
+
+        with self.settings(PET_DOCUMENT_DELIVERY_OFFLOAD='x-accel-redirect'):
+            response = self.client.get(self._preview_url(self.visit_document.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.visit_document.file.name}')
+        self.assertEqual(response.content, b'')
+
     def test_canonical_pet_documents_endpoint_lists_only_accessible_documents(self):
         self.client.force_authenticate(self.employee_a.user)
 
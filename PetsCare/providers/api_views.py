@@ -19,9 +19,11 @@ API представления для модуля providers.
 """
 
 from collections import defaultdict
+from decimal import Decimal
 from threading import Thread
 
 from rest_framework import generics, status, permissions, filters, viewsets
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
@@ -34,7 +36,7 @@ from django.db import transaction
 from django.http import FileResponse
 from django.urls import reverse
 
-from users.serializers import UserSerializer
+from sitters.serializers import SitterSearchResultSerializer
 from .models import Provider, Employee, EmployeeProvider, Schedule, LocationSchedule, EmployeeWorkSlot, SchedulePattern, ProviderLocation, ProviderLocationService, EmployeeLocationService, EmployeeLocationRole, ProviderReportExportJob, ProviderRolePermission
 from catalog.models import Service
 from django.db.models import Q, Count, Case, When, Value, Min, Max, F
@@ -49,7 +51,7 @@ from .serializers import (
     EmployeeWorkSlotSerializer,
     BulkLocationReactivateSerializer,
     LifecycleTransitionSerializer,
-    ProviderBriefSerializer, ProviderDetailLiteSerializer,
+    ProviderBriefSerializer, ProviderDetailLiteSerializer, provider_serializer_prefetches,
     ProviderLocationSerializer, ProviderLocationListSerializer, ProviderLocationServiceSerializer,
     LocationScheduleSerializer, HolidayShiftSerializer,
     LocationServicePricesUpdateSerializer,
@@ -699,6 +701,8 @@ class ProviderListCreateAPIView(generics.ListCreateAPIView):
         queryset = self.queryset
         if self.request.method == 'GET' and _is_brief_mode(self.request):
             queryset = queryset.select_related('structured_address', 'invoice_currency').prefetch_related('served_pet_types')
+        elif self.request.method == 'GET':
+            queryset = queryset.prefetch_related(*provider_serializer_prefetches())
         resource_code = 'dashboard' if self.request.method == 'GET' else 'org.profile'
         return _filter_providers_by_permission(queryset, self.request.user, resource_code, 'read')
 
@@ -732,6 +736,8 @@ class ProviderRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView
         queryset = self.queryset
         if self.request.method == 'GET' and _is_brief_mode(self.request):
             queryset = queryset.select_related('structured_address', 'invoice_currency').prefetch_related('served_pet_types')
+        elif self.request.method == 'GET':
+            queryset = queryset.prefetch_related(*provider_serializer_prefetches())
         action = 'read'
         resource_code = 'org.profile'
         if self.request.method in {'PUT', 'PATCH'}:
@@ -1486,251 +1492,57 @@ class ProviderSearchByDistanceAPIView(generics.ListAPIView):
     def get_queryset(self):
         """
         Возвращает провайдеров в указанном радиусе с фильтрацией по цене и доступности.
+
+        Число SQL-запросов постоянно и не зависит от количества результатов
+        (см. providers.search_services.SEARCH_MAX_QUERIES).
         """
         if getattr(self, 'swagger_fake_view', False):
             return Provider.objects.none()
-        
-        from billing.models import ProviderBlocking
-        from booking.models import Booking
-        from datetime import datetime, timedelta
-        
-        # Получаем параметры запроса
-        latitude = self.request.query_params.get('latitude')
-        longitude = self.request.query_params.get('longitude')
-        radius = float(self.request.query_params.get('radius', 10))
-        service_id = self.request.query_params.get('service_id')
-        min_rating = self.request.query_params.get('min_rating')
-        price_min = self.request.query_params.get('price_min')
-        price_max = self.request.query_params.get('price_max')
-        available_date = self.request.query_params.get('available_date')
-        available_time = self.request.query_params.get('available_time')
-        available_only = self.request.query_params.get('available', '').lower() == 'true'
-        sort_by = self.request.query_params.get('sort_by', 'distance')
-        limit = int(self.request.query_params.get('limit', 20))
-        
+
+        from .search_services import ProviderDistanceSearchParams, ProviderDistanceSearchService
+
+        query_params = self.request.query_params
+        latitude = query_params.get('latitude')
+        longitude = query_params.get('longitude')
+
         # Валидируем координаты
         if not latitude or not longitude:
             return Provider.objects.none()
-        
+
         try:
             lat = float(latitude)
             lon = float(longitude)
         except (ValueError, TypeError):
             return Provider.objects.none()
-        
+
         if not validate_coordinates(lat, lon):
             return Provider.objects.none()
-        
-        # Базовый queryset активных провайдеров
-        queryset = Provider.objects.filter(is_active=True)
-        
-        # Исключаем заблокированные учреждения
-        blocked_provider_ids = ProviderBlocking.objects.filter(
-            status='active'
-        ).values_list('provider_id', flat=True)
-        queryset = queryset.exclude(id__in=blocked_provider_ids)
-        
-        # Фильтрация по услуге через локации
-        if service_id:
-            try:
-                service_id = int(service_id)
-                # Фильтруем провайдеров, у которых есть активные локации с этой услугой
-                queryset = queryset.filter(
-                    locations__is_active=True,
-                    locations__available_services__service_id=service_id,
-                    locations__available_services__is_active=True
-                ).distinct()
-            except (ValueError, TypeError):
-                pass
-        
-        # Фильтрация по цене через локации
-        if service_id and (price_min or price_max):
-            try:
-                service_id = int(service_id)
-                from providers.models import ProviderLocationService
-                
-                # Фильтруем локации с услугами в указанном диапазоне цен
-                location_services_filter = ProviderLocationService.objects.filter(
-                    location__provider__in=queryset,
-                    location__is_active=True,
-                    service_id=service_id,
-                    is_active=True
-                )
-                
-                if price_min:
-                    try:
-                        price_min_val = float(price_min)
-                        location_services_filter = location_services_filter.filter(price__gte=price_min_val)
-                    except (ValueError, TypeError):
-                        pass
-                
-                if price_max:
-                    try:
-                        price_max_val = float(price_max)
-                        location_services_filter = location_services_filter.filter(price__lte=price_max_val)
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Получаем ID провайдеров, у которых есть локации с подходящими ценами
-                provider_ids = location_services_filter.values_list('location__provider_id', flat=True).distinct()
-                queryset = queryset.filter(id__in=provider_ids)
-            except (ValueError, TypeError):
-                pass
-        
-        # Фильтрация по доступности
-        if available_only and available_date and available_time:
-            try:
-                # Парсим дату и время
-                date_obj = datetime.strptime(available_date, '%Y-%m-%d').date()
-                time_obj = datetime.strptime(available_time, '%H:%M').time()
-                datetime_obj = datetime.combine(date_obj, time_obj)
-                
-                # Получаем день недели (0 = понедельник)
-                weekday = date_obj.weekday()
-                
-                # Проверяем доступность слотов
-                available_provider_ids = []
-                
-                for provider in queryset:
-                    # Проверяем расписание учреждения
-                    provider_schedule = provider.schedules.filter(weekday=weekday).first()
-                    if not provider_schedule or provider_schedule.is_closed:
-                        continue
-                    
-                    # Проверяем время работы
-                    if (provider_schedule.open_time and provider_schedule.close_time and
-                        (time_obj < provider_schedule.open_time or time_obj > provider_schedule.close_time)):
-                        continue
-                    
-                    # Проверяем свободные слоты сотрудников
-                    if service_id:
-                        # Ищем сотрудников с этой услугой
-                        employees = provider.employees.filter(
-                            services__id=service_id,
-                            is_active=True
-                        )
-                        
-                        # Проверяем доступность хотя бы одного сотрудника
-                        has_available_employee = False
-                        for employee in employees:
-                            # Проверяем расписание сотрудника
-                            employee_schedule = employee.schedules.filter(day_of_week=weekday).first()
-                            if not employee_schedule or not employee_schedule.is_working:
-                                continue
-                            
-                            # Проверяем время работы сотрудника
-                            if (employee_schedule.start_time and employee_schedule.end_time and
-                                (time_obj < employee_schedule.start_time or time_obj > employee_schedule.end_time)):
-                                continue
-                            
-                            # Проверяем, нет ли уже бронирования в это время
-                            slot_end_time = datetime_obj + timedelta(minutes=30)  # Предполагаем 30 минут
-                            conflicting_booking = Booking.objects.filter(
-                                employee=employee,
-                                scheduled_date=date_obj,
-                                scheduled_time__lt=slot_end_time.time(),
-                                scheduled_time__gt=datetime_obj.time(),
-                                status__in=['confirmed', 'pending']
-                            ).exists()
-                            
-                            if not conflicting_booking:
-                                has_available_employee = True
-                                break
-                        
-                        if has_available_employee:
-                            available_provider_ids.append(provider.id)
-                    else:
-                        # Если услуга не указана, считаем доступным если есть работающие сотрудники
-                        if provider.employees.filter(is_active=True).exists():
-                            available_provider_ids.append(provider.id)
-                
-                # Фильтруем только доступные учреждения
-                if available_provider_ids:
-                    queryset = queryset.filter(id__in=available_provider_ids)
-                else:
-                    return Provider.objects.none()
-                    
-            except (ValueError, TypeError):
-                pass
-        
-        # Фильтруем провайдеров с активными локациями, у которых есть адреса
-        queryset = queryset.filter(
-            locations__is_active=True,
-            locations__structured_address__isnull=False,
-            locations__structured_address__point__isnull=False
-        ).distinct()
-        
-        # Получаем локации в радиусе (вместо провайдеров)
-        # Сначала получаем все локации провайдеров
-        from providers.models import ProviderLocation
-        locations = ProviderLocation.objects.filter(
-            provider__in=queryset,
-            is_active=True,
-            structured_address__isnull=False,
-            structured_address__point__isnull=False
-        )
-        
-        # Фильтруем локации по расстоянию
-        locations_with_distance = filter_by_distance(
-            locations, lat, lon, radius, 'structured_address__point'
+
+        try:
+            service_id = int(query_params.get('service_id'))
+        except (ValueError, TypeError):
+            service_id = None
+
+        available_at = None
+        if query_params.get('available', '').lower() == 'true':
+            available_at = ProviderDistanceSearchService.parse_available_at(
+                query_params.get('available_date'),
+                query_params.get('available_time'),
+            )
+
+        params = ProviderDistanceSearchParams(
+            latitude=lat,
+            longitude=lon,
+            radius_km=float(query_params.get('radius', 10)),
+            service_id=service_id,
+            price_min=ProviderDistanceSearchService.parse_price(query_params.get('price_min')),
+            price_max=ProviderDistanceSearchService.parse_price(query_params.get('price_max')),
+            available_at=available_at,
+            sort_by=query_params.get('sort_by', 'distance'),
+            limit=int(query_params.get('limit', 20)),
         )
-        
-        # Группируем локации по провайдерам и выбираем ближайшую локацию для каждого провайдера
-        providers_with_distance = []
-        provider_distances = {}  # {provider_id: min_distance}
-        
-        for location, distance in locations_with_distance:
-            provider_id = location.provider_id
-            if provider_id not in provider_distances or distance < provider_distances[provider_id]:
-                provider_distances[provider_id] = distance
-        
-        # Создаем список (provider, distance) для сортировки
-        for provider_id, distance in provider_distances.items():
-            try:
-                provider = Provider.objects.get(id=provider_id)
-                providers_with_distance.append((provider, distance))
-            except Provider.DoesNotExist:
-                pass
-        
-        rating_map = _get_provider_rating_map([provider for provider, _ in providers_with_distance])
-        get_rating = lambda provider: rating_map.get(provider.id, 0)
-        
-        # Сортировка
-        if sort_by == 'rating':
-            providers_with_distance.sort(key=lambda x: (-get_rating(x[0]), x[1]))
-        elif sort_by == 'price_asc' and service_id:
-            # Сортировка по возрастанию цены (минимальная цена из всех локаций)
-            def get_min_price(provider):
-                from providers.models import ProviderLocationService
-                location_service = ProviderLocationService.objects.filter(
-                    location__provider=provider,
-                    location__is_active=True,
-                    service_id=service_id,
-                    is_active=True
-                ).order_by('price').first()
-                return location_service.price if location_service else float('inf')
-            
-            providers_with_distance.sort(key=lambda x: (get_min_price(x[0]), x[1]))
-        elif sort_by == 'price_desc' and service_id:
-            # Сортировка по убыванию цены (максимальная цена из всех локаций)
-            def get_max_price(provider):
-                from providers.models import ProviderLocationService
-                location_service = ProviderLocationService.objects.filter(
-                    location__provider=provider,
-                    location__is_active=True,
-                    service_id=service_id,
-                    is_active=True
-                ).order_by('-price').first()
-                return location_service.price if location_service else float('-inf')
-            
-            providers_with_distance.sort(key=lambda x: (-get_max_price(x[0]), x[1]))
-        else:
-            # Сортировка по расстоянию (по умолчанию)
-            providers_with_distance.sort(key=lambda x: (x[1], -get_rating(x[0])))
-        
-        # Возвращаем только объекты провайдеров
-        return [provider for provider, distance in providers_with_distance[:limit]]
-    
+        return ProviderDistanceSearchService.search(params)
+
     def get_serializer_context(self):
         """
         Добавляет контекст для расчета расстояний и информации о ценах/доступности в сериализатор.
@@ -1746,92 +1558,94 @@ class ProviderSearchByDistanceAPIView(generics.ListAPIView):
         return context
 
 
+class SitterSearchPagination(PageNumberPagination):
+    """
+    Пагинация геопоиска ситтеров.
+    """
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
 class SitterAdvancedSearchByDistanceAPIView(generics.ListAPIView):
     """
     API для расширенного поиска ситтеров по расстоянию с дополнительными фильтрами.
     
     Основные возможности:
-    - Поиск ситтеров в указанном радиусе
-    - Фильтрация по услугам, расписанию, цене
-    - Фильтрация по рейтингу и доступности
-    - Сортировка по расстоянию, рейтингу и цене
+    - Поиск ситтеров по точке зоны обслуживания (SitterProfile.service_point)
+      в указанном радиусе и в пределах радиуса обслуживания ситтера
+    - Фильтрация по цене, рейтингу и доступности на дату
+    - Сортировка по расстоянию, постраничная выдача
     - Возвращает расстояние до каждого ситтера
     
     Параметры запроса:
     - latitude: Широта центральной точки
     - longitude: Долгота центральной точки
-    - radius: Радиус поиска в километрах (по умолчанию 10)
-    - service_id: ID конкретной услуги для фильтрации
+    - radius: Радиус поиска в километрах (по умолчанию 10, от 0.1 до 100)
     - min_rating: Минимальный рейтинг ситтера
-    - max_price: Максимальная цена за услугу
+    - min_price / max_price: Границы почасовой ставки
+    - compensation_type: paid / unpaid
     - available_date: Дата для проверки доступности (YYYY-MM-DD)
-    - available_time: Время для проверки доступности (HH:MM)
-    - available: Только доступные ситтеры (true/false)
-    - limit: Максимальное количество результатов (по умолчанию 20)
+    - available: Только доступные сегодня ситтеры (true/false), если дата не указана
+    - limit: Размер страницы (по умолчанию 20, не более 100)
+    - page: Номер страницы
     
     Права доступа:
     - Требуется аутентификация
     """
-    serializer_class = UserSerializer
+    serializer_class = SitterSearchResultSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SitterSearchPagination
     
     def get_queryset(self):
         """
-        Возвращает ситтеров в указанном радиусе с расширенными фильтрами.
+        Возвращает активных ситтеров в указанном радиусе с расширенными фильтрами.
         """
+        from sitters.models import SitterProfile
+
         if getattr(self, 'swagger_fake_view', False):
-            from users.models import User
-            return User.objects.none()
-        
-        from geolocation.utils import filter_by_distance, validate_coordinates
-        from sitters.models import PetSitting
-        from datetime import datetime, time
-        from django.utils import timezone
+            return SitterProfile.objects.none()
         
-        # Получаем параметры запроса
-        latitude = self.request.query_params.get('latitude')
-        longitude = self.request.query_params.get('longitude')
-        radius = float(self.request.query_params.get('radius', 10))
-        service_id = self.request.query_params.get('service_id')
-        min_rating = self.request.query_params.get('min_rating')
-        max_price = self.request.query_params.get('max_price')
-        available_date = self.request.query_params.get('available_date')
-        available_time = self.request.query_params.get('available_time')
-        available = self.request.query_params.get('available')
-        limit = int(self.request.query_params.get('limit', 20))
-        
-        # Валидируем координаты
-        if not latitude or not longitude:
-            return User.objects.none()
+        from rest_framework.exceptions import ValidationError as DRFValidationError
+        from sitters.search import SitterSearchService
         
+        params = self.request.query_params
         try:
-            lat = float(latitude)
-            lon = float(longitude)
+            lat = float(params.get('latitude'))
+            lon = float(params.get('longitude'))
         except (ValueError, TypeError):
-            return User.objects.none()
+            return SitterProfile.objects.none()
         
         if not validate_coordinates(lat, lon):
-            return User.objects.none()
+            return SitterProfile.objects.none()
         
-        # Базовый queryset ситтеров
-        queryset = User.objects.filter(
-            is_active=True,
-            user_types__name='sitter'
-        )
+        try:
+            radius = float(params.get('radius', 10))
+            min_rating = float(params['min_rating']) if params.get('min_rating') else None
+            min_price = Decimal(params['min_price']) if params.get('min_price') else None
+            max_price = Decimal(params['max_price']) if params.get('max_price') else None
+        except (ValueError, TypeError, ArithmeticError):
+            raise DRFValidationError({'detail': _('Radius, rating and price filters must be numbers.')})
+        if not (0.1 <= radius <= 100):
+            raise DRFValidationError({'radius': _('Radius must be a number between 0.1 and 100.')})
         
-        # В модели User нет геокоординат/рейтинга для поиска ситтеров по расстоянию
-        return User.objects.none()
-    
-    def get_serializer_context(self):
-        """
-        Добавляет контекст для расчета расстояний в сериализатор.
-        """
-        context = super().get_serializer_context()
-        if getattr(self, 'swagger_fake_view', False):
-            return context
-        context['latitude'] = self.request.query_params.get('latitude')
-        context['longitude'] = self.request.query_params.get('longitude')
-        return context 
+        available_date = None
+        if params.get('available_date'):
+            try:
+                available_date = datetime.strptime(params['available_date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise DRFValidationError({'available_date': _('Invalid date format. Use YYYY-MM-DD.')})
+        elif params.get('available', '').lower() == 'true':
+            available_date = timezone.localdate()
+        
+        return SitterSearchService(lat, lon, radius).search(
+            min_rating=min_rating,
+            min_price=min_price,
+            max_price=max_price,
+            compensation_type=params.get('compensation_type'),
+            available_from=available_date,
+            available_to=available_date,
+        )
 
 
 @api_view(['GET'])
@@ -8,7 +8,7 @@
 """
 
 from django.apps import AppConfig
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_delete, pre_save, post_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -31,11 +31,21 @@ class ProvidersConfig(AppConfig):
         Инициализация сигналов при запуске приложения.
         """
         from . import signals  # noqa
-        from .models import ProviderLocation, Provider
+        from geolocation.models import Address
+
+        from .models import ProviderLocation, ProviderLocationService, Provider
         
         # Подключаем сигнал деактивации локации
         pre_save.connect(signals.handle_location_deactivation, sender=ProviderLocation)
         
         # Подключаем сигналы для отправки письма при активации провайдера
         pre_save.connect(signals.store_provider_old_status, sender=Provider)
-        post_save.connect(signals.send_provider_activation_email, sender=Provider)
\ No newline at end of file
+        post_save.connect(signals.send_provider_activation_email, sender=Provider)
+
+        # Кеш геопоиска зависит от локаций, их услуг и координат адресов
+        for search_model in (ProviderLocation, ProviderLocationService):
+            post_save.connect(signals.invalidate_location_search_cache, sender=search_model)
+            post_delete.connect(signals.invalidate_location_search_cache, sender=search_model)
+        pre_save.connect(signals.remember_address_point, sender=Address)
+        post_save.connect(signals.invalidate_address_search_cache, sender=Address)
+        post_delete.connect(signals.invalidate_location_search_cache, sender=Address)
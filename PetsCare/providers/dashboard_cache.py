@@ -0,0 +1,104 @@
+"""
+Короткий кеш payload operational dashboard провайдера.
+
+Каждая вкладка менеджера опрашивает dashboard по таймеру, поэтому один и тот же
+payload собирается десятки раз в минуту. Готовый payload кладётся в кеш
+'provider_dashboard' на PROVIDER_DASHBOARD_CACHE_SECONDS по ключу
+(провайдер, версия, scope, окно alerts). RBAC не кешируется: scope
+пользователя разрешается на каждый запрос, в кеше только данные scope.
+
+Изменения бронирований и инцидентов меняют версию провайдера — следующий
+запрос собирает payload заново. Сборку одного ключа выполняет один процесс
+(блокировка через cache.add), остальные ждут готовый payload не дольше
+PROVIDER_DASHBOARD_LOCK_WAIT_SECONDS, а затем собирают сами.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time as time_module
+from typing import Callable
+
+from django.conf import settings
+
+from utils.caching import get_namespace_cache
+
+cache = get_namespace_cache('provider_dashboard')
+
+VERSION_KEY = 'version:{provider_id}'
+PAYLOAD_KEY = 'payload:{provider_id}:{version}:{scope}:{alerts_minutes}'
+LOCK_SUFFIX = ':lock'
+POLL_INTERVAL_SECONDS = 0.05
+
+
+class DashboardCache:
+    """Кеш payload dashboard с защитой от одновременной сборки."""
+
+    @staticmethod
+    def get_timeout() -> int:
+        return max(int(getattr(settings, 'PROVIDER_DASHBOARD_CACHE_SECONDS', 5)), 0)
+
+    @classmethod
+    def get_or_build(cls, *, scope, alerts_minutes: int, builder: Callable[[], dict]) -> dict:
+        """Возвращает payload из кеша или собирает его builder-ом."""
+        timeout = cls.get_timeout()
+        if timeout <= 0:
+            return builder()
+
+        key = PAYLOAD_KEY.format(
+            provider_id=scope.provider.id,
+            version=cls._get_version(scope.provider.id),
+            scope=cls._scope_digest(scope),
+            alerts_minutes=alerts_minutes,
+        )
+        payload = cache.get(key)
+        if payload is not None:
+            return payload
+
+        lock_key = key + LOCK_SUFFIX
+        if cache.add(lock_key, 1, cls._lock_timeout()):
+            try:
+                payload = builder()
+                cache.set(key, payload, timeout)
+            finally:
+                cache.delete(lock_key)
+            return payload
+
+        deadline = time_module.monotonic() + float(getattr(settings, 'PROVIDER_DASHBOARD_LOCK_WAIT_SECONDS', 2))
+        while time_module.monotonic() < deadline:
+            time_module.sleep(POLL_INTERVAL_SECONDS)
+            payload = cache.get(key)
+            if payload is not None:
+                return payload
+        return builder()
+
+    @staticmethod
+    def invalidate(provider_id: int | None) -> None:
+        """Сбрасывает все payload провайдера сменой версии."""
+        if provider_id:
+            cache.set(VERSION_KEY.format(provider_id=provider_id), time_module.time_ns(), None)
+
+    @staticmethod
+    def _get_version(provider_id: int):
+        key = VERSION_KEY.format(provider_id=provider_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time_module.time_ns(), None)
+            version = cache.get(key, 0)
+        return version
+
+    @staticmethod
+    def _scope_digest(scope) -> str:
+        """Ключ scope: тип, локации и финансовый доступ (не пользователь)."""
+        raw_value = '|'.join((
+            scope.scope_type,
+            ','.join(map(str, scope.location_ids)),
+            '1' if scope.can_view_financials else '0',
+            ','.join(map(str, scope.financial_location_ids)),
+        ))
+        return hashlib.blake2b(raw_value.encode(), digest_size=12).hexdigest()
+
+    @staticmethod
+    def _lock_timeout() -> int:
+        # Блокировка переживает зависшую сборку не дольше нескольких секунд
+        return max(int(getattr(settings, 'PROVIDER_DASHBOARD_LOCK_WAIT_SECONDS', 2)) * 5, 5)
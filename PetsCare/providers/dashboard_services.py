@@ -5,7 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from decimal import Decimal
 
-from django.db.models import Q, Sum, Value
+from django.db.models import Count, Q, Sum, Value
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -18,9 +18,10 @@ from booking.constants import (
     CANCELLATION_REASON_PROVIDER_EMERGENCY_PREEMPTION,
     ISSUE_STATUS_OPEN,
 )
-from booking.models import Booking, BookingServiceIssue
+from booking.models import Booking
 from notifications.models import Notification
 
+from .dashboard_cache import DashboardCache
 from .models import EmployeeLocationRole, EmployeeProvider, Provider, ProviderLocation, Schedule
 from .permission_service import ProviderPermissionService
 
@@ -44,37 +45,25 @@ class ProviderDashboardService:
     def build_dashboard(cls, *, user, provider_id: int | None = None, alerts_minutes: int = 30) -> dict:
         """Возвращает payload operational dashboard для пользователя."""
         scope = cls.resolve_scope(user=user, provider_id=provider_id)
+        return DashboardCache.get_or_build(
+            scope=scope,
+            alerts_minutes=alerts_minutes,
+            builder=lambda: cls._build_payload(scope=scope, alerts_minutes=alerts_minutes),
+        )
+
+    @classmethod
+    def _build_payload(cls, *, scope: ProviderDashboardScope, alerts_minutes: int) -> dict:
+        """Собирает payload dashboard для scope без кеша."""
         now = timezone.localtime(timezone.now())
         day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         day_end = day_start + timezone.timedelta(days=1)
         month_start = day_start.replace(day=1)
         alerts_cutoff = now - timezone.timedelta(minutes=alerts_minutes)
 
-        day_bookings = cls._get_scoped_bookings(scope=scope).filter(
-            start_time__gte=day_start,
-            start_time__lt=day_end,
-        )
-
-        completed_count = day_bookings.filter(status__name=BOOKING_STATUS_COMPLETED).count()
-        total_count = day_bookings.filter(
-            status__name__in=(BOOKING_STATUS_ACTIVE, BOOKING_STATUS_COMPLETED),
-        ).count()
-
-        displaced_count = day_bookings.filter(
-            status__name=BOOKING_STATUS_CANCELLED,
-            cancellation_reason__code=CANCELLATION_REASON_PROVIDER_EMERGENCY_PREEMPTION,
-        ).count()
-        open_disputes_count = BookingServiceIssue.objects.filter(
-            booking__in=day_bookings,
-            status=ISSUE_STATUS_OPEN,
-        ).count()
-        late_count = day_bookings.filter(
-            status__name=BOOKING_STATUS_ACTIVE,
-            start_time__lt=now,
-        ).count()
-
+        counters = cls._get_day_counters(scope=scope, day_start=day_start, day_end=day_end, now=now)
         shift_staff = cls._get_shift_staff_count(scope=scope, now=now)
-        busy_staff = cls._get_busy_staff_count(scope=scope, now=now)
+        busy_staff = counters['busy_staff']
+        displaced_count = counters['displaced']
 
         payload = {
             'timestamp': now,
@@ -87,9 +76,9 @@ class ProviderDashboardService:
                 'can_view_financials': scope.can_view_financials,
             },
             'appointments': {
-                'completed': completed_count,
-                'total': total_count,
-                'has_overload': cls._has_overload(day_bookings=day_bookings, displaced_count=displaced_count),
+                'completed': counters['completed'],
+                'total': counters['total'],
+                'has_overload': displaced_count > 0 or counters['manual_emergencies'] > 0,
             },
             'staff': {
                 'total': shift_staff,
@@ -98,8 +87,8 @@ class ProviderDashboardService:
             },
             'incidents': [
                 {'code': 'displaced_bookings', 'count': displaced_count},
-                {'code': 'open_disputes', 'count': open_disputes_count},
-                {'code': 'late_bookings', 'count': late_count},
+                {'code': 'open_disputes', 'count': counters['open_disputes']},
+                {'code': 'late_bookings', 'count': counters['late']},
             ],
             'system_alerts': cls._build_alerts(scope=scope, alerts_cutoff=alerts_cutoff),
         }
@@ -273,31 +262,64 @@ class ProviderDashboardService:
         return schedules.values('employee_id').distinct().count()
 
     @classmethod
-    def _get_busy_staff_count(cls, *, scope: ProviderDashboardScope, now) -> int:
-        """Считает сотрудников с активным визитом в текущую минуту."""
-        bookings = cls._get_scoped_bookings(scope=scope).filter(
-            status__name=BOOKING_STATUS_ACTIVE,
-            start_time__lte=now,
-            end_time__gt=now,
+    def _get_day_counters(cls, *, scope: ProviderDashboardScope, day_start, day_end, now) -> dict:
+        """
+        Счётчики дня одним запросом с условной агрегацией.
+
+        В выборку входят бронирования дня и визиты, идущие прямо сейчас
+        (занятость сотрудников, в том числе начатые вчера). JOIN с инцидентами
+        размножает строки, поэтому бронирования считаются по distinct id.
+        """
+        today = Q(start_time__gte=day_start, start_time__lt=day_end)
+        active = Q(status__name=BOOKING_STATUS_ACTIVE)
+        return cls._get_scoped_bookings(scope=scope).filter(
+            today | Q(start_time__lte=now, end_time__gt=now),
+        ).aggregate(
+            completed=Count('id', distinct=True, filter=today & Q(status__name=BOOKING_STATUS_COMPLETED)),
+            total=Count(
+                'id',
+                distinct=True,
+                filter=today & Q(status__name__in=(BOOKING_STATUS_ACTIVE, BOOKING_STATUS_COMPLETED)),
+            ),
+            displaced=Count(
+                'id',
+                distinct=True,
+                filter=today & Q(
+                    status__name=BOOKING_STATUS_CANCELLED,
+                    cancellation_reason__code=CANCELLATION_REASON_PROVIDER_EMERGENCY_PREEMPTION,
+                ),
+            ),
+            late=Count('id', distinct=True, filter=today & active & Q(start_time__lt=now)),
+            manual_emergencies=Count(
+                'id',
+                distinct=True,
+                filter=today & Q(
+                    source=Booking.BookingSource.MANUAL_ENTRY,
+                    notes__contains='"is_emergency":true',
+                ),
+            ),
+            open_disputes=Count(
+                'service_issues',
+                distinct=True,
+                filter=today & Q(service_issues__status=ISSUE_STATUS_OPEN),
+            ),
+            busy_staff=Count(
+                'employee_id',
+                distinct=True,
+                filter=active & Q(start_time__lte=now, end_time__gt=now),
+            ),
         )
-        return bookings.values('employee_id').distinct().count()
-
-    @classmethod
-    def _has_overload(cls, *, day_bookings, displaced_count: int) -> bool:
-        """Проверяет перегруз по экстренным ручным записям."""
-        return displaced_count > 0 or day_bookings.filter(
-            source=Booking.BookingSource.MANUAL_ENTRY,
-            notes__contains='"is_emergency":true',
-        ).exists()
 
     @classmethod
     def _build_financials(cls, *, scope: ProviderDashboardScope, day_start, day_end, month_start, month_end) -> dict:
         """Собирает финансовые KPI в допустимом scope."""
-        bookings = cls._get_financial_bookings(scope=scope)
-        expected_today = bookings.filter(
-            start_time__gte=day_start,
-            start_time__lt=day_end,
-        ).filter(
+        today = Q(start_time__gte=day_start, start_time__lt=day_end)
+        month_completed = Q(
+            status__name=BOOKING_STATUS_COMPLETED,
+            completed_at__gte=month_start,
+            completed_at__lt=month_end,
+        )
+        expected = today & (
             Q(status__name__in=(BOOKING_STATUS_ACTIVE, BOOKING_STATUS_COMPLETED))
             | Q(
                 status__name=BOOKING_STATUS_CANCELLED,
@@ -307,17 +329,14 @@ class ProviderDashboardService:
                 status__name=BOOKING_STATUS_CANCELLED,
                 cancellation_reason__code=CANCELLATION_REASON_CLIENT_NO_SHOW,
             )
-        ).aggregate(
-            total=Coalesce(Sum('price'), Value(Decimal('0.00'))),
-        )['total']
-
-        month_actual = bookings.filter(
-            status__name=BOOKING_STATUS_COMPLETED,
-            completed_at__gte=month_start,
-            completed_at__lt=month_end,
-        ).aggregate(
-            total=Coalesce(Sum('price'), Value(Decimal('0.00'))),
-        )['total']
+        )
+        # Оба окна (день и месяц) — одним проходом по бронированиям
+        totals = cls._get_financial_bookings(scope=scope).filter(today | month_completed).aggregate(
+            expected_today=Coalesce(Sum('price', filter=expected), Value(Decimal('0.00'))),
+            month_actual=Coalesce(Sum('price', filter=month_completed), Value(Decimal('0.00'))),
+        )
+        expected_today = totals['expected_today']
+        month_actual = totals['month_actual']
 
         currency = getattr(scope.provider.invoice_currency, 'code', None) if getattr(scope.provider, 'invoice_currency', None) else None
 
@@ -1849,12 +1849,19 @@ class EmployeeProvider(models.Model):
         Активные связи «админ провайдера» (owner / provider_manager / provider_admin) для провайдера.
         Используется для уведомлений и поиска контактов админа.
         """
+        return cls.get_active_admin_links_for_providers([provider.id])
+
+    @classmethod
+    def get_active_admin_links_for_providers(cls, provider_ids):
+        """
+        Активные админские связи сразу для набора провайдеров (массовые уведомления).
+        """
         from django.db.models import Q
         from django.utils import timezone
         today = timezone.now().date()
         q = Q(end_date__isnull=True) | Q(end_date__gte=today)
         role_q = Q(is_owner=True) | Q(is_provider_manager=True) | Q(is_provider_admin=True)
-        return cls.objects.filter(provider=provider).filter(role_q).filter(q).select_related('employee', 'employee__user')
+        return cls.objects.filter(provider_id__in=provider_ids).filter(role_q).filter(q).select_related('employee', 'employee__user')
 
     def can_work(self):
         """
@@ -0,0 +1,345 @@
+"""
+Сервис поиска провайдеров по расстоянию.
+
+Поиск выполняется множествами, а не циклом по провайдерам:
+
+1. кандидаты-локации из GeoSearchCache (пространственный запрос только
+   при промахе кеша) и один запрос локаций с провайдером по их id;
+2. один запрос карты рейтингов;
+3. один агрегат min/max цены по провайдерам (только при сортировке по цене);
+4. три запроса для проверки доступности (расписания локаций, графики
+   сотрудников, пересекающиеся бронирования) — только при фильтре available.
+
+Итого не более SEARCH_MAX_QUERIES запросов независимо от числа результатов.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from geolocation.search_cache import GeoSearchCache
+
+from .models import (
+    Employee,
+    EmployeeLocationService,
+    LocationSchedule,
+    Provider,
+    ProviderLocation,
+    ProviderLocationService,
+    Schedule,
+)
+
+SEARCH_MAX_QUERIES = 7
+SEARCH_CACHE_NAMESPACE = 'provider_locations'
+AVAILABILITY_SLOT_MINUTES = 30
+PRICE_SORT_OPTIONS = ('price_asc', 'price_desc')
+
+
+@dataclass(frozen=True)
+class ProviderDistanceSearchParams:
+    """Разобранные параметры поиска провайдеров по расстоянию."""
+
+    latitude: float
+    longitude: float
+    radius_km: float = 10
+    service_id: int | None = None
+    price_min: Decimal | None = None
+    price_max: Decimal | None = None
+    available_at: datetime | None = None
+    sort_by: str = 'distance'
+    limit: int = 20
+
+
+@dataclass(frozen=True)
+class LocationAvailability:
+    """Доступность локаций на момент времени."""
+
+    day_schedules: dict[int, LocationSchedule]
+    open_location_ids: set[int]
+    free_employees: dict[int, list[Employee]]
+
+
+class ProviderDistanceSearchService:
+    """
+    Поиск провайдеров в радиусе с фильтрами цены и доступности.
+    """
+
+    @classmethod
+    def search(cls, params: ProviderDistanceSearchParams) -> list[Provider]:
+        """
+        Возвращает провайдеров, отсортированных согласно params.sort_by.
+
+        Для каждого провайдера учитывается ближайшая подходящая локация.
+        """
+        candidates = GeoSearchCache.get_candidates(
+            namespace=SEARCH_CACHE_NAMESPACE,
+            queryset=cls._candidate_locations(params),
+            lat=params.latitude,
+            lon=params.longitude,
+            radius_km=params.radius_km,
+            filters=cls._candidate_filters(params),
+            point_field='structured_address__point',
+        )
+        locations = {
+            location.id: location
+            for location in ProviderLocation.objects.filter(
+                id__in=[location_id for location_id, _distance in candidates],
+                provider__is_active=True,
+            )
+            .exclude(provider_id__in=cls._blocked_provider_ids())
+            .select_related('provider')
+        }
+
+        nearest: dict[int, tuple[Provider, float]] = {}
+        provider_locations: dict[int, list[int]] = defaultdict(list)
+        for location_id, distance in candidates:
+            location = locations.get(location_id)
+            if location is None:
+                continue
+            provider_locations[location.provider_id].append(location.id)
+            if location.provider_id not in nearest:
+                nearest[location.provider_id] = (location.provider, distance)
+
+        if params.available_at is not None and nearest:
+            available_location_ids = cls._get_available_location_ids(
+                location_ids=[
+                    location_id
+                    for location_ids in provider_locations.values()
+                    for location_id in location_ids
+                ],
+                moment=params.available_at,
+                service_id=params.service_id,
+            )
+            nearest = {
+                provider_id: entry
+                for provider_id, entry in nearest.items()
+                if any(location_id in available_location_ids for location_id in provider_locations[provider_id])
+            }
+
+        results = list(nearest.values())
+        rating_map = cls.get_rating_map(list(nearest))
+
+        def get_rating(provider):
+            return rating_map.get(provider.id, 0)
+
+        if params.sort_by == 'rating':
+            results.sort(key=lambda item: (-get_rating(item[0]), item[1]))
+        elif params.sort_by in PRICE_SORT_OPTIONS and params.service_id:
+            price_map = cls.get_price_range_map(list(nearest), params.service_id)
+            if params.sort_by == 'price_asc':
+                results.sort(key=lambda item: (price_map.get(item[0].id, (Decimal('Infinity'),))[0], item[1]))
+            else:
+                results.sort(key=lambda item: (-price_map.get(item[0].id, (0, Decimal('-Infinity')))[1], item[1]))
+        else:
+            results.sort(key=lambda item: (item[1], -get_rating(item[0])))
+
+        return [provider for provider, _distance in results[:params.limit]]
+
+    @classmethod
+    def _candidate_locations(cls, params: ProviderDistanceSearchParams):
+        """
+        Queryset активных геокодированных локаций под фильтры услуги и цены.
+
+        Активность и блокировки провайдера проверяются при чтении, поэтому
+        кешированный набор кандидатов зависит только от локаций, адресов и услуг.
+        """
+        locations = ProviderLocation.objects.filter(
+            is_active=True,
+            structured_address__isnull=False,
+            structured_address__point__isnull=False,
+        )
+
+        if params.service_id is not None:
+            # Провайдер подходит, если услуга есть хотя бы в одной его активной локации.
+            service_offers = ProviderLocationService.objects.filter(
+                location__provider_id=OuterRef('provider_id'),
+                location__is_active=True,
+                service_id=params.service_id,
+                is_active=True,
+            )
+            locations = locations.filter(Exists(service_offers))
+            if params.price_min is not None or params.price_max is not None:
+                priced_offers = service_offers
+                if params.price_min is not None:
+                    priced_offers = priced_offers.filter(price__gte=params.price_min)
+                if params.price_max is not None:
+                    priced_offers = priced_offers.filter(price__lte=params.price_max)
+                locations = locations.filter(Exists(priced_offers))
+        return locations
+
+    @staticmethod
+    def _candidate_filters(params: ProviderDistanceSearchParams) -> dict[str, str | int | None]:
+        """Фильтры, однозначно описывающие _candidate_locations, для ключа кеша."""
+        return {
+            'service_id': params.service_id,
+            'price_min': str(params.price_min) if params.price_min is not None else None,
+            'price_max': str(params.price_max) if params.price_max is not None else None,
+        }
+
+    @staticmethod
+    def _blocked_provider_ids():
+        """Подзапрос id провайдеров с активной блокировкой."""
+        from billing.models import ProviderBlocking
+
+        return ProviderBlocking.objects.filter(status='active').values('provider_id')
+
+    @staticmethod
+    def get_rating_map(provider_ids: list[int]) -> dict[int, float]:
+        """Карта рейтингов провайдеров одним запросом."""
+        from django.contrib.contenttypes.models import ContentType
+
+        from ratings.models import Rating
+
+        if not provider_ids:
+            return {}
+        ratings = Rating.objects.filter(
+            content_type=ContentType.objects.get_for_model(Provider),
+            object_id__in=provider_ids,
+        ).values_list('object_id', 'current_rating')
+        return {object_id: float(current_rating) for object_id, current_rating in ratings}
+
+    @staticmethod
+    def get_price_range_map(provider_ids: list[int], service_id: int) -> dict[int, tuple[Decimal, Decimal]]:
+        """Минимальная и максимальная цена услуги по провайдерам одним агрегатом."""
+        if not provider_ids:
+            return {}
+        rows = (
+            ProviderLocationService.objects.filter(
+                location__provider_id__in=provider_ids,
+                location__is_active=True,
+                service_id=service_id,
+                is_active=True,
+            )
+            .values('location__provider_id')
+            .annotate(min_price=Min('price'), max_price=Max('price'))
+        )
+        return {row['location__provider_id']: (row['min_price'], row['max_price']) for row in rows}
+
+    @classmethod
+    def _get_available_location_ids(
+        cls,
+        *,
+        location_ids: list[int],
+        moment: datetime,
+        service_id: int | None,
+    ) -> set[int]:
+        """
+        Локации, где в moment открыт филиал и свободен хотя бы один сотрудник.
+        """
+        availability = cls.get_location_availability(
+            location_ids=location_ids,
+            moment=moment,
+            service_id=service_id,
+        )
+        return set(availability.free_employees)
+
+    @classmethod
+    def get_location_availability(
+        cls,
+        *,
+        location_ids: list[int],
+        moment: datetime,
+        service_id: int | None,
+    ) -> LocationAvailability:
+        """
+        Доступность локаций в moment тремя запросами на весь набор.
+
+        Сотрудник свободен, если работает по графику в это время, оказывает
+        услугу (если она задана) и не имеет активной записи, пересекающей
+        интервал AVAILABILITY_SLOT_MINUTES минут.
+        """
+        from booking.constants import ACTIVE_BOOKING_STATUS_NAMES
+        from booking.models import Booking
+
+        weekday = moment.weekday()
+        moment_time = moment.time()
+        slot_end = moment + timedelta(minutes=AVAILABILITY_SLOT_MINUTES)
+
+        day_schedules = {
+            location_schedule.provider_location_id: location_schedule
+            for location_schedule in LocationSchedule.objects.filter(
+                provider_location_id__in=location_ids,
+                weekday=weekday,
+                is_closed=False,
+            ).only('provider_location_id', 'open_time', 'close_time')
+        }
+        open_location_ids = {
+            location_id
+            for location_id, location_schedule in day_schedules.items()
+            if cls._time_within(moment_time, location_schedule.open_time, location_schedule.close_time)
+        }
+        if not open_location_ids:
+            return LocationAvailability(day_schedules, open_location_ids, {})
+
+        schedules = Schedule.objects.filter(
+            provider_location_id__in=open_location_ids,
+            day_of_week=weekday,
+            is_working=True,
+            employee__is_active=True,
+        ).select_related('employee__user')
+        if service_id is not None:
+            schedules = schedules.filter(
+                Exists(
+                    EmployeeLocationService.objects.filter(
+                        employee_id=OuterRef('employee_id'),
+                        provider_location_id=OuterRef('provider_location_id'),
+                        service_id=service_id,
+                    )
+                )
+            )
+        working = [
+            schedule
+            for schedule in schedules
+            if cls._time_within(moment_time, schedule.start_time, schedule.end_time)
+        ]
+        if not working:
+            return LocationAvailability(day_schedules, open_location_ids, {})
+
+        busy_employee_ids = set(
+            Booking.objects.filter(
+                employee_id__in={schedule.employee_id for schedule in working},
+                status__name__in=ACTIVE_BOOKING_STATUS_NAMES,
+                start_time__lt=slot_end,
+                end_time__gt=moment,
+            ).values_list('employee_id', flat=True)
+        )
+        free_employees = defaultdict(list)
+        for schedule in working:
+            if schedule.employee_id not in busy_employee_ids:
+                free_employees[schedule.provider_location_id].append(schedule.employee)
+        return LocationAvailability(day_schedules, open_location_ids, dict(free_employees))
+
+    @staticmethod
+    def _time_within(moment_time: time, start: time | None, end: time | None) -> bool:
+        """Время попадает в рабочие часы; незаданные границы не ограничивают."""
+        if start is None or end is None:
+            return True
+        return start <= moment_time <= end
+
+    @staticmethod
+    def parse_available_at(available_date: str | None, available_time: str | None) -> datetime | None:
+        """Собирает aware datetime из параметров available_date/available_time."""
+        if not available_date or not available_time:
+            return None
+        try:
+            date_obj: date = datetime.strptime(available_date, '%Y-%m-%d').date()
+            time_obj = datetime.strptime(available_time, '%H:%M').time()
+        except ValueError:
+            return None
+        return timezone.make_aware(datetime.combine(date_obj, time_obj))
+
+    @staticmethod
+    def parse_price(value: str | None) -> Decimal | None:
+        """Разбирает ценовой фильтр; некорректное значение игнорируется."""
+        if not value:
+            return None
+        try:
+            return Decimal(value)
+        except (InvalidOperation, ValueError):
+            return None
@@ -15,6 +15,7 @@ from .models import (
     Provider,
     Employee,
     EmployeeLocationRole,
+    EmployeeLocationService,
     EmployeeProvider,
     Schedule,
     LocationSchedule,
@@ -30,10 +31,13 @@ from catalog.models import Service
 from pets.models import PetType
 from users.serializers import UserSerializer
 from users.models import EmployeeSpecialization, User
-from django.db.models import Q
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.db.models.manager import BaseManager
 from geopy.distance import geodesic
 from django.utils import timezone
 from geolocation.utils import calculate_distance
+from utils.image_derivatives import ImageDerivativesField
+from .search_services import ProviderDistanceSearchService
 
 
 class ProviderBriefSerializer(serializers.ModelSerializer):
@@ -166,10 +170,92 @@ class BulkLocationReactivateSerializer(serializers.Serializer):
     restore_staffing = serializers.BooleanField(required=False, default=True)
 
 
+def provider_serializer_prefetches():
+    """
+    Prefetch-выражения для ProviderSerializer: активные локации с активными
+    услугами, сотрудники и категории загружаются запросом на связь, а не на провайдера.
+    """
+    return [
+        Prefetch('available_category_levels', queryset=Service.objects.prefetch_related('allowed_pet_types')),
+        Prefetch(
+            'locations',
+            queryset=ProviderLocation.objects.filter(is_active=True)
+            .select_related('structured_address')
+            .prefetch_related(
+                Prefetch(
+                    'location_services',
+                    queryset=ProviderLocationService.objects.filter(is_active=True)
+                    .select_related('service', 'pet_type')
+                    .prefetch_related('service__allowed_pet_types'),
+                    to_attr='active_services',
+                )
+            ),
+            to_attr='active_locations',
+        ),
+        Prefetch(
+            'employees',
+            queryset=Employee.objects.select_related('user').prefetch_related(
+                'user__user_types',
+                'specializations',
+                'employeeprovider_set',
+                Prefetch(
+                    'location_services',
+                    queryset=EmployeeLocationService.objects.select_related('service')
+                    .prefetch_related('service__allowed_pet_types'),
+                ),
+            ),
+        ),
+    ]
+
+
+def prefetch_provider_data(providers, context):
+    """
+    Готовит набор провайдеров к сериализации: связи через prefetch_related_objects,
+    доступность на available_date/available_time — одним расчетом на весь набор.
+    """
+    pending = [provider for provider in providers if not hasattr(provider, 'active_locations')]
+    if pending:
+        prefetch_related_objects(pending, *provider_serializer_prefetches())
+
+    availability = None
+    moment = ProviderDistanceSearchService.parse_available_at(
+        context.get('available_date'),
+        context.get('available_time'),
+    )
+    if moment is not None and providers:
+        availability = ProviderDistanceSearchService.get_location_availability(
+            location_ids=[location.id for provider in providers for location in provider.active_locations],
+            moment=moment,
+            service_id=_context_service_id(context),
+        )
+    for provider in providers:
+        provider.location_availability = availability
+
+
+def _context_service_id(context):
+    """service_id из контекста сериализатора; None, если не задан или некорректен."""
+    try:
+        return int(context.get('service_id'))
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderListSerializer(serializers.ListSerializer):
+    """
+    Список провайдеров: данные вложенных полей загружаются для всей страницы сразу.
+    """
+
+    def to_representation(self, data):
+        providers = list(data.all() if isinstance(data, BaseManager) else data)
+        prefetch_provider_data(providers, self.context)
+        return super().to_representation(providers)
+
+
 class ProviderSerializer(serializers.ModelSerializer):
     """
     Serializer для модели Provider.
     Используется для сериализации данных учреждения.
+    Вложенные поля читаются из данных prefetch_provider_data.
     """
     available_categories = ServiceSerializer(
         source='available_category_levels',
@@ -179,8 +265,14 @@ class ProviderSerializer(serializers.ModelSerializer):
     services = serializers.SerializerMethodField()
     employees = serializers.SerializerMethodField()
     distance = serializers.SerializerMethodField()
+    logo_srcset = ImageDerivativesField(source='logo', profile='logo')
     price_info = serializers.SerializerMethodField()
     availability_info = serializers.SerializerMethodField()
+
+    def to_representation(self, instance):
+        if not hasattr(instance, 'location_availability'):
+            prefetch_provider_data([instance], self.context)
+        return super().to_representation(instance)
     
     def get_services(self, obj):
         """
@@ -192,13 +284,13 @@ class ProviderSerializer(serializers.ModelSerializer):
             return []
         # Ленивый импорт для избежания циклических зависимостей
         from .serializers import ProviderLocationServiceSerializer
-        # Получаем все услуги из всех активных локаций
-        location_services = ProviderLocationService.objects.filter(
-            location__provider=obj,
-            location__is_active=True,
-            is_active=True
-        ).select_related('location', 'service')
-        return ProviderLocationServiceSerializer(location_services, many=True).data
+        # Все активные услуги из всех активных локаций
+        location_services = [
+            location_service
+            for location in obj.active_locations
+            for location_service in location.active_services
+        ]
+        return ProviderLocationServiceSerializer(location_services, many=True, context=self.context).data
     
     def get_employees(self, obj):
         # Для Swagger возвращаем пустой список
@@ -206,7 +298,7 @@ class ProviderSerializer(serializers.ModelSerializer):
             return []
         # EmployeeBriefSerializer без providers, чтобы не уходить в рекурсию Provider->employees->Employee->providers->Provider->employees
         from .serializers import EmployeeBriefSerializer
-        return EmployeeBriefSerializer(obj.employees.all(), many=True).data
+        return EmployeeBriefSerializer(obj.employees.all(), many=True, context=self.context).data
     
     def get_distance(self, obj):
         """
@@ -229,7 +321,7 @@ class ProviderSerializer(serializers.ModelSerializer):
         
         # Получаем координаты из первой активной локации провайдера
         # Координаты теперь хранятся в локациях (ProviderLocation), а не в организации
-        location = obj.locations.filter(is_active=True).first()
+        location = next(iter(obj.active_locations), None)
         if location and location.point:
             from django.contrib.gis.geos import Point
             search_point = Point(search_lon, search_lat, srid=location.point.srid)
@@ -243,162 +335,111 @@ class ProviderSerializer(serializers.ModelSerializer):
         Возвращает информацию о ценах на услуги из всех локаций провайдера.
         Возвращает минимальную и максимальную цену, если услуга доступна в нескольких локациях.
         """
-        context = self.context
-        service_id = context.get('service_id')
-        
-        if not service_id:
+        service_id = _context_service_id(self.context)
+        if service_id is None:
             return None
-        
-        try:
-            service_id = int(service_id)
-            # Получаем все услуги из всех активных локаций провайдера
-            location_services = ProviderLocationService.objects.filter(
-                location__provider=obj,
-                location__is_active=True,
-                service_id=service_id,
-                is_active=True
-            )
-            
-            if location_services.exists():
-                prices = [float(ls.price) for ls in location_services]
-                durations = [ls.duration_minutes for ls in location_services]
-                tech_breaks = [ls.tech_break_minutes for ls in location_services]
-                
-                return {
-                    'service_id': service_id,
-                    'price_min': min(prices),
-                    'price_max': max(prices) if len(prices) > 1 else prices[0],
-                    'price': min(prices),  # Для обратной совместимости
-                    'duration_minutes': durations[0] if durations else 60,
-                    'tech_break_minutes': tech_breaks[0] if tech_breaks else 0,
-                    'locations_count': location_services.count()
-                }
-        except (ValueError, TypeError):
-            pass
-        
-        return None
+
+        location_services = [
+            location_service
+            for location in obj.active_locations
+            for location_service in location.active_services
+            if location_service.service_id == service_id
+        ]
+        if not location_services:
+            return None
+
+        prices = [float(ls.price) for ls in location_services]
+        return {
+            'service_id': service_id,
+            'price_min': min(prices),
+            'price_max': max(prices),
+            'price': min(prices),  # Для обратной совместимости
+            'duration_minutes': location_services[0].duration_minutes,
+            'tech_break_minutes': location_services[0].tech_break_minutes,
+            'locations_count': len(location_services)
+        }
     
     def get_availability_info(self, obj):
         """
         Возвращает информацию о доступности учреждения.
+        Графики и записи рассчитываются для всей выборки в prefetch_provider_data.
         """
         context = self.context
-        available_date = context.get('available_date')
-        available_time = context.get('available_time')
-        service_id = context.get('service_id')
-        
-        if not available_date or not available_time:
+        if not context.get('available_date') or not context.get('available_time'):
             return None
-        
-        try:
-            from datetime import datetime, timedelta
-            from booking.models import Booking
-            
-            # Парсим дату и время
-            date_obj = datetime.strptime(available_date, '%Y-%m-%d').date()
-            time_obj = datetime.strptime(available_time, '%H:%M').time()
-            datetime_obj = datetime.combine(date_obj, time_obj)
-            
-            # Получаем день недели (0 = понедельник)
-            weekday = date_obj.weekday()
-            
-            # Проверяем расписание учреждения
-            provider_schedule = obj.schedules.filter(weekday=weekday).first()
-            if not provider_schedule or provider_schedule.is_closed:
-                return {
-                    'available': False,
-                    'reason': 'provider_closed',
-                    'message': _('Institution is closed on this day')
-                }
-            
-            # Проверяем время работы
-            if (provider_schedule.open_time and provider_schedule.close_time and
-                (time_obj < provider_schedule.open_time or time_obj > provider_schedule.close_time)):
-                return {
-                    'available': False,
-                    'reason': 'outside_hours',
-                    'message': f'Учреждение работает с {provider_schedule.open_time} до {provider_schedule.close_time}'
-                }
-            
-            # Проверяем доступность сотрудников
-            if service_id:
-                employees = obj.employees.filter(
-                    services__id=service_id,
-                    is_active=True
-                )
-                
-                available_employees = []
-                for employee in employees:
-                    # Проверяем расписание сотрудника
-                    employee_schedule = employee.schedules.filter(day_of_week=weekday).first()
-                    if not employee_schedule or not employee_schedule.is_working:
-                        continue
-                    
-                    # Проверяем время работы сотрудника
-                    if (employee_schedule.start_time and employee_schedule.end_time and
-                        (time_obj < employee_schedule.start_time or time_obj > employee_schedule.end_time)):
-                        continue
-                    
-                    # Проверяем, нет ли уже бронирования в это время
-                    slot_end_time = datetime_obj + timedelta(minutes=30)  # Предполагаем 30 минут
-                    conflicting_booking = Booking.objects.filter(
-                        employee=employee,
-                        scheduled_date=date_obj,
-                        scheduled_time__lt=slot_end_time.time(),
-                        scheduled_time__gt=datetime_obj.time(),
-                        status__in=['confirmed', 'pending']
-                    ).exists()
-                    
-                    if not conflicting_booking:
-                        available_employees.append({
-                            'id': employee.id,
-                            'name': f"{employee.user.first_name} {employee.user.last_name}",
-                        })
-                
-                if available_employees:
-                    return {
-                        'available': True,
-                        'available_employees': available_employees,
-                        'message': f'Доступно {len(available_employees)} сотрудников'
-                    }
-                else:
-                    return {
-                        'available': False,
-                        'reason': 'no_available_employees',
-                        'message': _('No available employees at this time')
-                    }
-            else:
-                # Если услуга не указана, проверяем наличие работающих сотрудников
-                if obj.employees.filter(is_active=True).exists():
-                    return {
-                        'available': True,
-                        'message': _('There are working employees')
-                    }
-                else:
-                    return {
-                        'available': False,
-                        'reason': 'no_employees',
-                        'message': _('No working employees')
-                    }
-                    
-        except (ValueError, TypeError):
+
+        availability = obj.location_availability
+        if availability is None:
             return {
                 'available': False,
                 'reason': 'error',
                 'message': _('Error checking availability')
             }
-        
-        return None
+
+        location_ids = [location.id for location in obj.active_locations]
+        day_schedules = [
+            availability.day_schedules[location_id]
+            for location_id in location_ids
+            if location_id in availability.day_schedules
+        ]
+        if not day_schedules:
+            return {
+                'available': False,
+                'reason': 'provider_closed',
+                'message': _('Institution is closed on this day')
+            }
+
+        if not availability.open_location_ids.intersection(location_ids):
+            schedule = day_schedules[0]
+            return {
+                'available': False,
+                'reason': 'outside_hours',
+                'message': f'Учреждение работает с {schedule.open_time} до {schedule.close_time}'
+            }
+
+        if _context_service_id(context) is not None:
+            available_employees = {}
+            for location_id in location_ids:
+                for employee in availability.free_employees.get(location_id, []):
+                    available_employees.setdefault(employee.id, {
+                        'id': employee.id,
+                        'name': f"{employee.user.first_name} {employee.user.last_name}",
+                    })
+
+            if available_employees:
+                return {
+                    'available': True,
+                    'available_employees': list(available_employees.values()),
+                    'message': f'Доступно {len(available_employees)} сотрудников'
+                }
+            return {
+                'available': False,
+                'reason': 'no_available_employees',
+                'message': _('No available employees at this time')
+            }
+
+        # Если услуга не указана, проверяем наличие работающих сотрудников
+        if any(employee.is_active for employee in obj.employees.all()):
+            return {
+                'available': True,
+                'message': _('There are working employees')
+            }
+        return {
+            'available': False,
+            'reason': 'no_employees',
+            'message': _('No working employees')
+        }
     
     class Meta:
         model = Provider
         fields = [
             'id', 'name', 'structured_address',
-            'phone_number', 'email', 'website', 'logo',
+            'phone_number', 'email', 'website', 'logo', 'logo_srcset',
             'is_active', 'created_at', 'updated_at', 'available_category_levels', 'available_categories',
             'services', 'employees', 'distance', 'price_info', 'availability_info'
         ]
         read_only_fields = ['created_at', 'updated_at', 'distance', 'price_info', 'availability_info']
+        list_serializer_class = ProviderListSerializer
 
 
 class EmployeeSpecializationSerializer(serializers.ModelSerializer):
@@ -433,13 +474,13 @@ class EmployeeBriefSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
     def get_services(self, obj):
-        """Уникальные услуги сотрудника по всем локациям (EmployeeLocationService)."""
-        from catalog.models import Service
-        ids = obj.location_services.values_list('service_id', flat=True).distinct()
-        return ServiceSerializer(Service.objects.filter(id__in=ids), many=True).data
+        """Уникальные услуги сотрудника по всем локациям (EmployeeLocationService, из prefetch)."""
+        services = {link.service_id: link.service for link in obj.location_services.all()}
+        ordered = sorted(services.values(), key=lambda service: (service.hierarchy_order, service.name))
+        return ServiceSerializer(ordered, many=True, context=self.context).data
 
     def get_is_manager(self, obj):
-        return obj.employeeprovider_set.filter(is_manager=True).exists()
+        return any(link.is_manager for link in obj.employeeprovider_set.all())
 
 
 class EmployeeSerializer(serializers.ModelSerializer):
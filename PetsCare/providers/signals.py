@@ -5,9 +5,11 @@
 - Обработка деактивации локаций провайдеров
 - Отмена бронирований при деактивации локации
 - Отправка письма администратору провайдера при активации
+- Сброс кеша геопоиска локаций
+- Сброс кеша operational dashboard при изменении бронирований
 """
 
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_delete, pre_save, post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -20,6 +22,9 @@ from booking.constants import (
     CANCELLED_BY_PROVIDER,
     CANCELLATION_REASON_PROVIDER_UNAVAILABLE,
 )
+from utils.image_derivatives import register_image_derivatives
+
+from .models import Provider
 
 logger = logging.getLogger(__name__)
 
@@ -334,3 +339,81 @@ def _send_activation_email(provider, admin_user, recipient_email=None, is_admin=
     except Exception as e:
         logger.error(f"Error rendering or sending activation email: {e}", exc_info=True)
         raise
+
+
+def invalidate_location_search_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш геопоиска при изменении локации или её услуг.
+    """
+    from geolocation.search_cache import GeoSearchCache
+
+    from .search_services import SEARCH_CACHE_NAMESPACE
+
+    GeoSearchCache.invalidate(SEARCH_CACHE_NAMESPACE)
+
+
+def remember_address_point(sender, instance, **kwargs):
+    """
+    Запоминает координаты адреса до сохранения для сравнения в post_save.
+    """
+    previous_point = None
+    if instance.pk:
+        previous_point = sender.objects.filter(pk=instance.pk).values_list('point', flat=True).first()
+    instance._geo_search_previous_point = previous_point
+
+
+def invalidate_address_search_cache(sender, instance, created=False, **kwargs):
+    """
+    Сбрасывает кеш геопоиска, если сместилась точка адреса локации.
+    """
+    from .models import ProviderLocation
+
+    if not created and getattr(instance, '_geo_search_previous_point', None) == instance.point:
+        return
+    if ProviderLocation.objects.filter(structured_address_id=instance.pk).exists():
+        invalidate_location_search_cache(sender, instance)
+
+
+def _booking_dashboard_provider_ids(booking) -> set[int]:
+    """Провайдеры, в dashboard которых попадает бронирование."""
+    from .models import ProviderLocation
+
+    provider_ids = {booking.provider_id} if booking.provider_id else set()
+    if booking.provider_location_id:
+        location = booking._state.fields_cache.get('provider_location')
+        if location is not None:
+            provider_ids.add(location.provider_id)
+        elif not provider_ids:
+            provider_ids.update(
+                ProviderLocation.objects.filter(pk=booking.provider_location_id).values_list('provider_id', flat=True)
+            )
+    return provider_ids
+
+
+@receiver(post_save, sender='booking.Booking')
+@receiver(post_delete, sender='booking.Booking')
+def invalidate_dashboard_on_booking_change(sender, instance, **kwargs):
+    """Сбрасывает кеш dashboard провайдера после коммита изменения бронирования."""
+    from .dashboard_cache import DashboardCache
+
+    for provider_id in _booking_dashboard_provider_ids(instance):
+        transaction.on_commit(lambda provider_id=provider_id: DashboardCache.invalidate(provider_id))
+
+
+@receiver(post_save, sender='booking.BookingServiceIssue')
+@receiver(post_delete, sender='booking.BookingServiceIssue')
+def invalidate_dashboard_on_service_issue_change(sender, instance, **kwargs):
+    """Открытые инциденты входят в счётчики dashboard."""
+    from booking.models import Booking
+
+    from .dashboard_cache import DashboardCache
+
+    booking = Booking.objects.filter(pk=instance.booking_id).only('provider_id', 'provider_location_id').first()
+    if booking is None:
+        return
+    for provider_id in _booking_dashboard_provider_ids(booking):
+        transaction.on_commit(lambda provider_id=provider_id: DashboardCache.invalidate(provider_id))
+
+
+# Производные логотипа организации генерируются при загрузке.
+register_image_derivatives(Provider, {'logo': 'logo'})
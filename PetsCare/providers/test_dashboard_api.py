@@ -383,6 +383,28 @@ class ProviderDashboardAPITests(TestCase):
         self.assertEqual(response.data['appointments']['completed'], 1)
         self.assertEqual(response.data['appointments']['total'], 3)
 
+    def test_dashboard_payload_is_cached_until_booking_changes(self):
+        """Повторный опрос отдаётся из кеша, изменение бронирования сбрасывает его."""
+        first = self._get_dashboard_response(self.provider_admin_user)
+        self.assertEqual(first.data['appointments']['total'], 4)
+
+        Booking.objects.filter(pk=self.future_location_two.pk).update(status=self.status_completed)
+        cached = self._get_dashboard_response(self.provider_admin_user)
+        self.assertEqual(cached.data['appointments']['completed'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_booking(
+                employee=self.worker_employee,
+                provider_location=self.location_one,
+                status=self.status_active,
+                start_time=self.now + timedelta(hours=10),
+                end_time=self.now + timedelta(hours=11),
+                price=Decimal('30.00'),
+            )
+        refreshed = self._get_dashboard_response(self.provider_admin_user)
+        self.assertEqual(refreshed.data['appointments']['completed'], 2)
+        self.assertEqual(refreshed.data['appointments']['total'], 5)
+
     def test_provider_brief_list_returns_only_accessible_organizations(self):
         """brief-list не должен падать на select_related и должен фильтровать чужие организации."""
         foreign_provider = Provider.objects.create(
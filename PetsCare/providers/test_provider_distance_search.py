@@ -0,0 +1,201 @@
+"""Тесты set-based поиска провайдеров по расстоянию."""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from catalog.models import Service
+from geolocation.models import Address
+from pets.models import PetType
+from providers.models import (
+    Employee,
+    EmployeeLocationService,
+    LocationSchedule,
+    Provider,
+    ProviderLocation,
+    ProviderLocationService,
+    Schedule,
+)
+from providers.search_services import (
+    SEARCH_MAX_QUERIES,
+    ProviderDistanceSearchParams,
+    ProviderDistanceSearchService,
+)
+
+User = get_user_model()
+
+CENTER_LAT = 42.44
+CENTER_LON = 19.26
+
+
+class ProviderDistanceSearchServiceTests(TestCase):
+    """Проверяет порядок результатов и постоянное число запросов."""
+
+    def setUp(self):
+        """Создаёт провайдеров на разном расстоянии от центра."""
+        cache.clear()
+        ContentType.objects.get_for_model(Provider)
+        self.pet_type = PetType.objects.create(name='Dog', code='dog')
+        self.service = Service.objects.create(code='distance_grooming', name='Grooming', level=0)
+        self.moment = timezone.make_aware(
+            datetime.combine(timezone.localdate() + timedelta(days=1), time(hour=11))
+        )
+        self.addresses = []
+        self.providers = [
+            self._create_provider(index=index, offset=0.01 * (index + 1), price=Decimal(30 - index * 5))
+            for index in range(3)
+        ]
+
+    def _create_provider(self, *, index, offset, price):
+        provider = Provider.objects.create(
+            name=f'Provider {index}',
+            phone_number=f'+3826702000{index}',
+            email=f'provider{index}@example.com',
+            activation_status='active',
+            is_active=True,
+        )
+        address = Address.objects.create(
+            country='Montenegro',
+            city='Podgorica',
+            street='Main street',
+            house_number=str(index + 1),
+            formatted_address=f'Main street {index + 1}',
+            latitude=CENTER_LAT + offset,
+            longitude=CENTER_LON,
+            validation_status='valid',
+        )
+        location = ProviderLocation.objects.create(
+            provider=provider,
+            name=f'Branch {index}',
+            structured_address=address,
+            phone_number=f'+3826702010{index}',
+            email=f'branch{index}@example.com',
+            is_active=True,
+        )
+        ProviderLocationService.objects.create(
+            location=location,
+            service=self.service,
+            pet_type=self.pet_type,
+            size_code='S',
+            price=price,
+            duration_minutes=30,
+            is_active=True,
+        )
+        LocationSchedule.objects.create(
+            provider_location=location,
+            weekday=self.moment.weekday(),
+            open_time=time(hour=9),
+            close_time=time(hour=18),
+            is_closed=False,
+        )
+        employee = Employee.objects.create(
+            user=User.objects.create_user(
+                email=f'distance-employee{index}@example.com',
+                password='password123',
+                username=f'distance_employee_{index}',
+                phone_number=f'+3826702020{index}',
+            ),
+            is_active=True,
+        )
+        EmployeeLocationService.objects.create(employee=employee, provider_location=location, service=self.service)
+        Schedule.objects.create(
+            employee=employee,
+            provider_location=location,
+            day_of_week=self.moment.weekday(),
+            start_time=time(hour=9),
+            end_time=time(hour=18),
+            is_working=True,
+        )
+        self.addresses.append(address)
+        return provider
+
+    def _search(self, query_budget=SEARCH_MAX_QUERIES, **kwargs):
+        params = ProviderDistanceSearchParams(
+            latitude=CENTER_LAT,
+            longitude=CENTER_LON,
+            service_id=self.service.id,
+            **kwargs,
+        )
+        with self.assertNumQueries(query_budget):
+            return ProviderDistanceSearchService.search(params)
+
+    def test_distance_sort_returns_nearest_first(self):
+        results = ProviderDistanceSearchService.search(
+            ProviderDistanceSearchParams(latitude=CENTER_LAT, longitude=CENTER_LON, service_id=self.service.id)
+        )
+
+        self.assertEqual(results, self.providers)
+
+    def test_price_sort_with_availability_fits_query_budget(self):
+        results = self._search(sort_by='price_asc', available_at=self.moment)
+
+        self.assertEqual(results, list(reversed(self.providers)))
+
+    def test_query_budget_does_not_grow_with_results(self):
+        for index in range(3, 8):
+            self._create_provider(index=index, offset=0.01 * (index + 1), price=Decimal('10.00'))
+
+        results = self._search(sort_by='price_desc', available_at=self.moment)
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results[0], self.providers[0])
+
+    def test_price_range_excludes_providers(self):
+        results = ProviderDistanceSearchService.search(
+            ProviderDistanceSearchParams(
+                latitude=CENTER_LAT,
+                longitude=CENTER_LON,
+                service_id=self.service.id,
+                price_min=Decimal('22.00'),
+            )
+        )
+
+        self.assertEqual(results, self.providers[:2])
+
+    def test_cached_candidates_skip_spatial_query(self):
+        cold_results = self._search(sort_by='price_asc', available_at=self.moment)
+
+        warm_results = self._search(query_budget=SEARCH_MAX_QUERIES - 1, sort_by='price_asc', available_at=self.moment)
+
+        self.assertEqual(warm_results, cold_results)
+
+    def test_nearby_point_reuses_tile_and_refines_distance(self):
+        ProviderDistanceSearchService.search(
+            ProviderDistanceSearchParams(
+                latitude=CENTER_LAT,
+                longitude=CENTER_LON,
+                service_id=self.service.id,
+                radius_km=5,
+            )
+        )
+
+        with self.assertNumQueries(2):
+            results = ProviderDistanceSearchService.search(
+                ProviderDistanceSearchParams(
+                    latitude=CENTER_LAT + 0.0005,
+                    longitude=CENTER_LON,
+                    service_id=self.service.id,
+                    radius_km=2.5,
+                )
+            )
+
+        self.assertEqual(results, self.providers[:2])
+
+    def test_address_move_invalidates_cached_candidates(self):
+        self.assertIn(self.providers[0], ProviderDistanceSearchService.search(
+            ProviderDistanceSearchParams(latitude=CENTER_LAT, longitude=CENTER_LON, service_id=self.service.id)
+        ))
+
+        address = self.addresses[0]
+        address.latitude = CENTER_LAT + 1
+        address.save()
+
+        results = ProviderDistanceSearchService.search(
+            ProviderDistanceSearchParams(latitude=CENTER_LAT, longitude=CENTER_LON, service_id=self.service.id)
+        )
+        self.assertNotIn(self.providers[0], results)
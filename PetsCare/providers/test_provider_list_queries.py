@@ -0,0 +1,162 @@
+"""Тесты постоянного числа запросов при сериализации списка провайдеров."""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from catalog.models import Service
+from geolocation.models import Address
+from pets.models import PetType
+from providers.models import (
+    Employee,
+    EmployeeLocationService,
+    EmployeeProvider,
+    LocationSchedule,
+    Provider,
+    ProviderLocation,
+    ProviderLocationService,
+    Schedule,
+)
+from providers.serializers import ProviderSerializer
+
+User = get_user_model()
+
+
+class ProviderListQueryCountTests(TestCase):
+    """Число запросов списка провайдеров не зависит от их количества."""
+
+    def setUp(self):
+        """Создаёт двух провайдеров с локацией, услугой и сотрудником."""
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_superuser(email='list-admin@example.com', password='password123')
+        )
+        self.pet_type = PetType.objects.create(name='Dog', code='dog')
+        root = Service.objects.create(code='list_grooming', name='Grooming', level=0)
+        self.service = Service.objects.create(code='list_bath', name='Bath', level=1, parent=root)
+        self.moment = timezone.make_aware(
+            datetime.combine(timezone.localdate() + timedelta(days=1), time(hour=11))
+        )
+        self.providers = [self._create_provider(index) for index in range(2)]
+
+    def _create_provider(self, index):
+        provider = Provider.objects.create(
+            name=f'List provider {index}',
+            phone_number=f'+3826703000{index}',
+            email=f'list-provider{index}@example.com',
+            activation_status='active',
+            is_active=True,
+        )
+        provider.available_category_levels.add(self.service.parent)
+        location = ProviderLocation.objects.create(
+            provider=provider,
+            name=f'List branch {index}',
+            structured_address=Address.objects.create(
+                country='Montenegro',
+                city='Podgorica',
+                street='List street',
+                house_number=str(index + 1),
+                formatted_address=f'List street {index + 1}',
+                latitude=42.44 + 0.01 * index,
+                longitude=19.26,
+                validation_status='valid',
+            ),
+            phone_number=f'+3826703010{index}',
+            email=f'list-branch{index}@example.com',
+            is_active=True,
+        )
+        ProviderLocationService.objects.create(
+            location=location,
+            service=self.service,
+            pet_type=self.pet_type,
+            size_code='S',
+            price=Decimal('25.00'),
+            duration_minutes=30,
+            is_active=True,
+        )
+        LocationSchedule.objects.create(
+            provider_location=location,
+            weekday=self.moment.weekday(),
+            open_time=time(hour=9),
+            close_time=time(hour=18),
+            is_closed=False,
+        )
+        employee = Employee.objects.create(
+            user=User.objects.create_user(
+                email=f'list-employee{index}@example.com',
+                password='password123',
+                username=f'list_employee_{index}',
+                phone_number=f'+3826703020{index}',
+            ),
+            is_active=True,
+        )
+        EmployeeProvider.objects.create(employee=employee, provider=provider, start_date=timezone.localdate())
+        EmployeeLocationService.objects.create(employee=employee, provider_location=location, service=self.service)
+        Schedule.objects.create(
+            employee=employee,
+            provider_location=location,
+            day_of_week=self.moment.weekday(),
+            start_time=time(hour=9),
+            end_time=time(hour=18),
+            is_working=True,
+        )
+        return provider
+
+    def _serializer_context(self):
+        return {
+            'latitude': '42.44',
+            'longitude': '19.26',
+            'service_id': str(self.service.id),
+            'available_date': self.moment.strftime('%Y-%m-%d'),
+            'available_time': self.moment.strftime('%H:%M'),
+        }
+
+    def test_list_endpoint_query_count_does_not_grow_with_providers(self):
+        url = reverse('providers:provider-list-create')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as baseline:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+        for index in range(2, 5):
+            self._create_provider(index)
+
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            response = self.client.get(url)
+
+        self.assertEqual(response.data['count'], 5)
+        first = response.data['results'][0]
+        self.assertEqual(len(first['services']), 1)
+        self.assertEqual(first['services'][0]['service_details']['root_category_code'], 'list_grooming')
+        self.assertEqual(len(first['employees']), 1)
+        self.assertEqual(first['employees'][0]['services'][0]['id'], self.service.id)
+
+    def test_search_context_fields_are_computed_per_page(self):
+        with CaptureQueriesContext(connection) as baseline:
+            ProviderSerializer(
+                Provider.objects.filter(id__in=[provider.id for provider in self.providers]),
+                many=True,
+                context=self._serializer_context(),
+            ).data
+
+        providers = self.providers + [self._create_provider(index) for index in range(2, 5)]
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            data = ProviderSerializer(
+                Provider.objects.filter(id__in=[provider.id for provider in providers]),
+                many=True,
+                context=self._serializer_context(),
+            ).data
+
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data[0]['distance'], 0.0)
+        self.assertEqual(data[0]['price_info']['locations_count'], 1)
+        self.assertTrue(data[0]['availability_info']['available'])
+        self.assertEqual(len(data[0]['availability_info']['available_employees']), 1)
@@ -43,6 +43,7 @@ urlpatterns = [
     path('schedules/<int:pk>/', api_views.ScheduleRetrieveUpdateDestroyAPIView.as_view(), name='schedule-detail'),
     # Поиск согласно ФД
     path('search/', api_views.ProviderSearchAPIView.as_view(), name='provider-search'),
+    path('search/sitters/advanced/', api_views.SitterAdvancedSearchByDistanceAPIView.as_view(), name='sitter-advanced-search'),
     
     # Управление сотрудниками согласно ФД
     path('employees/<int:employee_id>/update/', api_views.EmployeeProviderUpdateAPIView.as_view(), name='employee-update'),
@@ -8,12 +8,14 @@
 import logging
 import requests
 from typing import Dict, Optional, Tuple
-from django.core.cache import cache
+from utils.caching import get_namespace_cache
 from django.utils import timezone
 from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
+cache = get_namespace_cache('vies')
+
 # URL VIES API
 VIES_API_URL = "https://ec.europa.eu/taxation_customs/vies/rest-api/ms/{country_code}/vat/{vat_number}"
 
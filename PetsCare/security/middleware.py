@@ -1,7 +1,6 @@
 import logging
 from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, HttpResponseTooManyRequests
 from django.utils.deprecation import MiddlewareMixin
-from django.core.cache import cache
 from django.conf import settings
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -9,9 +8,12 @@ from datetime import timedelta
 
 from .services import get_threat_detection_service, get_ip_blocking_service, get_policy_enforcement_service, get_session_monitoring_service, get_access_control_service
 from .models import SecurityThreat
+from utils.caching import get_namespace_cache
 
 logger = logging.getLogger(__name__)
 
+rate_limit_cache = get_namespace_cache('rate_limit')
+
 class SecurityMonitoringMiddleware(MiddlewareMixin):
     def __init__(self, get_response=None):
         super().__init__(get_response)
@@ -77,11 +79,16 @@ class SecurityMonitoringMiddleware(MiddlewareMixin):
                 client_ip = self._get_client_ip(request)
                 cache_key = f"rate_limit:{client_ip}:{path}"
                 
-                requests = cache.get(cache_key, 0)
-                if requests >= limit:
+                # add + incr атомарны в общем кеше: счётчик не теряет запросы параллельных воркеров
+                rate_limit_cache.add(cache_key, 0, window)
+                try:
+                    requests = rate_limit_cache.incr(cache_key)
+                except ValueError:
+                    # Ключ истёк между add и incr — начинаем новое окно
+                    rate_limit_cache.set(cache_key, 1, window)
+                    requests = 1
+                if requests > limit:
                     return True
-                
-                cache.set(cache_key, requests + 1, window)
                 break
         
         return False
@@ -111,14 +111,75 @@ DATABASES = {
     }
 }
 
-# Настройки кэша (для VIES API и других сервисов)
-# Для разработки используем локальный кэш в памяти
-# Для продакшена рекомендуется использовать Redis (см. VIES_API_SETUP.md)
-CACHES = {
-    'default': {
+# Настройки кэша.
+# При заданном REDIS_CACHE_URL все кеши общие для воркеров gunicorn и Celery (Redis).
+# Без него используется локальный кеш в памяти процесса (разработка, тесты).
+# Каждая подсистема получает свой alias с TTL и префиксом ключей из CACHE_NAMESPACES;
+# доступ через utils.caching.get_namespace_cache(namespace) с метриками hit/miss/latency.
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='')
+
+CACHE_NAMESPACES = {
+    'vies': {'TIMEOUT': 86400, 'KEY_PREFIX': 'vies'},
+    'routing': {'TIMEOUT': 3600, 'KEY_PREFIX': 'routing'},
+    'billing_blocking': {'TIMEOUT': 10, 'KEY_PREFIX': 'billing_blocking'},
+    'geolocation': {'TIMEOUT': 86400, 'KEY_PREFIX': 'geolocation'},
+    'geo_search': {'TIMEOUT': 600, 'KEY_PREFIX': 'geo_search'},
+    'rate_limit': {'TIMEOUT': 300, 'KEY_PREFIX': 'rate_limit'},
+    'booking_availability': {'TIMEOUT': 6 * 3600, 'KEY_PREFIX': 'booking_availability'},
+    'provider_context': {'TIMEOUT': 300, 'KEY_PREFIX': 'provider_context'},
+    'image_derivatives': {'TIMEOUT': 30 * 86400, 'KEY_PREFIX': 'image_derivatives'},
+    'notification_rules': {'TIMEOUT': None, 'KEY_PREFIX': 'notification_rules'},
+    'booking_reference': {'TIMEOUT': None, 'KEY_PREFIX': 'booking_reference'},
+    'provider_dashboard': {'TIMEOUT': 60, 'KEY_PREFIX': 'provider_dashboard'},
+}
+
+# Без REDIS_CACHE_URL версии в namespace видны только своему процессу: снимки
+# в памяти процесса перечитываются из БД не реже указанного интервала.
+NOTIFICATION_RULES_LOCAL_MAX_AGE_SECONDS = config('NOTIFICATION_RULES_LOCAL_MAX_AGE_SECONDS', default=30, cast=int)
+
+# Брокер событий реального времени (SSE-поток /api/v1/events/stream/ в asgi.py).
+# Redis pub/sub общий для всех воркеров; без URL — брокер в памяти процесса.
+REALTIME_BROKER_URL = config('REALTIME_BROKER_URL', default=REDIS_CACHE_URL)
+REALTIME_HEARTBEAT_SECONDS = config('REALTIME_HEARTBEAT_SECONDS', default=20, cast=int)
+REALTIME_SUBSCRIBER_QUEUE_SIZE = config('REALTIME_SUBSCRIBER_QUEUE_SIZE', default=100, cast=int)
+
+# Буфер счетчиков активности пользователей (user_analytics.activity_buffer).
+# Redis общий для всех воркеров, сброс в БД — Celery beat раз в минуту;
+# без URL — буфер в памяти процесса, который сбрасывает сам процесс.
+USER_ACTIVITY_BUFFER_URL = config('USER_ACTIVITY_BUFFER_URL', default=REDIS_CACHE_URL)
+USER_ACTIVITY_FLUSH_INTERVAL_SECONDS = config('USER_ACTIVITY_FLUSH_INTERVAL_SECONDS', default=60, cast=int)
+
+# Буфер записей аудита UserAction (audit.log_buffer): Redis общий для воркеров,
+# сброс в БД bulk_create — Celery beat; без URL записи пишутся сразу после коммита.
+AUDIT_LOG_BUFFER_URL = config('AUDIT_LOG_BUFFER_URL', default=REDIS_CACHE_URL)
+# Помесячные партиции таблиц аудита (audit.partitions): сколько месяцев создавать заранее.
+AUDIT_PARTITION_MONTHS_AHEAD = config('AUDIT_PARTITION_MONTHS_AHEAD', default=3, cast=int)
+
+
+def _cache_backend_settings(timeout=300, key_prefix=''):
+    """Настройки одного кеша для Redis или in-process fallback."""
+    if REDIS_CACHE_URL:
+        return {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'TIMEOUT': timeout,
+            'KEY_PREFIX': key_prefix,
+        }
+    # Одно хранилище LocMem на процесс: cache.clear() в тестах сбрасывает все namespace.
+    return {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
+        'TIMEOUT': timeout,
+        'KEY_PREFIX': key_prefix,
     }
+
+
+CACHES = {
+    'default': _cache_backend_settings(),
+    **{
+        namespace: _cache_backend_settings(profile['TIMEOUT'], profile['KEY_PREFIX'])
+        for namespace, profile in CACHE_NAMESPACES.items()
+    },
 }
 
 # Настройки GDAL для OSGeo4W (только для Windows-разработки)
@@ -151,6 +212,12 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Отдача документов питомцев после проверки прав (pets.document_delivery):
+# '' — файл стримит Django (Range/ETag/304), 'x-accel-redirect' — nginx
+# (internal location PET_DOCUMENT_ACCEL_REDIRECT_PREFIX → MEDIA_ROOT), 'x-sendfile' — Apache/lighttpd.
+PET_DOCUMENT_DELIVERY_OFFLOAD = config('PET_DOCUMENT_DELIVERY_OFFLOAD', default='')
+PET_DOCUMENT_ACCEL_REDIRECT_PREFIX = config('PET_DOCUMENT_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+
 # Templates
 TEMPLATES = [
     {
@@ -296,6 +363,29 @@ SOCIALACCOUNT_QUERY_EMAIL = True  # Запрашивать email у провай
 # Google Maps API
 GOOGLE_MAPS_API_KEY = config('GOOGLE_MAPS_API_KEY', default='')
 
+# Routing для проверки переездов питомца между визитами.
+# booking.routing.HaversineRoutingBackend — локальная оценка без внешнего API (тесты, офлайн).
+BOOKING_ROUTING_BACKEND = config('BOOKING_ROUTING_BACKEND', default='booking.routing.DistanceMatrixRoutingBackend')
+BOOKING_ROUTING_STORE_MAX_AGE_DAYS = config('BOOKING_ROUTING_STORE_MAX_AGE_DAYS', default=30, cast=int)
+
+# Блокировки бронирований по временному окну (booking.locking).
+# Корзина advisory lock и запас окна питомца под проверку переезда.
+BOOKING_LOCK_BUCKET_MINUTES = config('BOOKING_LOCK_BUCKET_MINUTES', default=60, cast=int)
+BOOKING_LOCK_PET_MARGIN_MINUTES = config('BOOKING_LOCK_PET_MARGIN_MINUTES', default=180, cast=int)
+
+# Справочники бронирования в памяти процесса (booking.reference_data):
+# как часто сверять версию снимка с общим кешем и, без REDIS_CACHE_URL,
+# максимальный возраст снимка (версия в LocMem не видна другим процессам).
+BOOKING_REFERENCE_DATA_CHECK_SECONDS = config('BOOKING_REFERENCE_DATA_CHECK_SECONDS', default=5, cast=int)
+BOOKING_REFERENCE_DATA_LOCAL_MAX_AGE_SECONDS = config(
+    'BOOKING_REFERENCE_DATA_LOCAL_MAX_AGE_SECONDS', default=60, cast=int
+)
+
+# Кеш operational dashboard провайдера (providers.dashboard_cache): TTL payload
+# и сколько ждать payload, который уже собирает другой процесс.
+PROVIDER_DASHBOARD_CACHE_SECONDS = config('PROVIDER_DASHBOARD_CACHE_SECONDS', default=5, cast=int)
+PROVIDER_DASHBOARD_LOCK_WAIT_SECONDS = config('PROVIDER_DASHBOARD_LOCK_WAIT_SECONDS', default=2, cast=int)
+
 # Настройки локализации
 LANGUAGE_CODE = 'ru'
 TIME_ZONE = 'Europe/Moscow'
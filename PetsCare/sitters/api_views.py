@@ -15,7 +15,7 @@ from datetime import date, datetime, time, timedelta
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, Prefetch, Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.dateparse import parse_date
@@ -30,12 +30,14 @@ from rest_framework.response import Response
 
 from access.models import PetAccess
 from notifications.models import Notification
+from notifications.realtime import publish_to_users
 from pets.models import Pet
 from pets.serializers import PetSerializer
 from users.email_verification_permissions import require_verified_email_for_owner_action
 from utils.site_urls import build_public_url
 
-from .models import Conversation, Message, PetSitting, PetSittingAd, PetSittingRequest, PetSittingResponse, SitterProfile, SitterReview
+from .models import Conversation, ConversationReadState, Message, PetSitting, PetSittingAd, PetSittingRequest, PetSittingResponse, SitterProfile, SitterReview
+from .search import CAPACITY_BLOCKING_STATUSES
 from .serializers import (
     ConversationDetailSerializer,
     ConversationSerializer,
@@ -50,7 +52,7 @@ from .serializers import (
 
 User = get_user_model()
 
-CAPACITY_BLOCKING_STATUSES = ('waiting_start', 'active', 'waiting_review')
+MAX_MESSAGE_PAGE_SIZE = 100
 
 
 def _normalize_language_code(raw_value: str | None) -> str:
@@ -1447,9 +1449,17 @@ class ConversationViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Conversation.objects.none()
 
-        return Conversation.objects.filter(participants=self.request.user, is_active=True).prefetch_related(
-            'participants',
-            'messages',
+        return Conversation.objects.filter(participants=self.request.user, is_active=True).select_related(
+            'last_message_sender',
+            'pet_sitting_ad',
+            'pet_sitting',
+        ).prefetch_related(
+            'participants__sitter',
+            Prefetch(
+                'read_states',
+                queryset=ConversationReadState.objects.filter(user=self.request.user),
+                to_attr='current_user_read_states',
+            ),
         ).order_by('-updated_at', '-id')
 
     def get_serializer_class(self):
@@ -1474,11 +1484,20 @@ class ConversationViewSet(viewsets.ModelViewSet):
         if other_participant is None:
             raise ValidationError({'detail': _('No other participant found for this conversation.')})
 
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=request.user,
-            recipient=other_participant,
-            text=text,
+        with transaction.atomic():
+            message = Message.objects.create(
+                conversation=conversation,
+                sender=request.user,
+                recipient=other_participant,
+                text=text,
+            )
+            conversation.register_message(message, text)
+
+        message_data = MessageSerializer(message, context={'request': request}).data
+        publish_to_users(
+            [participant.id for participant in conversation.participants.all()],
+            'message.created',
+            {'conversation_id': conversation.id, 'message': message_data},
         )
 
         _notify_user(
@@ -1495,9 +1514,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
             },
         )
 
-        conversation.updated_at = timezone.now()
-        conversation.save(update_fields=['updated_at'])
-        return Response(MessageSerializer(message, context={'request': request}).data)
+        return Response(message_data)
 
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -1505,12 +1522,30 @@ class ConversationViewSet(viewsets.ModelViewSet):
         Отмечает непрочитанные сообщения как прочитанные.
         """
         conversation = self.get_object()
-        updated_count = conversation.messages.filter(
-            is_read=False,
-            recipient=request.user,
-        ).update(is_read=True)
+        updated_count = conversation.mark_read_by(request.user)
         return Response({'marked_as_read': updated_count})
 
+    @action(detail=True, methods=['get'])
+    def messages(self, request, pk=None):
+        """
+        Возвращает страницу истории сообщений по keyset-курсору.
+
+        Параметры: before — next_cursor предыдущей страницы, limit — размер страницы.
+        """
+        conversation = self.get_object()
+        try:
+            before_id = int(request.query_params['before']) if request.query_params.get('before') else None
+            limit = int(request.query_params.get('limit', Conversation.MESSAGE_PAGE_SIZE))
+        except (TypeError, ValueError) as exc:
+            raise ValidationError({'detail': _('Invalid pagination parameters.')}) from exc
+        limit = min(max(limit, 1), MAX_MESSAGE_PAGE_SIZE)
+
+        page, next_cursor = conversation.get_message_page(before_id=before_id, limit=limit)
+        return Response({
+            'results': MessageSerializer(page, many=True, context={'request': request}).data,
+            'next_cursor': next_cursor,
+        })
+
     @action(detail=False, methods=['post'])
     def create_or_get(self, request):
         """
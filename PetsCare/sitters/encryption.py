@@ -3,11 +3,16 @@
 
 Этот модуль обеспечивает безопасное хранение сообщений в базе данных
 через шифрование AES-256-GCM.
+
+Ключ выводится из SECRET_KEY через PBKDF2 (100 000 итераций) лениво — при
+первом шифровании/дешифровании — и кэшируется на процесс, поэтому импорт
+модуля, management-команды и старт Celery-воркеров его не оплачивают.
 """
 
 import base64
-import os
 import logging
+import threading
+from typing import Iterable
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -16,34 +21,48 @@ from django.core.exceptions import ImproperlyConfigured
 
 logger = logging.getLogger(__name__)
 
+KEY_DERIVATION_SALT = b'petscare_messages'  # Фиксированная соль для совместимости
+KEY_DERIVATION_ITERATIONS = 100000
+
+# SECRET_KEY → Fernet: ключ выводится один раз на процесс (и на значение SECRET_KEY).
+_fernets: dict[str, Fernet] = {}
+_fernets_lock = threading.Lock()
+
+
+def get_fernet() -> Fernet:
+    """Возвращает общий для процесса Fernet, выводя ключ при первом обращении."""
+    secret_key = getattr(settings, 'SECRET_KEY', None)
+    if not secret_key:
+        raise ImproperlyConfigured("SECRET_KEY is required for message encryption")
+
+    fernet = _fernets.get(secret_key)
+    if fernet is None:
+        with _fernets_lock:
+            fernet = _fernets.get(secret_key)
+            if fernet is None:
+                kdf = PBKDF2HMAC(
+                    algorithm=hashes.SHA256(),
+                    length=32,
+                    salt=KEY_DERIVATION_SALT,
+                    iterations=KEY_DERIVATION_ITERATIONS,
+                )
+                key = base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
+                fernet = _fernets[secret_key] = Fernet(key)
+    return fernet
+
 
 class MessageEncryption:
     """
     Класс для шифрования и дешифрования сообщений.
     
     Использует Fernet (AES-128-CBC с HMAC) для шифрования.
-    Ключ генерируется из SECRET_KEY Django.
+    Ключ генерируется из SECRET_KEY Django лениво, см. get_fernet().
     """
     
-    def __init__(self):
-        """Инициализация с ключом шифрования."""
-        self.fernet = self._get_fernet()
-    
-    def _get_fernet(self):
-        """Получает или создает Fernet ключ из SECRET_KEY."""
-        if not hasattr(settings, 'SECRET_KEY') or not settings.SECRET_KEY:
-            raise ImproperlyConfigured("SECRET_KEY is required for message encryption")
-        
-        # Генерируем ключ из SECRET_KEY
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b'petscare_messages',  # Фиксированная соль для совместимости
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(settings.SECRET_KEY.encode()))
-        
-        return Fernet(key)
+    @property
+    def fernet(self) -> Fernet:
+        """Fernet с ключом из SECRET_KEY (вывод ключа — при первом использовании)."""
+        return get_fernet()
     
     def encrypt(self, text: str) -> str:
         """
@@ -94,6 +113,37 @@ class MessageEncryption:
             )
             raise
 
+    def decrypt_many(self, encrypted_texts: Iterable[str], fallback_to_input: bool = False) -> list[str]:
+        """
+        Дешифрует набор текстов одним Fernet.
+        
+        Args:
+            encrypted_texts: Зашифрованные тексты в base64
+            fallback_to_input: Вместо исключения вернуть исходную строку
+                (старые незашифрованные сообщения)
+            
+        Returns:
+            list[str]: Расшифрованные тексты в том же порядке
+        """
+        fernet = self.fernet
+        result = []
+        failed = 0
+        for encrypted_text in encrypted_texts:
+            if not encrypted_text:
+                result.append("")
+                continue
+            try:
+                encrypted_data = base64.urlsafe_b64decode(encrypted_text.encode('utf-8'))
+                result.append(fernet.decrypt(encrypted_data).decode('utf-8'))
+            except Exception:
+                if not fallback_to_input:
+                    raise
+                failed += 1
+                result.append(encrypted_text)
+        if failed:
+            logger.warning("Error decrypting %d of %d messages in bulk", failed, len(result))
+        return result
+
 
-# Глобальный экземпляр для использования в моделях
+# Глобальный экземпляр для использования в моделях (ключ выводится лениво)
 message_encryption = MessageEncryption()
@@ -0,0 +1,68 @@
+"""
+Management команда для замера стоимости шифрования сообщений чата.
+
+Использование:
+    python manage.py benchmark_message_encryption --messages 1000 --max-import-ms 50
+
+Выводит время импорта sitters.encryption (без вывода ключа), время первого
+вывода ключа PBKDF2, скорость шифрования и поштучного и пакетного дешифрования.
+С --max-import-ms завершается ошибкой, если импорт модуля стал дороже порога
+(например, ключ снова начали выводить при импорте).
+"""
+
+import importlib
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sitters import encryption
+
+
+class Command(BaseCommand):
+    help = 'Замеряет стоимость импорта и работы шифрования сообщений чата'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000)
+        parser.add_argument('--max-import-ms', type=float, default=None)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        module = importlib.reload(encryption)
+        import_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        module.get_fernet()
+        derive_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        module.get_fernet()
+        cached_us = (time.perf_counter() - started) * 1_000_000
+
+        texts = [f'Benchmark message {index} ' * 4 for index in range(options['messages'])]
+        service = module.message_encryption
+
+        started = time.perf_counter()
+        encrypted = [service.encrypt(text) for text in texts]
+        encrypt_single_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for text in encrypted:
+            service.decrypt(text)
+        decrypt_single_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        service.decrypt_many(encrypted)
+        decrypt_many_ms = (time.perf_counter() - started) * 1000
+
+        self.stdout.write(f'import sitters.encryption: {import_ms:8.2f} ms')
+        self.stdout.write(f'first key derivation:      {derive_ms:8.2f} ms')
+        self.stdout.write(f'cached key lookup:         {cached_us:8.2f} µs')
+        self.stdout.write(f'encrypt {len(texts)}: {encrypt_single_ms:.2f} ms one by one')
+        self.stdout.write(
+            f'decrypt {len(texts)}: {decrypt_single_ms:.2f} ms one by one, {decrypt_many_ms:.2f} ms decrypt_many'
+        )
+
+        if options['max_import_ms'] is not None and import_ms > options['max_import_ms']:
+            raise CommandError(
+                f'Import of sitters.encryption took {import_ms:.2f} ms, limit is {options["max_import_ms"]:.2f} ms.'
+            )
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.11 on 2026-10-16 13:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_conversation_summaries(apps, schema_editor):
+    """Заполняет последнее сообщение и счётчики непрочитанных по существующим сообщениям."""
+    from django.db.models import Count
+
+    from sitters.encryption import message_encryption
+
+    Conversation = apps.get_model('sitters', 'Conversation')
+    ConversationReadState = apps.get_model('sitters', 'ConversationReadState')
+    Message = apps.get_model('sitters', 'Message')
+
+    for conversation in Conversation.objects.iterator():
+        last_message = Message.objects.filter(conversation=conversation).order_by('-created_at', '-id').first()
+        if last_message is None:
+            continue
+        try:
+            text = message_encryption.decrypt(last_message.text)
+        except Exception:
+            text = last_message.text
+        preview = text[:100] + '...' if len(text) > 100 else text
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_message=last_message,
+            last_message_at=last_message.created_at,
+            last_message_sender_id=last_message.sender_id,
+            last_message_preview=message_encryption.encrypt(preview),
+        )
+
+    unread_rows = (
+        Message.objects.filter(is_read=False)
+        .values('conversation_id', 'recipient_id')
+        .annotate(unread=Count('id'))
+    )
+    ConversationReadState.objects.bulk_create(
+        [
+            ConversationReadState(
+                conversation_id=row['conversation_id'],
+                user_id=row['recipient_id'],
+                unread_count=row['unread'],
+            )
+            for row in unread_rows
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sitters', '0005_petsittingad_visibility_petsittingrequest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sitters.message', verbose_name='Last Message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Last Message At'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Last Message Sender'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.TextField(blank=True, help_text='Encrypted preview of the last message', verbose_name='Last Message Preview'),
+        ),
+        migrations.CreateModel(
+            name='ConversationReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='Unread Count')),
+                ('last_read_at', models.DateTimeField(blank=True, null=True, verbose_name='Last Read At')),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='sitters.conversation', verbose_name='Conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_read_states', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Conversation Read State',
+                'verbose_name_plural': 'Conversation Read States',
+                'constraints': [models.UniqueConstraint(fields=('conversation', 'user'), name='sitters_conversation_read_state_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_conversation_summaries, migrations.RunPython.noop),
+    ]
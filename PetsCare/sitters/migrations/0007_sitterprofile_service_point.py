@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-16 15:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+def backfill_service_points(apps, schema_editor):
+    """Точка зоны обслуживания берётся из геолокации пользователя ситтера."""
+    from django.db.models import OuterRef, Subquery
+
+    SitterProfile = apps.get_model('sitters', 'SitterProfile')
+    UserLocation = apps.get_model('geolocation', 'UserLocation')
+
+    SitterProfile.objects.filter(service_point__isnull=True).update(
+        service_point=Subquery(
+            UserLocation.objects.filter(user_id=OuterRef('user_id')).values('point')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geolocation', '0008_remove_address_is_valid_is_validated'),
+        ('sitters', '0006_conversation_last_message_and_read_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitterprofile',
+            name='service_point',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, help_text='Center of the service area; synchronized with the user location', null=True, srid=4326, verbose_name='Service Point'),
+        ),
+        migrations.AddIndex(
+            model_name='sitterprofile',
+            index=models.Index(fields=['is_active', 'hourly_rate'], name='sitters_profile_active_rate_idx'),
+        ),
+        migrations.RunPython(backfill_service_points, migrations.RunPython.noop),
+    ]
@@ -7,8 +7,10 @@
 3. Отзывов и рейтингов
 """
 
+from django.contrib.gis.db import models as gis_models
 from django.db import models
-from django.db.models import Q
+from django.db.models import F, Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from users.models import User
 from django.core.exceptions import ValidationError
@@ -73,6 +75,13 @@ class SitterProfile(models.Model):
         default=5,
         help_text=_('Maximum distance for pet sitting services')
     )
+    service_point = gis_models.PointField(
+        _('Service Point'),
+        srid=4326,
+        null=True,
+        blank=True,
+        help_text=_('Center of the service area; synchronized with the user location')
+    )
     is_active = models.BooleanField(
         _('Is Active'),
         default=True,
@@ -115,6 +124,9 @@ class SitterProfile(models.Model):
         verbose_name = _('Sitter Profile')
         verbose_name_plural = _('Sitter Profiles')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'hourly_rate'], name='sitters_profile_active_rate_idx'),
+        ]
 
     def __str__(self):
         """
@@ -125,6 +137,19 @@ class SitterProfile(models.Model):
         """
         return f"Sitter Profile for {self.user.get_full_name()}"
 
+    def save(self, *args, **kwargs):
+        """
+        Новый профиль без точки зоны обслуживания получает координаты
+        геолокации пользователя.
+        """
+        if self.service_point is None and self.user_id:
+            from geolocation.models import UserLocation
+
+            self.service_point = (
+                UserLocation.objects.filter(user_id=self.user_id).values_list('point', flat=True).first()
+            )
+        super().save(*args, **kwargs)
+
     def update_rating(self, new_rating):
         """
         Обновляет рейтинг передержки.
@@ -495,6 +520,36 @@ class Conversation(models.Model):
         default=True,
         verbose_name=_('Is Active')
     )
+    # Денормализованное последнее сообщение: список диалогов не читает Message.
+    last_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name=_('Last Message'),
+        null=True,
+        blank=True
+    )
+    last_message_at = models.DateTimeField(
+        verbose_name=_('Last Message At'),
+        null=True,
+        blank=True
+    )
+    last_message_sender = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name=_('Last Message Sender'),
+        null=True,
+        blank=True
+    )
+    last_message_preview = models.TextField(
+        verbose_name=_('Last Message Preview'),
+        blank=True,
+        help_text=_('Encrypted preview of the last message')
+    )
+
+    LAST_MESSAGE_PREVIEW_LENGTH = 100
+    MESSAGE_PAGE_SIZE = 50
 
     class Meta:
         verbose_name = _('Conversation')
@@ -509,8 +564,127 @@ class Conversation(models.Model):
         return f"Chat {self.id}"
 
     def get_other_participant(self, user):
-        """Получает другого участника диалога"""
-        return self.participants.exclude(id=user.id).first()
+        """Получает другого участника диалога (использует prefetch участников, если он есть)"""
+        return next((participant for participant in self.participants.all() if participant.id != user.id), None)
+
+    @classmethod
+    def build_preview(cls, text):
+        """Обрезает текст сообщения до превью списка диалогов."""
+        if len(text) > cls.LAST_MESSAGE_PREVIEW_LENGTH:
+            return text[:cls.LAST_MESSAGE_PREVIEW_LENGTH] + '...'
+        return text
+
+    @property
+    def decrypted_last_message_preview(self):
+        """Расшифрованное превью последнего сообщения"""
+        if '_decrypted_last_message_preview' in self.__dict__:
+            return self._decrypted_last_message_preview
+        if not self.last_message_preview:
+            return ""
+        try:
+            return message_encryption.decrypt(self.last_message_preview)
+        except Exception:
+            return self.last_message_preview
+
+    @classmethod
+    def decrypt_last_message_previews(cls, conversations):
+        """Расшифровывает превью последних сообщений списка диалогов одним вызовом."""
+        conversations = list(conversations)
+        previews = message_encryption.decrypt_many(
+            [conversation.last_message_preview for conversation in conversations],
+            fallback_to_input=True,
+        )
+        for conversation, preview in zip(conversations, previews):
+            conversation._decrypted_last_message_preview = preview
+        return conversations
+
+    def register_message(self, message, text):
+        """
+        Обновляет последнее сообщение и счётчик непрочитанных получателя.
+
+        text — исходный (незашифрованный) текст сообщения. Вызывать в транзакции.
+        """
+        self.last_message = message
+        self.last_message_at = message.created_at
+        self.last_message_sender_id = message.sender_id
+        self.last_message_preview = message_encryption.encrypt(self.build_preview(text))
+        self.save(update_fields=[
+            'last_message',
+            'last_message_at',
+            'last_message_sender',
+            'last_message_preview',
+            'updated_at',
+        ])
+        state, created = ConversationReadState.objects.get_or_create(
+            conversation=self,
+            user_id=message.recipient_id,
+            defaults={'unread_count': 1},
+        )
+        if not created:
+            ConversationReadState.objects.filter(pk=state.pk).update(unread_count=F('unread_count') + 1)
+
+    def get_message_page(self, *, before_id=None, limit=MESSAGE_PAGE_SIZE):
+        """
+        Keyset-страница истории: сообщения с id < before_id, от старых к новым.
+
+        Возвращает (сообщения, курсор следующей, более ранней страницы или None).
+        """
+        queryset = self.messages.select_related('sender', 'recipient').order_by('-id')
+        if before_id is not None:
+            queryset = queryset.filter(id__lt=before_id)
+        page = list(queryset[:limit + 1])
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = page[-1].id
+        page.reverse()
+        return page, next_cursor
+
+    def mark_read_by(self, user):
+        """Отмечает входящие сообщения пользователя прочитанными и обнуляет его счётчик."""
+        updated_count = self.messages.filter(is_read=False, recipient=user).update(is_read=True)
+        ConversationReadState.objects.filter(conversation=self, user=user).update(
+            unread_count=0,
+            last_read_at=timezone.now(),
+        )
+        return updated_count
+
+
+class ConversationReadState(models.Model):
+    """
+    Состояние диалога для участника: счётчик непрочитанных входящих сообщений.
+    """
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='read_states',
+        verbose_name=_('Conversation')
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='conversation_read_states',
+        verbose_name=_('User')
+    )
+    unread_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Unread Count')
+    )
+    last_read_at = models.DateTimeField(
+        verbose_name=_('Last Read At'),
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = _('Conversation Read State')
+        verbose_name_plural = _('Conversation Read States')
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='sitters_conversation_read_state_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.conversation_id}: {self.unread_count} unread"
 
 
 class Message(models.Model):
@@ -557,6 +731,12 @@ class Message(models.Model):
 
     def mark_as_read(self):
         """Отмечает сообщение как прочитанное"""
+        if not self.is_read and self.pk:
+            ConversationReadState.objects.filter(
+                conversation_id=self.conversation_id,
+                user_id=self.recipient_id,
+                unread_count__gt=0,
+            ).update(unread_count=F('unread_count') - 1)
         self.is_read = True
         self.save()
     
@@ -566,9 +746,20 @@ class Message(models.Model):
             self.text = message_encryption.encrypt(self.text)
         super().save(*args, **kwargs)
     
+    @classmethod
+    def decrypt_texts(cls, messages):
+        """Расшифровывает тексты набора сообщений одним вызовом."""
+        messages = list(messages)
+        texts = message_encryption.decrypt_many([message.text for message in messages], fallback_to_input=True)
+        for message, text in zip(messages, texts):
+            message._decrypted_text = text
+        return messages
+
     @property
     def decrypted_text(self):
         """Возвращает расшифрованный текст сообщения"""
+        if '_decrypted_text' in self.__dict__:
+            return self._decrypted_text
         if not self.text:
             return ""
         try:
@@ -0,0 +1,145 @@
+"""
+Геопоиск ситтеров по точке зоны обслуживания (PostGIS).
+
+Поиск выполняется так:
+- кандидаты в радиусе поиска берутся из GeoSearchCache (пространственный
+  запрос по service_point только при промахе кеша);
+- один SQL-запрос по id кандидатов: радиус зоны обслуживания ситтера
+  (max_distance_km) и расстояние — тем же путём, что
+  geolocation.utils.filter_by_distance (distance_lte + Distance);
+- цена и активность фильтруются по индексу (is_active, hourly_rate),
+  рейтинг и текущая загрузка считаются подзапросами.
+
+Кеш сбрасывается сигналами sitters.signals при смене точки или активности
+профиля ситтера.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.db.models import Avg, Count, F, IntegerField, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from geolocation.search_cache import GeoSearchCache
+
+from .models import PetSitting, SitterProfile, SitterReview
+
+# Статусы передержки, которые занимают место ситтера.
+CAPACITY_BLOCKING_STATUSES = ('waiting_start', 'active', 'waiting_review')
+
+SEARCH_CACHE_NAMESPACE = 'sitter_profiles'
+
+
+class SitterSearchService:
+    """
+    Поиск активных ситтеров вокруг точки.
+
+    Возвращает QuerySet, отсортированный по расстоянию, с аннотациями
+    distance, rating_value, reviews_count_value и current_load.
+    """
+
+    def __init__(self, latitude: float, longitude: float, radius_km: float):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius_km = radius_km
+        self.center = Point(longitude, latitude, srid=4326)
+
+    def search(
+        self,
+        *,
+        min_rating: Optional[float] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        compensation_type: Optional[str] = None,
+        available_from: Optional[date] = None,
+        available_to: Optional[date] = None,
+    ) -> QuerySet:
+        candidates = GeoSearchCache.get_candidates(
+            namespace=SEARCH_CACHE_NAMESPACE,
+            queryset=SitterProfile.objects.filter(is_active=True),
+            lat=self.latitude,
+            lon=self.longitude,
+            radius_km=self.radius_km,
+            point_field='service_point',
+        )
+        queryset = SitterProfile.objects.filter(
+            is_active=True,
+            pk__in=[sitter_id for sitter_id, _distance in candidates],
+        )
+
+        if compensation_type:
+            queryset = queryset.filter(compensation_type=compensation_type)
+        if min_price is not None:
+            queryset = queryset.filter(hourly_rate__gte=min_price)
+        if max_price is not None:
+            # Бесплатные ситтеры (ставка не указана) проходят ограничение сверху.
+            queryset = queryset.exclude(hourly_rate__gt=max_price)
+
+        if available_from or available_to:
+            available_from = available_from or available_to
+            available_to = available_to or available_from
+            queryset = queryset.exclude(available_from__gt=available_from).exclude(available_to__lt=available_to)
+
+        queryset = queryset.filter(
+            service_point__distance_lte=(self.center, F('max_distance_km') * 1000),
+        )
+
+        queryset = queryset.annotate(
+            distance=Distance('service_point', self.center),
+            rating_value=self._rating_subquery(),
+            reviews_count_value=Coalesce(self._reviews_count_subquery(), Value(0)),
+        )
+        if min_rating is not None:
+            queryset = queryset.filter(rating_value__gte=min_rating)
+
+        if available_from:
+            queryset = queryset.annotate(
+                current_load=Coalesce(self._load_subquery(available_from, available_to), Value(0)),
+            ).filter(current_load__lt=F('max_pets'))
+        else:
+            queryset = queryset.annotate(current_load=Value(0, output_field=IntegerField()))
+
+        return queryset.select_related('user', 'user__user_location').order_by('distance', 'id')
+
+    @staticmethod
+    def _rating_subquery() -> Subquery:
+        reviews = (
+            SitterReview.objects.filter(history__sitter=OuterRef('pk'))
+            .order_by()
+            .values('history__sitter')
+            .annotate(avg=Avg('rating'))
+            .values('avg')
+        )
+        return Subquery(reviews[:1])
+
+    @staticmethod
+    def _reviews_count_subquery() -> Subquery:
+        reviews = (
+            SitterReview.objects.filter(history__sitter=OuterRef('pk'))
+            .order_by()
+            .values('history__sitter')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return Subquery(reviews[:1], output_field=IntegerField())
+
+    @staticmethod
+    def _load_subquery(available_from: date, available_to: date) -> Subquery:
+        sittings = (
+            PetSitting.objects.filter(
+                sitter=OuterRef('pk'),
+                status__in=CAPACITY_BLOCKING_STATUSES,
+                start_date__lte=available_to,
+                end_date__gte=available_from,
+            )
+            .order_by()
+            .values('sitter')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return Subquery(sittings[:1], output_field=IntegerField())
@@ -9,12 +9,14 @@
 5. Отзывов и чатов
 """
 
+from django.db import models
 from django.db.models import Avg, Count
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
 from geolocation.models import Address
 from users.models import User
+from utils.image_derivatives import build_srcset
 
 from .models import (
     Conversation,
@@ -43,6 +45,7 @@ def _serialize_user_brief(user: User | None) -> dict | None:
         'first_name': user.first_name,
         'last_name': user.last_name,
         'profile_picture': profile_picture.url if profile_picture else None,
+        'profile_picture_srcset': build_srcset(profile_picture, 'avatar'),
     }
 
 
@@ -63,6 +66,7 @@ def _serialize_pet_brief(pet) -> dict | None:
         'breed': breed.id if breed else None,
         'breed_name': breed.get_localized_name() if breed else None,
         'photo': pet.photo.url if getattr(pet, 'photo', None) else None,
+        'photo_srcset': build_srcset(getattr(pet, 'photo', None), 'pet_photo'),
         'weight': float(pet.weight) if getattr(pet, 'weight', None) is not None else None,
         'description': getattr(pet, 'description', '') or '',
         'behavioral_traits': list(getattr(pet, 'behavioral_traits', []) or []),
@@ -213,6 +217,26 @@ class SitterProfileSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class SitterSearchResultSerializer(SitterProfileSerializer):
+    """
+    Результат геопоиска ситтеров: профиль, расстояние и текущая загрузка.
+    """
+
+    distance_km = serializers.SerializerMethodField()
+    current_load = serializers.IntegerField(read_only=True, default=0)
+
+    class Meta(SitterProfileSerializer.Meta):
+        fields = SitterProfileSerializer.Meta.fields + ['distance_km', 'current_load']
+        read_only_fields = fields
+
+    def get_distance_km(self, obj: SitterProfile) -> float | None:
+        """
+        Возвращает расстояние до ситтера в километрах из аннотации поиска.
+        """
+        distance = getattr(obj, 'distance', None)
+        return round(float(distance.km), 2) if distance is not None else None
+
+
 class PetSittingAdSerializer(serializers.ModelSerializer):
     """
     Сериализатор объявления владельца о поиске передержки.
@@ -757,6 +781,16 @@ class SitterReviewSerializer(serializers.ModelSerializer):
         return _serialize_user_brief(obj.author)
 
 
+class MessageListSerializer(serializers.ListSerializer):
+    """
+    Список сообщений: тексты расшифровываются одним вызовом decrypt_many.
+    """
+
+    def to_representation(self, data):
+        items = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return super().to_representation(Message.decrypt_texts(items))
+
+
 class MessageSerializer(serializers.ModelSerializer):
     """
     Сериализатор сообщений чата с расшифрованным текстом.
@@ -783,6 +817,7 @@ class MessageSerializer(serializers.ModelSerializer):
             'is_read',
         ]
         read_only_fields = fields
+        list_serializer_class = MessageListSerializer
 
     def get_sender_avatar(self, obj: Message) -> str | None:
         """
@@ -799,6 +834,16 @@ class MessageSerializer(serializers.ModelSerializer):
         return picture.url if picture else None
 
 
+class ConversationListSerializer(serializers.ListSerializer):
+    """
+    Список диалогов: превью последних сообщений расшифровываются одним вызовом.
+    """
+
+    def to_representation(self, data):
+        items = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return super().to_representation(Conversation.decrypt_last_message_previews(items))
+
+
 class ConversationSerializer(serializers.ModelSerializer):
     """
     Сериализатор списка диалогов.
@@ -828,6 +873,7 @@ class ConversationSerializer(serializers.ModelSerializer):
             'is_active',
         ]
         read_only_fields = fields
+        list_serializer_class = ConversationListSerializer
 
     def get_participants(self, obj: Conversation) -> list[dict]:
         """
@@ -837,29 +883,30 @@ class ConversationSerializer(serializers.ModelSerializer):
 
     def get_last_message(self, obj: Conversation) -> dict | None:
         """
-        Возвращает краткое описание последнего сообщения.
+        Возвращает краткое описание последнего сообщения из денормализованных полей диалога.
         """
-        last_message = obj.messages.last()
-        if last_message is None:
+        if obj.last_message_id is None:
             return None
 
-        decrypted_text = last_message.decrypted_text
-        preview = decrypted_text[:100] + '...' if len(decrypted_text) > 100 else decrypted_text
+        sender = obj.last_message_sender
         return {
-            'id': last_message.id,
-            'text': preview,
-            'sender_name': last_message.sender.get_full_name() or last_message.sender.email,
-            'created_at': last_message.created_at,
+            'id': obj.last_message_id,
+            'text': obj.decrypted_last_message_preview,
+            'sender_name': (sender.get_full_name() or sender.email) if sender else '',
+            'created_at': obj.last_message_at,
         }
 
     def get_unread_count(self, obj: Conversation) -> int:
         """
-        Возвращает количество непрочитанных сообщений.
+        Возвращает количество непрочитанных сообщений из счётчика участника.
         """
         request = self.context.get('request')
         if request is None:
             return 0
-        return obj.messages.filter(is_read=False, recipient=request.user).count()
+        read_states = getattr(obj, 'current_user_read_states', None)
+        if read_states is None:
+            read_states = list(obj.read_states.filter(user=request.user))
+        return read_states[0].unread_count if read_states else 0
 
     def get_other_participant(self, obj: Conversation) -> dict | None:
         """
@@ -888,10 +935,26 @@ class ConversationSerializer(serializers.ModelSerializer):
 
 class ConversationDetailSerializer(ConversationSerializer):
     """
-    Детальный сериализатор диалога с сообщениями.
+    Детальный сериализатор диалога с последней страницей сообщений.
+
+    Более ранние сообщения загружаются через conversations/{id}/messages/?before=<next_cursor>.
     """
 
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
+    messages_next_cursor = serializers.SerializerMethodField()
 
     class Meta(ConversationSerializer.Meta):
-        fields = ConversationSerializer.Meta.fields + ['messages']
+        fields = ConversationSerializer.Meta.fields + ['messages', 'messages_next_cursor']
+
+    def _get_message_page(self, obj: Conversation) -> tuple[list[Message], int | None]:
+        if not hasattr(obj, '_latest_message_page'):
+            obj._latest_message_page = obj.get_message_page()
+        return obj._latest_message_page
+
+    def get_messages(self, obj: Conversation) -> list[dict]:
+        messages, _next_cursor = self._get_message_page(obj)
+        return MessageSerializer(messages, many=True, context=self.context).data
+
+    def get_messages_next_cursor(self, obj: Conversation) -> int | None:
+        return self._get_message_page(obj)[1]
+
@@ -1,8 +1,10 @@
 """
-Сигналы для автоматического назначения ролей при создании профилей ситтеров.
+Сигналы для автоматического назначения ролей при создании профилей ситтеров,
+синхронизации точки зоны обслуживания с геолокацией пользователя и сброса
+кеша геопоиска ситтеров.
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from .models import SitterProfile
 
@@ -35,3 +37,48 @@ def assign_pet_sitter_role_on_profile_creation(sender, instance, created, **kwar
             )
             if not instance.user.user_types.filter(name='pet_sitter').exists():
                 instance.user.user_types.add(pet_sitter_role)
+
+
+@receiver(post_save, sender='geolocation.UserLocation')
+def sync_sitter_service_point(sender, instance, **kwargs):
+    """
+    Геолокация пользователя изменилась — переносим точку в профиль ситтера,
+    по которой работает пространственный индекс геопоиска.
+    """
+    if instance.user_id:
+        updated = SitterProfile.objects.filter(user_id=instance.user_id).exclude(
+            service_point=instance.point,
+        ).update(service_point=instance.point)
+        if updated:
+            invalidate_sitter_search_cache()
+
+
+def invalidate_sitter_search_cache():
+    """Сбрасывает кеш кандидатов геопоиска ситтеров."""
+    from geolocation.search_cache import GeoSearchCache
+
+    from .search import SEARCH_CACHE_NAMESPACE
+
+    GeoSearchCache.invalidate(SEARCH_CACHE_NAMESPACE)
+
+
+@receiver(post_init, sender=SitterProfile)
+def remember_sitter_search_fields(sender, instance, **kwargs):
+    """Запоминает точку и активность профиля, от которых зависит кеш геопоиска."""
+    if 'service_point' in instance.__dict__ and 'is_active' in instance.__dict__:
+        instance._geo_search_values = (instance.service_point, instance.is_active)
+
+
+@receiver(post_save, sender=SitterProfile)
+def invalidate_sitter_search_cache_on_save(sender, instance, created, **kwargs):
+    """Новый профиль или смена точки/активности — сбрасываем кеш геопоиска."""
+    current_values = (instance.__dict__.get('service_point'), instance.__dict__.get('is_active'))
+    if created or getattr(instance, '_geo_search_values', None) != current_values:
+        invalidate_sitter_search_cache()
+    instance._geo_search_values = current_values
+
+
+@receiver(post_delete, sender=SitterProfile)
+def invalidate_sitter_search_cache_on_delete(sender, instance, **kwargs):
+    """Удалённый профиль не должен оставаться среди кандидатов геопоиска."""
+    invalidate_sitter_search_cache()
@@ -15,7 +15,9 @@ from datetime import datetime, time, timedelta
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import Point
 from django.core import mail
-from django.test import TestCase
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -23,7 +25,9 @@ from rest_framework.test import APIClient
 from access.models import PetAccess
 from geolocation.models import UserLocation
 from pets.models import Pet, PetOwner, PetType
-from .models import PetSitting, PetSittingAd, PetSittingRequest, PetSittingResponse, SitterProfile, SitterReview
+from . import encryption
+from .models import Conversation, PetSitting, PetSittingAd, PetSittingRequest, PetSittingResponse, SitterProfile, SitterReview
+from .search import SitterSearchService
 
 User = get_user_model()
 
@@ -368,6 +372,24 @@ class PetSittingApiTestCase(TestCase):
         self.assertNotIn(self.sitter_profile.id, result_ids)
         self.assertIn(self.other_sitter_profile.id, result_ids)
 
+    def test_search_cache_follows_sitter_location_and_activity(self):
+        """
+        Кеш кандидатов геопоиска сбрасывается при смене точки и активности ситтера.
+        """
+        def found_ids():
+            return set(SitterSearchService(42.4411, 19.2624, 5).search().values_list('id', flat=True))
+
+        self.assertEqual(found_ids(), {self.sitter_profile.id})
+
+        location = UserLocation.objects.get(user=self.other_sitter_user)
+        location.point = Point(19.2630, 42.4415, srid=4326)
+        location.save()
+        self.assertEqual(found_ids(), {self.sitter_profile.id, self.other_sitter_profile.id})
+
+        self.sitter_profile.is_active = False
+        self.sitter_profile.save()
+        self.assertEqual(found_ids(), {self.other_sitter_profile.id})
+
     def test_public_ads_list_hides_pet_with_already_agreed_boarding(self):
         """
         В публичной выдаче для ситтера не должно быть объявления, по которому уже договорились о передержке.
@@ -472,6 +494,106 @@ class PetSittingApiTestCase(TestCase):
         self.assertIn('/boarding?tab=stays&sitting=', mail.outbox[0].body)
 
 
+class ConversationApiTestCase(TestCase):
+    """
+    Тесты списка диалогов и истории сообщений.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = create_user('chat-owner@example.com', 11)
+        self.sitter_user = create_user('chat-sitter@example.com', 12)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.owner, self.sitter_user)
+
+    def send(self, sender, text):
+        self.client.force_authenticate(user=sender)
+        response = self.client.post(f'/api/v1/conversations/{self.conversation.id}/send_message/', {'text': text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_list_uses_denormalized_last_message_and_unread_counter(self):
+        self.send(self.owner, 'Hello')
+        last = self.send(self.owner, 'x' * 150)
+
+        self.client.force_authenticate(user=self.sitter_user)
+        response = self.client.get('/api/v1/conversations/')
+
+        item = response.data['results'][0] if 'results' in response.data else response.data[0]
+        self.assertEqual(item['last_message']['id'], last['id'])
+        self.assertEqual(item['last_message']['text'], 'x' * 100 + '...')
+        self.assertEqual(item['unread_count'], 2)
+
+        self.client.post(f'/api/v1/conversations/{self.conversation.id}/mark_as_read/')
+        response = self.client.get('/api/v1/conversations/')
+        item = response.data['results'][0] if 'results' in response.data else response.data[0]
+        self.assertEqual(item['unread_count'], 0)
+
+    def test_list_query_count_does_not_depend_on_message_count(self):
+        self.send(self.owner, 'first')
+        self.client.force_authenticate(user=self.sitter_user)
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get('/api/v1/conversations/')
+
+        for index in range(10):
+            self.send(self.owner, f'message {index}')
+        self.client.force_authenticate(user=self.sitter_user)
+        with CaptureQueriesContext(connection) as after:
+            self.client.get('/api/v1/conversations/')
+
+        self.assertEqual(len(after), len(baseline))
+        self.assertFalse(any('sitters_message' in query['sql'] for query in after.captured_queries))
+
+    def test_message_history_is_keyset_paginated(self):
+        sent_ids = [self.send(self.owner, f'message {index}')['id'] for index in range(5)]
+
+        self.client.force_authenticate(user=self.sitter_user)
+        url = f'/api/v1/conversations/{self.conversation.id}/messages/'
+        first_page = self.client.get(url, {'limit': 3}).data
+        second_page = self.client.get(url, {'limit': 3, 'before': first_page['next_cursor']}).data
+
+        self.assertEqual([message['id'] for message in first_page['results']], sent_ids[2:])
+        self.assertEqual([message['id'] for message in second_page['results']], sent_ids[:2])
+        self.assertIsNone(second_page['next_cursor'])
+        self.assertEqual(second_page['results'][0]['text'], 'message 0')
+
+
+class MessageEncryptionTestCase(SimpleTestCase):
+    """
+    Тесты ленивого вывода ключа и пакетной расшифровки сообщений.
+    """
+
+    @override_settings(SECRET_KEY='lazy-derivation-test-key')
+    def test_key_is_derived_lazily_once_per_process(self):
+        encryption._fernets.pop('lazy-derivation-test-key', None)
+
+        first = encryption.MessageEncryption()
+        self.assertNotIn('lazy-derivation-test-key', encryption._fernets)
+
+        encrypted = first.encrypt('hello')
+        second = encryption.MessageEncryption()
+
+        self.assertIs(first.fernet, second.fernet)
+        self.assertEqual(second.decrypt(encrypted), 'hello')
+
+    def test_decrypt_many_round_trip(self):
+        texts = ['first', '', 'третье сообщение']
+        encrypted = [encryption.message_encryption.encrypt(text) for text in texts]
+
+        self.assertEqual(encrypted[1], '')
+        self.assertEqual(encryption.message_encryption.decrypt_many(encrypted), texts)
+
+    def test_decrypt_many_fallback_keeps_legacy_plain_text(self):
+        encrypted = encryption.message_encryption.encrypt('secret')
+
+        self.assertEqual(
+            encryption.message_encryption.decrypt_many([encrypted, 'legacy text'], fallback_to_input=True),
+            ['secret', 'legacy text'],
+        )
+        with self.assertRaises(Exception):
+            encryption.message_encryption.decrypt_many(['legacy text'])
+
+
 def datetime_for_date(target_date):
     """
     Возвращает datetime конца дня для даты.
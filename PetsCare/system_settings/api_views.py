@@ -22,6 +22,7 @@ from django.utils.decorators import method_decorator
 
 # from users.permissions import IsSystemAdmin  # Заменено на стандартные permissions
 from audit.models import UserAction
+from utils.caching import CacheMetrics
 from .models import PlatformBrandingSettings
 from .serializers import SupportRequestCreateSerializer
 
@@ -282,7 +283,9 @@ class SystemHealthAPIView(APIView):
                     'cache': self._check_cache(),
                     'storage': self._check_storage(),
                     'external_services': self._check_external_services()
-                }
+                },
+                # Счётчики hit/miss/latency кешей подсистем в этом процессе
+                'cache_metrics': CacheMetrics.snapshot(),
             }
 
             # Определяем общий статус
@@ -0,0 +1,58 @@
+"""
+Management команда для генерации производных (thumbnails) уже загруженных изображений.
+
+Использование:
+    python manage.py backfill_image_derivatives
+    python manage.py backfill_image_derivatives --model pets.Pet --async
+
+Обходит все модели, зарегистрированные через register_image_derivatives
+(фото питомцев, аватары, логотипы организаций и бренда). Существующие
+производные повторно не кодируются, манифест в кеше обновляется.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.image_derivatives import (
+    REGISTERED_IMAGE_FIELDS,
+    ImageDerivativeService,
+    generate_image_derivatives_task,
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate image derivatives for existing pet photos, avatars and logos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', help='Only this model, e.g. pets.Pet')
+        parser.add_argument('--async', action='store_true', dest='use_celery', help='Enqueue Celery tasks instead of generating inline')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        registered = {model._meta.label: (model, fields) for model, fields in REGISTERED_IMAGE_FIELDS.items()}
+        if options['model']:
+            if options['model'] not in registered:
+                raise CommandError(f"Model {options['model']} has no registered image fields: {', '.join(sorted(registered))}")
+            registered = {options['model']: registered[options['model']]}
+
+        service = ImageDerivativeService()
+        for label, (model, fields) in registered.items():
+            for field, profile in fields.items():
+                names = (
+                    model._default_manager.exclude(**{f'{field}__isnull': True})
+                    .exclude(**{field: ''})
+                    .values_list(field, flat=True)
+                    .iterator(chunk_size=options['batch_size'])
+                )
+                processed = failed = 0
+                for name in names:
+                    if options['use_celery']:
+                        generate_image_derivatives_task.delay(name, profile)
+                    else:
+                        try:
+                            if service.generate(name, profile) is None:
+                                failed += 1
+                        except Exception as e:
+                            failed += 1
+                            self.stderr.write(f'{label}.{field} {name}: {e}')
+                    processed += 1
+                self.stdout.write(f'{label}.{field}: {processed} images, {failed} failed')
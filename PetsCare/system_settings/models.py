@@ -936,6 +936,8 @@ class PlatformBrandingSettings(models.Model):
 
     def as_public_dict(self, request=None):
         """Сериализует настройки бренда для публичного runtime-конфига фронтов."""
+        from utils.image_derivatives import build_srcset
+
         domains = [
             domain.as_public_dict()
             for domain in self.domains.filter(is_active=True).order_by('app_type', '-is_primary', 'display_order', 'domain')
@@ -952,6 +954,8 @@ class PlatformBrandingSettings(models.Model):
             'contact_path': self.contact_path,
             'logo_url': self._build_media_url(request, 'logo'),
             'favicon_url': self._build_media_url(request, 'favicon'),
+            'logo_srcset': build_srcset(self.logo, 'logo', request),
+            'favicon_srcset': build_srcset(self.favicon, 'favicon', request),
             'domains': domains,
             'version': self.version,
         }
@@ -12,6 +12,8 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
 
+from utils.image_derivatives import register_image_derivatives
+
 from .models import (
     SecuritySettings,
     BlockingScheduleSettings,
@@ -102,3 +104,7 @@ def clear_platform_branding_cache(sender, instance, **kwargs):
         logger.info("Platform branding settings cache cleared")
     except Exception as e:
         logger.error(f"Failed to clear platform branding cache: {e}")
+
+
+# Производные логотипа и favicon бренда генерируются при загрузке.
+register_image_derivatives(PlatformBrandingSettings, {'logo': 'logo', 'favicon': 'favicon'})
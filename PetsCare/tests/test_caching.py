@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from utils.caching import CacheMetrics, get_namespace_cache
+
+
+class NamespaceCacheTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        CacheMetrics.reset()
+
+    def test_namespaces_have_own_prefix_and_timeout(self):
+        routing_cache = get_namespace_cache('routing')
+        vies_cache = get_namespace_cache('vies')
+
+        routing_cache.set('key', 'routing')
+        vies_cache.set('key', 'vies')
+
+        self.assertEqual(routing_cache.get('key'), 'routing')
+        self.assertEqual(vies_cache.get('key'), 'vies')
+        self.assertEqual(routing_cache.default_timeout, settings.CACHE_NAMESPACES['routing']['TIMEOUT'])
+
+    def test_metrics_count_hits_misses_and_writes(self):
+        geo_cache = get_namespace_cache('geolocation')
+
+        geo_cache.get('missing')
+        geo_cache.set('present', 0)
+        geo_cache.get('present')
+        geo_cache.get_many(['present', 'absent'])
+
+        metrics = CacheMetrics.snapshot()['geolocation']
+        self.assertEqual(metrics['hits'], 2)
+        self.assertEqual(metrics['misses'], 2)
+        self.assertEqual(metrics['writes'], 1)
+        self.assertEqual(metrics['hit_ratio'], 0.5)
+        self.assertIsNotNone(metrics['avg_latency_ms'])
+
+    def test_falsy_cached_value_counts_as_hit(self):
+        rate_cache = get_namespace_cache('rate_limit')
+        rate_cache.set('counter', 0)
+
+        self.assertEqual(rate_cache.get('counter', 5), 0)
+        self.assertEqual(CacheMetrics.snapshot()['rate_limit']['hits'], 1)
+
+    def test_unknown_namespace_falls_back_to_default_cache(self):
+        adhoc_cache = get_namespace_cache('adhoc')
+        adhoc_cache.set('key', 'value')
+
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertIn('adhoc', CacheMetrics.snapshot())
+
+    def test_default_clear_resets_namespaces_in_local_fallback(self):
+        if settings.REDIS_CACHE_URL:
+            self.skipTest('Проверяется только in-process fallback')
+        routing_cache = get_namespace_cache('routing')
+        routing_cache.set('key', 'value')
+
+        cache.clear()
+
+        self.assertIsNone(routing_cache.get('key'))
+
+    def test_local_fallback_is_not_shared(self):
+        self.assertEqual(get_namespace_cache('routing').is_shared, bool(settings.REDIS_CACHE_URL))
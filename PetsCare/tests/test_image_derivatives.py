@@ -0,0 +1,126 @@
+import io
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase
+from PIL import Image
+from rest_framework import serializers
+
+from utils import image_derivatives
+from utils.image_derivatives import (
+    ImageDerivativeService,
+    ImageDerivativesField,
+    build_srcset,
+    derivative_name,
+    generate_image_derivatives_task,
+)
+
+
+class StoredImage:
+    """Минимальный FieldFile: имя, storage и URL сохранённого файла."""
+
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+        self.url = storage.url(name)
+
+    def __bool__(self):
+        return True
+
+
+def save_image(storage, name, size, mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 100, 50, 128) if mode == 'RGBA' else (200, 100, 50)).save(
+        buffer, format='PNG' if mode == 'RGBA' else 'JPEG'
+    )
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+class ImageDerivativeServiceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.storage = InMemoryStorage(base_url='/media/')
+        self.service = ImageDerivativeService(self.storage)
+
+    def test_generates_webp_and_jpeg_without_upscaling(self):
+        name = save_image(self.storage, 'pets/2026/01/01/cat.jpg', (700, 350))
+
+        manifest = self.service.generate(name, 'pet_photo')
+
+        self.assertEqual(manifest['widths'], [160, 320, 640])
+        self.assertEqual(manifest['fallback_format'], 'jpg')
+        with self.storage.open(derivative_name(name, 320, 'webp')) as derived:
+            image = Image.open(derived)
+            self.assertEqual((image.format, image.size), ('WEBP', (320, 160)))
+        self.assertTrue(self.storage.exists(derivative_name(name, 640, 'jpg')))
+        self.assertFalse(self.storage.exists(derivative_name(name, 1280, 'webp')))
+
+    def test_transparent_logo_keeps_png_fallback(self):
+        name = save_image(self.storage, 'providers/logos/logo.png', (300, 300), mode='RGBA')
+
+        manifest = self.service.generate(name, 'logo')
+
+        self.assertEqual(manifest['fallback_format'], 'png')
+        self.assertEqual(manifest['fallback'][128], derivative_name(name, 128, 'png'))
+
+    def test_srcset_falls_back_to_original_and_schedules_generation_once(self):
+        name = save_image(self.storage, 'users/avatar.jpg', (400, 400))
+        stored = StoredImage(self.storage, name)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            first = build_srcset(stored, 'avatar')
+            build_srcset(stored, 'avatar')
+
+        self.assertEqual(first, {'original': '/media/users/avatar.jpg', 'srcset': '', 'fallback_srcset': ''})
+        self.assertEqual(len(callbacks), 1)
+
+        self.service.generate(name, 'avatar')
+        srcset = build_srcset(stored, 'avatar')
+        self.assertEqual(
+            srcset['srcset'],
+            '/media/derivatives/users/avatar/w48.webp 48w, '
+            '/media/derivatives/users/avatar/w96.webp 96w, '
+            '/media/derivatives/users/avatar/w192.webp 192w',
+        )
+
+    def test_failed_generation_is_not_rescheduled_on_render(self):
+        name = save_image(self.storage, 'users/broken.jpg', (400, 400))
+        stored = StoredImage(self.storage, name)
+
+        with mock.patch.object(ImageDerivativeService, 'generate', side_effect=OSError('cannot identify image')):
+            generate_image_derivatives_task(name, 'avatar')
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            result = build_srcset(stored, 'avatar')
+
+        self.assertEqual(result['srcset'], '')
+        self.assertEqual(callbacks, [])
+
+    def test_list_serializer_reads_page_manifests_in_one_round_trip(self):
+        class AvatarSerializer(serializers.Serializer):
+            photo = ImageDerivativesField(profile='avatar')
+
+        owners = []
+        for index in range(3):
+            name = save_image(self.storage, f'users/avatar{index}.jpg', (200, 200))
+            self.service.generate(name, 'avatar')
+            owners.append(SimpleNamespace(photo=StoredImage(self.storage, name)))
+
+        with mock.patch.object(image_derivatives.cache, 'get', side_effect=AssertionError), \
+                mock.patch.object(image_derivatives.cache, 'get_many', wraps=image_derivatives.cache.get_many) as get_many:
+            data = AvatarSerializer(owners, many=True).data
+
+        self.assertEqual(get_many.call_count, 1)
+        self.assertTrue(all(item['photo']['srcset'] for item in data))
+
+    def test_delete_removes_derivatives_and_manifest(self):
+        name = save_image(self.storage, 'pets/dog.jpg', (500, 500))
+        self.service.generate(name, 'pet_photo')
+
+        self.service.delete(name, 'pet_photo')
+
+        self.assertFalse(self.storage.exists(derivative_name(name, 160, 'webp')))
+        self.assertIsNone(self.service.get_manifest(name))
@@ -0,0 +1,304 @@
+"""
+Буферизация счетчиков активности пользователей (UserActivity).
+
+Запрос лишь увеличивает счетчик в буфере (O(1), без обращения к БД);
+накопленные приращения периодически сбрасываются в БД Celery-задачей
+flush_user_activity_buffer одним проходом: один INSERT ... ON CONFLICT DO UPDATE
+на пачку создает недостающие строки и атомарно увеличивает счетчики.
+
+Буферы:
+- RedisActivityBuffer (USER_ACTIVITY_BUFFER_URL задан) — общий для всех воркеров:
+  hash на пару пользователь/день, HINCRBY, множество ключей к сбросу;
+- LocalActivityBuffer — словарь в памяти процесса (разработка, тесты);
+  процесс сбрасывает его сам раз в USER_ACTIVITY_FLUSH_INTERVAL_SECONDS.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone as dt_timezone
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import UserActivity
+
+logger = logging.getLogger(__name__)
+
+# Тип действия → счетчик UserActivity (помимо общего actions_count).
+ACTION_FIELDS = {
+    'login': 'login_count',
+    'page_view': 'page_views',
+    'search': 'searches_count',
+    'booking': 'bookings_count',
+    'review': 'reviews_count',
+    'message': 'messages_count',
+}
+COUNTER_FIELDS = tuple(ACTION_FIELDS.values()) + ('actions_count', 'session_duration')
+
+REDIS_KEY_PREFIX = 'user_activity:'
+REDIS_PENDING_KEY = 'user_activity:pending'
+FLUSH_BATCH_SIZE = 1000
+UPSERT_BATCH_SIZE = 500
+ACTIVITY_CACHE_TIMEOUT = 3600
+
+
+@dataclass
+class ActivityDelta:
+    """Приращения счетчиков одного пользователя за день."""
+
+    user_id: int
+    date: date
+    counters: dict = field(default_factory=dict)
+    first_activity: Optional[datetime] = None
+    last_activity: Optional[datetime] = None
+
+    def merge(self, counters: dict, first_activity: datetime, last_activity: datetime) -> None:
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.first_activity is None or first_activity < self.first_activity:
+            self.first_activity = first_activity
+        if self.last_activity is None or last_activity > self.last_activity:
+            self.last_activity = last_activity
+
+
+def activity_counters(action_type: str, duration: int = 0) -> dict:
+    counters = {'actions_count': 1}
+    if action_type in ACTION_FIELDS:
+        counters[ACTION_FIELDS[action_type]] = 1
+    if duration:
+        counters['session_duration'] = duration
+    return counters
+
+
+class LocalActivityBuffer:
+    """Буфер в памяти процесса."""
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._deltas: dict = {}
+        self._last_flush = time.monotonic()
+
+    def increment(self, user_id: int, day: date, counters: dict, at: datetime) -> None:
+        with self._lock:
+            delta = self._deltas.get((user_id, day))
+            if delta is None:
+                delta = self._deltas[(user_id, day)] = ActivityDelta(user_id, day)
+            delta.merge(counters, at, at)
+
+    def restore(self, deltas: list[ActivityDelta]) -> None:
+        for delta in deltas:
+            with self._lock:
+                current = self._deltas.setdefault((delta.user_id, delta.date), ActivityDelta(delta.user_id, delta.date))
+                current.merge(delta.counters, delta.first_activity, delta.last_activity)
+
+    def drain(self) -> list[ActivityDelta]:
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+            self._last_flush = time.monotonic()
+        return list(deltas.values())
+
+    def flush_due(self) -> bool:
+        return bool(self._deltas) and (
+            len(self._deltas) >= FLUSH_BATCH_SIZE
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+
+class RedisActivityBuffer:
+    """Буфер в Redis, общий для воркеров gunicorn и Celery."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def increment(self, user_id: int, day: date, counters: dict, at: datetime) -> None:
+        self._write(user_id, day, counters, at.timestamp(), at.timestamp())
+
+    def restore(self, deltas: list[ActivityDelta]) -> None:
+        for delta in deltas:
+            self._write(
+                delta.user_id, delta.date, delta.counters,
+                delta.first_activity.timestamp(), delta.last_activity.timestamp(),
+            )
+
+    def _write(self, user_id: int, day: date, counters: dict, first_ts: float, last_ts: float) -> None:
+        key = f'{REDIS_KEY_PREFIX}{day.isoformat()}:{user_id}'
+        # MULTI/EXEC: drain не увидит hash со счетчиками, но без отметок времени.
+        pipe = self.client.pipeline(transaction=True)
+        for name, value in counters.items():
+            pipe.hincrby(key, name, value)
+        # first_activity пишется только первым вызовом, last_activity — последним.
+        pipe.hsetnx(key, 'first_activity', first_ts)
+        pipe.hset(key, 'last_activity', last_ts)
+        pipe.sadd(REDIS_PENDING_KEY, key)
+        pipe.execute()
+
+    def drain(self) -> list[ActivityDelta]:
+        keys = self.client.spop(REDIS_PENDING_KEY, FLUSH_BATCH_SIZE) or []
+        if not keys:
+            return []
+        pipe = self.client.pipeline(transaction=True)
+        for key in keys:
+            pipe.hgetall(key)
+            pipe.delete(key)
+        results = pipe.execute()[::2]
+
+        deltas = []
+        for key, values in zip(keys, results):
+            if not values:
+                continue
+            _, day, user_id = key.decode().rsplit(':', 2)
+            values = {name.decode(): value.decode() for name, value in values.items()}
+            delta = ActivityDelta(int(user_id), date.fromisoformat(day))
+            delta.counters = {name: int(values[name]) for name in COUNTER_FIELDS if name in values}
+            # Ключ мог быть записан старой версией без MULTI: недостающая отметка
+            # берется из второй или из текущего времени.
+            first_ts = values.get('first_activity') or values.get('last_activity')
+            last_ts = values.get('last_activity') or first_ts
+            now_ts = timezone.now().timestamp()
+            delta.first_activity = datetime.fromtimestamp(float(first_ts or now_ts), tz=dt_timezone.utc)
+            delta.last_activity = datetime.fromtimestamp(float(last_ts or now_ts), tz=dt_timezone.utc)
+            deltas.append(delta)
+        return deltas
+
+    def flush_due(self) -> bool:
+        # Сбрасывает Celery beat, запрос никогда не пишет в БД.
+        return False
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_activity_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                url = getattr(settings, 'USER_ACTIVITY_BUFFER_URL', '')
+                if url:
+                    _buffer = RedisActivityBuffer(url)
+                else:
+                    _buffer = LocalActivityBuffer(getattr(settings, 'USER_ACTIVITY_FLUSH_INTERVAL_SECONDS', 60))
+    return _buffer
+
+
+def set_activity_buffer(buffer) -> None:
+    """Подмена буфера (тесты)."""
+    global _buffer
+    _buffer = buffer
+
+
+def record_activity(user_id: int, action_type: str = 'page_view', duration: int = 0) -> None:
+    """Учитывает действие пользователя в буфере."""
+    now = timezone.now()
+    buffer = get_activity_buffer()
+    buffer.increment(user_id, timezone.localdate(now), activity_counters(action_type, duration), now)
+    if buffer.flush_due():
+        try:
+            flush_activity_buffer(buffer)
+        except Exception as e:
+            logger.error(f"User activity flush failed: {e}")
+
+
+def flush_activity_buffer(buffer=None) -> int:
+    """
+    Сбрасывает накопленные приращения в UserActivity.
+    Возвращает количество обновленных строк. При ошибке БД приращения
+    возвращаются в буфер.
+    """
+    buffer = buffer or get_activity_buffer()
+    total = 0
+    while True:
+        deltas = buffer.drain()
+        if not deltas:
+            return total
+        try:
+            _apply_deltas(deltas)
+        except Exception:
+            buffer.restore(deltas)
+            raise
+        total += len(deltas)
+        if len(deltas) < FLUSH_BATCH_SIZE:
+            return total
+
+
+def _apply_deltas(deltas: list[ActivityDelta]) -> None:
+    # Пользователи могли быть удалены, пока приращения лежали в буфере.
+    existing = set(
+        get_user_model().objects.filter(pk__in={delta.user_id for delta in deltas}).values_list('pk', flat=True)
+    )
+    # Один порядок блокировок строк для параллельных сбросов.
+    deltas = sorted((delta for delta in deltas if delta.user_id in existing), key=lambda d: (d.user_id, d.date))
+    if not deltas:
+        return
+
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(deltas), UPSERT_BATCH_SIZE):
+            batch = deltas[start:start + UPSERT_BATCH_SIZE]
+            params = []
+            for delta in batch:
+                params.extend([delta.user_id, delta.date])
+                params.extend(delta.counters.get(name, 0) for name in COUNTER_FIELDS)
+                params.extend([delta.first_activity, delta.last_activity, now, now])
+            cursor.execute(_upsert_sql(len(batch)), params)
+
+    _update_activity_cache(deltas)
+
+
+def _upsert_sql(rows: int) -> str:
+    """
+    INSERT ... ON CONFLICT (user_id, date) DO UPDATE: недостающие строки
+    создаются, существующие счетчики увеличиваются на приращения — один
+    запрос на пачку вместо UPDATE на каждую пару пользователь/день.
+    """
+    columns = ('user_id', 'date') + COUNTER_FIELDS + ('first_activity', 'last_activity', 'created_at', 'updated_at')
+    row = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    assignments = [f'{name} = t.{name} + EXCLUDED.{name}' for name in COUNTER_FIELDS] + [
+        'first_activity = LEAST(t.first_activity, EXCLUDED.first_activity)',
+        'last_activity = GREATEST(t.last_activity, EXCLUDED.last_activity)',
+        'updated_at = EXCLUDED.updated_at',
+    ]
+    return (
+        f'INSERT INTO {UserActivity._meta.db_table} AS t ({", ".join(columns)}) '
+        f'VALUES {", ".join([row] * rows)} '
+        f'ON CONFLICT (user_id, date) DO UPDATE SET {", ".join(assignments)}'
+    )
+
+
+def _update_activity_cache(deltas: list[ActivityDelta]) -> None:
+    """Кэш последней активности пользователей (ключ user_activity_<id>)."""
+    latest = {}
+    for delta in deltas:
+        if delta.user_id not in latest or delta.date > latest[delta.user_id]:
+            latest[delta.user_id] = delta.date
+    rows = UserActivity.objects.filter(
+        user_id__in=latest.keys(), date__in=set(latest.values()),
+    ).values('user_id', 'date', 'last_activity', 'actions_count', 'session_duration')
+    cache.set_many({
+        f"user_activity_{row['user_id']}": {
+            'last_activity': row['last_activity'],
+            'total_actions': row['actions_count'],
+            'session_duration': row['session_duration'],
+        }
+        for row in rows
+        if latest[row['user_id']] == row['date']
+    }, ACTIVITY_CACHE_TIMEOUT)
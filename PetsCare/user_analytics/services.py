@@ -5,6 +5,7 @@ from django.core.cache import cache
 from django.db.models import Count, Avg, Sum, Q
 from datetime import timedelta, date
 from .models import UserGrowth, UserActivity, UserConversion, UserMetrics
+from .activity_buffer import record_activity
 
 User = get_user_model()
 
@@ -83,50 +84,12 @@ class UserAnalyticsService:
     
     @staticmethod
     def track_user_activity(user, action_type='page_view', duration=0):
-        """Отслеживание активности пользователя"""
-        today = timezone.now().date()
-        
-        activity, created = UserActivity.objects.get_or_create(
-            user=user,
-            date=today,
-            defaults={
-                'login_count': 0,
-                'session_duration': 0,
-                'page_views': 0,
-                'actions_count': 0,
-                'searches_count': 0,
-                'bookings_count': 0,
-                'reviews_count': 0,
-                'messages_count': 0,
-                'first_activity': timezone.now(),
-                'last_activity': timezone.now(),
-            }
-        )
-        
-        # Обновляем метрики в зависимости от типа действия
-        if action_type == 'login':
-            activity.login_count += 1
-        elif action_type == 'page_view':
-            activity.page_views += 1
-        elif action_type == 'search':
-            activity.searches_count += 1
-        elif action_type == 'booking':
-            activity.bookings_count += 1
-        elif action_type == 'review':
-            activity.reviews_count += 1
-        elif action_type == 'message':
-            activity.messages_count += 1
-        
-        # Обновляем общие метрики
-        activity.actions_count += 1
-        activity.session_duration += duration
-        activity.last_activity = timezone.now()
-        
-        if created:
-            activity.first_activity = timezone.now()
-        
-        activity.save()
-        return activity
+        """
+        Отслеживание активности пользователя.
+        Счетчик увеличивается в буфере; в UserActivity приращения попадают
+        при сбросе (задача flush_user_activity_buffer).
+        """
+        record_activity(user.pk, action_type, duration)
     
     @staticmethod
     def track_user_conversion(user, stage, source=''):
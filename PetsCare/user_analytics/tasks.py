@@ -0,0 +1,20 @@
+"""
+Задачи Celery для аналитики пользователей.
+"""
+
+import logging
+
+from celery import shared_task
+
+from .activity_buffer import flush_activity_buffer
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_user_activity_buffer():
+    """Сбрасывает буфер счетчиков активности в UserActivity."""
+    flushed = flush_activity_buffer()
+    if flushed:
+        logger.info(f"Flushed user activity for {flushed} user-days")
+    return flushed
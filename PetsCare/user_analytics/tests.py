@@ -1,3 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-# Create your tests here.
+from .activity_buffer import ActivityDelta, LocalActivityBuffer, flush_activity_buffer, set_activity_buffer
+from .models import UserActivity
+from .services import user_analytics_service
+
+User = get_user_model()
+
+
+class UserActivityBufferTestCase(TestCase):
+    def setUp(self):
+        self.buffer = LocalActivityBuffer(flush_interval=3600)
+        set_activity_buffer(self.buffer)
+        self.addCleanup(set_activity_buffer, None)
+        self.user = User.objects.create_user(email='activity@example.com', password='password')
+
+    def test_tracking_is_buffered_until_flush(self):
+        user_analytics_service.track_user_activity(self.user, 'page_view')
+        user_analytics_service.track_user_activity(self.user, 'search', duration=30)
+
+        self.assertFalse(UserActivity.objects.filter(user=self.user).exists())
+
+        self.assertEqual(flush_activity_buffer(self.buffer), 1)
+        activity = UserActivity.objects.get(user=self.user, date=timezone.localdate())
+        # Регистрация учитывается как вход.
+        self.assertEqual(
+            (activity.login_count, activity.page_views, activity.searches_count, activity.actions_count),
+            (1, 1, 1, 3),
+        )
+        self.assertEqual(activity.session_duration, 30)
+        self.assertLessEqual(activity.first_activity, activity.last_activity)
+
+    def test_flush_increments_existing_row(self):
+        user_analytics_service.track_user_activity(self.user, 'message')
+        flush_activity_buffer(self.buffer)
+        user_analytics_service.track_user_activity(self.user, 'message')
+        user_analytics_service.track_user_activity(self.user, 'booking')
+
+        self.assertEqual(flush_activity_buffer(self.buffer), 1)
+
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertEqual((activity.messages_count, activity.bookings_count, activity.actions_count), (2, 1, 4))
+        self.assertEqual(flush_activity_buffer(self.buffer), 0)
+
+    def test_flush_query_count_does_not_grow_with_rows(self):
+        users = [
+            User.objects.create_user(email=f'activity{index}@example.com', password='password')
+            for index in range(5)
+        ]
+        flush_activity_buffer(self.buffer)
+        before = dict(UserActivity.objects.filter(user__in=users).values_list('user_id', 'actions_count'))
+
+        def flush_for(batch):
+            now = timezone.now()
+            self.buffer.restore([
+                ActivityDelta(user.id, timezone.localdate(now), {'actions_count': 1}, now, now)
+                for user in batch
+            ])
+            with CaptureQueriesContext(connection) as queries:
+                flush_activity_buffer(self.buffer)
+            return len(queries)
+
+        self.assertEqual(flush_for(users[:1]), flush_for(users))
+        after = dict(UserActivity.objects.filter(user__in=users).values_list('user_id', 'actions_count'))
+        self.assertEqual(
+            {user_id: count - before.get(user_id, 0) for user_id, count in after.items()},
+            {user.id: 2 if user == users[0] else 1 for user in users},
+        )
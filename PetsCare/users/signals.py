@@ -16,12 +16,13 @@ from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from utils.image_derivatives import register_image_derivatives
 
 logger = logging.getLogger(__name__)
 
 # Проверяем, что Django полностью инициализирован
 if settings.configured:
-    from .models import UserType, ProviderForm
+    from .models import UserType, ProviderForm, User
     
     # Все сигналы должны быть внутри этой проверки
 
@@ -803,3 +804,7 @@ def _send_registration_emails(provider, provider_form, admin_user=None):
             template_name = TEMPLATES_ACTIVATED[role]
             recipient = {'email': email_val, 'role': role, 'user': user_obj, 'display_name': name}
             _send_one(recipient, role, template_name, subject)
+
+
+# Производные аватара пользователя генерируются при загрузке.
+register_image_derivatives(User, {'profile_picture': 'avatar'})
@@ -0,0 +1,169 @@
+"""
+Именованные кеши подсистем с метриками.
+
+Каждая подсистема получает свой alias из settings.CACHE_NAMESPACES
+(TTL и префикс ключей задаются там же) через get_namespace_cache().
+Возвращаемая обёртка считает попадания, промахи, записи и суммарную
+задержку операций по пространству имён; CacheMetrics.snapshot() отдаёт
+счётчики текущего процесса.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+_MISSING = object()
+
+
+class CacheMetrics:
+    """Потокобезопасные счётчики операций кеша по пространствам имён."""
+
+    _lock = threading.Lock()
+    _counters: dict[str, dict[str, float]] = defaultdict(
+        lambda: {'hits': 0, 'misses': 0, 'writes': 0, 'deletes': 0, 'errors': 0, 'latency_ms': 0.0, 'calls': 0}
+    )
+
+    @classmethod
+    def record(
+        cls,
+        namespace: str,
+        *,
+        latency_ms: float,
+        hits: int = 0,
+        misses: int = 0,
+        writes: int = 0,
+        deletes: int = 0,
+        errors: int = 0,
+    ) -> None:
+        with cls._lock:
+            counters = cls._counters[namespace]
+            counters['hits'] += hits
+            counters['misses'] += misses
+            counters['writes'] += writes
+            counters['deletes'] += deletes
+            counters['errors'] += errors
+            counters['latency_ms'] += latency_ms
+            counters['calls'] += 1
+
+    @classmethod
+    def snapshot(cls) -> dict[str, dict[str, float]]:
+        """Возвращает копию счётчиков с долей попаданий и средней задержкой."""
+        with cls._lock:
+            result = {}
+            for namespace, counters in cls._counters.items():
+                lookups = counters['hits'] + counters['misses']
+                result[namespace] = {
+                    **counters,
+                    'hit_ratio': round(counters['hits'] / lookups, 4) if lookups else None,
+                    'avg_latency_ms': round(counters['latency_ms'] / counters['calls'], 3) if counters['calls'] else None,
+                }
+            return result
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._counters.clear()
+
+
+class NamespacedCache:
+    """
+    Обёртка над кешем Django с учётом метрик.
+
+    Backend берётся из django.core.cache.caches при каждом вызове, поэтому
+    обёртку можно хранить на уровне модуля (caches потоко-локален).
+    Прочие атрибуты проксируются в backend без учёта в метриках.
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+
+    @property
+    def backend(self):
+        # Alias без записи в CACHES (урезанные тестовые settings) падает на default,
+        # метрики всё равно ведутся по namespace.
+        alias = self.namespace if self.namespace in settings.CACHES else 'default'
+        return caches[alias]
+
+    @property
+    def is_shared(self) -> bool:
+        """
+        Общий ли кеш для процессов. LocMem (fallback без REDIS_CACHE_URL) живёт
+        в памяти процесса: записанные в него версии другие воркеры не видят.
+        """
+        return not isinstance(self.backend, (LocMemCache, DummyCache))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.backend, name)
+
+    def _call(self, method: str, *args, **kwargs) -> tuple[Any, float]:
+        """Вызывает метод backend и возвращает (результат, задержка в мс)."""
+        started = time.perf_counter()
+        try:
+            result = getattr(self.backend, method)(*args, **kwargs)
+        except Exception:
+            CacheMetrics.record(self.namespace, latency_ms=(time.perf_counter() - started) * 1000, errors=1)
+            raise
+        return result, (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _timeout_kwargs(timeout, version) -> dict[str, Any]:
+        kwargs = {'version': version}
+        if timeout is not _MISSING:
+            kwargs['timeout'] = timeout
+        return kwargs
+
+    def get(self, key, default=None, version=None):
+        value, latency_ms = self._call('get', key, _MISSING, version=version)
+        hit = value is not _MISSING
+        CacheMetrics.record(self.namespace, latency_ms=latency_ms, hits=int(hit), misses=int(not hit))
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values, latency_ms = self._call('get_many', keys, version=version)
+        CacheMetrics.record(self.namespace, latency_ms=latency_ms, hits=len(values), misses=len(keys) - len(values))
+        return values
+
+    def set(self, key, value, timeout=_MISSING, version=None):
+        result, latency_ms = self._call('set', key, value, **self._timeout_kwargs(timeout, version))
+        CacheMetrics.record(self.namespace, latency_ms=latency_ms, writes=1)
+        return result
+
+    def add(self, key, value, timeout=_MISSING, version=None):
+        result, latency_ms = self._call('add', key, value, **self._timeout_kwargs(timeout, version))
+        CacheMetrics.record(self.namespace, latency_ms=latency_ms, writes=int(bool(result)))
+        return result
+
+    def set_many(self, data, timeout=_MISSING, version=None):
+        result, latency_ms = self._call('set_many', data, **self._timeout_kwargs(timeout, version))
+        CacheMetrics.record(self.namespace, latency_ms=latency_ms, writes=len(data))
+        return result
+
+    def incr(self, key, delta=1, version=None):
+        result, latency_ms = self._call('incr', key, delta, version=version)
+        CacheMetrics.record(self.namespace, latency_ms=latency_ms, writes=1)
+        return result
+
+    def delete(self, key, version=None):
+        result, latency_ms = self._call('delete', key, version=version)
+        CacheMetrics.record(self.namespace, latency_ms=latency_ms, deletes=1)
+        return result
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        result, latency_ms = self._call('delete_many', keys, version=version)
+        CacheMetrics.record(self.namespace, latency_ms=latency_ms, deletes=len(keys))
+        return result
+
+
+def get_namespace_cache(namespace: str) -> NamespacedCache:
+    """Возвращает кеш пространства имён из settings.CACHE_NAMESPACES."""
+    return NamespacedCache(namespace)
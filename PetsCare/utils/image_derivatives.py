@@ -0,0 +1,290 @@
+"""
+Производные изображения (thumbnails) для фото питомцев, аватаров и логотипов.
+
+Оригинал хранится как загружен; для каждого профиля (IMAGE_DERIVATIVE_PROFILES)
+Celery-задача строит WebP и запасной JPEG (PNG для изображений с прозрачностью)
+фиксированной ширины рядом с оригиналом:
+
+    derivatives/<путь оригинала без расширения>/w<ширина>.<webp|jpg|png>
+
+Готовый набор (манифест) хранится в кеше 'image_derivatives'. Сериализаторы
+читают только кеш: если манифеста нет (новая загрузка, вытеснение из кеша),
+отдаётся оригинал, а генерация ставится в очередь один раз — недостающие
+производные создаются лениво, существующие файлы повторно не кодируются.
+Неудачная генерация (например, файл, который Pillow не декодирует) оставляет
+отметку pending на PENDING_TIMEOUT, чтобы рендер списков не ставил задачу снова.
+
+Для списков манифесты всей страницы читаются одним cache.get_many.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+from typing import Optional
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from rest_framework import serializers
+
+from utils.caching import get_namespace_cache
+
+logger = logging.getLogger(__name__)
+
+# Профиль → ширины производных в пикселях (без увеличения исходника).
+IMAGE_DERIVATIVE_PROFILES = getattr(settings, 'IMAGE_DERIVATIVE_PROFILES', {
+    'pet_photo': (160, 320, 640, 1280),
+    'avatar': (48, 96, 192),
+    'logo': (64, 128, 256, 512),
+    'favicon': (32, 64, 180),
+})
+DERIVATIVES_ROOT = 'derivatives'
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+# Пока генерация в очереди или недавно завершилась ошибкой, повторно её не ставим.
+PENDING_TIMEOUT = 10 * 60
+
+MANIFEST_KEY = 'manifest:{digest}'
+PENDING_KEY = 'pending:{digest}'
+
+cache = get_namespace_cache('image_derivatives')
+
+# Модель → {ImageField: профиль}; заполняется register_image_derivatives().
+REGISTERED_IMAGE_FIELDS: dict = {}
+
+
+def _digest(name: str) -> str:
+    return hashlib.sha1(name.encode('utf-8')).hexdigest()
+
+
+def derivative_name(name: str, width: int, extension: str) -> str:
+    stem, _ = os.path.splitext(name)
+    return f'{DERIVATIVES_ROOT}/{stem}/w{width}.{extension}'
+
+
+class ImageDerivativeService:
+    """Генерация, поиск и удаление производных одного оригинала."""
+
+    def __init__(self, storage=None):
+        self.storage = storage or default_storage
+
+    def get_manifest(self, name: str) -> Optional[dict]:
+        return cache.get(MANIFEST_KEY.format(digest=_digest(name)))
+
+    def get_manifests(self, names) -> dict[str, Optional[dict]]:
+        """Манифесты нескольких оригиналов одним cache.get_many; None — манифеста нет."""
+        keys = {name: MANIFEST_KEY.format(digest=_digest(name)) for name in names}
+        found = cache.get_many(keys.values()) if keys else {}
+        return {name: found.get(key) for name, key in keys.items()}
+
+    def schedule(self, name: str, profile: str, previous_name: Optional[str] = None) -> None:
+        """Ставит генерацию в очередь после коммита (не чаще раза в PENDING_TIMEOUT)."""
+        if not cache.add(PENDING_KEY.format(digest=_digest(name)), 1, PENDING_TIMEOUT):
+            return
+
+        def _enqueue():
+            try:
+                generate_image_derivatives_task.delay(name, profile, previous_name)
+            except Exception as e:
+                logger.error(f"Failed to enqueue image derivatives for {name}: {e}")
+                cache.delete(PENDING_KEY.format(digest=_digest(name)))
+
+        transaction.on_commit(_enqueue)
+
+    def generate(self, name: str, profile: str) -> Optional[dict]:
+        """
+        Создаёт недостающие производные и сохраняет манифест в кеш.
+        Возвращает манифест или None, если оригинал недоступен.
+        """
+        from PIL import Image, ImageOps
+
+        if not name or not self.storage.exists(name):
+            return None
+
+        with self.storage.open(name, 'rb') as original:
+            with Image.open(original) as source:
+                source.load()
+                image = ImageOps.exif_transpose(source)
+
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        fallback_format, fallback_extension = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+        widths = [width for width in IMAGE_DERIVATIVE_PROFILES[profile] if width < image.width]
+        if not widths:
+            widths = [image.width]
+
+        manifest = {'widths': widths, 'webp': {}, 'fallback': {}, 'fallback_format': fallback_extension}
+        for width in widths:
+            webp_name = derivative_name(name, width, 'webp')
+            fallback_name = derivative_name(name, width, fallback_extension)
+            if not (self.storage.exists(webp_name) and self.storage.exists(fallback_name)):
+                resized = image.resize(
+                    (width, max(1, round(image.height * width / image.width))),
+                    Image.Resampling.LANCZOS,
+                )
+                if not has_alpha and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')
+                self._save(webp_name, resized, 'WEBP', quality=WEBP_QUALITY, method=4)
+                if fallback_format == 'JPEG':
+                    self._save(fallback_name, resized, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+                else:
+                    self._save(fallback_name, resized, 'PNG', optimize=True)
+            manifest['webp'][width] = webp_name
+            manifest['fallback'][width] = fallback_name
+
+        cache.set(MANIFEST_KEY.format(digest=_digest(name)), manifest)
+        cache.delete(PENDING_KEY.format(digest=_digest(name)))
+        return manifest
+
+    def delete(self, name: str, profile: str) -> None:
+        """Удаляет производные замененного или удаленного оригинала."""
+        for width in IMAGE_DERIVATIVE_PROFILES[profile]:
+            for extension in ('webp', 'jpg', 'png'):
+                derived = derivative_name(name, width, extension)
+                if self.storage.exists(derived):
+                    self.storage.delete(derived)
+        cache.delete(MANIFEST_KEY.format(digest=_digest(name)))
+
+    def _save(self, name: str, image, image_format: str, **options) -> None:
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, **options)
+        if self.storage.exists(name):
+            self.storage.delete(name)
+        self.storage.save(name, ContentFile(buffer.getvalue()))
+
+
+@shared_task
+def generate_image_derivatives_task(name: str, profile: str, previous_name: Optional[str] = None):
+    """Celery-задача генерации производных загруженного изображения."""
+    service = ImageDerivativeService()
+    if previous_name:
+        service.delete(previous_name, profile)
+    try:
+        service.generate(name, profile)
+    except Exception as e:
+        # Отметка остаётся на PENDING_TIMEOUT: иначе каждый рендер ставил бы
+        # заведомо неудачную задачу снова.
+        cache.set(PENDING_KEY.format(digest=_digest(name)), 1, PENDING_TIMEOUT)
+        logger.warning(f"Image derivatives generation failed for {name}: {e}")
+
+
+def build_srcset(file_value, profile: str, request=None, manifests: Optional[dict] = None) -> Optional[dict]:
+    """
+    URL оригинала и srcset производных для <img>/<picture>.
+
+    Если производных ещё нет — только оригинал, генерация ставится в очередь.
+    manifests — заранее прочитанные манифесты страницы (ImageDerivativeService.get_manifests).
+    """
+    if not file_value:
+        return None
+
+    storage = file_value.storage
+
+    def absolute(url):
+        return request.build_absolute_uri(url) if request is not None else url
+
+    result = {'original': absolute(file_value.url), 'srcset': '', 'fallback_srcset': ''}
+    service = ImageDerivativeService(storage)
+    if manifests is not None and file_value.name in manifests:
+        manifest = manifests[file_value.name]
+    else:
+        manifest = service.get_manifest(file_value.name)
+    if manifest is None:
+        service.schedule(file_value.name, profile)
+        return result
+
+    result['srcset'] = ', '.join(
+        f"{absolute(storage.url(manifest['webp'][width]))} {width}w" for width in manifest['widths']
+    )
+    result['fallback_srcset'] = ', '.join(
+        f"{absolute(storage.url(manifest['fallback'][width]))} {width}w" for width in manifest['widths']
+    )
+    return result
+
+
+class ImageDerivativesField(serializers.Field):
+    """
+    Read-only поле сериализатора: srcset производных изображения.
+
+    Пример: photo_srcset = ImageDerivativesField(source='photo', profile='pet_photo')
+    """
+
+    def __init__(self, profile: str, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.profile = profile
+
+    def to_representation(self, value):
+        return build_srcset(value, self.profile, self.context.get('request'), self._page_manifests())
+
+    def _page_manifests(self) -> Optional[dict]:
+        """
+        Манифесты всех объектов списка одним cache.get_many, если поле
+        принадлежит элементу корневого ListSerializer; хранятся в контексте.
+        """
+        root = self.root
+        if not isinstance(root, serializers.ListSerializer) or self.parent is not root.child or root.instance is None:
+            return None
+        context_key = f'_image_manifests:{self.field_name}'
+        manifests = self.context.get(context_key)
+        if manifests is None:
+            names = set()
+            for instance in root.instance:
+                try:
+                    name = _file_name(self.get_attribute(instance))
+                except Exception:
+                    continue
+                if name:
+                    names.add(name)
+            manifests = ImageDerivativeService().get_manifests(names)
+            self.context[context_key] = manifests
+        return manifests
+
+
+def _file_name(value) -> Optional[str]:
+    """Имя файла из FieldFile или строки, хранимой дескриптором поля."""
+    return getattr(value, 'name', value) or None
+
+
+def register_image_derivatives(model, fields: dict[str, str]) -> None:
+    """
+    Подключает генерацию производных при загрузке файлов модели.
+
+    fields — имя ImageField → профиль. Имя файла при загрузке из БД
+    запоминается в post_init, поэтому смена файла определяется без запроса.
+    """
+    def remember_image_names(sender, instance, **kwargs):
+        # Отложенные поля (only/defer) не читаем, чтобы не вызвать запрос.
+        instance._image_derivative_names = {
+            field: _file_name(instance.__dict__[field])
+            for field in fields
+            if field in instance.__dict__
+        }
+
+    def schedule_image_derivatives(sender, instance, created=False, **kwargs):
+        previous = getattr(instance, '_image_derivative_names', {})
+        service = ImageDerivativeService()
+        for field, profile in fields.items():
+            if not created and field not in previous:
+                continue
+            current_name = _file_name(getattr(instance, field))
+            previous_name = None if created else previous[field]
+            if current_name == previous_name:
+                continue
+            if current_name:
+                service.schedule(current_name, profile, previous_name)
+            elif previous_name:
+                transaction.on_commit(
+                    lambda name=previous_name, profile=profile: ImageDerivativeService().delete(name, profile)
+                )
+        remember_image_names(sender, instance)
+
+    REGISTERED_IMAGE_FIELDS[model] = fields
+    uid = f'image_derivatives:{model._meta.label}'
+    post_init.connect(remember_image_names, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(schedule_image_derivatives, sender=model, weak=False, dispatch_uid=uid)